@@ -0,0 +1,322 @@
+"""
+Exportação analítica de serviços em ficheiros colunares (Parquet / Arrow IPC).
+
+A equipa de BI reconstruía os relatórios a partir do JSON de
+`listar_servicos`. Esta exportação escreve uma cópia compacta e rápida de
+ler, fora da base de dados transaccional:
+
+    <destino>/<tabela>/mes=AAAA-MM/<tabela>-<AAAAMMDDTHHMMSS>-<id>.parquet
+
+- uma partição por mês de `data_servico` (layout "hive", lido directamente
+  por pyarrow.dataset, DuckDB, Spark, ...), com grupos de linhas de
+  ANALYTICS_ROW_GROUP_SIZE;
+- cada execução só acrescenta as linhas criadas ou alteradas desde a
+  anterior (`data_actualizacao`, ou `data_criacao` para linhas nunca
+  alteradas). Uma linha alterada volta a aparecer: a versão actual de
+  cada `id` é a de `exportado_em` mais recente;
+- as marcas de água ficam em `<destino>/_marcas.json` e só são gravadas
+  depois de todos os ficheiros da execução estarem completos.
+
+As tabelas são lidas por reflexão (servicos e, se existirem, as tabelas
+dos módulos Aqua e Verde), com o nome do cliente. O pyarrow é uma
+dependência opcional, só necessária para esta exportação.
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import MetaData, Table, and_, func, inspect, or_, select
+
+from .replit_config import config
+
+FORMATOS = {"parquet": ".parquet", "arrow": ".arrow"}
+TABELAS = ("servicos", "servicos_piscina", "servicos_jardim")
+FICHEIRO_MARCAS = "_marcas.json"
+# Colunas que datam a última alteração, por ordem de preferência
+COLUNAS_ALTERACAO = ("data_actualizacao", "data_criacao")
+# Janela relida em cada execução: cobre a resolução do relógio da base de
+# dados (segundos no SQLite) e transacções confirmadas com a mesma marca
+MARGEM_MARCA = timedelta(seconds=2)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("A exportação analítica requer o pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _tipo_arrow(pa, coluna):
+    try:
+        tipo_python = coluna.type.python_type
+    except NotImplementedError:
+        return pa.string()
+    if tipo_python is bool:
+        return pa.bool_()
+    if tipo_python is int:
+        return pa.int64()
+    if tipo_python is float:
+        return pa.float64()
+    if tipo_python is datetime:
+        return pa.timestamp("us", tz="UTC")
+    if tipo_python is date:
+        return pa.date32()
+    return pa.string()
+
+
+class MarcaAgua:
+    """
+    Posição da última exportação de uma tabela.
+
+    - **alterado_em**: maior data de alteração exportada
+    - **recentes**: id -> [data de alteração, hash do conteúdo] das linhas
+      exportadas dentro da margem antes de `alterado_em`: são relidas na
+      execução seguinte e ignoradas se não mudaram
+    - **ultimo_id**: maior id exportado (linhas sem data de alteração)
+    """
+
+    def __init__(self, alterado_em: Optional[datetime] = None, recentes: Optional[Dict[str, List[str]]] = None,
+                 ultimo_id: int = 0):
+        self.alterado_em = alterado_em
+        self.recentes = recentes or {}
+        self.ultimo_id = ultimo_id
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "MarcaAgua":
+        alterado_em = dados.get("alterado_em")
+        return cls(
+            datetime.fromisoformat(alterado_em) if alterado_em else None,
+            dados.get("recentes", {}),
+            dados.get("ultimo_id", 0),
+        )
+
+    def como_dict(self) -> dict:
+        return {
+            "alterado_em": self.alterado_em.isoformat() if self.alterado_em else None,
+            "recentes": self.recentes,
+            "ultimo_id": self.ultimo_id,
+        }
+
+
+def ler_marcas(destino: Path) -> Dict[str, MarcaAgua]:
+    caminho = Path(destino) / FICHEIRO_MARCAS
+    if not caminho.exists():
+        return {}
+    dados = json.loads(caminho.read_text(encoding="utf-8"))
+    return {tabela: MarcaAgua.de_dict(marca) for tabela, marca in dados.get("tabelas", {}).items()}
+
+
+def gravar_marcas(destino: Path, marcas: Dict[str, MarcaAgua]) -> None:
+    """Grava as marcas de forma atómica (ficheiro temporário + rename)."""
+    caminho = Path(destino) / FICHEIRO_MARCAS
+    temporario = caminho.with_suffix(".tmp")
+    conteudo = {
+        "actualizado_em": datetime.now(timezone.utc).isoformat(),
+        "tabelas": {tabela: marca.como_dict() for tabela, marca in marcas.items()},
+    }
+    temporario.write_text(json.dumps(conteudo, indent=2), encoding="utf-8")
+    os.replace(temporario, caminho)
+
+
+def consulta_alteracoes(tabela: Table, clientes: Table, marca: Optional[MarcaAgua]):
+    """
+    Linhas da tabela (com o nome do cliente) criadas ou alteradas desde a
+    marca; sem marca, a tabela completa. Devolve (consulta, expressão da
+    data de alteração ou None).
+    """
+    datas = [tabela.c[nome] for nome in COLUNAS_ALTERACAO if nome in tabela.c]
+    alterado_em = None
+    if datas:
+        alterado_em = datas[0] if len(datas) == 1 else func.coalesce(*datas)
+
+    colunas = [*tabela.c, clientes.c.nome.label("cliente_nome")]
+    if alterado_em is not None:
+        colunas.append(alterado_em.label("_alterado_em"))
+    consulta = select(*colunas).outerjoin(clientes, tabela.c.cliente_id == clientes.c.id)
+
+    if marca is not None:
+        novas = tabela.c.id > marca.ultimo_id
+        if alterado_em is None:
+            consulta = consulta.where(novas)
+        elif marca.alterado_em is None:
+            consulta = consulta.where(or_(alterado_em.is_not(None), novas))
+        else:
+            consulta = consulta.where(or_(
+                alterado_em >= marca.alterado_em - MARGEM_MARCA,
+                and_(alterado_em.is_(None), novas),
+            ))
+    return consulta.order_by(tabela.c.id), alterado_em is not None
+
+
+def _versao(linha: dict) -> str:
+    return hashlib.blake2b(repr(tuple(linha.values())).encode(), digest_size=8).hexdigest()
+
+
+class _EscritorParticoes:
+    """Um ficheiro por mês, escrito em grupos de linhas, com nome temporário até `concluir`."""
+
+    def __init__(self, pa, directorio: Path, prefixo: str, schema, formato: str, linhas_por_grupo: int):
+        self.pa = pa
+        self.directorio = directorio
+        self.prefixo = prefixo
+        self.schema = schema
+        self.formato = formato
+        self.linhas_por_grupo = linhas_por_grupo
+        self._pendentes: Dict[str, List[dict]] = {}
+        self._escritores: Dict[str, object] = {}
+        self._ficheiros: Dict[str, Path] = {}
+
+    def acrescentar(self, particao: str, linha: dict) -> None:
+        pendentes = self._pendentes.setdefault(particao, [])
+        pendentes.append(linha)
+        if len(pendentes) >= self.linhas_por_grupo:
+            self._escrever(particao)
+
+    def _escrever(self, particao: str) -> None:
+        linhas = self._pendentes.pop(particao, [])
+        if not linhas:
+            return
+        escritor = self._escritores.get(particao)
+        if escritor is None:
+            caminho = self.directorio / f"mes={particao}" / f"{self.prefixo}{FORMATOS[self.formato]}"
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            temporario = caminho.with_name(caminho.name + ".parcial")
+            if self.formato == "parquet":
+                escritor = self.pa.parquet.ParquetWriter(temporario, self.schema)
+            else:
+                escritor = self.pa.ipc.new_file(str(temporario), self.schema)
+            self._escritores[particao] = escritor
+            self._ficheiros[particao] = caminho
+        lote = self.pa.RecordBatch.from_pylist(linhas, schema=self.schema)
+        if self.formato == "parquet":
+            escritor.write_batch(lote, row_group_size=self.linhas_por_grupo)
+        else:
+            escritor.write_batch(lote)
+
+    def fechar(self) -> None:
+        for particao in list(self._pendentes):
+            self._escrever(particao)
+        for escritor in self._escritores.values():
+            escritor.close()
+
+    def concluir(self) -> List[Path]:
+        """Dá aos ficheiros completos o nome final."""
+        for caminho in self._ficheiros.values():
+            os.replace(caminho.with_name(caminho.name + ".parcial"), caminho)
+        return sorted(self._ficheiros.values())
+
+    def descartar(self) -> None:
+        for caminho in self._ficheiros.values():
+            caminho.with_name(caminho.name + ".parcial").unlink(missing_ok=True)
+
+
+def exportar_tabela(bind, tabela: Table, clientes: Table, destino: Path, formato: str,
+                    marca: Optional[MarcaAgua], exportado_em: datetime,
+                    linhas_por_grupo: Optional[int] = None):
+    """
+    Exporta as alterações de uma tabela. Devolve (ficheiros escritos,
+    linhas exportadas, nova marca); os ficheiros já têm o nome final.
+    """
+    pa = _pyarrow()
+    consulta, tem_data = consulta_alteracoes(tabela, clientes, marca)
+    nomes = [coluna.name for coluna in tabela.c]
+    schema = pa.schema(
+        [pa.field(coluna.name, _tipo_arrow(pa, coluna)) for coluna in tabela.c]
+        + [pa.field("cliente_nome", pa.string()), pa.field("exportado_em", pa.timestamp("us", tz="UTC"))]
+    )
+    escritor = _EscritorParticoes(
+        pa, Path(destino) / tabela.name, f"{tabela.name}-{exportado_em:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}", schema, formato,
+        linhas_por_grupo or config.ANALYTICS_ROW_GROUP_SIZE,
+    )
+
+    anterior = marca or MarcaAgua()
+    alterado_em, ultimo_id = anterior.alterado_em, anterior.ultimo_id
+    vistos: Dict[str, List[str]] = {}
+    linhas = 0
+    try:
+        with bind.connect() as conn:
+            resultado = conn.execution_options(yield_per=config.EXPORT_BATCH_SIZE).execute(consulta)
+            for bloco in resultado.partitions():
+                for registo in bloco:
+                    dados = registo._mapping
+                    linha = {nome: dados[nome] for nome in nomes}
+                    linha["cliente_nome"] = dados["cliente_nome"]
+                    data_alteracao = dados["_alterado_em"] if tem_data else None
+                    if data_alteracao is not None:
+                        # O conteúdo distingue alterações com a mesma data (relógio ao segundo)
+                        identificador, versao = str(linha["id"]), _versao(linha)
+                        ja_exportada = anterior.recentes.get(identificador, [None, None])[1] == versao
+                        vistos[identificador] = [data_alteracao.isoformat(), versao]
+                        if ja_exportada:
+                            continue
+                        if alterado_em is None or data_alteracao > alterado_em:
+                            alterado_em = data_alteracao
+                    ultimo_id = max(ultimo_id, linha["id"])
+
+                    linha["exportado_em"] = exportado_em
+                    data_servico = linha["data_servico"]
+                    escritor.acrescentar(f"{data_servico:%Y-%m}" if data_servico else "sem-data", linha)
+                    linhas += 1
+        escritor.fechar()
+    except BaseException:
+        escritor.fechar()
+        escritor.descartar()
+        raise
+
+    # Versões a ignorar na próxima execução: as que ficam dentro da margem
+    recentes = {}
+    if alterado_em is not None:
+        limite = alterado_em - MARGEM_MARCA
+        candidatos = {**anterior.recentes, **vistos}
+        recentes = {
+            identificador: versao for identificador, versao in candidatos.items()
+            if datetime.fromisoformat(versao[0]) >= limite
+        }
+    return escritor.concluir(), linhas, MarcaAgua(alterado_em, recentes, ultimo_id)
+
+
+def exportar_analitica(bind, destino, formato: str = "parquet", completa: bool = False,
+                       tabelas: Iterable[str] = TABELAS) -> Dict[str, object]:
+    """
+    Exporta as tabelas de serviços existentes para `destino`. Com
+    `completa`, ignora as marcas e exporta tudo de novo. Devolve um
+    resumo por tabela.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato não suportado: use {' ou '.join(FORMATOS)}")
+    _pyarrow()
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    marcas = {} if completa else ler_marcas(destino)
+    existentes = set(inspect(bind).get_table_names())
+    metadata = MetaData()
+    clientes = Table("clientes", metadata, autoload_with=bind)
+    exportado_em = datetime.now(timezone.utc)
+
+    resumo: Dict[str, object] = {}
+    for nome in tabelas:
+        if nome not in existentes:
+            continue
+        inicio = time.perf_counter()
+        tabela = Table(nome, metadata, autoload_with=bind)
+        if not any(coluna in tabela.c for coluna in COLUNAS_ALTERACAO):
+            print(f"⚠️ {nome} sem data_actualizacao: só são exportadas linhas novas (corra o bootstrap)")
+        ficheiros, linhas, marcas[nome] = exportar_tabela(
+            bind, tabela, clientes, destino, formato, marcas.get(nome), exportado_em
+        )
+        resumo[nome] = {
+            "linhas": linhas,
+            "ficheiros": [str(caminho.relative_to(destino)) for caminho in ficheiros],
+            "duracao_ms": round((time.perf_counter() - inicio) * 1000, 1),
+        }
+    gravar_marcas(destino, marcas)
+    return resumo
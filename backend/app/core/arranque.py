@@ -0,0 +1,242 @@
+"""
+Arranque e preparação da base de dados para GestOnGo.
+
+Criar tabelas e o utilizador administrador deixou de acontecer ao
+importar a aplicação: cada worker, cada importação nos testes e o
+`deploy.py` pagavam I/O e um hash bcrypt. O esquema passa a ter um
+carimbo (hash dos modelos) guardado na tabela `gestongo_meta`; se o
+carimbo coincide, o arranque salta o `create_all` com uma única leitura.
+
+O bootstrap completo corre uma vez, pelo comando `bootstrap.py`, ou no
+arranque quando BOOTSTRAP_ON_STARTUP está activo e o carimbo difere.
+"""
+
+import hashlib
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from sqlalchemy import Column, MetaData, String, Table, inspect, select, text
+
+from .contadores import VERSAO_CONTADORES
+from .database import adicionar_colunas_em_falta
+from .pesquisa import VERSAO_PESQUISA
+
+# Tabela de metadados fora do Base, para não entrar no próprio carimbo
+TABELA_META = Table(
+    "gestongo_meta",
+    MetaData(),
+    Column("chave", String(100), primary_key=True),
+    Column("valor", String(255), nullable=False),
+)
+
+EMAIL_ADMIN = "admin@gestongo.pt"
+
+# Último relatório de arranque do processo (exposto em /metricas)
+relatorio_arranque: Dict[str, object] = {}
+
+
+def impressao_esquema(metadata) -> str:
+    """Hash estável das tabelas, colunas e índices declarados nos modelos."""
+    partes = []
+    for tabela in metadata.sorted_tables:
+        partes.append(f"T:{tabela.name}")
+        for coluna in tabela.columns:
+            padrao = coluna.server_default.arg if coluna.server_default is not None else ""
+            partes.append(f"C:{coluna.name}:{coluna.type}:{coluna.nullable}:{coluna.primary_key}:{padrao}")
+        for indice in sorted(tabela.indexes, key=lambda i: i.name or ""):
+            colunas = ",".join(c.name for c in indice.columns)
+            partes.append(f"I:{indice.name}:{colunas}:{indice.unique}")
+        pesquisa = tabela.info.get("pesquisa")
+        if pesquisa is not None:
+            partes.append(f"P:{','.join(pesquisa.colunas)}:{VERSAO_PESQUISA}")
+        obsoletos = tabela.info.get("indices_obsoletos")
+        if obsoletos:
+            partes.append(f"O:{','.join(sorted(obsoletos))}")
+    # Chaves novas nos contadores: o bootstrap seguinte recalcula-os
+    partes.append(f"K:{VERSAO_CONTADORES}")
+    return hashlib.sha256("\n".join(partes).encode()).hexdigest()[:32]
+
+
+def ler_carimbo(bind, chave: str) -> Optional[str]:
+    """Valor guardado para a chave, ou None se a tabela/chave não existir."""
+    if not inspect(bind).has_table(TABELA_META.name):
+        return None
+    with bind.connect() as conn:
+        return conn.execute(
+            select(TABELA_META.c.valor).where(TABELA_META.c.chave == chave)
+        ).scalar()
+
+
+def gravar_carimbo(bind, chave: str, valor: str) -> None:
+    TABELA_META.create(bind, checkfirst=True)
+    with bind.begin() as conn:
+        conn.execute(TABELA_META.delete().where(TABELA_META.c.chave == chave))
+        conn.execute(TABELA_META.insert().values(chave=chave, valor=valor))
+
+
+def criar_indices_em_falta(bind, metadata) -> List[str]:
+    """
+    Cria os índices declarados que ainda não existem.
+
+    O `create_all` só cria índices de tabelas novas; índices acrescentados
+    a modelos já em produção são criados aqui.
+    """
+    inspector = inspect(bind)
+    criados = []
+    for tabela in metadata.sorted_tables:
+        if not inspector.has_table(tabela.name):
+            continue
+        existentes = {indice["name"] for indice in inspector.get_indexes(tabela.name)}
+        for indice in tabela.indexes:
+            if indice.name not in existentes:
+                indice.create(bind)
+                criados.append(indice.name)
+    return criados
+
+
+def remover_indices_obsoletos(bind, metadata) -> List[str]:
+    """
+    Remove os índices que os modelos deixaram de declarar (ex.: substituídos
+    por índices compostos), listados em `info["indices_obsoletos"]` da
+    tabela. O `criar_indices_em_falta` só acrescenta índices; sem isto os
+    antigos ficavam nas bases de dados existentes.
+    """
+    inspector = inspect(bind)
+    preparador = bind.dialect.identifier_preparer
+    removidos = []
+    for tabela in metadata.sorted_tables:
+        obsoletos = tabela.info.get("indices_obsoletos")
+        if not obsoletos or not inspector.has_table(tabela.name):
+            continue
+        existentes = {indice["name"] for indice in inspector.get_indexes(tabela.name)}
+        for nome in obsoletos:
+            if nome in existentes:
+                with bind.begin() as conn:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {preparador.quote(nome)}"))
+                removidos.append(nome)
+    return removidos
+
+
+def preparar_esquema(bind, metadata, nome: str = "principal", forcar: bool = False) -> bool:
+    """
+    Garante o esquema actual na base de dados.
+
+    Devolve False sem tocar no esquema quando o carimbo coincide (caminho
+    rápido) e True quando criou/actualizou tabelas, colunas e índices.
+    """
+    chave = f"esquema:{nome}"
+    impressao = impressao_esquema(metadata)
+    if not forcar and ler_carimbo(bind, chave) == impressao:
+        return False
+
+    metadata.create_all(bind=bind)
+    adicionar_colunas_em_falta(bind, metadata)
+    for indice in criar_indices_em_falta(bind, metadata):
+        print(f"🗂️ Índice criado: {indice}")
+    for indice in remover_indices_obsoletos(bind, metadata):
+        print(f"🗑️ Índice removido: {indice}")
+    for tabela in metadata.sorted_tables:
+        # Índices de pesquisa textual de tabelas criadas antes de existirem
+        pesquisa = tabela.info.get("pesquisa")
+        if pesquisa is not None and pesquisa.preparar(bind):
+            print(f"🔎 Índice de pesquisa preparado: {tabela.name}")
+    gravar_carimbo(bind, chave, impressao)
+    return True
+
+
+def criar_utilizador_admin(sessao_factory, modelo_user, gerar_hash) -> bool:
+    """Cria o utilizador administrador por defeito se não existir."""
+    db = sessao_factory()
+    try:
+        if db.query(modelo_user.id).filter(modelo_user.email == EMAIL_ADMIN).first():
+            return False
+        db.add(modelo_user(
+            nome="Administrador GestOnGo",
+            email=EMAIL_ADMIN,
+            hash_senha=gerar_hash("gestongo2025"),
+            is_active=True,
+        ))
+        db.commit()
+        print(f"✅ Utilizador administrador criado: {EMAIL_ADMIN} / gestongo2025")
+        return True
+    finally:
+        db.close()
+
+
+def reconciliar_contadores_arranque(sessao_factory) -> Dict[str, object]:
+    """
+    Recalcula os contadores agregados após uma mudança de esquema (ex.:
+    tabela `contadores` acabada de criar numa base com dados).
+    """
+    from .contadores import reconciliar_contadores
+
+    db = sessao_factory()
+    try:
+        resultado = reconciliar_contadores(db)
+    finally:
+        db.close()
+    if resultado["deriva"]:
+        print(f"🔢 Contadores recalculados: {len(resultado['deriva'])} chaves corrigidas")
+    return resultado
+
+
+class MedidorArranque:
+    """
+    Mede as fases do arranque e compara o total com o orçamento.
+
+    - **orcamento_ms**: tempo máximo esperado entre a importação e o fim do arranque
+    - **inicio**: instante (perf_counter) da importação da aplicação
+    """
+
+    def __init__(self, orcamento_ms: int, inicio: Optional[float] = None):
+        self.orcamento_ms = orcamento_ms
+        self.inicio = inicio if inicio is not None else time.perf_counter()
+        self.fases: Dict[str, float] = {}
+        if inicio is not None:
+            self.fases["importacao"] = round((time.perf_counter() - inicio) * 1000, 1)
+
+    @contextmanager
+    def fase(self, nome: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[nome] = round((time.perf_counter() - inicio) * 1000, 1)
+
+    def relatorio(self) -> Dict[str, object]:
+        total = round((time.perf_counter() - self.inicio) * 1000, 1)
+        return {
+            "total_ms": total,
+            "orcamento_ms": self.orcamento_ms,
+            "dentro_orcamento": total <= self.orcamento_ms,
+            "fases_ms": dict(self.fases),
+        }
+
+    def reportar(self) -> Dict[str, object]:
+        """Imprime o relatório e guarda-o para /metricas."""
+        relatorio = self.relatorio()
+        relatorio_arranque.clear()
+        relatorio_arranque.update(relatorio)
+        fases = ", ".join(f"{nome}={ms}ms" for nome, ms in relatorio["fases_ms"].items())
+        simbolo = "⏱️" if relatorio["dentro_orcamento"] else "⚠️"
+        print(f"{simbolo} Arranque em {relatorio['total_ms']}ms (orçamento {self.orcamento_ms}ms): {fases}")
+        return relatorio
+
+
+def executar_bootstrap(bind, metadata, sessao_factory, modelo_user, gerar_hash,
+                       nome: str = "principal", forcar: bool = False) -> Dict[str, object]:
+    """Bootstrap completo: esquema, utilizador administrador e contadores."""
+    medidor = MedidorArranque(orcamento_ms=0)
+    with medidor.fase("esquema"):
+        esquema_actualizado = preparar_esquema(bind, metadata, nome, forcar)
+    with medidor.fase("admin"):
+        admin_criado = criar_utilizador_admin(sessao_factory, modelo_user, gerar_hash)
+    with medidor.fase("contadores"):
+        deriva = reconciliar_contadores_arranque(sessao_factory)["deriva"]
+    return {
+        "esquema_actualizado": esquema_actualizado,
+        "admin_criado": admin_criado,
+        "contadores_corrigidos": len(deriva),
+        "fases_ms": medidor.fases,
+    }
@@ -0,0 +1,259 @@
+"""
+Agenda dos técnicos: atribuições com hora de início e duração.
+
+As atribuições de um técnico num dia são guardadas num índice de
+intervalos `[início, fim)` em minutos, ordenados pelo início
+(`IntervalosOrdenados`). Como os intervalos de um técnico não se
+sobrepõem, os fins ficam pela mesma ordem: uma pesquisa binária encontra
+o único intervalo que pode colidir com um novo, em O(log n).
+
+O índice de um dia é construído com uma consulta às atribuições dos
+serviços desse dia (UNION ALL sobre `servicos` e as tabelas dos módulos
+Aqua e Verde, cada ramo pelo seu índice de `data_servico`, como no
+calendário), para um técnico ou para a equipa toda:
+
+- `garantir_tecnicos_livres` corre depois do flush de uma atribuição ou
+  de uma alteração a serviços (data, duração, reactivação) e rejeita-a
+  se algum técnico ficou com atribuições sobrepostas;
+- `tecnicos_livres` responde a "quem está livre das 9:00 às 12:00 no
+  dia X" com um índice por técnico e uma pesquisa em cada um.
+
+Os serviços cancelados não ocupam os técnicos.
+"""
+
+from bisect import bisect_left
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from .origens import ramo_servicos, tabelas_servicos
+from ..models.tecnico import Atribuicao, Tecnico
+
+MINUTOS_DIA = 24 * 60
+STATUS_LIVRE = "cancelado"
+
+
+def minutos(hora: time) -> int:
+    return hora.hour * 60 + hora.minute
+
+
+def hora(minutos_dia: int) -> time:
+    return time(minutos_dia // 60, minutos_dia % 60)
+
+
+def intervalo(hora_inicio: time, duracao_horas: int) -> Tuple[int, int]:
+    """Intervalo `[início, fim)` em minutos desde a meia-noite."""
+    inicio = minutos(hora_inicio)
+    return inicio, inicio + duracao_horas * 60
+
+
+class IntervalosOrdenados:
+    """
+    Intervalos `[início, fim)` disjuntos, ordenados pelo início, cada um
+    com um valor associado (ex.: a atribuição).
+    """
+
+    def __init__(self):
+        self._inicios: List[int] = []
+        self._itens: List[Tuple[int, int, object]] = []
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def __iter__(self):
+        return iter(self._itens)
+
+    def sobreposto(self, inicio: int, fim: int) -> Optional[Tuple[int, int, object]]:
+        """Intervalo que intersecta `[inicio, fim)`, ou None se está livre."""
+        # Dos intervalos que começam antes de `fim`, o último é o que acaba mais tarde
+        posicao = bisect_left(self._inicios, fim)
+        if posicao and self._itens[posicao - 1][1] > inicio:
+            return self._itens[posicao - 1]
+        return None
+
+    def livre(self, inicio: int, fim: int) -> bool:
+        return self.sobreposto(inicio, fim) is None
+
+    def inserir(self, inicio: int, fim: int, valor: object = None) -> None:
+        """Acrescenta um intervalo; ValueError se se sobrepõe a outro."""
+        if fim <= inicio:
+            raise ValueError("Intervalo vazio")
+        if not self.livre(inicio, fim):
+            raise ValueError("Intervalo sobreposto")
+        posicao = bisect_left(self._inicios, inicio)
+        self._inicios.insert(posicao, inicio)
+        self._itens.insert(posicao, (inicio, fim, valor))
+
+    def remover(self, inicio: int) -> None:
+        """Retira o intervalo que começa em `inicio`; KeyError se não existe."""
+        posicao = bisect_left(self._inicios, inicio)
+        if posicao == len(self._inicios) or self._inicios[posicao] != inicio:
+            raise KeyError(inicio)
+        del self._inicios[posicao]
+        del self._itens[posicao]
+
+    def primeiro_livre(self, duracao: int, desde: int, ate: int) -> Optional[int]:
+        """
+        Início mais cedo (>= `desde`) de um intervalo livre com `duracao`
+        minutos que termine até `ate`, ou None.
+        """
+        inicio = desde
+        posicao = bisect_left(self._inicios, desde)
+        # O intervalo anterior pode ainda estar a decorrer em `desde`
+        if posicao and self._itens[posicao - 1][1] > inicio:
+            inicio = self._itens[posicao - 1][1]
+        while posicao < len(self._itens) and inicio + duracao <= ate:
+            outro_inicio, outro_fim, _ = self._itens[posicao]
+            if outro_inicio >= inicio + duracao:
+                break
+            inicio = max(inicio, outro_fim)
+            posicao += 1
+        return inicio if inicio + duracao <= ate else None
+
+
+def servicos_do_dia(bind, dia: date):
+    """Serviços de todas as tabelas no dia (subconsulta com `origem`)."""
+    ramos = [ramo_servicos(tabela, origem, dia, dia) for origem, tabela in tabelas_servicos(bind).items()]
+    return union_all(*ramos).subquery("servicos_dia")
+
+
+def activo(servicos):
+    """Serviços que ocupam técnicos: os cancelados não contam."""
+    return or_(servicos.c.status.is_(None), servicos.c.status != STATUS_LIVRE)
+
+
+def consulta_atribuicoes(servicos):
+    """Atribuições dos `servicos` indicados, com o dia e a duração efectiva."""
+    return (
+        select(
+            Atribuicao.id,
+            Atribuicao.tecnico_id,
+            Atribuicao.origem,
+            Atribuicao.servico_id,
+            servicos.c.data_servico,
+            Atribuicao.hora_inicio,
+            func.coalesce(Atribuicao.duracao_horas, servicos.c.duracao_horas).label("duracao_horas"),
+            servicos.c.status,
+        )
+        .join(servicos, and_(servicos.c.origem == Atribuicao.origem, servicos.c.id == Atribuicao.servico_id))
+    )
+
+
+def ler_servico(db: Session, origem: str, servico_id: int):
+    """Tipo, dia, duração e estado de um serviço de qualquer origem, ou None."""
+    tabela = tabelas_servicos(db.get_bind()).get(origem)
+    if tabela is None:
+        return None
+    colunas = [tabela.c.id, tabela.c.tipo, tabela.c.data_servico, tabela.c.duracao_horas]
+    if "status" in tabela.c:
+        colunas.append(tabela.c.status)
+    linha = db.execute(select(*colunas).where(tabela.c.id == servico_id)).mappings().first()
+    return None if linha is None else {"status": None, **linha, "origem": origem}
+
+
+def descrever(linha) -> dict:
+    """Atribuição (colunas de `consulta_atribuicoes`), com a hora de fim."""
+    dados = dict(linha)
+    fim = intervalo(dados["hora_inicio"], dados["duracao_horas"] or 0)[1]
+    dados["hora_fim"] = hora(fim % MINUTOS_DIA)
+    return dados
+
+
+def agenda_do_dia(db: Session, dia: date, tecnico_ids: Optional[Iterable[int]] = None) -> list:
+    """Atribuições activas (serviço não cancelado) do dia, pela hora de início."""
+    servicos = servicos_do_dia(db.get_bind(), dia)
+    consulta = consulta_atribuicoes(servicos).where(activo(servicos))
+    if tecnico_ids is not None:
+        consulta = consulta.where(Atribuicao.tecnico_id.in_(list(tecnico_ids)))
+    return db.execute(consulta.order_by(Atribuicao.hora_inicio, Atribuicao.id)).all()
+
+
+def indexar(linhas: Iterable) -> Dict[int, IntervalosOrdenados]:
+    """Índice de intervalos de cada técnico a partir de linhas da agenda."""
+    indice: Dict[int, IntervalosOrdenados] = {}
+    for linha in linhas:
+        inicio, fim = intervalo(linha.hora_inicio, linha.duracao_horas or 0)
+        intervalos = indice.setdefault(linha.tecnico_id, IntervalosOrdenados())
+        # Sobreposições antigas (anteriores à verificação) ficam de fora do índice
+        if fim > inicio and intervalos.livre(inicio, fim):
+            intervalos.inserir(inicio, fim, linha)
+    return indice
+
+
+def indice_do_dia(db: Session, dia: date,
+                  tecnico_ids: Optional[Iterable[int]] = None) -> Dict[int, IntervalosOrdenados]:
+    """Índice de intervalos de cada técnico com atribuições no dia."""
+    return indexar(agenda_do_dia(db, dia, tecnico_ids))
+
+
+def _rejeitar(db: Session, detalhe: str) -> None:
+    db.rollback()
+    raise HTTPException(status_code=400, detail=detalhe)
+
+
+def _nome_servico(origem: str, servico_id: int) -> str:
+    return f"serviço {servico_id}" if origem == "servicos" else f"serviço {origem} {servico_id}"
+
+
+def garantir_tecnicos_livres(db: Session, servico_ids: Iterable[int], origem: str = "servicos") -> None:
+    """
+    Rejeita (400, desfazendo a transacção) alterações que deixam técnicos
+    com atribuições sobrepostas. Chamada depois do flush com os serviços
+    criados ou alterados: as suas atribuições são verificadas contra as
+    restantes do mesmo dia e entre si.
+    """
+    servico_ids = set(servico_ids)
+    tabela = tabelas_servicos(db.get_bind()).get(origem)
+    if not servico_ids or tabela is None:
+        return
+    tecnico_ids = db.execute(
+        select(Atribuicao.tecnico_id)
+        .where(Atribuicao.origem == origem, Atribuicao.servico_id.in_(servico_ids))
+        .distinct()
+    ).scalars().all()
+    if not tecnico_ids:
+        return
+    dias = db.execute(select(tabela.c.data_servico).where(tabela.c.id.in_(servico_ids)).distinct()).scalars()
+
+    for dia in dias.all():
+        linhas = agenda_do_dia(db, dia, tecnico_ids)
+        proprias = [linha for linha in linhas if linha.origem == origem and linha.servico_id in servico_ids]
+        indice = indexar(linha for linha in linhas if not (linha.origem == origem and linha.servico_id in servico_ids))
+        for linha in proprias:
+            inicio, fim = intervalo(linha.hora_inicio, linha.duracao_horas or 0)
+            if fim > MINUTOS_DIA:
+                _rejeitar(db, f"A atribuição do técnico {linha.tecnico_id} no "
+                              f"{_nome_servico(linha.origem, linha.servico_id)} termina depois da meia-noite")
+            intervalos = indice.setdefault(linha.tecnico_id, IntervalosOrdenados())
+            conflito = intervalos.sobreposto(inicio, fim)
+            if conflito is not None:
+                outro_inicio, outro_fim, outra = conflito
+                _rejeitar(
+                    db,
+                    f"O técnico {linha.tecnico_id} já está ocupado em {dia} das "
+                    f"{hora(outro_inicio):%H:%M} às {hora(outro_fim % MINUTOS_DIA):%H:%M} "
+                    f"({_nome_servico(outra.origem, outra.servico_id)})"
+                )
+            intervalos.inserir(inicio, fim, linha)
+
+
+def tecnicos_livres(db: Session, dia: date, inicio: time, fim: time,
+                    tipo: Optional[str] = None) -> List[Tecnico]:
+    """
+    Técnicos activos sem atribuições entre `inicio` e `fim` no dia; com
+    `tipo`, só os dessa especialidade ou sem especialidade.
+    """
+    consulta = db.query(Tecnico).filter(Tecnico.activo.is_(True))
+    if tipo is not None:
+        consulta = consulta.filter(or_(Tecnico.especialidade.is_(None), Tecnico.especialidade == tipo))
+    tecnicos = consulta.order_by(Tecnico.nome, Tecnico.id).all()
+
+    indice = indice_do_dia(db, dia)
+    janela = minutos(inicio), minutos(fim)
+    return [
+        tecnico for tecnico in tecnicos
+        if tecnico.id not in indice or indice[tecnico.id].livre(*janela)
+    ]
@@ -0,0 +1,153 @@
+"""
+Índice de prefixos em memória para o autocomplete de clientes.
+
+Os seletores de cliente do frontend pedem sugestões a cada tecla; servir
+esses pedidos da base de dados não escala. O índice guarda os nomes
+"dobrados" (minúsculas, sem acentos) em listas ordenadas e responde com
+`bisect`, sem I/O:
+
+- `_nomes`: o nome completo (correspondências no início do nome);
+- `_palavras`: o resto do nome a partir de cada palavra seguinte, para
+  que "silva" encontre "João Silva".
+
+É construído no arranque e actualizado pelas rotas de clientes. Cada
+worker tem o seu índice; alterações feitas noutros workers aparecem
+quando o índice é reconstruído (ver `refrescar_se_antigo`).
+"""
+
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def dobrar(texto: str) -> str:
+    """Forma de comparação: sem acentos, sem maiúsculas e espaços normalizados."""
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().split())
+
+
+def _chaves_palavras(nome_dobrado: str) -> List[str]:
+    """Sufixos do nome a começar em cada palavra depois da primeira."""
+    palavras = nome_dobrado.split(" ")
+    return [" ".join(palavras[indice:]) for indice in range(1, len(palavras))]
+
+
+class IndicePrefixos:
+    """
+    Índice de prefixos de nomes (id -> nome) com listas ordenadas.
+
+    - **refrescar_segundos**: idade máxima antes de reconstruir a partir da
+      base de dados (0 desactiva a reconstrução periódica)
+    """
+
+    def __init__(self, refrescar_segundos: float = 0):
+        self.refrescar_segundos = refrescar_segundos
+        self._nomes: List[Tuple[str, int]] = []
+        self._palavras: List[Tuple[str, int]] = []
+        self._registos: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.construido_em: Optional[float] = None
+        self.duracao_construcao_ms = 0.0
+        self.procuras = 0
+        self.actualizacoes = 0
+
+    def construir(self, registos: Iterable[Tuple[int, str]]) -> None:
+        """Substitui o conteúdo do índice por (id, nome)."""
+        inicio = time.perf_counter()
+        nomes, palavras, dados = [], [], {}
+        for identificador, nome in registos:
+            dobrado = dobrar(nome)
+            dados[identificador] = nome
+            nomes.append((dobrado, identificador))
+            palavras.extend((chave, identificador) for chave in _chaves_palavras(dobrado))
+        nomes.sort()
+        palavras.sort()
+        with self._lock:
+            self._nomes, self._palavras, self._registos = nomes, palavras, dados
+            self.construido_em = time.monotonic()
+            self.duracao_construcao_ms = round((time.perf_counter() - inicio) * 1000, 2)
+
+    def carregar(self, db, modelo) -> None:
+        """Constrói o índice a partir de todas as linhas do modelo (id, nome)."""
+        self.construir(db.query(modelo.id, modelo.nome).all())
+
+    def refrescar_se_antigo(self, db, modelo) -> bool:
+        """Reconstrói se o índice nunca foi carregado ou é mais antigo que o limite."""
+        construido_em = self.construido_em
+        if construido_em is not None and (
+            not self.refrescar_segundos or time.monotonic() - construido_em < self.refrescar_segundos
+        ):
+            return False
+        self.carregar(db, modelo)
+        return True
+
+    def invalidar(self) -> None:
+        """Força a reconstrução a partir da base de dados no próximo pedido."""
+        with self._lock:
+            self.construido_em = None
+
+    def _retirar(self, identificador: int) -> None:
+        nome = self._registos.pop(identificador, None)
+        if nome is None:
+            return
+        dobrado = dobrar(nome)
+        for lista, chaves in ((self._nomes, [dobrado]), (self._palavras, _chaves_palavras(dobrado))):
+            for chave in chaves:
+                posicao = bisect_left(lista, (chave, identificador))
+                if posicao < len(lista) and lista[posicao] == (chave, identificador):
+                    del lista[posicao]
+
+    def actualizar(self, identificador: int, nome: str) -> None:
+        """Insere ou substitui o nome de um registo."""
+        with self._lock:
+            self._retirar(identificador)
+            dobrado = dobrar(nome)
+            self._registos[identificador] = nome
+            insort(self._nomes, (dobrado, identificador))
+            for chave in _chaves_palavras(dobrado):
+                insort(self._palavras, (chave, identificador))
+            self.actualizacoes += 1
+
+    def remover(self, identificador: int) -> None:
+        with self._lock:
+            self._retirar(identificador)
+            self.actualizacoes += 1
+
+    def procurar(self, prefixo: str, limite: int = 10) -> List[Tuple[int, str]]:
+        """
+        Até `limite` registos (id, nome): primeiro os nomes que começam pelo
+        prefixo, depois os que têm uma palavra seguinte a começar por ele,
+        cada grupo por ordem alfabética.
+        """
+        chave = dobrar(prefixo)
+        resultado: List[Tuple[int, str]] = []
+        vistos = set()
+        with self._lock:
+            self.procuras += 1
+            for lista in (self._nomes, self._palavras):
+                posicao = bisect_left(lista, (chave, -1))
+                while posicao < len(lista) and len(resultado) < limite:
+                    texto, identificador = lista[posicao]
+                    if not texto.startswith(chave):
+                        break
+                    if identificador not in vistos:
+                        vistos.add(identificador)
+                        resultado.append((identificador, self._registos[identificador]))
+                    posicao += 1
+        return resultado
+
+    def estatisticas(self) -> Dict[str, object]:
+        with self._lock:
+            idade = None if self.construido_em is None else round(time.monotonic() - self.construido_em, 1)
+            return {
+                "registos": len(self._registos),
+                "chaves": len(self._nomes) + len(self._palavras),
+                "duracao_construcao_ms": self.duracao_construcao_ms,
+                "idade_segundos": idade,
+                "refrescar_segundos": self.refrescar_segundos,
+                "procuras": self.procuras,
+                "actualizacoes": self.actualizacoes,
+            }
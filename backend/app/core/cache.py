@@ -0,0 +1,197 @@
+"""
+Cache em memória com política LRU e expiração por tempo (TTL).
+
+Utilizada para evitar consultas repetidas à base de dados em caminhos
+muito frequentes, como a resolução do utilizador autenticado em cada
+pedido. Cada processo (worker uvicorn) mantém a sua própria cache.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class CacheTTL:
+    """
+    Cache LRU limitada em número de entradas e com expiração por entrada.
+
+    - **max_entradas**: número máximo de entradas antes de despejar a mais antiga
+    - **ttl_segundos**: tempo de vida por defeito de cada entrada
+    """
+
+    def __init__(self, max_entradas: int = 1024, ttl_segundos: float = 60.0):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self._dados: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.despejos = 0
+        self.invalidacoes = 0
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """Devolve o valor associado à chave ou None se ausente/expirado."""
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._dados.get(chave)
+            if entrada is None:
+                self.misses += 1
+                return None
+            valor, expira_em = entrada
+            if expira_em <= agora:
+                del self._dados[chave]
+                self.misses += 1
+                return None
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def guardar(self, chave: Hashable, valor: Any, ttl_segundos: Optional[float] = None) -> None:
+        """Guarda um valor; o TTL efectivo nunca excede o TTL configurado."""
+        if self.max_entradas <= 0:
+            return
+        ttl = self.ttl_segundos if ttl_segundos is None else min(ttl_segundos, self.ttl_segundos)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._dados[chave] = (valor, time.monotonic() + ttl)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+                self.despejos += 1
+
+    def invalidar(self, chave: Hashable) -> None:
+        """Remove uma entrada específica."""
+        with self._lock:
+            if self._dados.pop(chave, None) is not None:
+                self.invalidacoes += 1
+
+    def invalidar_se(self, condicao: Callable[[Any], bool]) -> int:
+        """Remove todas as entradas cujo valor satisfaz a condição."""
+        with self._lock:
+            chaves = [chave for chave, (valor, _) in self._dados.items() if condicao(valor)]
+            for chave in chaves:
+                del self._dados[chave]
+            self.invalidacoes += len(chaves)
+            return len(chaves)
+
+    def limpar(self) -> None:
+        """Esvazia a cache (os contadores são mantidos)."""
+        with self._lock:
+            self._dados.clear()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores para monitorização."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entradas": len(self._dados),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl_segundos,
+                "hits": self.hits,
+                "misses": self.misses,
+                "despejos": self.despejos,
+                "invalidacoes": self.invalidacoes,
+                "taxa_acerto": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class CacheRevalidada:
+    """
+    Cache de resultados calculados (ex.: agregações do dashboard).
+
+    Dentro do TTL devolve o valor guardado. Com `stale_segundos > 0`, um
+    valor expirado há menos desse tempo continua a ser devolvido enquanto
+    é recalculado numa thread em segundo plano (stale-while-revalidate).
+    `invalidar()` descarta os valores de imediato, incluindo recálculos
+    em curso iniciados antes da invalidação.
+
+    - **ttl_segundos**: tempo de vida de cada valor
+    - **stale_segundos**: tempo após expirar em que o valor antigo ainda é servido
+    """
+
+    def __init__(self, ttl_segundos: float = 30.0, stale_segundos: float = 0.0):
+        self.ttl_segundos = ttl_segundos
+        self.stale_segundos = stale_segundos
+        self._dados: Dict[Hashable, tuple] = {}
+        self._a_recalcular: set = set()
+        self._geracao = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.hits_antigos = 0
+        self.misses = 0
+        self.invalidacoes = 0
+
+    def _guardar(self, chave: Hashable, valor: Any, geracao: int) -> None:
+        with self._lock:
+            self._a_recalcular.discard(chave)
+            # Um recálculo iniciado antes de uma invalidação já não é válido
+            if geracao == self._geracao and self.ttl_segundos > 0:
+                self._dados[chave] = (valor, time.monotonic() + self.ttl_segundos)
+
+    def _recalcular(self, chave: Hashable, calcular: Callable[[], Any], geracao: int) -> None:
+        try:
+            self._guardar(chave, calcular(), geracao)
+        except Exception as erro:  # o pedido seguinte volta a tentar
+            with self._lock:
+                self._a_recalcular.discard(chave)
+            print(f"⚠️ Recálculo em segundo plano falhou: {erro}")
+
+    def obter(self, chave: Hashable, calcular: Callable[[], Any],
+              calcular_fundo: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Devolve o valor da chave, calculando-o com `calcular` se necessário.
+
+        `calcular_fundo` é usado no recálculo em segundo plano (não pode
+        depender da sessão do pedido, que já estará fechada).
+        """
+        agora = time.monotonic()
+        with self._lock:
+            geracao = self._geracao
+            entrada = self._dados.get(chave)
+            if entrada is not None:
+                valor, expira_em = entrada
+                if agora < expira_em:
+                    self.hits += 1
+                    return valor
+                if calcular_fundo is not None and agora < expira_em + self.stale_segundos:
+                    self.hits_antigos += 1
+                    if chave not in self._a_recalcular:
+                        self._a_recalcular.add(chave)
+                        threading.Thread(
+                            target=self._recalcular,
+                            args=(chave, calcular_fundo, geracao),
+                            name="cache-revalidacao",
+                            daemon=True,
+                        ).start()
+                    return valor
+                del self._dados[chave]
+            self.misses += 1
+
+        valor = calcular()
+        self._guardar(chave, valor, geracao)
+        return valor
+
+    def invalidar(self) -> None:
+        """Descarta todos os valores (chamado após escritas)."""
+        with self._lock:
+            self._geracao += 1
+            if self._dados:
+                self.invalidacoes += 1
+            self._dados.clear()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores para monitorização."""
+        with self._lock:
+            total = self.hits + self.hits_antigos + self.misses
+            return {
+                "entradas": len(self._dados),
+                "ttl_segundos": self.ttl_segundos,
+                "stale_segundos": self.stale_segundos,
+                "hits": self.hits,
+                "hits_antigos": self.hits_antigos,
+                "misses": self.misses,
+                "invalidacoes": self.invalidacoes,
+                "taxa_acerto": round((self.hits + self.hits_antigos) / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,106 @@
+"""
+Calendário de serviços agrupado por dia.
+
+O frontend construía as vistas de mês e de semana a paginar
+`listar_servicos` e a agrupar no browser. Aqui os serviços de uma janela
+de datas são lidos numa só consulta (UNION ALL sobre `servicos` e as
+tabelas dos módulos Aqua e Verde, cada ramo pelo seu índice de
+`data_servico`) e devolvidos por dia, com o total de horas. As
+ocorrências previstas dos planos recorrentes entram como `origem="plano"`.
+
+A resposta leva um ETag calculado sobre o conteúdo: uma semana sem
+alterações é respondida com 304, sem corpo.
+"""
+
+import hashlib
+import json
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Table, select, union_all
+from sqlalchemy.orm import Session
+
+from .origens import ramo_servicos, tabelas_servicos
+from .recorrencia import ocorrencias_na_janela
+from ..models.cliente import Cliente
+
+# Maior janela pedida de uma vez (dois meses com as semanas das pontas)
+MAX_DIAS_CALENDARIO = 62
+# Estado que não conta para o total de horas do dia
+STATUS_SEM_HORAS = "cancelado"
+
+
+def consulta_calendario(tabelas: Dict[str, Table], inicio: date, fim: date):
+    """Serviços de todas as tabelas entre as duas datas, com o nome do cliente."""
+    ramos = [ramo_servicos(tabela, origem, inicio, fim) for origem, tabela in tabelas.items()]
+    uniao = union_all(*ramos).subquery()
+    return (
+        select(uniao, Cliente.nome.label("cliente_nome"))
+        .outerjoin(Cliente, uniao.c.cliente_id == Cliente.id)
+        .order_by(uniao.c.data_servico, uniao.c.origem, uniao.c.id)
+    )
+
+
+def _ocorrencias_previstas(db: Session, inicio: date, fim: date) -> List[dict]:
+    """Ocorrências dos planos ainda sem serviço (as outras já vêm da consulta)."""
+    ocorrencias = ocorrencias_na_janela(db, inicio, fim, incluir_materializadas=False)
+    if not ocorrencias:
+        return []
+    ids = {ocorrencia["cliente_id"] for ocorrencia in ocorrencias}
+    nomes = dict(db.execute(select(Cliente.id, Cliente.nome).where(Cliente.id.in_(ids))).all())
+    return [
+        {
+            "origem": "plano",
+            "id": None,
+            "tipo": ocorrencia["tipo"],
+            "data_servico": ocorrencia["data_servico"],
+            "duracao_horas": ocorrencia["duracao_horas"],
+            "status": ocorrencia["status"],
+            "cliente_id": ocorrencia["cliente_id"],
+            "cliente_nome": nomes.get(ocorrencia["cliente_id"]),
+            "descricao": ocorrencia["descricao"],
+            "plano_id": ocorrencia["plano_id"],
+        }
+        for ocorrencia in ocorrencias
+    ]
+
+
+def agrupar_por_dia(entradas: Iterable[dict], inicio: date, fim: date) -> List[dict]:
+    """Um grupo por dia da janela (incluindo os vazios), com o total de horas."""
+    dias = {inicio + timedelta(days=n): [] for n in range((fim - inicio).days + 1)}
+    for entrada in entradas:
+        dias[entrada["data_servico"]].append(entrada)
+    return [
+        {
+            "data": dia,
+            "total_horas": sum(
+                e["duracao_horas"] or 0 for e in servicos if e["status"] != STATUS_SEM_HORAS
+            ),
+            "servicos": servicos,
+        }
+        for dia, servicos in dias.items()
+    ]
+
+
+def calcular_calendario(db: Session, inicio: date, fim: date) -> dict:
+    """Calendário de `inicio` a `fim` (inclusive), agrupado por dia."""
+    tabelas = tabelas_servicos(db.get_bind())
+    entradas = [dict(linha) for linha in db.execute(consulta_calendario(tabelas, inicio, fim)).mappings()]
+    # Dentro de cada dia: serviços por origem e id, depois as ocorrências previstas
+    entradas.extend(_ocorrencias_previstas(db, inicio, fim))
+    return {"inicio": inicio, "fim": fim, "dias": agrupar_por_dia(entradas, inicio, fim)}
+
+
+def etag_conteudo(dados) -> str:
+    """ETag fraco derivado do conteúdo serializado (independente da ordem das chaves)."""
+    serializado = json.dumps(jsonable_encoder(dados), sort_keys=True, separators=(",", ":"))
+    return f'W/"{hashlib.blake2b(serializado.encode("utf-8"), digest_size=16).hexdigest()}"'
+
+
+def etag_corresponde(if_none_match: Optional[str], etag: str) -> bool:
+    """Indica se o cabeçalho If-None-Match inclui o ETag (comparação fraca)."""
+    if not if_none_match:
+        return False
+    valores = [valor.strip() for valor in if_none_match.split(",")]
+    return "*" in valores or any(valor.removeprefix("W/") == etag.removeprefix("W/") for valor in valores)
@@ -0,0 +1,269 @@
+"""
+Capacidade diária de serviços e procura do próximo dia livre.
+
+As horas marcadas por dia (`duracao_horas` dos serviços não cancelados)
+são contadores mantidos incrementalmente, um por tabela (`servicos`,
+`servicos_piscina`, `servicos_jardim`; ver `contadores.chaves_servico`).
+Verificar um dia custa uma consulta a três chaves, independentemente do
+número de serviços:
+
+- `garantir_capacidade` corre depois do flush de uma marcação (os
+  contadores já incluem o serviço, na mesma transacção) e rejeita-a se o
+  dia ficou acima de DAILY_CAPACITY_HOURS;
+- `AgendaCapacidade` guarda os próximos CAPACITY_HORIZON_DAYS dias numa
+  árvore de segmentos com o mínimo de horas marcadas de cada intervalo:
+  o primeiro dia com `duracao` horas livres é encontrado em O(log n).
+
+Cada worker tem a sua agenda. Os dias alterados neste processo são
+relidos na procura seguinte; alterações de outros workers aparecem
+quando a agenda é relida (CAPACITY_REFRESH_SECONDS). O dia proposto é
+sempre confirmado nos contadores antes de ser devolvido.
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from .contadores import ler_contadores
+from .replit_config import config
+from ..models.contador import Contador
+
+# Prefixos dos contadores de horas (um por tabela de serviços)
+PREFIXOS_HORAS = ("servicos", "servicos_piscina", "servicos_jardim")
+SUFIXO_HORAS = ":horas:dia:"
+STATUS_SEM_HORAS = "cancelado"
+
+
+def chave_horas(prefixo: str, dia: date) -> str:
+    return f"{prefixo}{SUFIXO_HORAS}{dia.isoformat()}"
+
+
+def dia_da_chave(chave: str) -> Optional[date]:
+    """Dia de uma chave de horas, ou None para as restantes chaves."""
+    prefixo, separador, dia = chave.partition(SUFIXO_HORAS)
+    if not separador or prefixo not in PREFIXOS_HORAS:
+        return None
+    return date.fromisoformat(dia)
+
+
+def horas_por_dia(db: Session, inicio: date, fim: date) -> Dict[date, int]:
+    """
+    Horas marcadas por dia entre as duas datas, somando todas as tabelas.
+    Lê só os contadores do intervalo (pela chave primária); os dias sem
+    serviços não aparecem.
+    """
+    intervalos = [
+        Contador.chave.between(chave_horas(prefixo, inicio), chave_horas(prefixo, fim))
+        for prefixo in PREFIXOS_HORAS
+    ]
+    horas: Dict[date, int] = {}
+    for chave, valor in db.execute(select(Contador.chave, Contador.valor).where(or_(*intervalos))):
+        dia = dia_da_chave(chave)
+        horas[dia] = horas.get(dia, 0) + valor
+    return horas
+
+
+def horas_dos_dias(db: Session, dias: Iterable[date]) -> Dict[date, int]:
+    """Horas marcadas em cada um dos dias indicados (0 se não há serviços)."""
+    dias = set(dias)
+    valores = ler_contadores(db, [chave_horas(prefixo, dia) for dia in dias for prefixo in PREFIXOS_HORAS])
+    horas = dict.fromkeys(dias, 0)
+    for chave, valor in valores.items():
+        horas[dia_da_chave(chave)] += valor
+    return horas
+
+
+def reserva(servico) -> Tuple[Optional[date], int]:
+    """(dia, horas) que o serviço ocupa; os cancelados não ocupam horas."""
+    estado = getattr(servico, "status", None)
+    estado = getattr(estado, "value", estado)
+    horas = 0 if estado == STATUS_SEM_HORAS else (servico.duracao_horas or 0)
+    return servico.data_servico, horas
+
+
+def garantir_capacidade(db: Session, nova: Tuple[Optional[date], int],
+                        anterior: Optional[Tuple[Optional[date], int]] = None) -> None:
+    """
+    Rejeita (400, desfazendo a transacção) uma marcação que deixa o dia
+    acima da capacidade. Chamada depois do flush com a `reserva` do
+    serviço; `anterior` é a reserva antes de uma alteração: só aumentos de
+    horas no dia são verificados, para que serviços já marcados continuem
+    editáveis.
+    """
+    capacidade = config.DAILY_CAPACITY_HOURS
+    dia, horas = nova
+    if not capacidade or not horas or dia is None:
+        return
+    horas_anteriores = anterior[1] if anterior is not None and anterior[0] == dia else 0
+    if horas <= horas_anteriores:
+        return
+    marcadas = horas_dos_dias(db, [dia])[dia]
+    if marcadas <= capacidade:
+        return
+    db.rollback()
+    livres = max(0, capacidade - (marcadas - horas + horas_anteriores))
+    raise HTTPException(
+        status_code=400,
+        detail=f"Capacidade diária excedida em {dia}: {livres} de {capacidade} horas livres, o serviço ocupa {horas}"
+    )
+
+
+class ArvoreMinimos:
+    """
+    Árvore de segmentos sobre uma lista de inteiros: alterar um valor e
+    encontrar o primeiro índice com valor <= limite custam O(log n).
+    """
+
+    def __init__(self, valores: List[int]):
+        self.tamanho = len(valores)
+        self._folhas = 1
+        while self._folhas < max(self.tamanho, 1):
+            self._folhas *= 2
+        infinito = float("inf")
+        self._minimos = [infinito] * (2 * self._folhas)
+        self._minimos[self._folhas:self._folhas + self.tamanho] = valores
+        for no in range(self._folhas - 1, 0, -1):
+            self._minimos[no] = min(self._minimos[2 * no], self._minimos[2 * no + 1])
+
+    def valor(self, indice: int) -> int:
+        return self._minimos[self._folhas + indice]
+
+    def alterar(self, indice: int, valor: int) -> None:
+        no = self._folhas + indice
+        self._minimos[no] = valor
+        no //= 2
+        while no:
+            self._minimos[no] = min(self._minimos[2 * no], self._minimos[2 * no + 1])
+            no //= 2
+
+    def primeiro_ate(self, inicio: int, limite: int) -> Optional[int]:
+        """Primeiro índice >= inicio com valor <= limite, ou None."""
+        if inicio >= self.tamanho:
+            return None
+        return self._procurar(1, 0, self._folhas - 1, inicio, limite)
+
+    def _procurar(self, no: int, esquerda: int, direita: int, inicio: int, limite: int) -> Optional[int]:
+        # Desce só pelos ramos com algum valor <= limite à direita de `inicio`
+        if direita < inicio or self._minimos[no] > limite:
+            return None
+        if esquerda == direita:
+            return esquerda
+        meio = (esquerda + direita) // 2
+        encontrado = self._procurar(2 * no, esquerda, meio, inicio, limite)
+        if encontrado is None:
+            encontrado = self._procurar(2 * no + 1, meio + 1, direita, inicio, limite)
+        return encontrado
+
+
+class AgendaCapacidade:
+    """
+    Horas marcadas nos próximos `horizonte_dias` dias, para a procura do
+    próximo dia livre.
+
+    - **horizonte_dias**: dias abrangidos, a partir de hoje
+    - **refrescar_segundos**: idade máxima antes de reler todos os dias
+      (0 desactiva a releitura periódica)
+    """
+
+    def __init__(self, horizonte_dias: int = 365, refrescar_segundos: float = 0):
+        self.horizonte_dias = horizonte_dias
+        self.refrescar_segundos = refrescar_segundos
+        self._arvore: Optional[ArvoreMinimos] = None
+        self._inicio: Optional[date] = None
+        self._pendentes = set()
+        self._lock = threading.Lock()
+        self.construido_em: Optional[float] = None
+        self.duracao_construcao_ms = 0.0
+        self.procuras = 0
+        self.correccoes = 0
+
+    def carregar(self, db: Session, hoje: Optional[date] = None) -> None:
+        """Lê as horas de todos os dias do horizonte, numa consulta."""
+        inicio = time.perf_counter()
+        hoje = hoje or date.today()
+        horas = horas_por_dia(db, hoje, hoje + timedelta(days=self.horizonte_dias - 1))
+        valores = [horas.get(hoje + timedelta(days=n), 0) for n in range(self.horizonte_dias)]
+        with self._lock:
+            self._arvore = ArvoreMinimos(valores)
+            self._inicio = hoje
+            self._pendentes = set()
+            self.construido_em = time.monotonic()
+            self.duracao_construcao_ms = round((time.perf_counter() - inicio) * 1000, 2)
+
+    def invalidar(self) -> None:
+        """Força a releitura completa no próximo pedido."""
+        with self._lock:
+            self.construido_em = None
+
+    def marcar_chaves(self, chaves: Iterable[str]) -> None:
+        """Observador dos contadores: os dias alterados são relidos na próxima procura."""
+        dias = [dia for dia in map(dia_da_chave, chaves) if dia is not None]
+        if dias:
+            with self._lock:
+                self._pendentes.update(dias)
+
+    def _desactualizada(self, hoje: date) -> bool:
+        construido_em = self.construido_em
+        return (
+            construido_em is None
+            or self._inicio != hoje
+            or bool(self.refrescar_segundos and time.monotonic() - construido_em >= self.refrescar_segundos)
+        )
+
+    def _corrigir(self, horas: Dict[date, int]) -> None:
+        for dia, valor in horas.items():
+            indice = (dia - self._inicio).days
+            if 0 <= indice < self.horizonte_dias and self._arvore.valor(indice) != valor:
+                self._arvore.alterar(indice, valor)
+                self.correccoes += 1
+
+    def proximo_dia_livre(self, db: Session, duracao: int, capacidade: int,
+                          a_partir_de: date, hoje: Optional[date] = None) -> Optional[Tuple[date, int]]:
+        """
+        Primeiro dia >= a_partir_de (dentro do horizonte) com `duracao` horas
+        livres, e as horas já marcadas nesse dia; None se não houver.
+        """
+        hoje = hoje or date.today()
+        if self._desactualizada(hoje):
+            self.carregar(db, hoje)
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, set()
+        if pendentes:
+            horas = horas_dos_dias(db, pendentes)
+            with self._lock:
+                self._corrigir(horas)
+
+        indice = (a_partir_de - hoje).days
+        limite = capacidade - duracao
+        while True:
+            with self._lock:
+                self.procuras += 1
+                indice = self._arvore.primeiro_ate(indice, limite)
+            if indice is None:
+                return None
+            dia = hoje + timedelta(days=indice)
+            # Confirma o dia nos contadores (escritas de outros workers)
+            marcadas = horas_dos_dias(db, [dia])[dia]
+            with self._lock:
+                self._corrigir({dia: marcadas})
+            if marcadas <= limite:
+                return dia, marcadas
+
+    def estatisticas(self) -> Dict[str, object]:
+        with self._lock:
+            idade = None if self.construido_em is None else round(time.monotonic() - self.construido_em, 1)
+            return {
+                "horizonte_dias": self.horizonte_dias,
+                "inicio": self._inicio.isoformat() if self._inicio else None,
+                "duracao_construcao_ms": self.duracao_construcao_ms,
+                "idade_segundos": idade,
+                "refrescar_segundos": self.refrescar_segundos,
+                "procuras": self.procuras,
+                "correccoes": self.correccoes,
+                "dias_pendentes": len(self._pendentes),
+            }
@@ -0,0 +1,237 @@
+"""
+Contadores agregados mantidos incrementalmente.
+
+Os modelos registam, com `registar_contadores`, os atributos relevantes e
+uma função que devolve as chaves de contador a que cada linha pertence
+(cada chave conta 1, ou `peso` quando é devolvida como `(chave, peso)`).
+Antes de cada flush as criações, alterações e eliminações pendentes são
+convertidas em incrementos e aplicadas na tabela `contadores`, na mesma
+transacção das escritas: se o commit falhar, os contadores também não
+mudam. Qualquer rota (base, async, módulos) fica coberta sem alterações.
+
+Operações em massa que não passam pela sessão ORM (ex.: `query.update`)
+devem chamar `aplicar_incrementos` explicitamente. `reconciliar_contadores`
+recalcula tudo de raiz e reporta a deriva.
+"""
+
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Mapping, Sequence, Tuple, Union
+
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models.contador import Contador
+
+FuncaoChaves = Callable[[Mapping[str, object]], Iterable[Union[str, Tuple[str, int]]]]
+
+# Versão das chaves: mudá-la altera o carimbo do esquema e o arranque
+# seguinte recalcula os contadores (ver `arranque.impressao_esquema`)
+VERSAO_CONTADORES = 2
+
+# Modelo -> (atributos, função que devolve as chaves da linha)
+_regras: Dict[type, Tuple[Sequence[str], FuncaoChaves]] = {}
+# Funções chamadas com as chaves alteradas por `aplicar_incrementos`
+_observadores: List[Callable[[Iterable[str]], None]] = []
+
+
+def _normalizar(valor):
+    """Enums (ex.: StatusServico) são contados pelo seu valor."""
+    return getattr(valor, "value", valor)
+
+
+def registar_contadores(modelo, atributos: Sequence[str], chaves: FuncaoChaves) -> None:
+    """Mantém os contadores do modelo a partir dos atributos indicados."""
+    _regras[modelo] = (tuple(atributos), chaves)
+
+
+def observar_incrementos(funcao: Callable[[Iterable[str]], None]) -> None:
+    """
+    Regista uma função chamada com as chaves de cada `aplicar_incrementos`
+    (ex.: estruturas em memória derivadas dos contadores). É chamada antes
+    do commit: deve apenas marcar as chaves para serem relidas.
+    """
+    if funcao not in _observadores:
+        _observadores.append(funcao)
+
+
+def _somar(incrementos: Counter, chaves: Iterable[Union[str, Tuple[str, int]]], sinal: int = 1) -> None:
+    for chave in chaves:
+        peso = 1
+        if isinstance(chave, tuple):
+            chave, peso = chave
+        incrementos[chave] += sinal * peso
+
+
+def chaves_servico(prefixo: str) -> FuncaoChaves:
+    """
+    Chaves de um serviço: total, tipo, estado, mês, agendados por dia e
+    horas marcadas por dia (sem os cancelados; pesadas por `duracao_horas`).
+    """
+    def chaves(servico: Mapping[str, object]) -> Iterable[str]:
+        yield f"{prefixo}:total"
+        if servico.get("tipo"):
+            yield f"{prefixo}:tipo:{servico['tipo']}"
+        estado = servico.get("status")
+        if estado:
+            yield f"{prefixo}:status:{estado}"
+        data = servico.get("data_servico")
+        if data:
+            yield f"{prefixo}:mes:{data:%Y-%m}"
+            if estado == "agendado":
+                yield f"{prefixo}:agendados:dia:{data.isoformat()}"
+            if estado != "cancelado" and servico.get("duracao_horas"):
+                yield f"{prefixo}:horas:dia:{data.isoformat()}", servico["duracao_horas"]
+    return chaves
+
+
+def chaves_cliente(cliente: Mapping[str, object]) -> Iterable[str]:
+    """Chaves de um cliente: total e clientes com telefone/endereço."""
+    yield "clientes:total"
+    if cliente.get("telefone") is not None:
+        yield "clientes:com_telefone"
+    if cliente.get("endereco") is not None:
+        yield "clientes:com_endereco"
+
+
+def _valores_actuais(obj, atributos) -> Dict[str, object]:
+    valores = {}
+    for nome in atributos:
+        valor = getattr(obj, nome)
+        if valor is None:
+            # Valores por defeito das colunas só são aplicados no INSERT
+            padrao = obj.__table__.c[nome].default
+            if padrao is not None and padrao.is_scalar:
+                valor = padrao.arg
+        valores[nome] = _normalizar(valor)
+    return valores
+
+
+def _valores_anteriores(estado, atributos) -> Dict[str, object]:
+    valores = {}
+    for nome in atributos:
+        historia = estado.attrs[nome].load_history()
+        anteriores = historia.deleted or historia.unchanged
+        valores[nome] = _normalizar(anteriores[0]) if anteriores else None
+    return valores
+
+
+def calcular_incrementos(session: Session) -> Counter:
+    """Incrementos correspondentes às alterações pendentes na sessão."""
+    incrementos = Counter()
+    for obj in session.new:
+        regra = _regras.get(type(obj))
+        if regra:
+            atributos, chaves = regra
+            _somar(incrementos, chaves(_valores_actuais(obj, atributos)))
+    for obj in session.dirty:
+        regra = _regras.get(type(obj))
+        if not regra or not session.is_modified(obj):
+            continue
+        atributos, chaves = regra
+        estado = inspect(obj)
+        if not any(estado.attrs[nome].history.has_changes() for nome in atributos):
+            continue
+        _somar(incrementos, chaves(_valores_anteriores(estado, atributos)), -1)
+        _somar(incrementos, chaves(_valores_actuais(obj, atributos)))
+    for obj in session.deleted:
+        regra = _regras.get(type(obj))
+        if regra:
+            atributos, chaves = regra
+            _somar(incrementos, chaves(_valores_anteriores(inspect(obj), atributos)), -1)
+    return Counter({chave: delta for chave, delta in incrementos.items() if delta})
+
+
+def aplicar_incrementos(conn, incrementos: Mapping[str, int]) -> None:
+    """Soma os incrementos aos contadores (UPSERT quando o dialecto o suporta)."""
+    tabela = Contador.__table__
+    dialectos = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+    inserir = dialectos.get(conn.dialect.name)
+    for chave, delta in sorted(incrementos.items()):
+        if not delta:
+            continue
+        if inserir is not None:
+            conn.execute(
+                inserir(tabela)
+                .values(chave=chave, valor=delta)
+                .on_conflict_do_update(index_elements=[tabela.c.chave], set_={"valor": tabela.c.valor + delta})
+            )
+            continue
+        resultado = conn.execute(
+            update(tabela).where(tabela.c.chave == chave).values(valor=tabela.c.valor + delta)
+        )
+        if resultado.rowcount == 0:
+            conn.execute(insert(tabela).values(chave=chave, valor=delta))
+    for observador in _observadores:
+        observador(incrementos.keys())
+
+
+def incrementos_linhas(modelo, linhas: Iterable[Mapping[str, object]], sinal: int = 1) -> Counter:
+    """
+    Incrementos de linhas escritas fora da sessão ORM: `sinal=1` para
+    linhas inseridas, `sinal=-1` para linhas eliminadas. Uma alteração é
+    a soma dos dois (valores antigos com -1, novos com 1).
+    """
+    regra = _regras.get(modelo)
+    incrementos = Counter()
+    if regra is None:
+        return incrementos
+    atributos, chaves = regra
+    for linha in linhas:
+        _somar(incrementos, chaves({nome: _normalizar(linha.get(nome)) for nome in atributos}), sinal)
+    return incrementos
+
+
+@event.listens_for(Session, "before_flush")
+def _actualizar_contadores(session, flush_context, instances) -> None:
+    """Listener de sessão: aplica os incrementos na transacção do flush."""
+    if not _regras:
+        return
+    incrementos = calcular_incrementos(session)
+    if incrementos:
+        aplicar_incrementos(session.connection(), incrementos)
+
+
+def ler_contadores(db: Session, chaves: Iterable[str]) -> Dict[str, int]:
+    """Valores das chaves pedidas (0 para as inexistentes), numa só consulta."""
+    chaves = list(chaves)
+    valores = dict(db.execute(select(Contador.chave, Contador.valor).where(Contador.chave.in_(chaves))).all())
+    return {chave: valores.get(chave, 0) for chave in chaves}
+
+
+def recalcular_contadores(db: Session) -> Counter:
+    """Recalcula todos os contadores a partir das tabelas de origem."""
+    reais = Counter()
+    for modelo, (atributos, chaves) in _regras.items():
+        colunas = [getattr(modelo, nome) for nome in atributos]
+        for linha in db.execute(select(*colunas).execution_options(yield_per=10_000)):
+            _somar(reais, chaves({nome: _normalizar(valor) for nome, valor in zip(atributos, linha)}))
+    return reais
+
+
+def reconciliar_contadores(db: Session, corrigir: bool = True) -> Dict[str, object]:
+    """
+    Compara os contadores guardados com um recálculo completo.
+
+    Devolve a deriva por chave e, com `corrigir`, substitui os contadores
+    pelos valores recalculados. Deve correr fora de picos de escrita: as
+    escritas concorrentes durante o recálculo podem surgir como deriva.
+    """
+    reais = recalcular_contadores(db)
+    guardados = dict(db.execute(select(Contador.chave, Contador.valor)).all())
+    deriva = {
+        chave: {"guardado": guardados.get(chave, 0), "real": reais.get(chave, 0)}
+        for chave in sorted(set(reais) | set(guardados))
+        if guardados.get(chave, 0) != reais.get(chave, 0)
+    }
+    if corrigir and deriva:
+        tabela = Contador.__table__
+        db.execute(tabela.delete())
+        if reais:
+            db.execute(insert(tabela), [{"chave": chave, "valor": valor} for chave, valor in reais.items() if valor])
+        db.commit()
+    return {
+        "chaves": len(reais),
+        "deriva": deriva,
+        "corrigido": bool(corrigir and deriva),
+    }
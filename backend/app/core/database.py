@@ -3,18 +3,196 @@ Configuração da base de dados SQLAlchemy para GestOnGo
 Sistema modular com suporte para versão base e módulos pagos
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event, exc, inspect, text
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+from typing import Optional
+import hashlib
 import os
+import threading
+import time
+
+from .cache import CacheTTL
+from .replit_config import config
 
 # URL da base de dados (SQLite para desenvolvimento)
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./gestongo.db")
 
-# Configurar engine SQLite com check_same_thread=False para FastAPI
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
-)
+
+class QueuePoolMonitorizado(QueuePool):
+    """
+    QueuePool que mede o tempo de espera por uma ligação e conta os
+    timeouts, para dimensionar o pool face ao número de workers uvicorn.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock_metricas = threading.Lock()
+        self.pedidos_ligacao = 0
+        self.tempo_espera_total = 0.0
+        self.tempo_espera_max = 0.0
+        self.timeouts = 0
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._lock_metricas:
+                self.timeouts += 1
+            raise
+        finally:
+            espera = time.perf_counter() - inicio
+            with self._lock_metricas:
+                self.pedidos_ligacao += 1
+                self.tempo_espera_total += espera
+                self.tempo_espera_max = max(self.tempo_espera_max, espera)
+
+    def estatisticas(self) -> dict:
+        with self._lock_metricas:
+            return {
+                "tamanho": self.size(),
+                "max_overflow": self._max_overflow,
+                "capacidade_maxima": self.size() + max(self._max_overflow, 0),
+                "em_uso": self.checkedout(),
+                "livres": self.checkedin(),
+                "overflow": self.overflow(),
+                "pedidos_ligacao": self.pedidos_ligacao,
+                "timeouts": self.timeouts,
+                "espera_media_ms": round(self.tempo_espera_total / self.pedidos_ligacao * 1000, 3) if self.pedidos_ligacao else 0.0,
+                "espera_max_ms": round(self.tempo_espera_max * 1000, 3),
+            }
+
+
+def opcoes_engine(url: str) -> dict:
+    """Argumentos de create_engine adequados ao tipo de base de dados."""
+    if url.startswith("sqlite"):
+        # check_same_thread=False para FastAPI
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "poolclass": QueuePoolMonitorizado,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **opcoes_engine(SQLALCHEMY_DATABASE_URL))
+
+
+def estatisticas_pool(bind=None) -> dict:
+    """Estado actual do pool de ligações do engine (por processo)."""
+    bind = bind if bind is not None else engine
+    pool = bind.pool
+    if isinstance(pool, QueuePoolMonitorizado):
+        return pool.estatisticas()
+    return {"tipo": type(pool).__name__, "estado": pool.status()}
+
+
+def _valor_pragma(valor) -> str:
+    """Aceita apenas valores simples (palavras ou números) vindos da configuração."""
+    texto = str(valor).strip()
+    if not texto.lstrip("-").isalnum():
+        raise ValueError(f"Valor inválido para PRAGMA SQLite: {valor!r}")
+    return texto
+
+
+def aplicar_pragmas_sqlite(dbapi_connection, connection_record):
+    """
+    Aplica o perfil de desempenho a cada nova ligação SQLite.
+
+    - WAL: leitores deixam de bloquear perante o único escritor
+    - synchronous=NORMAL: seguro em WAL, evita fsync em cada commit
+    - cache_size/mmap_size: mais páginas em memória, menos leituras do disco
+    - temp_store=MEMORY: ordenações e tabelas temporárias em memória
+    - busy_timeout: espera pelo lock em vez de falhar com "database is locked"
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={_valor_pragma(config.SQLITE_JOURNAL_MODE)}")
+        cursor.execute(f"PRAGMA synchronous={_valor_pragma(config.SQLITE_SYNCHRONOUS)}")
+        cursor.execute(f"PRAGMA cache_size={_valor_pragma(config.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size={_valor_pragma(config.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA temp_store={_valor_pragma(config.SQLITE_TEMP_STORE)}")
+        cursor.execute(f"PRAGMA busy_timeout={_valor_pragma(config.SQLITE_BUSY_TIMEOUT_MS)}")
+    finally:
+        cursor.close()
+
+
+if engine.dialect.name == "sqlite" and config.SQLITE_PERFORMANCE_PROFILE:
+    event.listen(engine, "connect", aplicar_pragmas_sqlite)
+
+
+class ManutencaoSQLite:
+    """
+    Tarefa periódica em segundo plano para SQLite em modo WAL.
+
+    Faz checkpoint do ficheiro WAL (impede que cresça sem limite e que as
+    leituras fiquem mais lentas) e corre `PRAGMA optimize` para manter as
+    estatísticas do planeador actualizadas.
+    """
+
+    def __init__(self, bind, intervalo_segundos: int):
+        self.bind = bind
+        self.intervalo_segundos = intervalo_segundos
+        self._parar = threading.Event()
+        self._thread = None
+        self.execucoes = 0
+
+    @property
+    def activa(self) -> bool:
+        return self._thread is not None
+
+    def executar(self) -> None:
+        """Executa uma ronda de manutenção."""
+        with self.bind.connect() as conn:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+            conn.exec_driver_sql("PRAGMA optimize")
+        self.execucoes += 1
+
+    def _ciclo(self) -> None:
+        while not self._parar.wait(self.intervalo_segundos):
+            try:
+                self.executar()
+            except Exception as erro:  # a manutenção nunca deve derrubar o servidor
+                print(f"⚠️ Manutenção SQLite falhou: {erro}")
+
+    def iniciar(self) -> None:
+        if self._thread is not None or self.intervalo_segundos <= 0:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._ciclo, name="manutencao-sqlite", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+
+manutencao_sqlite = ManutencaoSQLite(engine, config.SQLITE_MAINTENANCE_INTERVAL_SECONDS)
+
+
+def iniciar_manutencao_sqlite():
+    """Arranca a manutenção periódica (apenas em SQLite com o perfil activo)."""
+    if engine.dialect.name == "sqlite" and config.SQLITE_PERFORMANCE_PROFILE:
+        manutencao_sqlite.iniciar()
+
+
+def parar_manutencao_sqlite():
+    """Pára a manutenção periódica e deixa o planeador optimizado à saída."""
+    if not manutencao_sqlite.activa:
+        return
+    manutencao_sqlite.parar()
+    try:
+        manutencao_sqlite.executar()
+    except Exception as erro:
+        print(f"⚠️ Manutenção SQLite falhou: {erro}")
 
 # Criar SessionLocal para ligações à base de dados
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -22,38 +200,304 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base declarativa para todos os modelos ORM
 Base = declarative_base()
 
+class EstatisticasSessoes:
+    """
+    Contadores de sessões e ligações, para confirmar que cada pedido usa
+    uma única sessão e que só requisita ligação quando faz consultas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sessoes = 0
+        self.sessoes_sem_ligacao = 0
+        self.ligacoes = 0
+        self.max_ligacoes_por_sessao = 0
+        self.checkouts_pool = 0
+
+    def registar_sessao(self, ligacoes: int) -> None:
+        with self._lock:
+            self.sessoes += 1
+            self.ligacoes += ligacoes
+            if ligacoes == 0:
+                self.sessoes_sem_ligacao += 1
+            self.max_ligacoes_por_sessao = max(self.max_ligacoes_por_sessao, ligacoes)
+
+    def registar_checkout(self) -> None:
+        with self._lock:
+            self.checkouts_pool += 1
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "sessoes": self.sessoes,
+                "sessoes_sem_ligacao": self.sessoes_sem_ligacao,
+                "ligacoes": self.ligacoes,
+                "media_ligacoes_por_sessao": round(self.ligacoes / self.sessoes, 3) if self.sessoes else 0.0,
+                "max_ligacoes_por_sessao": self.max_ligacoes_por_sessao,
+                "checkouts_pool": self.checkouts_pool,
+            }
+
+
+estatisticas_sessoes = EstatisticasSessoes()
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def _contar_ligacao(session, transaction, connection):
+    """A sessão só obtém ligação ao iniciar a primeira transacção (checkout lazy)."""
+    session.info["ligacoes"] = session.info.get("ligacoes", 0) + 1
+
+
+@event.listens_for(engine, "checkout")
+def _contar_checkout(dbapi_connection, connection_record, connection_proxy):
+    estatisticas_sessoes.registar_checkout()
+
+
+# Invalidações de cache pendentes, guardadas em session.info até ao commit
+CHAVE_INVALIDACOES = "invalidacoes_pendentes"
+
+
+def invalidar_apos_commit(sessao: Optional[Session], chave, invalidar) -> None:
+    """
+    Agenda `invalidar()` para depois do commit da sessão.
+
+    Invalidar durante o flush deixa um pedido concorrente voltar a pôr
+    em cache a linha antiga, ainda confirmada, até expirar o TTL. A
+    `chave` evita repetir a mesma invalidação no mesmo commit; um
+    rollback descarta as pendentes. Sem sessão, invalida logo.
+    """
+    if sessao is None:
+        invalidar()
+        return
+    sessao.info.setdefault(CHAVE_INVALIDACOES, {})[chave] = invalidar
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_invalidacoes(session):
+    for invalidar in session.info.pop(CHAVE_INVALIDACOES, {}).values():
+        invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_invalidacoes(session):
+    session.info.pop(CHAVE_INVALIDACOES, None)
+
+
 def get_db():
     """
     Dependência para obter uma sessão da base de dados
     Usado nas rotas FastAPI com Depends(get_db)
+
+    É a única dependência de sessão da aplicação: o FastAPI reutiliza o
+    resultado dentro do mesmo pedido, pelo que a autenticação e a rota
+    partilham a mesma sessão. Nenhuma ligação é requisitada ao pool até
+    à primeira consulta.
     """
     db = SessionLocal()
     try:
         yield db
     finally:
+        estatisticas_sessoes.registar_sessao(db.info.get("ligacoes", 0))
         db.close()
 
-def criar_tabelas():
+# Réplica de leitura opcional (ex.: réplica PostgreSQL ou cópia SQLite em testes)
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("DATABASE_READ_URL", "")
+
+# Cabeçalho com que o cliente exige ler da primária
+CABECALHO_CONSISTENCIA = "X-Consistencia"
+
+
+class EncaminhamentoLeituras:
+    """
+    Decide se uma leitura é servida pela réplica ou pela primária.
+
+    A réplica é a escolha por defeito. A leitura vai à primária quando
+    não há réplica configurada, quando a réplica falhou há menos de
+    `pausa_falha_segundos`, quando o pedido traz `X-Consistencia: primaria`
+    ou quando o mesmo cliente escreveu há menos de `janela_segundos`
+    (read-your-writes, cobre o atraso de replicação).
+    """
+
+    def __init__(self, bind=None, janela_segundos: float = 5, pausa_falha_segundos: float = 30,
+                 max_clientes: int = 10000):
+        self.bind = bind
+        self.pausa_falha_segundos = pausa_falha_segundos
+        self._sessoes = sessionmaker(autocommit=False, autoflush=False, bind=bind) if bind is not None else None
+        self._escritas = CacheTTL(max_entradas=max_clientes, ttl_segundos=janela_segundos)
+        self._lock = threading.Lock()
+        self._indisponivel_ate = 0.0
+        self.leituras_replica = 0
+        self.leituras_primaria = 0
+        self.leituras_apos_escrita = 0
+        self.falhas_replica = 0
+
+    @property
+    def activo(self) -> bool:
+        return self.bind is not None
+
+    def registar_escrita(self, chave: str) -> None:
+        """Marca o cliente como tendo escrito agora."""
+        if self.activo:
+            self._escritas.guardar(chave, True)
+
+    def _primaria(self, apos_escrita: bool = False) -> None:
+        with self._lock:
+            self.leituras_primaria += 1
+            if apos_escrita:
+                self.leituras_apos_escrita += 1
+        return None
+
+    def abrir_sessao(self, chave: Optional[str] = None, forcar_primaria: bool = False) -> Optional[Session]:
+        """Devolve uma sessão na réplica, ou None quando a leitura deve ir à primária."""
+        if not self.activo or forcar_primaria:
+            return self._primaria()
+        if chave is not None and self._escritas.obter(chave):
+            return self._primaria(apos_escrita=True)
+        if time.monotonic() < self._indisponivel_ate:
+            return self._primaria()
+
+        sessao = self._sessoes()
+        try:
+            # Requisita já a ligação para detectar uma réplica em baixo
+            sessao.connection()
+        except exc.DBAPIError as erro:
+            sessao.close()
+            with self._lock:
+                self.falhas_replica += 1
+                self._indisponivel_ate = time.monotonic() + self.pausa_falha_segundos
+            print(f"⚠️ Réplica de leitura indisponível, a usar a primária: {erro}")
+            return self._primaria()
+
+        with self._lock:
+            self.leituras_replica += 1
+        return sessao
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "activo": self.activo,
+                "replica_disponivel": time.monotonic() >= self._indisponivel_ate,
+                "leituras_replica": self.leituras_replica,
+                "leituras_primaria": self.leituras_primaria,
+                "leituras_apos_escrita": self.leituras_apos_escrita,
+                "falhas_replica": self.falhas_replica,
+            }
+
+
+engine_leitura = None
+if SQLALCHEMY_READ_DATABASE_URL:
+    engine_leitura = create_engine(SQLALCHEMY_READ_DATABASE_URL, **opcoes_engine(SQLALCHEMY_READ_DATABASE_URL))
+    if engine_leitura.dialect.name == "sqlite" and config.SQLITE_PERFORMANCE_PROFILE:
+        event.listen(engine_leitura, "connect", aplicar_pragmas_sqlite)
+
+encaminhamento_leituras = EncaminhamentoLeituras(
+    engine_leitura,
+    janela_segundos=config.DB_READ_YOUR_WRITES_SECONDS,
+    pausa_falha_segundos=config.DB_REPLICA_RETRY_SECONDS,
+)
+
+
+def chave_consistencia(request: Request) -> str:
+    """Identifica o cliente para read-your-writes (token, ou endereço se anónimo)."""
+    autorizacao = request.headers.get("authorization")
+    if autorizacao:
+        return hashlib.sha256(autorizacao.encode()).hexdigest()[:32]
+    return request.client.host if request.client else "anonimo"
+
+
+def get_db_leitura(request: Request, db: Session = Depends(get_db)):
+    """
+    Dependência de sessão para rotas só de leitura (GET)
+    Usado nas rotas FastAPI com Depends(get_db_leitura)
+
+    Sem réplica, ou quando a consistência o exige, devolve a mesma sessão
+    de `get_db` (partilhada com a autenticação). Caso contrário abre uma
+    sessão na réplica, fechada no fim do pedido.
+    """
+    forcar_primaria = request.headers.get(CABECALHO_CONSISTENCIA, "").lower() == "primaria"
+    sessao = encaminhamento_leituras.abrir_sessao(chave_consistencia(request), forcar_primaria)
+    if sessao is None:
+        yield db
+        return
+    try:
+        yield sessao
+    finally:
+        sessao.close()
+
+
+async def registar_escritas(request: Request, call_next):
+    """
+    Middleware HTTP: após uma escrita bem sucedida, as leituras do mesmo
+    cliente vão à primária durante DB_READ_YOUR_WRITES_SECONDS.
+    """
+    resposta = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and resposta.status_code < 400:
+        encaminhamento_leituras.registar_escrita(chave_consistencia(request))
+    return resposta
+
+def adicionar_colunas_em_falta(bind=None, metadata=None):
+    """
+    Acrescenta às tabelas existentes as colunas novas dos modelos.
+
+    O `create_all` só cria tabelas inexistentes; esta função cobre o caso
+    simples de colunas acrescentadas a modelos já em produção. Apenas são
+    adicionadas colunas que aceitem NULL ou tenham valor por defeito no
+    servidor. Devolve a lista de colunas adicionadas.
+    """
+    bind = bind if bind is not None else engine
+    metadata = metadata if metadata is not None else Base.metadata
+    inspector = inspect(bind)
+    adicionadas = []
+    with bind.begin() as conn:
+        for tabela in metadata.sorted_tables:
+            if not inspector.has_table(tabela.name):
+                continue
+            existentes = {coluna["name"] for coluna in inspector.get_columns(tabela.name)}
+            for coluna in tabela.columns:
+                if coluna.name in existentes:
+                    continue
+                if not coluna.nullable and coluna.server_default is None:
+                    print(f"⚠️ Coluna {tabela.name}.{coluna.name} requer migração manual")
+                    continue
+                tipo = coluna.type.compile(dialect=bind.dialect)
+                ddl = f"ALTER TABLE {tabela.name} ADD COLUMN {coluna.name} {tipo}"
+                if coluna.server_default is not None:
+                    valor = coluna.server_default.arg
+                    valor = f"'{valor}'" if isinstance(valor, str) else valor.compile(dialect=bind.dialect)
+                    ddl += f" DEFAULT {valor}"
+                    if not coluna.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
+                adicionadas.append(f"{tabela.name}.{coluna.name}")
+    return adicionadas
+
+def criar_tabelas(forcar: bool = False):
     """
     Criar todas as tabelas na base de dados
-    Chamado no arranque da aplicação
+    Chamado no arranque da aplicação modular
+
+    Salta o `create_all` quando o carimbo do esquema coincide com os
+    modelos (ver `arranque.preparar_esquema`). Devolve True se o esquema
+    foi criado/actualizado.
     """
+    from .arranque import preparar_esquema
+
     # Importar todos os modelos para garantir que estão registados
-    from app.models_base import user, cliente
+    from app.models_base import registar_modelos
+    registar_modelos()
     
     # Módulos opcionais (podem ser comentados para desativar)
     try:
         from modules.verde.models import servico_jardim
-        print("✅ Módulo Verde (Jardinagem) carregado")
     except ImportError:
         print("ℹ️ Módulo Verde não disponível")
     
     try:
         from modules.aqua.models import servico_piscina
-        print("✅ Módulo Aqua (Piscinas) carregado")
     except ImportError:
         print("ℹ️ Módulo Aqua não disponível")
     
-    # Criar todas as tabelas
-    Base.metadata.create_all(bind=engine)
-    print("📊 Base de dados inicializada com sucesso")
+    # Criar tabelas, colunas e índices em falta
+    actualizado = preparar_esquema(engine, Base.metadata, "modular", forcar)
+    if actualizado:
+        print("📊 Base de dados inicializada com sucesso")
+    return actualizado
@@ -0,0 +1,77 @@
+"""
+Engine e sessões SQLAlchemy assíncronas para GestOnGo.
+
+Activado com DATABASE_ASYNC=true. Usa aiosqlite para SQLite e asyncpg
+para PostgreSQL; as rotas assíncronas deixam de ocupar uma thread do
+threadpool enquanto esperam pela base de dados, pelo que um único worker
+consegue manter muitos pedidos em curso.
+"""
+
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from .database import SQLALCHEMY_DATABASE_URL, aplicar_pragmas_sqlite
+from .replit_config import config
+
+# Drivers assíncronos por tipo de base de dados
+DRIVERS_ASYNC = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+_engine_async: Optional[AsyncEngine] = None
+_sessao_async: Optional[async_sessionmaker] = None
+
+
+def url_async(url: str) -> str:
+    """Converte o URL síncrono no equivalente com driver assíncrono."""
+    esquema, separador, resto = url.partition("://")
+    if "+" in esquema:
+        esquema = esquema.split("+", 1)[0]
+    if esquema not in DRIVERS_ASYNC:
+        raise ValueError(f"Base de dados sem driver assíncrono suportado: {esquema}")
+    return f"{DRIVERS_ASYNC[esquema]}{separador}{resto}"
+
+
+def obter_engine_async() -> AsyncEngine:
+    """Cria o engine assíncrono na primeira utilização."""
+    global _engine_async, _sessao_async
+    if _engine_async is None:
+        url = url_async(SQLALCHEMY_DATABASE_URL)
+        if url.startswith("sqlite"):
+            _engine_async = create_async_engine(url)
+            if config.SQLITE_PERFORMANCE_PROFILE:
+                event.listen(_engine_async.sync_engine, "connect", aplicar_pragmas_sqlite)
+        else:
+            _engine_async = create_async_engine(
+                url,
+                pool_size=config.DB_POOL_SIZE,
+                max_overflow=config.DB_MAX_OVERFLOW,
+                pool_timeout=config.DB_POOL_TIMEOUT,
+                pool_recycle=config.DB_POOL_RECYCLE,
+                pool_pre_ping=config.DB_POOL_PRE_PING,
+            )
+        _sessao_async = async_sessionmaker(_engine_async, expire_on_commit=False, autoflush=False)
+    return _engine_async
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependência para obter uma sessão assíncrona
+    Usado nas rotas assíncronas com Depends(get_async_db)
+    """
+    obter_engine_async()
+    async with _sessao_async() as db:
+        yield db
+
+
+async def encerrar_engine_async() -> None:
+    """Fecha as ligações do engine assíncrono, se tiver sido criado."""
+    global _engine_async, _sessao_async
+    if _engine_async is not None:
+        await _engine_async.dispose()
+        _engine_async = None
+        _sessao_async = None
@@ -0,0 +1,349 @@
+"""
+Distribuição automática dos serviços de um dia pelos técnicos.
+
+Os serviços ainda sem técnico (`servicos` e os módulos Aqua e Verde) são
+distribuídos pelos técnicos activos em duas fases:
+
+1. gulosa: do serviço mais longo para o mais curto, cada um vai para o
+   técnico apto (especialidade) com menos horas no dia que tenha um
+   intervalo livre no horário de trabalho, no primeiro intervalo livre;
+2. pesquisa local: até esgotar ASSIGNMENT_SEARCH_SECONDS, muda um
+   serviço de um técnico para outro menos carregado, ou troca dois
+   serviços entre técnicos, enquanto isso reduzir a soma dos quadrados
+   das horas de cada técnico (horas mais equilibradas).
+
+As atribuições já existentes ficam onde estão. O resultado é uma
+proposta com a `versao` dos dados usados (serviços por atribuir,
+técnicos e ocupação do dia); a confirmação grava todas as atribuições
+numa transacção e é recusada (409) se o dia mudou entretanto.
+"""
+
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .atribuicoes import (
+    MINUTOS_DIA,
+    IntervalosOrdenados,
+    activo,
+    agenda_do_dia,
+    garantir_tecnicos_livres,
+    hora,
+    intervalo,
+    servicos_do_dia,
+)
+from .calendario import etag_conteudo
+from ..models.tecnico import Atribuicao, Tecnico
+
+
+class Distribuidor:
+    """
+    Estado de uma distribuição: agenda (intervalos) e horas de cada
+    técnico, e o técnico e início de cada serviço colocado.
+
+    - **servicos**: dicts com `origem`, `id`, `tipo` e `duracao_horas`
+    - **tecnicos**: dicts com `id` e `especialidade` (None: todos os tipos)
+    - **ocupadas**: `(tecnico_id, início, fim)` das atribuições existentes
+    - **inicio_dia**, **fim_dia**: horário de trabalho, em minutos
+    """
+
+    def __init__(self, servicos: List[dict], tecnicos: List[dict],
+                 ocupadas: Iterable[Tuple[int, int, int]], inicio_dia: int, fim_dia: int):
+        self.servicos = servicos
+        self.inicio_dia = inicio_dia
+        self.fim_dia = fim_dia
+        self.especialidades = {tecnico["id"]: tecnico["especialidade"] for tecnico in tecnicos}
+        self.agenda = {tecnico_id: IntervalosOrdenados() for tecnico_id in self.especialidades}
+        self.carga = dict.fromkeys(self.especialidades, 0)
+        self.por_tecnico: Dict[int, Dict[tuple, dict]] = {tecnico_id: {} for tecnico_id in self.especialidades}
+        self.colocados: Dict[tuple, Tuple[int, int]] = {}
+        self.sem_tecnico: Dict[tuple, str] = {}
+        self.movimentos = 0
+        for tecnico_id, inicio, fim in ocupadas:
+            if tecnico_id in self.agenda and self.agenda[tecnico_id].livre(inicio, fim):
+                self.agenda[tecnico_id].inserir(inicio, fim)
+                self.carga[tecnico_id] += fim - inicio
+
+    @staticmethod
+    def chave(servico: dict) -> tuple:
+        return servico["origem"], servico["id"]
+
+    @staticmethod
+    def duracao(servico: dict) -> int:
+        return (servico["duracao_horas"] or 0) * 60
+
+    def apto(self, tecnico_id: int, servico: dict) -> bool:
+        especialidade = self.especialidades[tecnico_id]
+        return especialidade is None or especialidade == servico["tipo"]
+
+    def _colocar(self, servico: dict, tecnico_id: int) -> bool:
+        duracao = self.duracao(servico)
+        inicio = self.agenda[tecnico_id].primeiro_livre(duracao, self.inicio_dia, self.fim_dia)
+        if inicio is None:
+            return False
+        chave = self.chave(servico)
+        self.agenda[tecnico_id].inserir(inicio, inicio + duracao, chave)
+        self.carga[tecnico_id] += duracao
+        self.por_tecnico[tecnico_id][chave] = servico
+        self.colocados[chave] = tecnico_id, inicio
+        return True
+
+    def _retirar(self, servico: dict) -> None:
+        chave = self.chave(servico)
+        tecnico_id, inicio = self.colocados.pop(chave)
+        self.agenda[tecnico_id].remover(inicio)
+        self.carga[tecnico_id] -= self.duracao(servico)
+        del self.por_tecnico[tecnico_id][chave]
+
+    def _por_carga(self, tecnico_ids: Iterable[int]) -> List[int]:
+        return sorted(tecnico_ids, key=lambda tecnico_id: (self.carga[tecnico_id], tecnico_id))
+
+    def gulosa(self, servicos: Iterable[dict]) -> None:
+        """Cada serviço (o mais longo primeiro) no técnico apto menos carregado com espaço."""
+        for servico in sorted(servicos, key=lambda s: (-self.duracao(s), s["origem"], s["id"])):
+            chave = self.chave(servico)
+            aptos = [tecnico_id for tecnico_id in self.especialidades if self.apto(tecnico_id, servico)]
+            if self.duracao(servico) <= 0:
+                motivo = "Serviço sem duração"
+            elif not aptos:
+                motivo = f"Nenhum técnico activo faz serviços de {servico['tipo']}"
+            elif any(self._colocar(servico, tecnico_id) for tecnico_id in self._por_carga(aptos)):
+                self.sem_tecnico.pop(chave, None)
+                continue
+            else:
+                motivo = f"Nenhum técnico apto tem {servico['duracao_horas']} horas seguidas livres"
+            self.sem_tecnico[chave] = motivo
+
+    def _mover(self, prazo: float) -> bool:
+        """Primeira mudança de um serviço para um técnico menos carregado que equilibra as horas."""
+        for origem in self._por_carga(self.especialidades)[::-1]:
+            for servico in sorted(self.por_tecnico[origem].values(), key=lambda s: -self.duracao(s)):
+                duracao = self.duracao(servico)
+                for destino in self._por_carga(self.especialidades):
+                    # Só melhora se o destino continuar abaixo da origem
+                    if self.carga[destino] + duracao >= self.carga[origem]:
+                        break
+                    if not self.apto(destino, servico):
+                        continue
+                    self._retirar(servico)
+                    if self._colocar(servico, destino):
+                        return True
+                    self._colocar(servico, origem)
+            if time.perf_counter() >= prazo:
+                return False
+        return False
+
+    def _trocar(self, prazo: float) -> bool:
+        """Primeira troca de dois serviços entre técnicos que equilibra as horas."""
+        ordem = self._por_carga(self.especialidades)[::-1]
+        for posicao, primeiro in enumerate(ordem):
+            for segundo in reversed(ordem[posicao + 1:]):
+                folga = self.carga[primeiro] - self.carga[segundo]
+                if folga <= 0:
+                    continue
+                for a in list(self.por_tecnico[primeiro].values()):
+                    if not self.apto(segundo, a):
+                        continue
+                    for b in list(self.por_tecnico[segundo].values()):
+                        diferenca = self.duracao(a) - self.duracao(b)
+                        if not 0 < diferenca < folga or not self.apto(primeiro, b):
+                            continue
+                        self._retirar(a)
+                        self._retirar(b)
+                        if self._colocar(a, segundo):
+                            if self._colocar(b, primeiro):
+                                return True
+                            self._retirar(a)
+                        self._colocar(a, primeiro)
+                        self._colocar(b, segundo)
+                if time.perf_counter() >= prazo:
+                    return False
+        return False
+
+    def pesquisa_local(self, limite_segundos: float) -> None:
+        """Mudanças e trocas até não haver melhorias ou esgotar o tempo."""
+        prazo = time.perf_counter() + limite_segundos
+        while time.perf_counter() < prazo and (self._mover(prazo) or self._trocar(prazo)):
+            self.movimentos += 1
+        # O equilíbrio pode ter aberto espaço para os que ficaram de fora
+        if self.sem_tecnico:
+            por_chave = {self.chave(servico): servico for servico in self.servicos}
+            self.gulosa([por_chave[chave] for chave in list(self.sem_tecnico)])
+
+    def resultado(self) -> dict:
+        por_chave = {self.chave(servico): servico for servico in self.servicos}
+        atribuicoes = [
+            {
+                "origem": chave[0],
+                "servico_id": chave[1],
+                "tecnico_id": tecnico_id,
+                "inicio": inicio,
+                "duracao_horas": por_chave[chave]["duracao_horas"],
+            }
+            for chave, (tecnico_id, inicio) in self.colocados.items()
+        ]
+        atribuicoes.sort(key=lambda a: (a["tecnico_id"], a["inicio"]))
+        sem_tecnico = [
+            {**por_chave[chave], "motivo": motivo}
+            for chave, motivo in sorted(self.sem_tecnico.items())
+        ]
+        return {
+            "atribuicoes": atribuicoes,
+            "sem_tecnico": sem_tecnico,
+            "minutos": dict(self.carga),
+            "movimentos": self.movimentos,
+        }
+
+
+def distribuir(servicos: List[dict], tecnicos: List[dict], ocupadas: Iterable[Tuple[int, int, int]],
+               inicio_dia: int, fim_dia: int, limite_segundos: float = 0.5) -> dict:
+    """Fase gulosa e pesquisa local; ver `Distribuidor`."""
+    distribuidor = Distribuidor(servicos, tecnicos, ocupadas, inicio_dia, fim_dia)
+    distribuidor.gulosa(servicos)
+    distribuidor.pesquisa_local(limite_segundos)
+    return distribuidor.resultado()
+
+
+def estado_do_dia(db: Session, dia: date) -> dict:
+    """
+    Dados de que depende a distribuição do dia: serviços activos sem
+    técnico, técnicos activos e intervalos já ocupados, com a `versao`.
+    """
+    servicos = servicos_do_dia(db.get_bind(), dia)
+    atribuido = (
+        select(Atribuicao.id)
+        .where(Atribuicao.origem == servicos.c.origem, Atribuicao.servico_id == servicos.c.id)
+        .exists()
+    )
+    por_atribuir = db.execute(
+        select(servicos.c.origem, servicos.c.id, servicos.c.tipo, servicos.c.duracao_horas)
+        .where(activo(servicos), ~atribuido)
+        .order_by(servicos.c.origem, servicos.c.id)
+    ).mappings().all()
+    tecnicos = db.execute(
+        select(Tecnico.id, Tecnico.nome, Tecnico.especialidade)
+        .where(Tecnico.activo.is_(True))
+        .order_by(Tecnico.id)
+    ).mappings().all()
+    ocupadas = [
+        (linha.tecnico_id, *intervalo(linha.hora_inicio, linha.duracao_horas or 0))
+        for linha in agenda_do_dia(db, dia)
+    ]
+    estado = {
+        "servicos": [dict(servico) for servico in por_atribuir],
+        "tecnicos": [dict(tecnico) for tecnico in tecnicos],
+        "ocupadas": ocupadas,
+    }
+    return {**estado, "data": dia, "versao": etag_conteudo(estado)}
+
+
+def propor_distribuicao(db: Session, dia: date, inicio_dia: int, fim_dia: int,
+                        limite_segundos: float) -> dict:
+    """Proposta de distribuição do dia, sem gravar nada."""
+    estado = estado_do_dia(db, dia)
+    inicio = time.perf_counter()
+    resultado = distribuir(
+        estado["servicos"], estado["tecnicos"], estado["ocupadas"], inicio_dia, fim_dia, limite_segundos
+    )
+    duracao_ms = round((time.perf_counter() - inicio) * 1000, 2)
+
+    atribuicoes = []
+    for atribuicao in resultado["atribuicoes"]:
+        fim = atribuicao["inicio"] + atribuicao["duracao_horas"] * 60
+        atribuicoes.append({
+            "origem": atribuicao["origem"],
+            "servico_id": atribuicao["servico_id"],
+            "tecnico_id": atribuicao["tecnico_id"],
+            "hora_inicio": hora(atribuicao["inicio"]),
+            "hora_fim": hora(fim % MINUTOS_DIA),
+            "duracao_horas": atribuicao["duracao_horas"],
+        })
+    colocados: Dict[int, int] = {}
+    for atribuicao in atribuicoes:
+        colocados[atribuicao["tecnico_id"]] = colocados.get(atribuicao["tecnico_id"], 0) + 1
+    tecnicos = [
+        {
+            "tecnico_id": tecnico["id"],
+            "nome": tecnico["nome"],
+            "horas": resultado["minutos"][tecnico["id"]] / 60,
+            "servicos_propostos": colocados.get(tecnico["id"], 0),
+        }
+        for tecnico in estado["tecnicos"]
+    ]
+    return {
+        "data": dia,
+        "versao": estado["versao"],
+        "atribuicoes": atribuicoes,
+        "sem_tecnico": [
+            {"origem": s["origem"], "servico_id": s["id"], "tipo": s["tipo"],
+             "duracao_horas": s["duracao_horas"], "motivo": s["motivo"]}
+            for s in resultado["sem_tecnico"]
+        ],
+        "tecnicos": tecnicos,
+        "movimentos": resultado["movimentos"],
+        "duracao_ms": duracao_ms,
+    }
+
+
+def confirmar_distribuicao(db: Session, dia: date, versao: str, propostas: List[dict]) -> List[int]:
+    """
+    Grava as atribuições propostas (eventualmente editadas) numa só
+    transacção e devolve os ids. Recusa (409) se os dados do dia mudaram
+    desde a proposta e (400) atribuições inválidas ou sobrepostas.
+    """
+    # Serializa confirmações concorrentes (PostgreSQL): bloqueia os técnicos activos
+    db.execute(select(Tecnico.id).where(Tecnico.activo.is_(True)).with_for_update())
+    estado = estado_do_dia(db, dia)
+    if estado["versao"] != versao:
+        raise HTTPException(
+            status_code=409,
+            detail="Os serviços ou a agenda do dia mudaram desde a proposta; peça uma nova distribuição"
+        )
+    por_atribuir = {(s["origem"], s["id"]): s for s in estado["servicos"]}
+    especialidades = {tecnico["id"]: tecnico["especialidade"] for tecnico in estado["tecnicos"]}
+
+    novas: List[Atribuicao] = []
+    vistas = set()
+    for proposta in propostas:
+        chave = proposta["origem"], proposta["servico_id"]
+        servico: Optional[dict] = por_atribuir.get(chave)
+        if servico is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"O serviço {proposta['origem']} {proposta['servico_id']} não está por atribuir em {dia}"
+            )
+        tecnico_id = proposta["tecnico_id"]
+        if tecnico_id not in especialidades:
+            raise HTTPException(status_code=400, detail=f"Técnico {tecnico_id} inexistente ou inactivo")
+        if especialidades[tecnico_id] not in (None, servico["tipo"]):
+            raise HTTPException(
+                status_code=400,
+                detail=f"O técnico {tecnico_id} não faz serviços de {servico['tipo']}"
+            )
+        if (chave, tecnico_id) in vistas:
+            raise HTTPException(status_code=400, detail="Atribuição repetida na proposta")
+        vistas.add((chave, tecnico_id))
+        # A duração do serviço fica implícita (acompanha alterações ao serviço)
+        duracao = proposta.get("duracao_horas")
+        novas.append(Atribuicao(
+            origem=proposta["origem"],
+            servico_id=proposta["servico_id"],
+            tecnico_id=tecnico_id,
+            hora_inicio=proposta["hora_inicio"],
+            duracao_horas=None if duracao in (None, servico["duracao_horas"]) else duracao,
+        ))
+
+    db.add_all(novas)
+    db.flush()
+    por_origem: Dict[str, set] = {}
+    for atribuicao in novas:
+        por_origem.setdefault(atribuicao.origem, set()).add(atribuicao.servico_id)
+    for origem, servico_ids in por_origem.items():
+        garantir_tecnicos_livres(db, servico_ids, origem)
+    ids = [atribuicao.id for atribuicao in novas]
+    db.commit()
+    return ids
@@ -0,0 +1,124 @@
+"""
+Exportação em streaming de listagens (CSV / NDJSON, opcionalmente gzip).
+
+As listagens paginadas limitam `limit` a 100; as exportações mensais da
+contabilidade precisam de dezenas de milhares de linhas. Aqui a consulta
+é executada com `yield_per` (cursor do lado do servidor no PostgreSQL,
+leitura incremental no SQLite) e cada bloco de linhas é codificado e
+enviado antes de se ler o seguinte, pelo que a memória usada não depende
+do tamanho do resultado.
+
+A sessão do pedido é fechada pelo FastAPI antes de a resposta ser
+enviada; o gerador abre a sua própria sessão sobre a mesma ligação
+(primária ou réplica) e fecha-a no fim do envio.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from .replit_config import config
+
+FORMATOS = ("csv", "ndjson")
+
+TIPOS_MIME = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def validar_formato(formato: str) -> str:
+    formato = (formato or "").lower()
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato não suportado: use {' ou '.join(FORMATOS)}")
+    return formato
+
+
+def _valor(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _blocos(bind, consulta, tamanho_bloco: int) -> Iterator[Sequence]:
+    """Linhas da consulta em blocos de `tamanho_bloco`, numa sessão própria."""
+    sessao = Session(bind=bind)
+    try:
+        resultado = sessao.execute(consulta.execution_options(yield_per=tamanho_bloco))
+        for bloco in resultado.partitions():
+            yield bloco
+    finally:
+        sessao.close()
+
+
+def _csv(blocos: Iterable[Sequence], nomes: List[str]) -> Iterator[str]:
+    memoria = io.StringIO()
+    escritor = csv.writer(memoria)
+    escritor.writerow(nomes)
+    for bloco in blocos:
+        escritor.writerows(["" if v is None else _valor(v) for v in linha] for linha in bloco)
+        yield memoria.getvalue()
+        memoria.seek(0)
+        memoria.truncate()
+    # Cabeçalho de uma exportação vazia
+    if memoria.tell():
+        yield memoria.getvalue()
+
+
+def _ndjson(blocos: Iterable[Sequence], nomes: List[str]) -> Iterator[str]:
+    for bloco in blocos:
+        yield "".join(
+            json.dumps({nome: _valor(v) for nome, v in zip(nomes, linha)}, ensure_ascii=False) + "\n"
+            for linha in bloco
+        )
+
+
+def _gzip(pedacos: Iterable[bytes]) -> Iterator[bytes]:
+    """Comprime em streaming (formato gzip, um bloco de cada vez)."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for pedaco in pedacos:
+        comprimido = compressor.compress(pedaco)
+        if comprimido:
+            yield comprimido
+    yield compressor.flush()
+
+
+def resposta_exportacao(
+    db: Session,
+    consulta,
+    formato: str,
+    nome_ficheiro: str,
+    comprimir: bool = False,
+    tamanho_bloco: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    StreamingResponse com o resultado de `consulta` (um `select` de
+    colunas, já filtrado e ordenado). Os nomes das colunas são o
+    cabeçalho do CSV e as chaves do NDJSON.
+
+    - **comprimir**: envia um ficheiro .gz comprimido à medida que é gerado
+    - **tamanho_bloco**: linhas lidas e enviadas de cada vez
+    """
+    formato = validar_formato(formato)
+    nomes = [coluna.key for coluna in consulta.selected_columns]
+    blocos = _blocos(db.get_bind(), consulta, tamanho_bloco or config.EXPORT_BATCH_SIZE)
+    codificar = _csv if formato == "csv" else _ndjson
+    corpo = (texto.encode("utf-8") for texto in codificar(blocos, nomes))
+
+    nome = f"{nome_ficheiro}.{formato}"
+    tipo = TIPOS_MIME[formato]
+    if comprimir:
+        corpo = _gzip(corpo)
+        nome += ".gz"
+        tipo = "application/gzip"
+    return StreamingResponse(
+        corpo,
+        media_type=tipo,
+        headers={"Content-Disposition": f'attachment; filename="{nome}"'},
+    )
@@ -0,0 +1,138 @@
+"""
+Pool de processos dedicado ao hashing de senhas.
+
+O bcrypt é deliberadamente lento e ocupa o CPU durante centenas de
+milissegundos. Executá-lo no threadpool partilhado do Starlette faz com
+que uma vaga de logins bloqueie as restantes rotas síncronas. Este módulo
+isola o trabalho num pool de processos limitado, com uma fila máxima:
+quando a fila está cheia o pedido é recusado de imediato com 503.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from .replit_config import config
+
+# Contexto de hashing de senhas. O bcrypt é um algoritmo robusto e amplamente
+# utilizado. A biblioteca passlib facilita a sua utilização e gestão de versões.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def calcular_hash(senha: str) -> str:
+    """Executado no processo trabalhador: gera o hash bcrypt."""
+    return pwd_context.hash(senha)
+
+
+def comparar_hash(senha: str, hash_senha: str) -> bool:
+    """Executado no processo trabalhador: verifica a senha contra o hash."""
+    return pwd_context.verify(senha, hash_senha)
+
+
+class PoolHashing:
+    """
+    Executor limitado para operações de hashing.
+
+    - **processos**: número de processos trabalhadores (0 executa no próprio processo)
+    - **max_pendentes**: pedidos em execução ou em espera antes de recusar com 503
+    """
+
+    def __init__(self, processos: int, max_pendentes: int):
+        self.processos = processos
+        self.max_pendentes = max_pendentes
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.pendentes = 0
+        self.max_pendentes_observado = 0
+        self.concluidos = 0
+        self.rejeitados = 0
+        self.tempo_total = 0.0
+
+    def _obter_executor(self) -> Optional[Executor]:
+        if self.processos <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # "spawn" evita herdar locks de threads do servidor através de fork
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processos,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _reservar(self) -> None:
+        with self._lock:
+            if self.pendentes >= self.max_pendentes:
+                self.rejeitados += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Servidor ocupado, tente novamente dentro de instantes",
+                    headers={"Retry-After": "1"},
+                )
+            self.pendentes += 1
+            self.max_pendentes_observado = max(self.max_pendentes_observado, self.pendentes)
+
+    def _libertar(self, inicio: float) -> None:
+        with self._lock:
+            self.pendentes -= 1
+            self.concluidos += 1
+            self.tempo_total += time.perf_counter() - inicio
+
+    async def executar(self, funcao: Callable, *args: Any) -> Any:
+        """Executa a função no pool sem ocupar threads do servidor."""
+        self._reservar()
+        inicio = time.perf_counter()
+        try:
+            executor = self._obter_executor()
+            if executor is None:
+                return funcao(*args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, funcao, *args)
+        finally:
+            self._libertar(inicio)
+
+    def executar_sync(self, funcao: Callable, *args: Any) -> Any:
+        """Versão bloqueante, para código síncrono (ex.: arranque da aplicação)."""
+        self._reservar()
+        inicio = time.perf_counter()
+        try:
+            executor = self._obter_executor()
+            if executor is None:
+                return funcao(*args)
+            return executor.submit(funcao, *args).result()
+        finally:
+            self._libertar(inicio)
+
+    def encerrar(self) -> None:
+        """Termina os processos trabalhadores."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores para monitorização."""
+        with self._lock:
+            em_execucao = min(self.pendentes, max(self.processos, 1))
+            return {
+                "processos": self.processos,
+                "max_pendentes": self.max_pendentes,
+                "em_execucao": em_execucao,
+                "em_fila": self.pendentes - em_execucao,
+                "max_pendentes_observado": self.max_pendentes_observado,
+                "concluidos": self.concluidos,
+                "rejeitados": self.rejeitados,
+                "tempo_medio_ms": round(self.tempo_total / self.concluidos * 1000, 2) if self.concluidos else 0.0,
+            }
+
+
+pool_hashing = PoolHashing(
+    processos=config.HASH_POOL_PROCESSES,
+    max_pendentes=config.HASH_QUEUE_MAX,
+)
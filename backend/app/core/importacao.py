@@ -0,0 +1,312 @@
+"""
+Importação em massa de clientes e serviços (CSV / NDJSON).
+
+O onboarding de uma empresa criava milhares de registos pelas rotas
+individuais: um pedido HTTP, uma consulta de duplicados, um INSERT, um
+commit e um refresh por linha. Aqui o ficheiro é lido em streaming e
+processado em lotes:
+
+1. cada linha é validada com os schemas Pydantic das rotas;
+2. duplicados (na base de dados e dentro do próprio ficheiro) e clientes
+   referenciados são verificados com uma consulta por lote;
+3. as linhas válidas são inseridas com um único `executemany` por lote,
+   numa transacção própria, juntamente com os contadores agregados;
+4. nos serviços, os dias do lote são verificados contra a capacidade
+   diária (DAILY_CAPACITY_HOURS) nos contadores já actualizados: um lote
+   que deixa algum dia acima da capacidade é desfeito por inteiro.
+
+O resultado é um relatório com o erro de cada linha rejeitada. No modo
+histórico os serviços podem ter datas passadas e a capacidade não é
+verificada.
+"""
+
+import csv
+import io
+import json
+import time
+from itertools import islice
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..models.cliente import Cliente
+from ..models.servico import Servico
+from ..schemas.cliente import ClienteCreate
+from ..schemas.servico import ServicoHistorico, ServicoImportacao, StatusServico
+from .capacidade import STATUS_SEM_HORAS, horas_dos_dias
+from .contadores import aplicar_incrementos, incrementos_linhas
+from .replit_config import config
+
+FORMATOS = ("csv", "ndjson")
+TAMANHO_LOTE = 500
+# Erros detalhados no relatório; os restantes só são contados
+MAX_ERROS_REPORTADOS = 1000
+
+# (número da linha no ficheiro, dados ou None, erro de leitura ou None)
+Linha = Tuple[int, Optional[dict], Optional[str]]
+# Verificação de um lote já inserido (antes do commit): erro por número de linha
+Verificacao = Callable[[Session, List[Tuple[int, dict]]], Dict[int, str]]
+
+
+def detectar_formato(nome_ficheiro: Optional[str], formato: Optional[str] = None) -> str:
+    """Formato explícito ou deduzido da extensão (.csv, .ndjson/.jsonl)."""
+    if formato:
+        formato = formato.lower()
+    elif nome_ficheiro and nome_ficheiro.lower().endswith((".ndjson", ".jsonl")):
+        formato = "ndjson"
+    elif nome_ficheiro and nome_ficheiro.lower().endswith(".csv"):
+        formato = "csv"
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato não suportado: use {' ou '.join(FORMATOS)}")
+    return formato
+
+
+def ler_linhas(ficheiro: BinaryIO, formato: str) -> Iterator[Linha]:
+    """
+    Lê o ficheiro linha a linha (sem o carregar todo em memória). Um
+    ficheiro ilegível (codificação, CSV malformado) termina a leitura com
+    um erro na última linha lida; os lotes anteriores ficam gravados.
+    """
+    texto = io.TextIOWrapper(ficheiro, encoding="utf-8-sig", newline="")
+    numero = 0
+    try:
+        for numero, dados, erro in _ler_texto(texto, formato):
+            yield numero, dados, erro
+    except (UnicodeDecodeError, csv.Error) as erro:
+        yield numero + 1, None, f"Ficheiro ilegível a partir desta linha: {erro}"
+    finally:
+        # Não fechar o ficheiro de quem chamou
+        texto.detach()
+
+
+def _ler_texto(texto, formato: str) -> Iterator[Linha]:
+    if formato == "csv":
+        leitor = csv.DictReader(texto)
+        for registo in leitor:
+            # Células vazias equivalem a campos omitidos (valores por defeito)
+            dados = {
+                chave.strip(): valor.strip()
+                for chave, valor in registo.items()
+                if chave and isinstance(valor, str) and valor.strip()
+            }
+            yield leitor.line_num, dados, None
+        return
+
+    for numero, conteudo in enumerate(texto, start=1):
+        if not conteudo.strip():
+            continue
+        try:
+            dados = json.loads(conteudo)
+        except ValueError as erro:
+            yield numero, None, f"JSON inválido: {erro}"
+            continue
+        if not isinstance(dados, dict):
+            yield numero, None, "Cada linha tem de ser um objecto JSON"
+            continue
+        yield numero, dados, None
+
+
+def _lotes(linhas: Iterable[Linha], tamanho: int) -> Iterator[List[Linha]]:
+    iterador = iter(linhas)
+    while True:
+        lote = list(islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def _mensagens(erro: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(p) for p in e['loc']) or 'linha'}: {e['msg']}" for e in erro.errors()]
+
+
+class RelatorioImportacao:
+    """Totais da importação e erros por linha (limitados a MAX_ERROS_REPORTADOS)."""
+
+    def __init__(self, entidade: str):
+        self.entidade = entidade
+        self.linhas = 0
+        self.importados = 0
+        self.duplicados = 0
+        self.invalidos = 0
+        self.erros: List[Dict[str, object]] = []
+        self.erros_omitidos = 0
+        self._inicio = time.perf_counter()
+
+    def erro(self, linha: int, mensagens: List[str], duplicado: bool = False) -> None:
+        if duplicado:
+            self.duplicados += 1
+        else:
+            self.invalidos += 1
+        if len(self.erros) < MAX_ERROS_REPORTADOS:
+            self.erros.append({"linha": linha, "erros": mensagens})
+        else:
+            self.erros_omitidos += 1
+
+    def como_dict(self) -> Dict[str, object]:
+        return {
+            "entidade": self.entidade,
+            "linhas": self.linhas,
+            "importados": self.importados,
+            "duplicados": self.duplicados,
+            "invalidos": self.invalidos,
+            "erros": self.erros,
+            "erros_omitidos": self.erros_omitidos,
+            "duracao_ms": round((time.perf_counter() - self._inicio) * 1000, 1),
+        }
+
+
+def _validar(lote: List[Linha], schema, relatorio: RelatorioImportacao) -> List[Tuple[int, object]]:
+    validos = []
+    for numero, dados, erro in lote:
+        relatorio.linhas += 1
+        if erro:
+            relatorio.erro(numero, [erro])
+            continue
+        try:
+            validos.append((numero, schema(**dados)))
+        except ValidationError as erro_validacao:
+            relatorio.erro(numero, _mensagens(erro_validacao))
+    return validos
+
+
+def _gravar(db: Session, modelo, linhas: List[Tuple[int, dict]], relatorio: RelatorioImportacao,
+            verificar: Optional[Verificacao] = None) -> None:
+    """
+    Insere o lote numa transacção (executemany) com os respectivos
+    contadores. Se `verificar` devolve erros, o lote é desfeito: as linhas
+    com erro levam a sua mensagem e as restantes a indicação do lote.
+    """
+    if not linhas:
+        return
+    valores = [dados for _, dados in linhas]
+    try:
+        db.execute(insert(modelo.__table__), valores)
+        aplicar_incrementos(db.connection(), incrementos_linhas(modelo, valores))
+        erros = verificar(db, linhas) if verificar else {}
+        if erros:
+            db.rollback()
+            for numero, _ in linhas:
+                relatorio.erro(numero, [erros.get(numero, "Lote não gravado por erros noutras linhas")])
+            return
+        db.commit()
+    except SQLAlchemyError as erro:
+        db.rollback()
+        for numero, _ in linhas:
+            relatorio.erro(numero, [f"Erro ao gravar o lote: {erro.__class__.__name__}"])
+        return
+    relatorio.importados += len(valores)
+
+
+def importar_clientes(db: Session, linhas: Iterable[Linha], tamanho_lote: int = TAMANHO_LOTE) -> RelatorioImportacao:
+    """Importa clientes; nomes já existentes (ou repetidos no ficheiro) são duplicados."""
+    relatorio = RelatorioImportacao("clientes")
+    for lote in _lotes(linhas, tamanho_lote):
+        validos = _validar(lote, ClienteCreate, relatorio)
+        if not validos:
+            continue
+        nomes = {cliente.nome for _, cliente in validos}
+        existentes = set(db.execute(select(Cliente.nome).where(Cliente.nome.in_(nomes))).scalars())
+
+        novos = []
+        for numero, cliente in validos:
+            if cliente.nome in existentes:
+                relatorio.erro(numero, [f"nome: Já existe um cliente com o nome '{cliente.nome}'"], duplicado=True)
+                continue
+            existentes.add(cliente.nome)
+            novos.append((numero, cliente.dict()))
+        _gravar(db, Cliente, novos, relatorio)
+    return relatorio
+
+
+def _resolver_clientes(db: Session, servicos) -> Tuple[set, Dict[str, int]]:
+    """Ids existentes e id por nome dos clientes referenciados no lote (uma consulta)."""
+    ids = {s.cliente_id for _, s in servicos if s.cliente_id is not None}
+    nomes = {s.cliente_nome for _, s in servicos if s.cliente_id is None and s.cliente_nome}
+    encontrados = db.execute(
+        select(Cliente.id, Cliente.nome).where(or_(Cliente.id.in_(ids), Cliente.nome.in_(nomes)))
+    ).all()
+    return {id_ for id_, _ in encontrados}, {nome: id_ for id_, nome in encontrados}
+
+
+def _verificar_capacidade(db: Session, linhas: List[Tuple[int, dict]]) -> Dict[int, str]:
+    """Linhas de serviços do lote em dias que ficaram acima da capacidade diária."""
+    capacidade = config.DAILY_CAPACITY_HOURS
+    horas_lote: Dict[object, int] = {}
+    for _, dados in linhas:
+        if dados["status"] != STATUS_SEM_HORAS and dados["duracao_horas"]:
+            dia = dados["data_servico"]
+            horas_lote[dia] = horas_lote.get(dia, 0) + dados["duracao_horas"]
+    if not capacidade or not horas_lote:
+        return {}
+    marcadas = horas_dos_dias(db, horas_lote)
+    erros = {}
+    for numero, dados in linhas:
+        dia = dados["data_servico"]
+        if dia in horas_lote and marcadas[dia] > capacidade:
+            livres = max(0, capacidade - (marcadas[dia] - horas_lote[dia]))
+            erros[numero] = (
+                f"data_servico: Capacidade diária excedida em {dia}: {livres} de {capacidade} "
+                f"horas livres, o lote ocupa {horas_lote[dia]}"
+            )
+    return erros
+
+
+def importar_servicos(db: Session, linhas: Iterable[Linha], historico: bool = False,
+                      tamanho_lote: int = TAMANHO_LOTE) -> RelatorioImportacao:
+    """
+    Importa serviços. Um serviço não cancelado do mesmo cliente na mesma
+    data (na base de dados ou antes no ficheiro) é duplicado, como em
+    `criar_servico`. Fora do modo histórico a capacidade diária é
+    verificada por lote.
+    """
+    relatorio = RelatorioImportacao("servicos")
+    schema = ServicoHistorico if historico else ServicoImportacao
+    for lote in _lotes(linhas, tamanho_lote):
+        validos = _validar(lote, schema, relatorio)
+        if not validos:
+            continue
+        ids, por_nome = _resolver_clientes(db, validos)
+
+        resolvidos = []
+        for numero, servico in validos:
+            if servico.cliente_id is None and servico.cliente_nome is None:
+                relatorio.erro(numero, ["cliente_id: Indique cliente_id ou cliente_nome"])
+                continue
+            cliente_id = servico.cliente_id if servico.cliente_id is not None else por_nome.get(servico.cliente_nome)
+            if cliente_id is None or (servico.cliente_id is not None and cliente_id not in ids):
+                relatorio.erro(numero, ["cliente_id: Cliente não encontrado"])
+                continue
+            dados = servico.dict(exclude={"cliente_nome"})
+            dados.update(cliente_id=cliente_id, tipo=servico.tipo.value, status=servico.status.value)
+            resolvidos.append((numero, dados))
+        if not resolvidos:
+            continue
+
+        clientes = {dados["cliente_id"] for _, dados in resolvidos}
+        datas = {dados["data_servico"] for _, dados in resolvidos}
+        ocupados = set(db.execute(
+            select(Servico.cliente_id, Servico.data_servico).where(
+                Servico.cliente_id.in_(clientes),
+                Servico.data_servico.in_(datas),
+                Servico.status != StatusServico.CANCELADO.value,
+            )
+        ).all())
+
+        novos = []
+        for numero, dados in resolvidos:
+            chave = (dados["cliente_id"], dados["data_servico"])
+            if dados["status"] != StatusServico.CANCELADO.value:
+                if chave in ocupados:
+                    relatorio.erro(
+                        numero,
+                        [f"data_servico: Já existe um serviço agendado para este cliente em {dados['data_servico']}"],
+                        duplicado=True,
+                    )
+                    continue
+                ocupados.add(chave)
+            novos.append((numero, dados))
+        _gravar(db, Servico, novos, relatorio, None if historico else _verificar_capacidade)
+    return relatorio
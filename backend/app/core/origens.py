@@ -0,0 +1,65 @@
+"""
+Tabelas de serviços por origem: `servicos` e as dos módulos Aqua e Verde.
+
+O calendário e a agenda dos técnicos lêem os serviços das três tabelas
+com um UNION ALL. Este módulo não importa modelos: é usado tanto pela
+aplicação principal como pelos routers dos módulos na aplicação
+modular, onde o modelo `Servico` não está carregado e a tabela
+`servicos` é reflectida (se existir).
+"""
+
+from datetime import date
+from typing import Dict
+
+from sqlalchemy import Integer, MetaData, String, Table, cast, inspect, literal, null, select
+
+from .cache import CacheTTL
+from .database import Base
+
+# Tabelas dos módulos (criadas pela aplicação modular) e a origem de cada uma
+TABELAS_MODULOS = {"servicos_piscina": "aqua", "servicos_jardim": "verde"}
+
+# Tabelas reflectidas por engine; revistas a cada 5 minutos para apanhar
+# módulos activados depois do arranque
+_tabelas_reflectidas = CacheTTL(max_entradas=8, ttl_segundos=300)
+
+
+def _reflectir(bind) -> Dict[str, Table]:
+    tabelas = _tabelas_reflectidas.obter(bind)
+    if tabelas is None:
+        nomes = dict(TABELAS_MODULOS)
+        if "servicos" not in Base.metadata.tables:
+            nomes["servicos"] = "servicos"
+        existentes = set(inspect(bind).get_table_names())
+        metadata = MetaData()
+        tabelas = {
+            origem: Table(nome, metadata, autoload_with=bind)
+            for nome, origem in nomes.items()
+            if nome in existentes
+        }
+        _tabelas_reflectidas.guardar(bind, tabelas)
+    return tabelas
+
+
+def tabelas_servicos(bind) -> Dict[str, Table]:
+    """Tabela `servicos` e as dos módulos existentes, por origem."""
+    reflectidas = _reflectir(bind)
+    servicos = Base.metadata.tables.get("servicos", reflectidas.get("servicos"))
+    modulos = {origem: tabela for origem, tabela in reflectidas.items() if origem != "servicos"}
+    return modulos if servicos is None else {"servicos": servicos, **modulos}
+
+
+def ramo_servicos(tabela: Table, origem: str, inicio: date, fim: date):
+    """Colunas comuns de uma tabela de serviços, no intervalo de datas."""
+    colunas = tabela.c
+    return select(
+        literal(origem, String).label("origem"),
+        colunas.id,
+        cast(colunas.tipo, String).label("tipo"),
+        colunas.data_servico,
+        colunas.duracao_horas,
+        (colunas.status if "status" in colunas else cast(null(), String)).label("status"),
+        colunas.cliente_id,
+        colunas.descricao,
+        (colunas.plano_id if "plano_id" in colunas else cast(null(), Integer)).label("plano_id"),
+    ).where(colunas.data_servico.between(inicio, fim))
@@ -0,0 +1,166 @@
+"""
+Paginação por cursor (keyset) para as listagens.
+
+Com `offset` a base de dados lê e descarta todas as linhas anteriores,
+pelo que as páginas profundas ficam cada vez mais lentas, e inserções
+concorrentes fazem linhas repetir-se ou desaparecer entre páginas. O
+cursor guarda os valores da ordenação da última (ou primeira) linha da
+página, e a página seguinte começa com uma condição sobre o índice:
+
+    (data_servico, id) < (:data, :id)   # ordem descendente
+
+O cursor é opaco para o cliente (JSON em base64 url-safe) e é devolvido
+nos cabeçalhos `X-Cursor-Seguinte`, `X-Cursor-Anterior` e `Link`, para
+que o corpo das respostas continue a ser uma lista.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import and_, or_
+
+SEGUINTE = "s"
+ANTERIOR = "a"
+
+# Ordem da listagem: (coluna, descendente)
+Ordem = Sequence[Tuple[Any, bool]]
+
+
+def _serializar(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _desserializar(coluna, valor):
+    if valor is None:
+        return None
+    tipo = coluna.type.python_type
+    if tipo is datetime:
+        return datetime.fromisoformat(valor)
+    if tipo is date:
+        return date.fromisoformat(valor)
+    return tipo(valor)
+
+
+def codificar_cursor(linha, ordem: Ordem, direccao: str) -> str:
+    """Cursor opaco com os valores de ordenação da linha."""
+    valores = [_serializar(getattr(linha, coluna.key)) for coluna, _ in ordem]
+    dados = json.dumps({"v": valores, "d": direccao}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip("=")
+
+
+def descodificar_cursor(cursor: str, ordem: Ordem) -> Tuple[List[Any], str]:
+    """Valores e direcção do cursor; 400 se o cursor for inválido."""
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        valores, direccao = dados["v"], dados["d"]
+        if direccao not in (SEGUINTE, ANTERIOR) or len(valores) != len(ordem):
+            raise ValueError(direccao)
+        return [_desserializar(coluna, valor) for (coluna, _), valor in zip(ordem, valores)], direccao
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+
+
+def _ordenar(query, ordem: Ordem):
+    return query.order_by(*[coluna.desc() if descendente else coluna.asc() for coluna, descendente in ordem])
+
+
+def _depois_de(ordem: Ordem, valores: Sequence[Any]):
+    """
+    Condição "linha vem depois de `valores`" na ordem dada (expansão de
+    row values, que admite direcções mistas).
+
+    O limite redundante na primeira coluna é o que permite ao planeador
+    fazer uma procura no índice: só com o OR o SQLite percorre o índice
+    desde o início.
+    """
+    condicoes = []
+    for indice, (coluna, descendente) in enumerate(ordem):
+        iguais = [ordem[anterior][0] == valores[anterior] for anterior in range(indice)]
+        comparacao = coluna < valores[indice] if descendente else coluna > valores[indice]
+        condicoes.append(and_(*iguais, comparacao))
+    primeira, descendente = ordem[0]
+    limite = primeira <= valores[0] if descendente else primeira >= valores[0]
+    return and_(limite, or_(*condicoes))
+
+
+def aplicar_cursor(query, ordem: Ordem, cursor: Optional[str]):
+    """
+    Ordena a consulta (Query ou select) e, havendo cursor, começa a
+    seguir a ele. Devolve a consulta e a direcção da página.
+    """
+    if not cursor:
+        return _ordenar(query, ordem), SEGUINTE
+    valores, direccao = descodificar_cursor(cursor, ordem)
+    if direccao == ANTERIOR:
+        # Percorre a ordem ao contrário; a página é invertida no fim
+        ordem = [(coluna, not descendente) for coluna, descendente in ordem]
+    return _ordenar(query.filter(_depois_de(ordem, valores)), ordem), direccao
+
+
+def cortar_pagina(linhas: Sequence[Any], ordem: Ordem, limit: int, direccao: str,
+                  tem_anterior: bool) -> Tuple[List[Any], Optional[str], Optional[str]]:
+    """
+    Recebe até `limit + 1` linhas (a extra indica que há mais) e devolve
+    a página na ordem normal com os cursores seguinte e anterior.
+    """
+    mais = len(linhas) > limit
+    pagina = list(linhas[:limit])
+    if direccao == ANTERIOR:
+        pagina.reverse()
+        ha_seguinte, ha_anterior = True, mais
+    else:
+        ha_seguinte, ha_anterior = mais, tem_anterior
+    if not pagina:
+        return pagina, None, None
+    seguinte = codificar_cursor(pagina[-1], ordem, SEGUINTE) if ha_seguinte else None
+    anterior = codificar_cursor(pagina[0], ordem, ANTERIOR) if ha_anterior else None
+    return pagina, seguinte, anterior
+
+
+def publicar_cursores(request: Request, response: Response,
+                      seguinte: Optional[str], anterior: Optional[str]) -> None:
+    """Escreve os cursores nos cabeçalhos X-Cursor-* e Link (RFC 8288)."""
+    base = request.url.remove_query_params(["skip", "offset"])
+    ligacoes = []
+    if seguinte:
+        response.headers["X-Cursor-Seguinte"] = seguinte
+        ligacoes.append(f'<{base.include_query_params(cursor=seguinte)}>; rel="next"')
+    if anterior:
+        response.headers["X-Cursor-Anterior"] = anterior
+        ligacoes.append(f'<{base.include_query_params(cursor=anterior)}>; rel="prev"')
+    if ligacoes:
+        response.headers["Link"] = ", ".join(ligacoes)
+
+
+def validar_modo(skip: int, cursor: Optional[str]) -> None:
+    """`skip`/`offset` e `cursor` não podem ser combinados."""
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="O cursor não pode ser combinado com skip/offset")
+
+
+def paginar(query, ordem: Ordem, skip: int, limit: int, cursor: Optional[str]):
+    """
+    Página de uma Query síncrona, em modo offset (`skip`) ou cursor.
+
+    Ambos os modos usam a mesma ordem total, pelo que a primeira página em
+    modo offset já devolve o cursor para continuar em modo keyset.
+    """
+    validar_modo(skip, cursor)
+    query, direccao = aplicar_cursor(query, ordem, cursor)
+    linhas = query.offset(skip).limit(limit + 1).all()
+    return cortar_pagina(linhas, ordem, limit, direccao, tem_anterior=bool(cursor or skip))
+
+
+async def paginar_async(db, query, ordem: Ordem, skip: int, limit: int, cursor: Optional[str]):
+    """Equivalente a `paginar` para um select() numa AsyncSession."""
+    validar_modo(skip, cursor)
+    query, direccao = aplicar_cursor(query, ordem, cursor)
+    resultado = await db.execute(query.offset(skip).limit(limit + 1))
+    linhas = resultado.scalars().all()
+    return cortar_pagina(linhas, ordem, limit, direccao, tem_anterior=bool(cursor or skip))
@@ -0,0 +1,190 @@
+"""
+Pesquisa textual indexada (clientes).
+
+Um `ILIKE '%texto%'` não usa índices e percorre a tabela inteira a cada
+tecla da caixa de pesquisa. Os modelos registam, com `registar_pesquisa`,
+as colunas pesquisáveis e os respectivos pesos; o índice é criado com a
+tabela (evento `after_create`) ou pelo bootstrap em bases já existentes:
+
+- SQLite: tabela virtual FTS5 de conteúdo externo (`<tabela>_fts`) com
+  `remove_diacritics`, sincronizada por triggers, e ordenação por bm25;
+- PostgreSQL: índice GIN `pg_trgm` sobre o texto sem acentos (`unaccent`),
+  ordenação por `word_similarity`;
+- outros motores (ou SQLite sem FTS5): ILIKE por coluna, sem ranking.
+
+Cada palavra pesquisada tem de aparecer (como prefixo de palavra no
+SQLite, como substring no PostgreSQL) nalguma das colunas.
+"""
+
+import re
+import sqlite3
+from functools import lru_cache
+from typing import List, Sequence
+
+from sqlalchemy import String, and_, column, event, func, literal_column, or_, select, table
+from sqlalchemy.engine import Engine
+
+# Incrementar quando o DDL mudar, para o bootstrap o recriar
+VERSAO_PESQUISA = 1
+
+# Palavras pesquisáveis: letras e dígitos (sem `_`, que é um wildcard do LIKE)
+_PALAVRA = re.compile(r"[^\W_]+")
+
+
+def palavras_pesquisa(texto: str) -> List[str]:
+    return _PALAVRA.findall(texto or "")
+
+
+@lru_cache(maxsize=1)
+def fts5_disponivel() -> bool:
+    """O SQLite do Python foi compilado com FTS5?"""
+    ligacao = sqlite3.connect(":memory:")
+    try:
+        ligacao.execute("CREATE VIRTUAL TABLE teste USING fts5(texto)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        ligacao.close()
+
+
+def _executar(bind, instrucoes: Sequence[str]) -> None:
+    if isinstance(bind, Engine):
+        with bind.begin() as conn:
+            _executar(conn, instrucoes)
+        return
+    for instrucao in instrucoes:
+        bind.exec_driver_sql(instrucao)
+
+
+class IndicePesquisa:
+    """
+    Índice de pesquisa sobre colunas de texto de uma tabela.
+
+    - **tabela**: tabela pesquisada (com chave primária inteira `id`)
+    - **colunas**: colunas pesquisáveis, pela ordem dos pesos
+    - **pesos**: peso de cada coluna no ranking bm25 (SQLite)
+    """
+
+    def __init__(self, tabela, colunas: Sequence[str], pesos: Sequence[float]):
+        self.tabela = tabela
+        self.colunas = tuple(colunas)
+        self.pesos = tuple(pesos)
+        self.nome_fts = f"{tabela.name}_fts"
+        self.nome_indice_trgm = f"ix_{tabela.name}_pesquisa_trgm"
+
+    # ------------------------------------------------------------------
+    # DDL
+    # ------------------------------------------------------------------
+
+    def _ddl_sqlite(self) -> List[str]:
+        t, fts = self.tabela.name, self.nome_fts
+        colunas = ", ".join(self.colunas)
+        novos = ", ".join(f"new.{c}" for c in self.colunas)
+        antigos = ", ".join(f"old.{c}" for c in self.colunas)
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({colunas}, "
+            f"content='{t}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {t} BEGIN "
+            f"INSERT INTO {fts}(rowid, {colunas}) VALUES (new.id, {novos}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {t} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {colunas}) VALUES ('delete', old.id, {antigos}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {t} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {colunas}) VALUES ('delete', old.id, {antigos}); "
+            f"INSERT INTO {fts}(rowid, {colunas}) VALUES (new.id, {novos}); END",
+            # Indexa as linhas que já existiam antes do índice
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ]
+
+    def _documento_sql(self) -> str:
+        partes = " || ' ' || ".join(f"coalesce({c}, '')" for c in self.colunas)
+        return f"gestongo_unaccent(lower({partes}))"
+
+    def _ddl_postgresql(self) -> List[str]:
+        return [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE EXTENSION IF NOT EXISTS unaccent",
+            # unaccent() não é IMMUTABLE e não pode ser usada num índice
+            "CREATE OR REPLACE FUNCTION gestongo_unaccent(text) RETURNS text "
+            "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+            "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$",
+            f"CREATE INDEX IF NOT EXISTS {self.nome_indice_trgm} ON {self.tabela.name} "
+            f"USING gin ({self._documento_sql()} gin_trgm_ops)",
+        ]
+
+    def preparar(self, bind) -> bool:
+        """Cria (idempotente) o índice para o motor do bind; False se não houver suporte."""
+        dialecto = bind.dialect.name
+        if dialecto == "sqlite" and fts5_disponivel():
+            _executar(bind, self._ddl_sqlite())
+            return True
+        if dialecto == "postgresql":
+            _executar(bind, self._ddl_postgresql())
+            return True
+        return False
+
+    def remover(self, bind) -> None:
+        """Remove a tabela FTS e os triggers (o índice GIN cai com a tabela)."""
+        if bind.dialect.name == "sqlite":
+            fts = self.nome_fts
+            _executar(bind, [f"DROP TRIGGER IF EXISTS {fts}_{sufixo}" for sufixo in ("ai", "ad", "au")]
+                      + [f"DROP TABLE IF EXISTS {fts}"])
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def filtrar(self, query, dialecto: str, texto: str, coluna_id):
+        """
+        Restringe a consulta (Query ou select) às linhas que correspondem
+        ao texto e ordena-as por relevância (desempate pelo id).
+        """
+        palavras = palavras_pesquisa(texto)
+        if not palavras:
+            return query.order_by(coluna_id)
+
+        if dialecto == "sqlite" and fts5_disponivel():
+            fts = table(self.nome_fts, column("rowid"))
+            documento = literal_column(self.nome_fts)
+            termos = " ".join(f'"{palavra}"*' for palavra in palavras)
+            correspondencias = (
+                select(fts.c.rowid.label("id"), func.bm25(documento, *self.pesos).label("relevancia"))
+                .select_from(fts)
+                .where(documento.op("MATCH")(termos))
+                .subquery()
+            )
+            # bm25: quanto menor, mais relevante
+            return (
+                query.join(correspondencias, correspondencias.c.id == coluna_id)
+                .order_by(correspondencias.c.relevancia, coluna_id)
+            )
+
+        if dialecto == "postgresql":
+            # A expressão tem de coincidir com a do índice GIN
+            documento = literal_column(self._documento_sql(), String)
+            pesquisa = func.gestongo_unaccent(func.lower(" ".join(palavras)), type_=String)
+            for palavra in palavras:
+                query = query.filter(documento.contains(func.gestongo_unaccent(func.lower(palavra), type_=String)))
+            return query.order_by(func.word_similarity(pesquisa, documento).desc(), coluna_id)
+
+        colunas = [self.tabela.c[c] for c in self.colunas]
+        condicoes = [or_(*[c.ilike(f"%{palavra}%") for c in colunas]) for palavra in palavras]
+        return query.filter(and_(*condicoes)).order_by(coluna_id)
+
+
+def registar_pesquisa(modelo, colunas: Sequence[str], pesos: Sequence[float]) -> IndicePesquisa:
+    """Declara o índice de pesquisa do modelo e liga-o à criação/remoção da tabela."""
+    tabela = modelo.__table__
+    indice = IndicePesquisa(tabela, colunas, pesos)
+    # Lido por `preparar_esquema`/`impressao_esquema` no bootstrap
+    tabela.info["pesquisa"] = indice
+
+    def criar(target, connection, **kw):
+        indice.preparar(connection)
+
+    def remover(target, connection, **kw):
+        indice.remover(connection)
+
+    event.listen(tabela, "after_create", criar)
+    event.listen(tabela, "before_drop", remover)
+    return indice
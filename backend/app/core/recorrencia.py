@@ -0,0 +1,159 @@
+"""
+Expansão preguiçosa de planos recorrentes.
+
+Os planos (ver `models/plano.py`) substituem a criação antecipada de
+centenas de serviços semanais ou quinzenais, que enchia a tabela
+`servicos` e os totais do dashboard. As ocorrências são calculadas só
+para a janela pedida: a primeira data dentro da janela é obtida por
+aritmética (sem percorrer as ocorrências anteriores), pelo que listar um
+mês custa o mesmo num plano com uma semana ou com dez anos.
+
+Por janela são feitas três consultas: planos activos na janela, as suas
+excepções e as ocorrências já materializadas em `servicos` (estas
+substituem a ocorrência prevista).
+"""
+
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from ..models.plano import ExcecaoPlano, PlanoRecorrente
+from ..models.servico import Servico
+
+# Intervalo em dias das frequências fixas; "mensal" repete o dia do mês
+PASSOS_DIAS = {"semanal": 7, "quinzenal": 14}
+# Maior janela expandida por pedido
+MAX_JANELA_DIAS = 366
+
+
+def _somar_meses(inicio: date, meses: int) -> date:
+    """Mesmo dia do mês `meses` depois; no fim do mês quando não existe (ex.: 31)."""
+    ano, mes = divmod(inicio.month - 1 + meses, 12)
+    ano += inicio.year
+    return date(ano, mes + 1, min(inicio.day, monthrange(ano, mes + 1)[1]))
+
+
+def datas_ocorrencias(frequencia: str, inicio: date, fim: Optional[date],
+                      janela_inicio: date, janela_fim: date) -> Iterator[date]:
+    """Datas do plano dentro de [janela_inicio, janela_fim], por ordem."""
+    desde = max(inicio, janela_inicio)
+    ate = min(fim, janela_fim) if fim else janela_fim
+    if desde > ate:
+        return
+
+    if frequencia in PASSOS_DIAS:
+        passo = PASSOS_DIAS[frequencia]
+        # Primeiro múltiplo do passo a partir do início que cai na janela
+        saltos = -(-(desde - inicio).days // passo)
+        data = inicio + timedelta(days=saltos * passo)
+        while data <= ate:
+            yield data
+            data += timedelta(days=passo)
+        return
+
+    meses = (desde.year - inicio.year) * 12 + desde.month - inicio.month
+    data = _somar_meses(inicio, meses)
+    if data < desde:
+        meses += 1
+        data = _somar_meses(inicio, meses)
+    while data <= ate:
+        yield data
+        meses += 1
+        data = _somar_meses(inicio, meses)
+
+
+def e_ocorrencia(plano: PlanoRecorrente, data: date) -> bool:
+    """Indica se a data pertence ao plano (sem considerar excepções)."""
+    return next(datas_ocorrencias(plano.frequencia, plano.data_inicio, plano.data_fim, data, data), None) == data
+
+
+def _ocorrencia_prevista(plano, data: date) -> Dict[str, object]:
+    return {
+        "plano_id": plano.id,
+        "cliente_id": plano.cliente_id,
+        "tipo": plano.tipo,
+        "data_ocorrencia": data,
+        "data_servico": data,
+        "duracao_horas": plano.duracao_horas,
+        "descricao": plano.descricao,
+        "status": "agendado",
+        "servico_id": None,
+    }
+
+
+def _ocorrencia_materializada(servico) -> Dict[str, object]:
+    return {
+        "plano_id": servico.plano_id,
+        "cliente_id": servico.cliente_id,
+        "tipo": servico.tipo,
+        "data_ocorrencia": servico.data_ocorrencia,
+        "data_servico": servico.data_servico,
+        "duracao_horas": servico.duracao_horas,
+        "descricao": servico.descricao,
+        "status": servico.status,
+        "servico_id": servico.id,
+    }
+
+
+def ocorrencias_na_janela(
+    db: Session,
+    janela_inicio: date,
+    janela_fim: date,
+    cliente_id: Optional[int] = None,
+    tipo: Optional[str] = None,
+    plano_id: Optional[int] = None,
+    incluir_materializadas: bool = True,
+) -> List[Dict[str, object]]:
+    """
+    Ocorrências dos planos entre as duas datas (inclusive), ordenadas por
+    data e plano. As ocorrências com excepção são omitidas; as
+    materializadas são devolvidas com os dados do serviço, ou omitidas
+    com `incluir_materializadas=False` (quando os serviços já são listados
+    à parte).
+    """
+    consulta = select(PlanoRecorrente).where(
+        PlanoRecorrente.data_inicio <= janela_fim,
+        or_(PlanoRecorrente.data_fim.is_(None), PlanoRecorrente.data_fim >= janela_inicio),
+    )
+    if cliente_id:
+        consulta = consulta.where(PlanoRecorrente.cliente_id == cliente_id)
+    if tipo:
+        consulta = consulta.where(PlanoRecorrente.tipo == tipo)
+    if plano_id:
+        consulta = consulta.where(PlanoRecorrente.id == plano_id)
+    planos = db.execute(consulta).scalars().all()
+    if not planos:
+        return []
+    ids = [plano.id for plano in planos]
+
+    excecoes = set(db.execute(
+        select(ExcecaoPlano.plano_id, ExcecaoPlano.data).where(
+            ExcecaoPlano.plano_id.in_(ids),
+            ExcecaoPlano.data.between(janela_inicio, janela_fim),
+        )
+    ).all())
+    materializadas = {
+        (servico.plano_id, servico.data_ocorrencia): servico
+        for servico in db.execute(
+            select(Servico).where(
+                Servico.plano_id.in_(ids),
+                Servico.data_ocorrencia.between(janela_inicio, janela_fim),
+            )
+        ).scalars()
+    }
+
+    ocorrencias = []
+    for plano in planos:
+        for data in datas_ocorrencias(plano.frequencia, plano.data_inicio, plano.data_fim, janela_inicio, janela_fim):
+            if (plano.id, data) in excecoes:
+                continue
+            servico = materializadas.get((plano.id, data))
+            if servico is None:
+                ocorrencias.append(_ocorrencia_prevista(plano, data))
+            elif incluir_materializadas:
+                ocorrencias.append(_ocorrencia_materializada(servico))
+    ocorrencias.sort(key=lambda o: (o["data_ocorrencia"], o["plano_id"]))
+    return ocorrencias
@@ -13,9 +13,78 @@ class ReplitConfig:
     JWT_ALGORITHM: str = os.environ.get("JWT_ALGORITHM", "HS256")
     JWT_EXPIRATION_MINUTES: int = int(os.environ.get("JWT_EXPIRATION_MINUTES", "30"))
     
+    # Tokens auto-contidos: id, estado e versão do utilizador seguem no token
+    JWT_SELF_CONTAINED: bool = os.environ.get("JWT_SELF_CONTAINED", "false").lower() == "true"
+    JWT_VERSION_CACHE_SECONDS: int = int(os.environ.get("JWT_VERSION_CACHE_SECONDS", "30"))
+    
+    # Cache do utilizador autenticado (0 entradas desactiva a cache)
+    AUTH_CACHE_TTL_SECONDS: int = int(os.environ.get("AUTH_CACHE_TTL_SECONDS", "60"))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", "2048"))
+    
+    # Cache do dashboard de serviços (0 desactiva; stale > 0 serve o valor
+    # expirado enquanto recalcula em segundo plano)
+    DASHBOARD_CACHE_SECONDS: int = int(os.environ.get("DASHBOARD_CACHE_SECONDS", "15"))
+    DASHBOARD_STALE_SECONDS: int = int(os.environ.get("DASHBOARD_STALE_SECONDS", "0"))
+
+    # Índice em memória do autocomplete de clientes: reconstruído após este
+    # intervalo para incluir alterações feitas noutros workers (0 nunca)
+    AUTOCOMPLETE_REFRESH_SECONDS: int = int(os.environ.get("AUTOCOMPLETE_REFRESH_SECONDS", "300"))
+
+    # Linhas lidas da base de dados e enviadas de cada vez nas exportações
+    EXPORT_BATCH_SIZE: int = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+    # Linhas por grupo nos ficheiros Parquet/Arrow da exportação analítica
+    ANALYTICS_ROW_GROUP_SIZE: int = int(os.environ.get("ANALYTICS_ROW_GROUP_SIZE", "50000"))
+
+    # Horas de serviço que podem ser marcadas por dia, somando todas as
+    # tabelas (0 desactiva o limite)
+    DAILY_CAPACITY_HOURS: int = int(os.environ.get("DAILY_CAPACITY_HOURS", "16"))
+    # Dias (a partir de hoje) abrangidos pela procura do próximo dia livre
+    CAPACITY_HORIZON_DAYS: int = int(os.environ.get("CAPACITY_HORIZON_DAYS", "365"))
+    # Idade máxima da agenda em memória antes de ser relida (alterações de outros workers)
+    CAPACITY_REFRESH_SECONDS: int = int(os.environ.get("CAPACITY_REFRESH_SECONDS", "60"))
+    # Horário de trabalho em que a distribuição automática marca os técnicos
+    WORKDAY_START_HOUR: int = int(os.environ.get("WORKDAY_START_HOUR", "8"))
+    WORKDAY_END_HOUR: int = int(os.environ.get("WORKDAY_END_HOUR", "18"))
+    # Tempo máximo da pesquisa local da distribuição automática
+    ASSIGNMENT_SEARCH_SECONDS: float = float(os.environ.get("ASSIGNMENT_SEARCH_SECONDS", "0.5"))
+    
+    # Pool de hashing de senhas (0 processos executa no próprio processo)
+    HASH_POOL_PROCESSES: int = int(os.environ.get("HASH_POOL_PROCESSES", str(min(4, os.cpu_count() or 1))))
+    HASH_QUEUE_MAX: int = int(os.environ.get("HASH_QUEUE_MAX", "32"))
+    
     # Base de dados
     DATABASE_URL: str = os.environ.get("DATABASE_URL", "sqlite:///./gestongo.db")
     DATABASE_TYPE: str = os.environ.get("DATABASE_TYPE", "sqlite")
+    # Rotas CRUD assíncronas (aiosqlite / asyncpg)
+    DATABASE_ASYNC: bool = os.environ.get("DATABASE_ASYNC", "false").lower() == "true"
+    # Réplica de leitura (opcional): as rotas GET lêem daqui
+    DATABASE_READ_URL: str = os.environ.get("DATABASE_READ_URL", "")
+    # Janela após uma escrita em que o mesmo cliente lê da primária (read-your-writes)
+    DB_READ_YOUR_WRITES_SECONDS: int = int(os.environ.get("DB_READ_YOUR_WRITES_SECONDS", "5"))
+    # Tempo sem tentar a réplica depois de uma falha de ligação
+    DB_REPLICA_RETRY_SECONDS: int = int(os.environ.get("DB_REPLICA_RETRY_SECONDS", "30"))
+    
+    # Pool de ligações (PostgreSQL e outras bases de dados servidor)
+    DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: int = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+    
+    # Perfil de desempenho SQLite (aplicado a cada nova ligação)
+    SQLITE_PERFORMANCE_PROFILE: bool = os.environ.get("SQLITE_PERFORMANCE_PROFILE", "true").lower() == "true"
+    SQLITE_JOURNAL_MODE: str = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_CACHE_SIZE: int = int(os.environ.get("SQLITE_CACHE_SIZE", "-65536"))  # negativo = KiB (64 MiB)
+    SQLITE_MMAP_SIZE: int = int(os.environ.get("SQLITE_MMAP_SIZE", "268435456"))  # 256 MiB
+    SQLITE_TEMP_STORE: str = os.environ.get("SQLITE_TEMP_STORE", "MEMORY")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MAINTENANCE_INTERVAL_SECONDS: int = int(os.environ.get("SQLITE_MAINTENANCE_INTERVAL_SECONDS", "600"))
+    
+    # Arranque: preparar o esquema (e o administrador) se o carimbo diferir.
+    # Em produção corra `bootstrap.py` uma vez e desactive nos workers.
+    BOOTSTRAP_ON_STARTUP: bool = os.environ.get("BOOTSTRAP_ON_STARTUP", "true").lower() == "true"
+    STARTUP_BUDGET_MS: int = int(os.environ.get("STARTUP_BUDGET_MS", "1500"))
     
     # Aplicação
     APP_NAME: str = os.environ.get("APP_NAME", "GestOnGo")
@@ -91,9 +160,18 @@ class ReplitConfig:
         print(f"🚀 {cls.APP_NAME} v{cls.APP_VERSION}")
         print(f"🌍 Environment: {cls.ENVIRONMENT}")
         print(f"🔧 Debug: {cls.DEBUG}")
-        print(f"📊 Database: {cls.DATABASE_TYPE}")
+        print(f"📊 Database: {cls.DATABASE_TYPE}{' (async)' if cls.DATABASE_ASYNC else ''}")
+        if cls.DATABASE_URL.startswith("sqlite") and cls.SQLITE_PERFORMANCE_PROFILE:
+            print(f"⚡ SQLite profile: journal={cls.SQLITE_JOURNAL_MODE} synchronous={cls.SQLITE_SYNCHRONOUS}")
+        elif not cls.DATABASE_URL.startswith("sqlite"):
+            print(f"🏊 DB pool: size={cls.DB_POOL_SIZE} overflow={cls.DB_MAX_OVERFLOW} timeout={cls.DB_POOL_TIMEOUT}s")
+        if cls.DATABASE_READ_URL:
+            print(f"📖 Read replica: on (read-your-writes {cls.DB_READ_YOUR_WRITES_SECONDS}s)")
         print(f"🔐 JWT Algorithm: {cls.JWT_ALGORITHM}")
         print(f"⏰ JWT Expiration: {cls.JWT_EXPIRATION_MINUTES} minutes")
+        print(f"🎫 JWT self-contained: {cls.JWT_SELF_CONTAINED}")
+        print(f"🗃️ Auth cache: {cls.AUTH_CACHE_MAX_ENTRIES} entries / {cls.AUTH_CACHE_TTL_SECONDS}s")
+        print(f"🔒 Hash pool: {cls.HASH_POOL_PROCESSES} processes / queue {cls.HASH_QUEUE_MAX}")
         print(f"🌐 CORS Origins: {len(cls.ALLOWED_ORIGINS)} configured")
         print(f"📧 Email configured: {bool(cls.EMAIL_USERNAME)}")
         print(f"🟢 Verde Module: {cls.MODULO_VERDE_ATIVO}")
@@ -7,16 +7,23 @@ com a segurança. Estas funções são utilizadas nos controladores de
 utilizadores para gerir o processo de login e protecção de rotas.
 """
 
+import time
+from dataclasses import dataclass
+from functools import partial
 from datetime import datetime, timedelta
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from jose import JWTError, jwk, jwt
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
-from app.core.database import get_db
+from app.core.cache import CacheTTL
+from app.core.database import get_db, invalidar_apos_commit
+from app.core.database_async import get_async_db
+from app.core.hashing import calcular_hash, comparar_hash, pool_hashing
 from app.core.replit_config import config
 from app.models_base.user import User
 
@@ -25,22 +32,57 @@ SECRET_KEY = config.JWT_SECRET_KEY
 ALGORITHM = config.JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = config.JWT_EXPIRATION_MINUTES
 
-# Contexto de hashing de senhas. O bcrypt é um algoritmo robusto e amplamente
-# utilizado. A biblioteca passlib facilita a sua utilização e gestão de versões.
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Chave construída uma única vez; evita reconstruí-la em cada encode/decode
+CHAVE_JWT = jwk.construct(SECRET_KEY, ALGORITHM)
 
 # Esquema OAuth2 para extração do token Bearer
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
+@dataclass(frozen=True)
+class UtilizadorAutenticado:
+    """Cópia do utilizador autenticado, desligada de qualquer sessão SQLAlchemy."""
+
+    id: int
+    nome: str
+    email: str
+    is_active: bool
+
+
+# Cache token -> utilizador autenticado. Evita a consulta à tabela de
+# utilizadores em cada pedido protegido; cada entrada expira, no máximo,
+# quando expira o próprio token.
+cache_utilizadores = CacheTTL(
+    max_entradas=config.AUTH_CACHE_MAX_ENTRIES,
+    ttl_segundos=config.AUTH_CACHE_TTL_SECONDS,
+)
+
+# Cache user_id -> (versao_token, is_active) usada pelos tokens auto-contidos
+# para detectar revogações sem consultar a base de dados em cada pedido.
+cache_versoes_token = CacheTTL(
+    max_entradas=config.AUTH_CACHE_MAX_ENTRIES,
+    ttl_segundos=config.JWT_VERSION_CACHE_SECONDS,
+)
+
+
 def gerar_hash_senha(senha: str) -> str:
-    """Gera um hash a partir de uma senha em texto plano."""
-    return pwd_context.hash(senha)
+    """Gera um hash a partir de uma senha em texto plano (bloqueante)."""
+    return pool_hashing.executar_sync(calcular_hash, senha)
 
 
 def verificar_senha(senha: str, hash_senha: str) -> bool:
-    """Verifica se a senha corresponde ao hash fornecido."""
-    return pwd_context.verify(senha, hash_senha)
+    """Verifica se a senha corresponde ao hash fornecido (bloqueante)."""
+    return pool_hashing.executar_sync(comparar_hash, senha, hash_senha)
+
+
+async def gerar_hash_senha_async(senha: str) -> str:
+    """Gera o hash no pool de hashing sem ocupar o threadpool do servidor."""
+    return await pool_hashing.executar(calcular_hash, senha)
+
+
+async def verificar_senha_async(senha: str, hash_senha: str) -> bool:
+    """Verifica a senha no pool de hashing sem ocupar o threadpool do servidor."""
+    return await pool_hashing.executar(comparar_hash, senha, hash_senha)
 
 
 def criar_token_acesso(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -48,21 +90,168 @@ def criar_token_acesso(data: dict, expires_delta: Optional[timedelta] = None) ->
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, CHAVE_JWT, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def verificar_token(token: str) -> Optional[str]:
-    """Verifica e decodifica um token JWT."""
+def criar_token_utilizador(user, expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Cria o token de acesso de um utilizador.
+
+    Com JWT_SELF_CONTAINED activo, o token transporta id, nome, estado e
+    versão do token, permitindo autenticar sem consultar a tabela de
+    utilizadores. Caso contrário contém apenas o email (`sub`).
+    """
+    dados = {"sub": user.email}
+    if config.JWT_SELF_CONTAINED:
+        dados.update({
+            "uid": user.id,
+            "nome": user.nome,
+            "act": bool(user.is_active),
+            "ver": user.versao_token or 0,
+        })
+    return criar_token_acesso(dados, expires_delta)
+
+
+def decodificar_token(token: str) -> Optional[dict]:
+    """Decodifica um token JWT, devolvendo None se for inválido ou expirado."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
-        return email
+        return jwt.decode(token, CHAVE_JWT, algorithms=[ALGORITHM])
     except JWTError:
         return None
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def token_auto_contido(payload: dict) -> bool:
+    """Indica se o token transporta os dados do utilizador."""
+    return "uid" in payload and "ver" in payload
+
+
+def principal_do_token(payload: dict) -> UtilizadorAutenticado:
+    """Constrói o utilizador autenticado a partir das claims do token."""
+    return UtilizadorAutenticado(
+        id=payload["uid"],
+        nome=payload.get("nome", ""),
+        email=payload["sub"],
+        is_active=bool(payload.get("act", True)),
+    )
+
+
+def versao_token_valida(payload: dict, db: Session, modelo=User) -> bool:
+    """
+    Verifica se um token auto-contido não foi revogado.
+
+    A versão actual do utilizador vem da cache; só em caso de falha é feita
+    uma leitura pela chave primária, restrita às duas colunas necessárias.
+    """
+    uid = payload["uid"]
+    estado = cache_versoes_token.obter(uid)
+    if estado is None:
+        linha = db.query(modelo.versao_token, modelo.is_active).filter(modelo.id == uid).first()
+        estado = _memorizar_versao(uid, linha)
+    return _versao_confere(payload, estado)
+
+
+async def versao_token_valida_async(payload: dict, db: AsyncSession, modelo=User) -> bool:
+    """Versão assíncrona de `versao_token_valida`."""
+    uid = payload["uid"]
+    estado = cache_versoes_token.obter(uid)
+    if estado is None:
+        resultado = await db.execute(
+            select(modelo.versao_token, modelo.is_active).where(modelo.id == uid)
+        )
+        estado = _memorizar_versao(uid, resultado.first())
+    return _versao_confere(payload, estado)
+
+
+def _memorizar_versao(uid: int, linha) -> Optional[tuple]:
+    if linha is None:
+        return None
+    estado = (linha.versao_token or 0, bool(linha.is_active))
+    cache_versoes_token.guardar(uid, estado)
+    return estado
+
+
+def _versao_confere(payload: dict, estado: Optional[tuple]) -> bool:
+    if estado is None:
+        return False
+    versao, activo = estado
+    return activo and versao == payload["ver"]
+
+
+def verificar_token(token: str) -> Optional[str]:
+    """Verifica e decodifica um token JWT."""
+    payload = decodificar_token(token)
+    return payload.get("sub") if payload else None
+
+
+def utilizador_em_cache(token: str) -> Optional[UtilizadorAutenticado]:
+    """Devolve o utilizador associado ao token se estiver em cache."""
+    return cache_utilizadores.obter(token)
+
+
+def memorizar_utilizador(token: str, payload: dict, user) -> UtilizadorAutenticado:
+    """Cria a cópia desligada do utilizador e guarda-a em cache até ao fim do token."""
+    utilizador = UtilizadorAutenticado(
+        id=user.id,
+        nome=user.nome,
+        email=user.email,
+        is_active=bool(user.is_active),
+    )
+    expira_em = payload.get("exp")
+    ttl = (expira_em - time.time()) if expira_em else None
+    cache_utilizadores.guardar(token, utilizador, ttl)
+    return utilizador
+
+
+def invalidar_utilizador(email: str) -> int:
+    """Remove da cache todas as entradas de um utilizador."""
+    return cache_utilizadores.invalidar_se(lambda utilizador: utilizador.email == email)
+
+
+def _invalidar_apos_escrita(mapper, connection, target) -> None:
+    """
+    Listener ORM: invalida o email actual e, se mudou, o anterior.
+
+    As invalidações só correm depois do commit, senão um pedido
+    concorrente repunha na cache a versão do token ainda por confirmar.
+    """
+    sessao = object_session(target)
+    emails = {target.email}
+    emails.update(inspect(target).attrs.email.history.deleted or ())
+    for email in emails:
+        if email:
+            invalidar_apos_commit(sessao, ("utilizador", email), partial(invalidar_utilizador, email))
+    invalidar_apos_commit(sessao, ("versao_token", target.id), partial(cache_versoes_token.invalidar, target.id))
+
+
+def _revogar_tokens_se_necessario(mapper, connection, target) -> None:
+    """Listener ORM: incrementa a versão do token ao mudar senha, email ou estado."""
+    estado = inspect(target)
+    if any(estado.attrs[campo].history.has_changes() for campo in ("hash_senha", "email", "is_active")):
+        target.versao_token = (target.versao_token or 0) + 1
+
+
+def registar_invalidacao_cache(modelo) -> None:
+    """
+    Invalida a cache sempre que um utilizador é criado, alterado ou eliminado.
+
+    Cobre desactivações, mudanças de senha e de email, independentemente
+    da rota que as efectua; nesses casos a versão do token é incrementada,
+    revogando os tokens auto-contidos já emitidos.
+    """
+    if not event.contains(modelo, "before_update", _revogar_tokens_se_necessario):
+        event.listen(modelo, "before_update", _revogar_tokens_se_necessario)
+    for evento in ("after_insert", "after_update", "after_delete"):
+        if not event.contains(modelo, evento, _invalidar_apos_escrita):
+            event.listen(modelo, evento, _invalidar_apos_escrita)
+
+
+registar_invalidacao_cache(User)
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> UtilizadorAutenticado:
     """Obtém o utilizador actual a partir do token JWT."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -70,16 +259,54 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+    payload = decodificar_token(token)
+    email = payload.get("sub") if payload else None
+    if email is None:
         raise credentials_exception
     
+    if token_auto_contido(payload):
+        if not versao_token_valida(payload, db, User):
+            raise credentials_exception
+        return principal_do_token(payload)
+    
+    utilizador = utilizador_em_cache(token)
+    if utilizador is not None:
+        return utilizador
+    
     user = db.query(User).filter(User.email == email).first()
     if user is None:
         raise credentials_exception
     
-    return user
+    return memorizar_utilizador(token, payload, user)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> UtilizadorAutenticado:
+    """Obtém o utilizador actual a partir do token JWT (rotas assíncronas)."""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    payload = decodificar_token(token)
+    email = payload.get("sub") if payload else None
+    if email is None:
+        raise credentials_exception
+    
+    if token_auto_contido(payload):
+        if not await versao_token_valida_async(payload, db, User):
+            raise credentials_exception
+        return principal_do_token(payload)
+    
+    utilizador = utilizador_em_cache(token)
+    if utilizador is not None:
+        return utilizador
+    
+    resultado = await db.execute(select(User).where(User.email == email))
+    user = resultado.scalars().first()
+    if user is None:
+        raise credentials_exception
+    
+    return memorizar_utilizador(token, payload, user)
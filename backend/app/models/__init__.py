@@ -0,0 +1,11 @@
+"""
+Modelos ORM da aplicação principal.
+
+Os módulos não são importados aqui: a aplicação modular importa alguns
+deles (ex.: `tecnico`) ao lado dos seus próprios modelos de clientes.
+"""
+
+
+def registar_modelos() -> None:
+    """Importa todos os modelos, registando as tabelas no `Base.metadata`."""
+    from . import cliente, contador, plano, servico, tecnico, user  # noqa: F401
@@ -9,7 +9,9 @@ pode ter múltiplos serviços associados.
 from sqlalchemy import Column, Integer, String, Text
 from sqlalchemy.orm import relationship
 
+from ..core.contadores import chaves_cliente, registar_contadores
 from ..core.database import Base
+from ..core.pesquisa import registar_pesquisa
 
 
 class Cliente(Base):
@@ -25,3 +27,10 @@ class Cliente(Base):
 
     # Relação um-para-muitos com serviços: um cliente pode ter vários serviços
     servicos = relationship("Servico", back_populates="cliente", cascade="all, delete-orphan")
+
+
+# Estatísticas de clientes mantidas na tabela de contadores
+registar_contadores(Cliente, ("telefone", "endereco"), chaves_cliente)
+
+# Pesquisa textual (FTS5/pg_trgm); o nome pesa mais no ranking
+pesquisa_clientes = registar_pesquisa(Cliente, ("nome", "telefone", "endereco", "observacoes"), (10.0, 5.0, 2.0, 1.0))
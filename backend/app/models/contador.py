@@ -0,0 +1,20 @@
+"""
+Modelo ORM para contadores agregados.
+
+Cada linha guarda um total mantido incrementalmente (ex.: serviços por
+tipo, por estado, por mês), para que dashboards e estatísticas não
+tenham de recontar tabelas inteiras. Ver `app/core/contadores.py`.
+"""
+
+from sqlalchemy import Column, Integer, String
+
+from ..core.database import Base
+
+
+class Contador(Base):
+    """Total agregado identificado por uma chave (ex.: "servicos:tipo:piscina")."""
+
+    __tablename__ = "contadores"
+
+    chave: str = Column(String(120), primary_key=True)
+    valor: int = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,53 @@
+"""
+Modelos ORM para planos de serviços recorrentes.
+
+Um plano descreve visitas periódicas a um cliente (ex.: piscina todas as
+semanas, jardim de 15 em 15 dias). As ocorrências não são gravadas com
+antecedência: são calculadas para a janela pedida (ver
+`app/core/recorrencia.py`) e só passam a linhas de `servicos` quando são
+iniciadas ou editadas. As excepções retiram ocorrências isoladas.
+"""
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from ..core.database import Base
+
+
+class PlanoRecorrente(Base):
+    """Regra de recorrência (semanal, quinzenal ou mensal) de um cliente."""
+
+    __tablename__ = "planos_recorrentes"
+    # Expansão de uma janela: planos que começam antes do fim da janela
+    __table_args__ = (
+        Index("ix_planos_recorrentes_inicio_fim", "data_inicio", "data_fim"),
+    )
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False, index=True)
+    tipo: str = Column(String, nullable=False)  # "jardinagem" ou "piscina"
+    frequencia: str = Column(String, nullable=False)  # semanal, quinzenal, mensal
+    data_inicio = Column(Date, nullable=False)
+    data_fim = Column(Date, nullable=True)  # sem fim quando NULL
+    duracao_horas = Column(Integer, nullable=False)
+    descricao: str = Column(Text, nullable=True)
+    data_criacao = Column(DateTime(timezone=True), server_default=func.now())
+    data_actualizacao = Column(DateTime(timezone=True), onupdate=func.now())
+
+    cliente = relationship("Cliente")
+    excecoes = relationship(
+        "ExcecaoPlano", back_populates="plano", cascade="all, delete-orphan", order_by="ExcecaoPlano.data"
+    )
+
+
+class ExcecaoPlano(Base):
+    """Ocorrência retirada de um plano (ex.: cliente ausente nessa semana)."""
+
+    __tablename__ = "excecoes_planos"
+
+    plano_id = Column(Integer, ForeignKey("planos_recorrentes.id"), primary_key=True)
+    data = Column(Date, primary_key=True)
+    motivo: str = Column(String, nullable=True)
+
+    plano = relationship("PlanoRecorrente", back_populates="excecoes")
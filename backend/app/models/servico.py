@@ -6,27 +6,49 @@ jardinagem ou manutenção de piscinas. Os serviços estão associados a
 clientes e contêm informação sobre a data, duração e descrição.
 """
 
-from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
+from ..core.contadores import chaves_servico, registar_contadores
 from ..core.database import Base
+from . import plano  # noqa: F401 (tabela referenciada por plano_id)
 
 
 class Servico(Base):
     """Representa um serviço de campo."""
 
     __tablename__ = "servicos"
+    # Índices compostos pelas formas reais das consultas (ver benchmarks/indices_servicos.py):
+    # - duplicados em criar_servico: cliente_id = ? AND data_servico = ? AND status != ?
+    # - listagens/dashboard: filtro por status ou tipo com intervalo/ordem por data_servico
+    # - ocorrências de planos já materializadas (no máximo uma por data)
+    # Substituem os índices simples de tipo e status, que são prefixo destes
+    # e que o bootstrap remove das bases de dados existentes.
+    __table_args__ = (
+        Index("ix_servicos_cliente_data_status", "cliente_id", "data_servico", "status"),
+        Index("ix_servicos_status_data", "status", "data_servico"),
+        Index("ix_servicos_tipo_data", "tipo", "data_servico"),
+        Index("ux_servicos_plano_ocorrencia", "plano_id", "data_ocorrencia", unique=True),
+        {"info": {"indices_obsoletos": ("ix_servicos_tipo", "ix_servicos_status")}},
+    )
 
     id: int = Column(Integer, primary_key=True, index=True)
-    tipo: str = Column(String, index=True)  # "jardinagem" ou "piscina"
+    tipo: str = Column(String)  # "jardinagem" ou "piscina"
     data_servico = Column(Date, index=True)
     duracao_horas = Column(Integer)
     cliente_id = Column(Integer, ForeignKey("clientes.id"))
     descricao: str = Column(Text, nullable=True)
-    status: str = Column(String, default="agendado", index=True)  # agendado, em_progresso, concluido, cancelado
+    status: str = Column(String, default="agendado")  # agendado, em_progresso, concluido, cancelado
     data_criacao = Column(DateTime(timezone=True), server_default=func.now())
     data_actualizacao = Column(DateTime(timezone=True), onupdate=func.now())
+    # Ocorrência de um plano recorrente que deu origem ao serviço (se for o caso)
+    plano_id = Column(Integer, ForeignKey("planos_recorrentes.id"), nullable=True)
+    data_ocorrencia = Column(Date, nullable=True)
 
     # Relação inversa para aceder ao cliente do serviço
     cliente = relationship("Cliente", back_populates="servicos")
+
+
+# Totais do dashboard e horas marcadas por dia mantidos na tabela de contadores
+registar_contadores(Servico, ("tipo", "status", "data_servico", "duracao_horas"), chaves_servico("servicos"))
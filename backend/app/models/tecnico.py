@@ -0,0 +1,58 @@
+"""
+Modelos ORM para técnicos e as suas atribuições a serviços.
+
+Um serviço tem data e duração, mas não hora nem responsável. Uma
+atribuição liga um técnico a um serviço com a hora de início; a duração
+é a do serviço, salvo indicação em contrário. As atribuições de um
+técnico num dia não se podem sobrepor (ver `app/core/atribuicoes.py`).
+
+O serviço pode ser da tabela `servicos` ou dos módulos Aqua e Verde
+(`origem`, como no calendário); por isso `servico_id` não tem chave
+estrangeira.
+"""
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Time, true
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from ..core.database import Base
+
+
+class Tecnico(Base):
+    """Membro da equipa que realiza os serviços."""
+
+    __tablename__ = "tecnicos"
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    nome: str = Column(String, nullable=False, index=True)
+    telefone: str = Column(String, nullable=True)
+    # "jardinagem" ou "piscina"; NULL quando faz os dois tipos
+    especialidade: str = Column(String, nullable=True)
+    activo = Column(Boolean, nullable=False, default=True, server_default=true())
+    data_criacao = Column(DateTime(timezone=True), server_default=func.now())
+
+    atribuicoes = relationship("Atribuicao", back_populates="tecnico")
+
+
+class Atribuicao(Base):
+    """Técnico atribuído a um serviço, a partir de uma hora."""
+
+    __tablename__ = "atribuicoes"
+    # Agenda de um técnico (por técnico, com o dia vindo do serviço) e
+    # técnicos de um serviço; o mesmo técnico só entra uma vez por serviço
+    __table_args__ = (
+        Index("ix_atribuicoes_tecnico_servico", "tecnico_id", "servico_id"),
+        Index("ux_atribuicoes_origem_servico_tecnico", "origem", "servico_id", "tecnico_id", unique=True),
+    )
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    # "servicos", "aqua" ou "verde" (ver `calendario.TABELAS_MODULOS`)
+    origem: str = Column(String, nullable=False, default="servicos", server_default="servicos")
+    servico_id = Column(Integer, nullable=False)
+    tecnico_id = Column(Integer, ForeignKey("tecnicos.id"), nullable=False)
+    hora_inicio = Column(Time, nullable=False)
+    # NULL: a duração do serviço (acompanha as alterações do serviço)
+    duracao_horas = Column(Integer, nullable=True)
+    data_criacao = Column(DateTime(timezone=True), server_default=func.now())
+
+    tecnico = relationship("Tecnico", back_populates="atribuicoes")
@@ -20,3 +20,5 @@ class User(Base):
     email: str = Column(String, unique=True, index=True, nullable=False)
     hash_senha: str = Column(String, nullable=False)
     is_active: bool = Column(Boolean, default=True)
+    # Incrementada ao mudar senha/estado; revoga tokens auto-contidos antigos
+    versao_token: int = Column(Integer, nullable=False, default=0, server_default="0")
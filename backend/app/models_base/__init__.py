@@ -1 +1,11 @@
 # Modelos base do sistema GestOnGo
+
+
+def registar_modelos() -> None:
+    """
+    Importa os modelos da aplicação modular, registando as tabelas no
+    `Base.metadata`: utilizadores e clientes base, mais os contadores e os
+    técnicos partilhados com a aplicação principal.
+    """
+    from app.models import contador, tecnico  # noqa: F401
+    from app.models_base import cliente, user  # noqa: F401
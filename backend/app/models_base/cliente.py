@@ -4,6 +4,7 @@ Versão base partilhada por todos os módulos
 """
 
 from sqlalchemy import Column, Integer, String, Text
+from app.core.contadores import chaves_cliente, registar_contadores
 from app.core.database import Base
 
 class Cliente(Base):
@@ -27,3 +28,7 @@ class Cliente(Base):
 
     def __repr__(self):
         return f"<Cliente(id={self.id}, nome='{self.nome}', telefone='{self.telefone}')>"
+
+
+# Estatísticas de clientes mantidas na tabela de contadores
+registar_contadores(Cliente, ("telefone", "endereco"), chaves_cliente)
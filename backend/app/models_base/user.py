@@ -16,6 +16,7 @@ class User(Base):
     - email: Email único para login
     - hash_senha: Senha hasheada com bcrypt
     - is_active: Utilizador activo (permite desactivar sem eliminar)
+    - versao_token: Versão dos tokens emitidos (incrementada para os revogar)
     """
     __tablename__ = "utilizadores"
 
@@ -24,6 +25,7 @@ class User(Base):
     email = Column(String(255), unique=True, index=True, nullable=False, comment="Email único para login")
     hash_senha = Column(String(255), nullable=False, comment="Senha hasheada com bcrypt")
     is_active = Column(Boolean, default=True, comment="Utilizador activo no sistema")
+    versao_token = Column(Integer, nullable=False, default=0, server_default="0", comment="Versão dos tokens emitidos")
 
     def __repr__(self):
         return f"<User(id={self.id}, email='{self.email}', nome='{self.nome}')>"
@@ -6,25 +6,100 @@ As operações estão protegidas por autenticação: apenas um utilizador
 autenticado pode executar estas acções.
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+from fastapi import APIRouter, Depends, File, HTTPException, status, Query, Request, Response, UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased, selectinload
 
-from ..core.database import SessionLocal
-from ..models.cliente import Cliente
-from ..schemas.cliente import ClienteCreate, ClienteResponse, ClienteUpdate
+from ..core.autocomplete import IndicePrefixos
+from ..core.contadores import ler_contadores
+from ..core.database import get_db, get_db_leitura
+from ..core.importacao import TAMANHO_LOTE, detectar_formato, importar_clientes, ler_linhas
+from ..core.paginacao import paginar, publicar_cursores
+from ..core.replit_config import config
+from ..models.cliente import Cliente, pesquisa_clientes
+from ..models.plano import PlanoRecorrente
+from ..models.servico import Servico
+from ..schemas.cliente import ClienteCreate, ClienteListagem, ClienteResponse, ClienteSugestao, ClienteUpdate
 from .users import get_current_user
 
 
 router = APIRouter(prefix="/clientes", tags=["Clientes"])
 
+# Relações que podem ser pedidas nas listagens com `include`
+INCLUDES_VALIDOS = {"servicos"}
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Nomes dos clientes para o autocomplete (um índice por worker)
+indice_autocomplete = IndicePrefixos(refrescar_segundos=config.AUTOCOMPLETE_REFRESH_SECONDS)
+
+# Ordem das listagens (ordem de criação), estável para os cursores
+ORDEM_CLIENTES = ((Cliente.id, False),)
+
+
+def validar_include(include: Optional[str]) -> set:
+    """Converte `include=servicos,...` num conjunto, rejeitando valores desconhecidos."""
+    pedidos = {parte.strip() for parte in (include or "").split(",") if parte.strip()}
+    desconhecidos = pedidos - INCLUDES_VALIDOS
+    if desconhecidos:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Valor inválido em include: {', '.join(sorted(desconhecidos))}"
+        )
+    return pedidos
+
+
+def consulta_servicos_recentes(cliente_ids: Sequence[int], limite: int):
+    """
+    Os `limite` serviços mais recentes de cada cliente, numa só consulta
+    (ROW_NUMBER() particionado por cliente).
+    """
+    numerados = select(
+        Servico,
+        func.row_number().over(
+            partition_by=Servico.cliente_id,
+            order_by=(Servico.data_servico.desc(), Servico.id.desc()),
+        ).label("ordem"),
+    ).where(Servico.cliente_id.in_(cliente_ids)).subquery()
+    servico = aliased(Servico, numerados)
+    return (
+        select(servico)
+        .where(numerados.c.ordem <= limite)
+        .order_by(servico.cliente_id, servico.data_servico.desc(), servico.id.desc())
+    )
+
+
+def cliente_listagem(cliente: Cliente, servicos: Optional[List[Servico]] = None) -> dict:
+    """Dados da listagem; `servicos` só entra quando foi pedido."""
+    dados = {
+        "id": cliente.id,
+        "nome": cliente.nome,
+        "telefone": cliente.telefone,
+        "endereco": cliente.endereco,
+        "observacoes": cliente.observacoes,
+    }
+    if servicos is not None:
+        dados["servicos"] = servicos
+    return dados
+
+
+def validar_pesquisa(cursor: Optional[str]) -> None:
+    """Resultados ordenados por relevância são paginados só por `skip`."""
+    if cursor:
+        raise HTTPException(status_code=400, detail="A pesquisa não suporta cursor; use skip")
+
+
+def ordenar_servicos(servicos: Sequence[Servico]) -> List[Servico]:
+    """Mais recentes primeiro, como nas listagens de serviços."""
+    return sorted(servicos, key=lambda s: (s.data_servico or date.min, s.id), reverse=True)
+
+
+def agrupar_por_cliente(servicos: Sequence[Servico]) -> Dict[int, List[Servico]]:
+    grupos: Dict[int, List[Servico]] = defaultdict(list)
+    for servico in servicos:
+        grupos[servico.cliente_id].append(servico)
+    return grupos
 
 
 @router.post("/", response_model=ClienteResponse, status_code=status.HTTP_201_CREATED)
@@ -46,32 +121,107 @@ def criar_cliente(
     db.add(novo_cliente)
     db.commit()
     db.refresh(novo_cliente)
+    indice_autocomplete.actualizar(novo_cliente.id, novo_cliente.nome)
     return novo_cliente
 
 
-@router.get("/", response_model=List[ClienteResponse])
+@router.get("/", response_model=List[ClienteListagem], response_model_exclude_unset=True)
 def listar_clientes(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="Número de registos a saltar"),
     limit: int = Query(100, ge=1, le=100, description="Número máximo de registos"),
-    nome: str = Query(None, description="Filtrar por nome (busca parcial)"),
-    db: Session = Depends(get_db), 
+    q: Optional[str] = Query(None, description="Pesquisa em nome, telefone, endereço e observações (por relevância)"),
+    nome: str = Query(None, description="Equivalente a q (compatibilidade)", deprecated=True),
+    include: Optional[str] = Query(None, description="Relações a incluir (ex.: 'servicos')"),
+    servicos_limite: Optional[int] = Query(None, ge=1, le=100, description="Máximo de serviços (mais recentes) por cliente"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devolvido em X-Cursor-Seguinte/X-Cursor-Anterior"),
+    db: Session = Depends(get_db_leitura), 
     current_user=Depends(get_current_user)
 ):
-    """Lista clientes com filtros opcionais. Requer autenticação."""
+    """
+    Lista clientes com filtros opcionais. Requer autenticação.
+
+    Por defeito devolve apenas os dados do cliente. Com `include=servicos`
+    os serviços são carregados numa única consulta adicional (mais
+    recentes primeiro), opcionalmente limitados por `servicos_limite`.
+
+    Paginação por `skip` ou por `cursor` (cabeçalhos X-Cursor-* e Link).
+    A pesquisa (`q`) usa o índice textual, ignora acentos e ordena por
+    relevância; nesse caso a paginação é só por `skip`.
+    """
+    incluir = validar_include(include)
     query = db.query(Cliente)
-    
-    # Filtro por nome (busca parcial, insensível a maiúsculas)
-    if nome:
-        query = query.filter(Cliente.nome.ilike(f"%{nome}%"))
-    
-    clientes = query.offset(skip).limit(limit).all()
-    return clientes
+    if "servicos" in incluir and servicos_limite is None:
+        query = query.options(selectinload(Cliente.servicos))
+
+    texto = q or nome
+    if texto:
+        validar_pesquisa(cursor)
+        query = pesquisa_clientes.filtrar(query, db.get_bind().dialect.name, texto, Cliente.id)
+        clientes = query.offset(skip).limit(limit).all()
+    else:
+        clientes, seguinte, anterior = paginar(query, ORDEM_CLIENTES, skip, limit, cursor)
+        publicar_cursores(request, response, seguinte, anterior)
+
+    if "servicos" not in incluir:
+        return [cliente_listagem(c) for c in clientes]
+
+    if servicos_limite is None:
+        return [cliente_listagem(c, ordenar_servicos(c.servicos)) for c in clientes]
+
+    servicos = db.execute(consulta_servicos_recentes([c.id for c in clientes], servicos_limite)).scalars().all()
+    grupos = agrupar_por_cliente(servicos)
+    return [cliente_listagem(c, grupos.get(c.id, [])) for c in clientes]
+
+
+@router.post("/importar")
+def importar_clientes_em_massa(
+    ficheiro: UploadFile = File(..., description="CSV com cabeçalho ou NDJSON (um objecto por linha)"),
+    formato: Optional[str] = Query(None, description="csv ou ndjson (por defeito, pela extensão)"),
+    lote: int = Query(TAMANHO_LOTE, ge=1, le=5000, description="Linhas por transacção"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Importa clientes em massa a partir de um ficheiro. Requer autenticação.
+
+    Colunas: nome, telefone, endereco, observacoes. Devolve os totais e os
+    erros por linha; nomes já existentes são reportados como duplicados.
+    """
+    try:
+        formato = detectar_formato(ficheiro.filename, formato)
+    except ValueError as erro:
+        raise HTTPException(status_code=400, detail=str(erro))
+
+    relatorio = importar_clientes(db, ler_linhas(ficheiro.file, formato), lote)
+    if relatorio.importados:
+        indice_autocomplete.invalidar()
+    return relatorio.como_dict()
+
+
+@router.get("/autocomplete", response_model=List[ClienteSugestao])
+def autocomplete_clientes(
+    q: str = Query("", max_length=100, description="Início do nome ou de uma das suas palavras"),
+    limite: int = Query(10, ge=1, le=50, description="Número máximo de sugestões"),
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user),
+):
+    """
+    Sugestões de clientes para os seletores (type-ahead). Requer autenticação.
+
+    Servidas do índice em memória, sem acentos nem maiúsculas: primeiro os
+    nomes que começam por `q`, depois os que têm uma palavra que começa
+    por `q`. A base de dados só é lida quando o índice é (re)construído.
+    """
+    indice_autocomplete.refrescar_se_antigo(db, Cliente)
+    return [{"id": identificador, "nome": nome} for identificador, nome in indice_autocomplete.procurar(q, limite)]
 
 
 @router.get("/{cliente_id}", response_model=ClienteResponse)
 def obter_cliente(
     cliente_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
     current_user=Depends(get_current_user),
 ):
     """Obtém um cliente específico pelo ID. Requer autenticação."""
@@ -100,6 +250,7 @@ def actualizar_cliente(
     
     db.commit()
     db.refresh(cliente)
+    indice_autocomplete.actualizar(cliente.id, cliente.nome)
     return cliente
 
 
@@ -120,21 +271,29 @@ def eliminar_cliente(
             status_code=400,
             detail="Não é possível eliminar cliente com serviços associados"
         )
+    if db.query(PlanoRecorrente.id).filter(PlanoRecorrente.cliente_id == cliente_id).first():
+        raise HTTPException(
+            status_code=400,
+            detail="Não é possível eliminar cliente com planos recorrentes"
+        )
     
     db.delete(cliente)
     db.commit()
+    indice_autocomplete.remover(cliente_id)
     return None
 
 
 @router.get("/estatisticas/resumo")
 def obter_estatisticas_clientes(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
     current_user=Depends(get_current_user),
 ):
     """Obtém estatísticas básicas dos clientes. Requer autenticação."""
-    total_clientes = db.query(Cliente).count()
-    clientes_com_telefone = db.query(Cliente).filter(Cliente.telefone.isnot(None)).count()
-    clientes_com_endereco = db.query(Cliente).filter(Cliente.endereco.isnot(None)).count()
+    # Totais mantidos incrementalmente na tabela de contadores
+    totais = ler_contadores(db, ["clientes:total", "clientes:com_telefone", "clientes:com_endereco"])
+    total_clientes = totais["clientes:total"]
+    clientes_com_telefone = totais["clientes:com_telefone"]
+    clientes_com_endereco = totais["clientes:com_endereco"]
     
     return {
         "total_clientes": total_clientes,
@@ -0,0 +1,165 @@
+"""
+Rotas assíncronas para gerir clientes.
+
+Equivalentes às rotas CRUD de `clientes.py`, mas sobre a sessão
+assíncrona: registadas antes das síncronas quando DATABASE_ASYNC está
+activo. As restantes rotas (estatísticas) continuam a ser servidas pelo
+router síncrono.
+"""
+
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ..core.database_async import get_async_db
+from ..core.paginacao import paginar_async, publicar_cursores
+from ..models.cliente import Cliente, pesquisa_clientes
+from ..models.plano import PlanoRecorrente
+from ..schemas.cliente import ClienteCreate, ClienteListagem, ClienteResponse, ClienteUpdate
+from .clientes import (
+    ORDEM_CLIENTES,
+    agrupar_por_cliente,
+    cliente_listagem,
+    consulta_servicos_recentes,
+    indice_autocomplete,
+    ordenar_servicos,
+    validar_include,
+    validar_pesquisa,
+)
+from .users import get_current_user_async
+
+
+router = APIRouter(prefix="/clientes", tags=["Clientes"])
+
+
+async def _obter_cliente(db: AsyncSession, cliente_id: int) -> Cliente:
+    """Carrega o cliente com os serviços (sem lazy loading em modo assíncrono)."""
+    resultado = await db.execute(
+        select(Cliente).options(selectinload(Cliente.servicos)).where(Cliente.id == cliente_id)
+    )
+    cliente = resultado.scalars().first()
+    if cliente is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return cliente
+
+
+@router.post("/", response_model=ClienteResponse, status_code=status.HTTP_201_CREATED)
+async def criar_cliente(
+    cliente: ClienteCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """Cria um novo cliente. Requer autenticação."""
+    # Verifica se já existe cliente com o mesmo nome
+    resultado = await db.execute(select(Cliente.id).where(Cliente.nome == cliente.nome))
+    if resultado.first():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Já existe um cliente com o nome '{cliente.nome}'"
+        )
+
+    novo_cliente = Cliente(**cliente.dict())
+    db.add(novo_cliente)
+    await db.commit()
+    indice_autocomplete.actualizar(novo_cliente.id, novo_cliente.nome)
+    return await _obter_cliente(db, novo_cliente.id)
+
+
+@router.get("/", response_model=List[ClienteListagem], response_model_exclude_unset=True)
+async def listar_clientes(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0, description="Número de registos a saltar"),
+    limit: int = Query(100, ge=1, le=100, description="Número máximo de registos"),
+    q: Optional[str] = Query(None, description="Pesquisa em nome, telefone, endereço e observações (por relevância)"),
+    nome: str = Query(None, description="Equivalente a q (compatibilidade)", deprecated=True),
+    include: Optional[str] = Query(None, description="Relações a incluir (ex.: 'servicos')"),
+    servicos_limite: Optional[int] = Query(None, ge=1, le=100, description="Máximo de serviços (mais recentes) por cliente"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devolvido em X-Cursor-Seguinte/X-Cursor-Anterior"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async)
+):
+    """Lista clientes com filtros opcionais (serviços só com include=servicos). Requer autenticação."""
+    incluir = validar_include(include)
+    query = select(Cliente)
+    if "servicos" in incluir and servicos_limite is None:
+        query = query.options(selectinload(Cliente.servicos))
+
+    texto = q or nome
+    if texto:
+        validar_pesquisa(cursor)
+        query = pesquisa_clientes.filtrar(query, db.bind.dialect.name, texto, Cliente.id)
+        clientes = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+    else:
+        clientes, seguinte, anterior = await paginar_async(db, query, ORDEM_CLIENTES, skip, limit, cursor)
+        publicar_cursores(request, response, seguinte, anterior)
+
+    if "servicos" not in incluir:
+        return [cliente_listagem(c) for c in clientes]
+
+    if servicos_limite is None:
+        return [cliente_listagem(c, ordenar_servicos(c.servicos)) for c in clientes]
+
+    servicos = (await db.execute(consulta_servicos_recentes([c.id for c in clientes], servicos_limite))).scalars().all()
+    grupos = agrupar_por_cliente(servicos)
+    return [cliente_listagem(c, grupos.get(c.id, [])) for c in clientes]
+
+
+@router.get("/{cliente_id:int}", response_model=ClienteResponse)
+async def obter_cliente(
+    cliente_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """Obtém um cliente específico pelo ID. Requer autenticação."""
+    return await _obter_cliente(db, cliente_id)
+
+
+@router.put("/{cliente_id:int}", response_model=ClienteResponse)
+async def actualizar_cliente(
+    cliente_id: int,
+    cliente_update: ClienteUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """Actualiza um cliente existente. Requer autenticação."""
+    cliente = await _obter_cliente(db, cliente_id)
+
+    # Actualiza apenas os campos fornecidos
+    dados_actualizacao = cliente_update.dict(exclude_unset=True)
+    for campo, valor in dados_actualizacao.items():
+        setattr(cliente, campo, valor)
+
+    await db.commit()
+    indice_autocomplete.actualizar(cliente.id, cliente.nome)
+    return cliente
+
+
+@router.delete("/{cliente_id:int}", status_code=status.HTTP_204_NO_CONTENT)
+async def eliminar_cliente(
+    cliente_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """Elimina um cliente. Requer autenticação."""
+    cliente = await _obter_cliente(db, cliente_id)
+
+    # Verifica se o cliente tem serviços associados
+    if cliente.servicos:
+        raise HTTPException(
+            status_code=400,
+            detail="Não é possível eliminar cliente com serviços associados"
+        )
+    planos = await db.execute(select(PlanoRecorrente.id).where(PlanoRecorrente.cliente_id == cliente_id).limit(1))
+    if planos.first():
+        raise HTTPException(
+            status_code=400,
+            detail="Não é possível eliminar cliente com planos recorrentes"
+        )
+
+    await db.delete(cliente)
+    await db.commit()
+    indice_autocomplete.remover(cliente_id)
+    return None
@@ -0,0 +1,54 @@
+"""
+Rotas de métricas internas.
+
+Expõe contadores de funcionamento (caches, filas, ligações) em formato
+JSON para recolha por ferramentas de monitorização. Só são registadas
+quando ENABLE_ADMIN_ROUTES está activo.
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from ..core.arranque import relatorio_arranque
+from ..core.contadores import reconciliar_contadores
+from ..core.database import encaminhamento_leituras, estatisticas_pool, estatisticas_sessoes, get_db
+from ..core.security import cache_utilizadores, cache_versoes_token, pool_hashing
+from .clientes import indice_autocomplete
+from .servicos import agenda_capacidade, cache_dashboard
+from .users import get_current_user
+
+
+router = APIRouter(prefix="/metricas", tags=["Métricas"])
+
+
+@router.get("/")
+def obter_metricas():
+    """Devolve os contadores internos do processo actual."""
+    return {
+        "cache_utilizadores": cache_utilizadores.estatisticas(),
+        "cache_versoes_token": cache_versoes_token.estatisticas(),
+        "pool_hashing": pool_hashing.estatisticas(),
+        "sessoes_db": estatisticas_sessoes.estatisticas(),
+        "pool_db": estatisticas_pool(),
+        "leituras_db": encaminhamento_leituras.estatisticas(),
+        "cache_dashboard": cache_dashboard.estatisticas(),
+        "autocomplete_clientes": indice_autocomplete.estatisticas(),
+        "agenda_capacidade": agenda_capacidade.estatisticas(),
+        "arranque": relatorio_arranque,
+    }
+
+
+@router.get("/pool")
+def obter_metricas_pool():
+    """Ligações em uso, overflow, tempos de espera e timeouts do pool."""
+    return estatisticas_pool()
+
+
+@router.post("/contadores/reconciliar")
+def reconciliar(
+    corrigir: bool = Query(True, description="Substituir os contadores pelos valores recalculados"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Recalcula os contadores agregados de raiz e devolve a deriva encontrada."""
+    return reconciliar_contadores(db, corrigir)
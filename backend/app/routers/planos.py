@@ -0,0 +1,269 @@
+"""
+Rotas para gerir planos de serviços recorrentes.
+
+Um plano gera as visitas periódicas de um cliente sem criar serviços com
+antecedência: as ocorrências são calculadas para a janela consultada e
+uma ocorrência só passa a serviço quando é iniciada ou editada
+(`materializar`). As operações exigem autenticação.
+"""
+
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from ..core.capacidade import garantir_capacidade, reserva
+from ..core.database import get_db, get_db_leitura
+from ..core.recorrencia import MAX_JANELA_DIAS, e_ocorrencia, ocorrencias_na_janela
+from ..models.cliente import Cliente
+from ..models.plano import ExcecaoPlano, PlanoRecorrente
+from ..models.servico import Servico
+from ..schemas.plano import (
+    ExcecaoPlanoCreate,
+    ExcecaoPlanoResponse,
+    MaterializarOcorrencia,
+    Ocorrencia,
+    PlanoCreate,
+    PlanoResponse,
+    PlanoUpdate,
+)
+from ..schemas.servico import ServicoResponse, StatusServico, TipoServico
+from .users import get_current_user
+
+
+router = APIRouter(prefix="/planos", tags=["Planos recorrentes"])
+
+
+def _obter_plano(db: Session, plano_id: int) -> PlanoRecorrente:
+    plano = (
+        db.query(PlanoRecorrente)
+        .options(selectinload(PlanoRecorrente.excecoes))
+        .filter(PlanoRecorrente.id == plano_id)
+        .first()
+    )
+    if plano is None:
+        raise HTTPException(status_code=404, detail="Plano não encontrado")
+    return plano
+
+
+def validar_janela(data_inicio: date, data_fim: date) -> None:
+    if data_fim < data_inicio:
+        raise HTTPException(status_code=400, detail="data_fim não pode ser anterior a data_inicio")
+    if (data_fim - data_inicio).days >= MAX_JANELA_DIAS:
+        raise HTTPException(status_code=400, detail=f"A janela não pode exceder {MAX_JANELA_DIAS} dias")
+
+
+@router.post("/", response_model=PlanoResponse, status_code=status.HTTP_201_CREATED)
+def criar_plano(
+    plano: PlanoCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Cria um plano recorrente para um cliente. Requer autenticação."""
+    if db.query(Cliente.id).filter(Cliente.id == plano.cliente_id).first() is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+
+    dados = plano.dict()
+    dados.update(tipo=plano.tipo.value, frequencia=plano.frequencia.value)
+    novo_plano = PlanoRecorrente(**dados)
+    db.add(novo_plano)
+    db.commit()
+    db.refresh(novo_plano)
+    return novo_plano
+
+
+@router.get("/", response_model=List[PlanoResponse])
+def listar_planos(
+    cliente_id: Optional[int] = Query(None, description="Filtrar por cliente"),
+    tipo: Optional[TipoServico] = Query(None, description="Filtrar por tipo de serviço"),
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user),
+):
+    """Lista os planos recorrentes, com as excepções. Requer autenticação."""
+    query = db.query(PlanoRecorrente).options(selectinload(PlanoRecorrente.excecoes))
+    if cliente_id:
+        query = query.filter(PlanoRecorrente.cliente_id == cliente_id)
+    if tipo:
+        query = query.filter(PlanoRecorrente.tipo == tipo.value)
+    return query.order_by(PlanoRecorrente.id).all()
+
+
+@router.get("/ocorrencias", response_model=List[Ocorrencia])
+def listar_ocorrencias(
+    data_inicio: date = Query(..., description="Início da janela (YYYY-MM-DD)"),
+    data_fim: date = Query(..., description="Fim da janela, inclusive (YYYY-MM-DD)"),
+    cliente_id: Optional[int] = Query(None, description="Filtrar por cliente"),
+    tipo: Optional[TipoServico] = Query(None, description="Filtrar por tipo de serviço"),
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user),
+):
+    """
+    Ocorrências dos planos na janela indicada (no máximo MAX_JANELA_DIAS),
+    calculadas a pedido. As já materializadas trazem o `servico_id` e os
+    dados do serviço. Requer autenticação.
+    """
+    validar_janela(data_inicio, data_fim)
+    return ocorrencias_na_janela(db, data_inicio, data_fim, cliente_id, tipo.value if tipo else None)
+
+
+@router.get("/{plano_id}", response_model=PlanoResponse)
+def obter_plano(
+    plano_id: int,
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user),
+):
+    """Obtém um plano pelo ID. Requer autenticação."""
+    return _obter_plano(db, plano_id)
+
+
+@router.put("/{plano_id}", response_model=PlanoResponse)
+def actualizar_plano(
+    plano_id: int,
+    plano_update: PlanoUpdate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Actualiza um plano. Requer autenticação.
+
+    Só as ocorrências previstas mudam; os serviços já materializados
+    mantêm-se.
+    """
+    plano = _obter_plano(db, plano_id)
+    for campo, valor in plano_update.dict(exclude_unset=True).items():
+        setattr(plano, campo, getattr(valor, "value", valor))
+    if plano.data_fim is not None and plano.data_fim < plano.data_inicio:
+        raise HTTPException(status_code=400, detail="A data de fim não pode ser anterior à data de início")
+
+    db.commit()
+    db.refresh(plano)
+    return plano
+
+
+@router.delete("/{plano_id}", status_code=status.HTTP_204_NO_CONTENT)
+def eliminar_plano(
+    plano_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Elimina um plano e as suas ocorrências previstas. Os serviços já
+    materializados mantêm-se, desligados do plano. Requer autenticação.
+    """
+    plano = _obter_plano(db, plano_id)
+    db.query(Servico).filter(Servico.plano_id == plano_id).update(
+        {Servico.plano_id: None, Servico.data_ocorrencia: None}, synchronize_session=False
+    )
+    db.delete(plano)
+    db.commit()
+    return None
+
+
+def _validar_ocorrencia(db: Session, plano: PlanoRecorrente, data: date) -> None:
+    """Confirma que a data é uma ocorrência prevista (sem excepção nem serviço)."""
+    if not e_ocorrencia(plano, data):
+        raise HTTPException(status_code=400, detail=f"{data} não é uma ocorrência deste plano")
+    if any(excecao.data == data for excecao in plano.excecoes):
+        raise HTTPException(status_code=400, detail=f"A ocorrência de {data} foi retirada do plano")
+    servico = db.query(Servico.id).filter(
+        Servico.plano_id == plano.id, Servico.data_ocorrencia == data
+    ).first()
+    if servico is not None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A ocorrência de {data} já foi materializada no serviço {servico.id}",
+        )
+
+
+@router.post("/{plano_id}/excecoes", response_model=ExcecaoPlanoResponse, status_code=status.HTTP_201_CREATED)
+def criar_excecao(
+    plano_id: int,
+    excecao: ExcecaoPlanoCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Retira uma ocorrência prevista do plano (ex.: cliente ausente). Requer autenticação."""
+    plano = _obter_plano(db, plano_id)
+    _validar_ocorrencia(db, plano, excecao.data)
+
+    nova_excecao = ExcecaoPlano(plano_id=plano_id, **excecao.dict())
+    db.add(nova_excecao)
+    db.commit()
+    return nova_excecao
+
+
+@router.delete("/{plano_id}/excecoes/{data}", status_code=status.HTTP_204_NO_CONTENT)
+def eliminar_excecao(
+    plano_id: int,
+    data: date,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Repõe uma ocorrência retirada. Requer autenticação."""
+    excecao = db.get(ExcecaoPlano, (plano_id, data))
+    if excecao is None:
+        raise HTTPException(status_code=404, detail="Excepção não encontrada")
+    db.delete(excecao)
+    db.commit()
+    return None
+
+
+@router.post(
+    "/{plano_id}/ocorrencias/{data}/materializar",
+    response_model=ServicoResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def materializar_ocorrencia(
+    plano_id: int,
+    data: date,
+    alteracoes: MaterializarOcorrencia = MaterializarOcorrencia(),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Cria o serviço correspondente a uma ocorrência prevista, quando é
+    iniciada (por defeito fica `em_progresso`) ou editada. A partir daí é
+    gerida pelas rotas de serviços. Requer autenticação.
+    """
+    plano = _obter_plano(db, plano_id)
+    _validar_ocorrencia(db, plano, data)
+
+    data_servico = alteracoes.data_servico or data
+    # Mesma regra de `criar_servico`: um serviço activo por cliente e dia
+    existente = db.query(Servico.id).filter(
+        and_(
+            Servico.cliente_id == plano.cliente_id,
+            Servico.data_servico == data_servico,
+            Servico.status != StatusServico.CANCELADO,
+        )
+    ).first()
+    if existente is not None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Já existe um serviço agendado para este cliente em {data_servico}"
+        )
+
+    servico = Servico(
+        tipo=plano.tipo,
+        data_servico=data_servico,
+        duracao_horas=alteracoes.duracao_horas or plano.duracao_horas,
+        cliente_id=plano.cliente_id,
+        descricao=alteracoes.descricao if alteracoes.descricao is not None else plano.descricao,
+        status=alteracoes.status.value,
+        plano_id=plano.id,
+        data_ocorrencia=data,
+    )
+    db.add(servico)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Materializada em simultâneo por outro pedido (índice único plano/data)
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"A ocorrência de {data} já foi materializada")
+    garantir_capacidade(db, reserva(servico))
+    db.commit()
+    db.refresh(servico)
+    return servico
@@ -8,18 +8,32 @@ data e duração. As operações exigem autenticação.
 
 from typing import List, Optional
 from datetime import date, datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from fastapi import APIRouter, Depends, File, HTTPException, status, Query, Request, Response, UploadFile
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy import and_, event, func, select, update
 
-from ..core.database import SessionLocal
+from ..core.cache import CacheRevalidada
+from ..core.atribuicoes import garantir_tecnicos_livres
+from ..core.calendario import MAX_DIAS_CALENDARIO, calcular_calendario, etag_conteudo, etag_corresponde
+from ..core.capacidade import AgendaCapacidade, garantir_capacidade, horas_dos_dias, reserva
+from ..core.contadores import aplicar_incrementos, incrementos_linhas, ler_contadores, observar_incrementos
+from ..core.database import get_db, get_db_leitura, invalidar_apos_commit
+from ..core.exportacao import resposta_exportacao, validar_formato
+from ..core.importacao import TAMANHO_LOTE, detectar_formato, importar_servicos, ler_linhas
+from ..core.paginacao import paginar, publicar_cursores
+from ..core.replit_config import config
 from ..models.servico import Servico
 from ..models.cliente import Cliente
+from ..models.tecnico import Atribuicao
 from ..schemas.servico import (
+    CalendarioResposta,
+    ProximoSlotResposta,
     ServicoCreate, 
     ServicoResponse, 
     ServicoUpdate, 
     ServicoResumo,
+    ServicoStatusEmMassa,
+    ServicoStatusEmMassaResposta,
     TipoServico,
     StatusServico
 )
@@ -28,13 +42,33 @@ from .users import get_current_user
 
 router = APIRouter(prefix="/servicos", tags=["Serviços"])
 
+# Ordem total das listagens: o id desempata serviços do mesmo dia
+ORDEM_SERVICOS = ((Servico.data_servico, True), (Servico.id, True))
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+DESCRICAO_CURSOR = "Cursor opaco devolvido em X-Cursor-Seguinte/X-Cursor-Anterior"
+
+# Resultado do dashboard, invalidado em qualquer escrita de serviços
+cache_dashboard = CacheRevalidada(
+    ttl_segundos=config.DASHBOARD_CACHE_SECONDS,
+    stale_segundos=config.DASHBOARD_STALE_SECONDS,
+)
+
+
+def _invalidar_dashboard(mapper, connection, target) -> None:
+    """Listener ORM: qualquer criação, alteração ou eliminação muda os totais."""
+    invalidar_apos_commit(object_session(target), "dashboard", cache_dashboard.invalidar)
+
+
+for _evento in ("after_insert", "after_update", "after_delete"):
+    if not event.contains(Servico, _evento, _invalidar_dashboard):
+        event.listen(Servico, _evento, _invalidar_dashboard)
+
+# Horas marcadas nos próximos dias (GET /servicos/proximo-slot), uma por worker
+agenda_capacidade = AgendaCapacidade(
+    horizonte_dias=config.CAPACITY_HORIZON_DAYS,
+    refrescar_segundos=config.CAPACITY_REFRESH_SECONDS,
+)
+observar_incrementos(agenda_capacidade.marcar_chaves)
 
 
 @router.post("/", response_model=ServicoResponse, status_code=status.HTTP_201_CREATED)
@@ -65,13 +99,123 @@ def criar_servico(
     
     novo_servico = Servico(**servico.dict())
     db.add(novo_servico)
+    db.flush()
+    garantir_capacidade(db, reserva(novo_servico))
     db.commit()
     db.refresh(novo_servico)
     return novo_servico
 
 
+@router.post("/importar")
+def importar_servicos_em_massa(
+    ficheiro: UploadFile = File(..., description="CSV com cabeçalho ou NDJSON (um objecto por linha)"),
+    formato: Optional[str] = Query(None, description="csv ou ndjson (por defeito, pela extensão)"),
+    historico: bool = Query(
+        False, description="Aceitar datas passadas, sem limite de capacidade (importação de histórico)"
+    ),
+    lote: int = Query(TAMANHO_LOTE, ge=1, le=5000, description="Linhas por transacção"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Importa serviços em massa a partir de um ficheiro. Requer autenticação.
+
+    Colunas: tipo, data_servico, duracao_horas, cliente_id ou cliente_nome,
+    descricao, status. Um lote que excede a capacidade diária não é
+    gravado. Devolve os totais e os erros por linha.
+    """
+    try:
+        formato = detectar_formato(ficheiro.filename, formato)
+    except ValueError as erro:
+        raise HTTPException(status_code=400, detail=str(erro))
+
+    relatorio = importar_servicos(db, ler_linhas(ficheiro.file, formato), historico, lote)
+    # As inserções em massa não passam pelos eventos ORM
+    if relatorio.importados:
+        cache_dashboard.invalidar()
+    return relatorio.como_dict()
+
+
+def filtrar_servicos(query, tipo=None, status=None, data_inicio=None, data_fim=None, cliente_id=None):
+    """Filtros das listagens e da exportação (Query ou select)."""
+    if tipo:
+        query = query.where(Servico.tipo == tipo)
+    if status:
+        query = query.where(Servico.status == status)
+    if data_inicio:
+        query = query.where(Servico.data_servico >= data_inicio)
+    if data_fim:
+        query = query.where(Servico.data_servico <= data_fim)
+    if cliente_id:
+        query = query.where(Servico.cliente_id == cliente_id)
+    return query
+
+
+@router.patch("/status", response_model=ServicoStatusEmMassaResposta)
+def actualizar_status_em_massa(
+    pedido: ServicoStatusEmMassa,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Altera o estado de vários serviços numa só transacção (ex.: marcar os
+    serviços do dia como concluídos). Requer autenticação.
+
+    Uma consulta lê o estado actual, um único UPDATE ... WHERE id IN (...)
+    altera os serviços que mudam e os contadores são ajustados na mesma
+    transacção. Devolve o resultado de cada serviço.
+    """
+    tabela = Servico.__table__
+    consulta = select(tabela.c.id, tabela.c.tipo, tabela.c.status, tabela.c.data_servico, tabela.c.duracao_horas)
+    if pedido.ids is not None:
+        consulta = consulta.where(tabela.c.id.in_(pedido.ids))
+    else:
+        consulta = consulta.where(
+            tabela.c.data_servico == pedido.data_servico,
+            tabela.c.status != StatusServico.CANCELADO.value,
+        )
+        if pedido.cliente_id is not None:
+            consulta = consulta.where(tabela.c.cliente_id == pedido.cliente_id)
+    # Bloqueia as linhas até ao commit (PostgreSQL) para os contadores não divergirem
+    actuais = {linha.id: linha._asdict() for linha in db.execute(consulta.with_for_update())}
+
+    novo_status = pedido.status.value
+    alterar = [dados for dados in actuais.values() if dados["status"] != novo_status]
+    if alterar:
+        db.execute(
+            update(tabela)
+            .where(tabela.c.id.in_([dados["id"] for dados in alterar]))
+            .values(status=novo_status, data_actualizacao=func.now())
+        )
+        # O UPDATE em massa não passa pelos eventos ORM dos contadores
+        incrementos = incrementos_linhas(Servico, alterar, -1)
+        incrementos.update(incrementos_linhas(Servico, [{**dados, "status": novo_status} for dados in alterar]))
+        aplicar_incrementos(db.connection(), incrementos)
+        # Serviços cancelados que voltam a ocupar horas e os seus técnicos
+        reactivados = [dados for dados in alterar if dados["status"] == StatusServico.CANCELADO.value]
+        for dados in reactivados:
+            garantir_capacidade(db, (dados["data_servico"], dados["duracao_horas"] or 0))
+        garantir_tecnicos_livres(db, [dados["id"] for dados in reactivados])
+    db.commit()
+    if alterar:
+        cache_dashboard.invalidar()
+
+    ids = pedido.ids if pedido.ids is not None else sorted(actuais)
+    resultados = []
+    for servico_id in ids:
+        dados = actuais.get(servico_id)
+        if dados is None:
+            resultados.append({"id": servico_id, "resultado": "nao_encontrado"})
+            continue
+        resultado = "inalterado" if dados["status"] == novo_status else "actualizado"
+        resultados.append({"id": servico_id, "resultado": resultado, "status_anterior": dados["status"]})
+    return {"status": novo_status, "actualizados": len(alterar), "resultados": resultados}
+
+
 @router.get("/", response_model=List[ServicoResponse])
 def listar_servicos(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="Número de registos a saltar"),
     limit: int = Query(100, ge=1, le=100, description="Número máximo de registos"),
     tipo: Optional[TipoServico] = Query(None, description="Filtrar por tipo de serviço"),
@@ -79,48 +223,86 @@ def listar_servicos(
     data_inicio: Optional[date] = Query(None, description="Data início (YYYY-MM-DD)"),
     data_fim: Optional[date] = Query(None, description="Data fim (YYYY-MM-DD)"),
     cliente_id: Optional[int] = Query(None, description="Filtrar por cliente"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=DESCRICAO_CURSOR),
+    db: Session = Depends(get_db_leitura),
     current_user=Depends(get_current_user)
 ):
-    """Lista serviços com filtros opcionais. Requer autenticação."""
-    query = db.query(Servico)
-    
-    # Aplicar filtros
-    if tipo:
-        query = query.filter(Servico.tipo == tipo)
-    if status:
-        query = query.filter(Servico.status == status)
-    if data_inicio:
-        query = query.filter(Servico.data_servico >= data_inicio)
-    if data_fim:
-        query = query.filter(Servico.data_servico <= data_fim)
-    if cliente_id:
-        query = query.filter(Servico.cliente_id == cliente_id)
-    
-    # Ordenar por data de serviço (mais recentes primeiro)
-    query = query.order_by(Servico.data_servico.desc())
-    
-    servicos = query.offset(skip).limit(limit).all()
+    """
+    Lista serviços com filtros opcionais. Requer autenticação.
+
+    Paginação por `skip` (compatibilidade) ou por `cursor`; os cursores da
+    página seguinte/anterior vão nos cabeçalhos X-Cursor-* e Link.
+    """
+    query = filtrar_servicos(db.query(Servico), tipo, status, data_inicio, data_fim, cliente_id)
+
+    # Mais recentes primeiro, com o id como desempate
+    servicos, seguinte, anterior = paginar(query, ORDEM_SERVICOS, skip, limit, cursor)
+    publicar_cursores(request, response, seguinte, anterior)
     return servicos
 
 
+@router.get("/export")
+def exportar_servicos(
+    formato: str = Query("csv", description="csv ou ndjson"),
+    gzip: bool = Query(False, description="Comprimir (ficheiro .gz gerado em streaming)"),
+    tipo: Optional[TipoServico] = Query(None, description="Filtrar por tipo de serviço"),
+    status: Optional[StatusServico] = Query(None, description="Filtrar por status"),
+    data_inicio: Optional[date] = Query(None, description="Data início (YYYY-MM-DD)"),
+    data_fim: Optional[date] = Query(None, description="Data fim (YYYY-MM-DD)"),
+    cliente_id: Optional[int] = Query(None, description="Filtrar por cliente"),
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user)
+):
+    """
+    Exporta todos os serviços que satisfazem os filtros de `listar_servicos`,
+    sem limite de linhas, com o nome do cliente. Requer autenticação.
+
+    A resposta é enviada em streaming: a memória usada não depende do
+    número de serviços exportados.
+    """
+    try:
+        formato = validar_formato(formato)
+    except ValueError as erro:
+        raise HTTPException(status_code=400, detail=str(erro))
+
+    consulta = select(
+        Servico.id,
+        Servico.tipo,
+        Servico.data_servico,
+        Servico.duracao_horas,
+        Servico.status,
+        Servico.cliente_id,
+        Cliente.nome.label("cliente_nome"),
+        Servico.descricao,
+        Servico.data_criacao,
+    ).outerjoin(Cliente, Servico.cliente_id == Cliente.id)
+    consulta = filtrar_servicos(consulta, tipo, status, data_inicio, data_fim, cliente_id)
+    consulta = consulta.order_by(*[c.desc() if desc else c for c, desc in ORDEM_SERVICOS])
+    return resposta_exportacao(db, consulta, formato, f"servicos-{date.today():%Y%m%d}", gzip)
+
+
 @router.get("/resumo", response_model=List[ServicoResumo])
 def listar_servicos_resumo(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=DESCRICAO_CURSOR),
+    db: Session = Depends(get_db_leitura),
     current_user=Depends(get_current_user)
 ):
     """Lista serviços em formato resumido com informação do cliente."""
-    servicos = db.query(
+    query = db.query(
         Servico.id,
         Servico.tipo,
         Servico.data_servico,
         Servico.status,
         Servico.duracao_horas,
         Cliente.nome.label("cliente_nome")
-    ).join(Cliente).order_by(Servico.data_servico.desc()).offset(skip).limit(limit).all()
-    
+    ).join(Cliente)
+    servicos, seguinte, anterior = paginar(query, ORDEM_SERVICOS, skip, limit, cursor)
+    publicar_cursores(request, response, seguinte, anterior)
+
     return [
         ServicoResumo(
             id=s.id,
@@ -134,10 +316,87 @@ def listar_servicos_resumo(
     ]
 
 
+@router.get("/calendario", response_model=CalendarioResposta)
+def obter_calendario(
+    request: Request,
+    response: Response,
+    inicio: date = Query(..., description="Primeiro dia (YYYY-MM-DD)"),
+    fim: date = Query(..., description="Último dia, inclusive (YYYY-MM-DD)"),
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user)
+):
+    """
+    Serviços entre `inicio` e `fim` agrupados por dia, com o total de horas
+    de cada dia, para as vistas de mês e de semana. Requer autenticação.
+
+    Inclui os serviços dos módulos Aqua e Verde e as ocorrências previstas
+    dos planos recorrentes. Com `If-None-Match` igual ao ETag anterior
+    responde 304 sem corpo.
+    """
+    if fim < inicio:
+        raise HTTPException(status_code=400, detail="fim não pode ser anterior a inicio")
+    if (fim - inicio).days >= MAX_DIAS_CALENDARIO:
+        raise HTTPException(status_code=400, detail=f"O calendário não pode exceder {MAX_DIAS_CALENDARIO} dias")
+
+    calendario = calcular_calendario(db, inicio, fim)
+    etag = etag_conteudo(calendario)
+    # Privado (dados do utilizador) e sempre revalidado com o ETag
+    cabecalhos = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_corresponde(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+    response.headers.update(cabecalhos)
+    return calendario
+
+
+@router.get("/proximo-slot", response_model=ProximoSlotResposta)
+def obter_proximo_slot(
+    duracao: int = Query(..., ge=1, le=12, description="Horas necessárias"),
+    a_partir_de: Optional[date] = Query(None, description="Primeiro dia a considerar (por defeito, hoje)"),
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user)
+):
+    """
+    Primeiro dia, a partir de `a_partir_de`, com `duracao` horas livres na
+    capacidade diária (serviços de todas as tabelas). Requer autenticação.
+
+    A procura usa a agenda em memória (O(log n) no número de dias) e
+    confirma o dia encontrado nos contadores.
+    """
+    hoje = date.today()
+    dia = max(a_partir_de or hoje, hoje)
+    capacidade = config.DAILY_CAPACITY_HOURS
+    if not capacidade:
+        # Sem limite diário qualquer dia serve
+        marcadas = horas_dos_dias(db, [dia])[dia]
+        return {"data": dia, "duracao": duracao, "horas_marcadas": marcadas, "capacidade": None, "horas_livres": None}
+    if duracao > capacidade:
+        raise HTTPException(status_code=400, detail=f"A duração excede a capacidade diária ({capacidade} horas)")
+    if (dia - hoje).days >= agenda_capacidade.horizonte_dias:
+        raise HTTPException(
+            status_code=400,
+            detail=f"a_partir_de fora do horizonte de {agenda_capacidade.horizonte_dias} dias"
+        )
+
+    encontrado = agenda_capacidade.proximo_dia_livre(db, duracao, capacidade, dia, hoje)
+    if encontrado is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Sem {duracao} horas livres nos próximos {agenda_capacidade.horizonte_dias} dias"
+        )
+    dia, marcadas = encontrado
+    return {
+        "data": dia,
+        "duracao": duracao,
+        "horas_marcadas": marcadas,
+        "capacidade": capacidade,
+        "horas_livres": capacidade - marcadas,
+    }
+
+
 @router.get("/{servico_id}", response_model=ServicoResponse)
 def obter_servico(
     servico_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
     current_user=Depends(get_current_user),
 ):
     """Obtém um serviço específico pelo ID. Requer autenticação."""
@@ -160,10 +419,14 @@ def actualizar_servico(
         raise HTTPException(status_code=404, detail="Serviço não encontrado")
     
     # Actualiza apenas os campos fornecidos
+    anterior = reserva(servico)
     dados_actualizacao = servico_update.dict(exclude_unset=True)
     for campo, valor in dados_actualizacao.items():
         setattr(servico, campo, valor)
     
+    db.flush()
+    garantir_capacidade(db, reserva(servico), anterior)
+    garantir_tecnicos_livres(db, [servico.id])
     db.commit()
     db.refresh(servico)
     return servico
@@ -180,55 +443,64 @@ def eliminar_servico(
     if servico is None:
         raise HTTPException(status_code=404, detail="Serviço não encontrado")
     
+    db.query(Atribuicao).filter(
+        Atribuicao.origem == "servicos", Atribuicao.servico_id == servico_id
+    ).delete(synchronize_session=False)
     db.delete(servico)
     db.commit()
     return None
 
 
-@router.get("/estatisticas/dashboard")
-def obter_dashboard_servicos(
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
-):
-    """Obtém estatísticas para dashboard. Requer autenticação."""
-    hoje = date.today()
-    inicio_mes = hoje.replace(day=1)
-    fim_mes = (inicio_mes + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-    
-    # Estatísticas gerais
-    total_servicos = db.query(Servico).count()
-    servicos_mes = db.query(Servico).filter(
-        and_(Servico.data_servico >= inicio_mes, Servico.data_servico <= fim_mes)
-    ).count()
-    
-    # Por tipo
-    servicos_jardinagem = db.query(Servico).filter(Servico.tipo == TipoServico.JARDINAGEM).count()
-    servicos_piscina = db.query(Servico).filter(Servico.tipo == TipoServico.PISCINA).count()
-    
-    # Por status
-    servicos_agendados = db.query(Servico).filter(Servico.status == StatusServico.AGENDADO).count()
-    servicos_concluidos = db.query(Servico).filter(Servico.status == StatusServico.CONCLUIDO).count()
-    
-    # Próximos serviços (próximos 7 dias)
-    proxima_semana = hoje + timedelta(days=7)
-    proximos_servicos = db.query(Servico).filter(
-        and_(
-            Servico.data_servico >= hoje,
-            Servico.data_servico <= proxima_semana,
-            Servico.status == StatusServico.AGENDADO
-        )
-    ).count()
-    
+def calcular_dashboard(db: Session, hoje: date) -> dict:
+    """
+    Lê os totais do dashboard da tabela de contadores, numa só consulta
+    e em tempo constante (independente do número de serviços).
+    """
+    dias_semana = [hoje + timedelta(days=dias) for dias in range(8)]
+    chaves_proximos = [f"servicos:agendados:dia:{dia.isoformat()}" for dia in dias_semana]
+    totais = ler_contadores(db, [
+        "servicos:total",
+        f"servicos:mes:{hoje:%Y-%m}",
+        f"servicos:tipo:{TipoServico.JARDINAGEM.value}",
+        f"servicos:tipo:{TipoServico.PISCINA.value}",
+        f"servicos:status:{StatusServico.AGENDADO.value}",
+        f"servicos:status:{StatusServico.CONCLUIDO.value}",
+        *chaves_proximos,
+    ])
+
     return {
-        "total_servicos": total_servicos,
-        "servicos_este_mes": servicos_mes,
+        "total_servicos": totais["servicos:total"],
+        "servicos_este_mes": totais[f"servicos:mes:{hoje:%Y-%m}"],
         "por_tipo": {
-            "jardinagem": servicos_jardinagem,
-            "piscina": servicos_piscina
+            "jardinagem": totais[f"servicos:tipo:{TipoServico.JARDINAGEM.value}"],
+            "piscina": totais[f"servicos:tipo:{TipoServico.PISCINA.value}"]
         },
         "por_status": {
-            "agendados": servicos_agendados,
-            "concluidos": servicos_concluidos
+            "agendados": totais[f"servicos:status:{StatusServico.AGENDADO.value}"],
+            "concluidos": totais[f"servicos:status:{StatusServico.CONCLUIDO.value}"]
         },
-        "proximos_7_dias": proximos_servicos
+        # Próximos serviços (próximos 7 dias)
+        "proximos_7_dias": sum(totais[chave] for chave in chaves_proximos)
     }
+
+
+@router.get("/estatisticas/dashboard")
+def obter_dashboard_servicos(
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user),
+):
+    """
+    Obtém estatísticas para dashboard. Requer autenticação.
+
+    O resultado fica em cache durante DASHBOARD_CACHE_SECONDS e é
+    descartado em qualquer escrita de serviços. Com DASHBOARD_STALE_SECONDS
+    o valor expirado é servido enquanto é recalculado em segundo plano.
+    """
+    hoje = date.today()
+    bind = db.get_bind()
+
+    def calcular_fundo():
+        with Session(bind=bind) as sessao:
+            return calcular_dashboard(sessao, hoje)
+
+    return cache_dashboard.obter(hoje, lambda: calcular_dashboard(db, hoje), calcular_fundo)
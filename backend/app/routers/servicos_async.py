@@ -0,0 +1,149 @@
+"""
+Rotas assíncronas para gerir serviços.
+
+Equivalentes às rotas CRUD de `servicos.py` sobre a sessão assíncrona,
+registadas antes das síncronas quando DATABASE_ASYNC está activo. O
+resumo, a exportação e o dashboard continuam a ser servidos pelo router
+síncrono.
+"""
+
+from typing import List, Optional
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import and_, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.atribuicoes import garantir_tecnicos_livres
+from ..core.capacidade import garantir_capacidade, reserva
+from ..core.database_async import get_async_db
+from ..core.paginacao import paginar_async, publicar_cursores
+from ..models.servico import Servico
+from ..models.cliente import Cliente
+from ..models.tecnico import Atribuicao
+from ..schemas.servico import (
+    ServicoCreate,
+    ServicoResponse,
+    ServicoUpdate,
+    TipoServico,
+    StatusServico
+)
+from .servicos import DESCRICAO_CURSOR, ORDEM_SERVICOS, filtrar_servicos
+from .users import get_current_user_async
+
+
+router = APIRouter(prefix="/servicos", tags=["Serviços"])
+
+
+async def _obter_servico(db: AsyncSession, servico_id: int) -> Servico:
+    servico = await db.get(Servico, servico_id)
+    if servico is None:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    return servico
+
+
+@router.post("/", response_model=ServicoResponse, status_code=status.HTTP_201_CREATED)
+async def criar_servico(
+    servico: ServicoCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """Cria um novo serviço associado a um cliente. Requer autenticação."""
+    if await db.get(Cliente, servico.cliente_id) is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+
+    # Verifica se já existe serviço para o mesmo cliente na mesma data
+    resultado = await db.execute(
+        select(Servico.id).where(
+            and_(
+                Servico.cliente_id == servico.cliente_id,
+                Servico.data_servico == servico.data_servico,
+                Servico.status != StatusServico.CANCELADO
+            )
+        )
+    )
+    if resultado.first():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Já existe um serviço agendado para este cliente em {servico.data_servico}"
+        )
+
+    novo_servico = Servico(**servico.dict())
+    db.add(novo_servico)
+    await db.flush()
+    await db.run_sync(garantir_capacidade, reserva(novo_servico))
+    await db.commit()
+    await db.refresh(novo_servico)
+    return novo_servico
+
+
+@router.get("/", response_model=List[ServicoResponse])
+async def listar_servicos(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0, description="Número de registos a saltar"),
+    limit: int = Query(100, ge=1, le=100, description="Número máximo de registos"),
+    tipo: Optional[TipoServico] = Query(None, description="Filtrar por tipo de serviço"),
+    status: Optional[StatusServico] = Query(None, description="Filtrar por status"),
+    data_inicio: Optional[date] = Query(None, description="Data início (YYYY-MM-DD)"),
+    data_fim: Optional[date] = Query(None, description="Data fim (YYYY-MM-DD)"),
+    cliente_id: Optional[int] = Query(None, description="Filtrar por cliente"),
+    cursor: Optional[str] = Query(None, description=DESCRICAO_CURSOR),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async)
+):
+    """Lista serviços com filtros opcionais. Requer autenticação."""
+    query = filtrar_servicos(select(Servico), tipo, status, data_inicio, data_fim, cliente_id)
+
+    # Mais recentes primeiro, com o id como desempate
+    servicos, seguinte, anterior = await paginar_async(db, query, ORDEM_SERVICOS, skip, limit, cursor)
+    publicar_cursores(request, response, seguinte, anterior)
+    return servicos
+
+
+@router.get("/{servico_id:int}", response_model=ServicoResponse)
+async def obter_servico(
+    servico_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """Obtém um serviço específico pelo ID. Requer autenticação."""
+    return await _obter_servico(db, servico_id)
+
+
+@router.put("/{servico_id:int}", response_model=ServicoResponse)
+async def actualizar_servico(
+    servico_id: int,
+    servico_update: ServicoUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """Actualiza um serviço existente. Requer autenticação."""
+    servico = await _obter_servico(db, servico_id)
+
+    # Actualiza apenas os campos fornecidos
+    anterior = reserva(servico)
+    dados_actualizacao = servico_update.dict(exclude_unset=True)
+    for campo, valor in dados_actualizacao.items():
+        setattr(servico, campo, valor)
+
+    await db.flush()
+    await db.run_sync(garantir_capacidade, reserva(servico), anterior)
+    await db.run_sync(garantir_tecnicos_livres, [servico.id])
+    await db.commit()
+    await db.refresh(servico)
+    return servico
+
+
+@router.delete("/{servico_id:int}", status_code=status.HTTP_204_NO_CONTENT)
+async def eliminar_servico(
+    servico_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """Elimina um serviço. Requer autenticação."""
+    servico = await _obter_servico(db, servico_id)
+
+    await db.execute(delete(Atribuicao).where(Atribuicao.origem == "servicos", Atribuicao.servico_id == servico_id))
+    await db.delete(servico)
+    await db.commit()
+    return None
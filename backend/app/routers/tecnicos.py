@@ -0,0 +1,277 @@
+"""
+Rotas para gerir técnicos e as suas atribuições a serviços.
+
+Cada atribuição liga um técnico a um serviço com a hora de início; um
+técnico não pode ter atribuições sobrepostas no mesmo dia. A pergunta
+"quem está livre entre as 9:00 e as 12:00 no dia X" é respondida para a
+equipa toda com uma consulta (ver `app/core/atribuicoes.py`). A
+distribuição automática propõe técnicos e horas para os serviços sem
+técnico de um dia e grava a proposta confirmada numa transacção (ver
+`app/core/distribuicao.py`). As operações exigem autenticação.
+"""
+
+from datetime import date, time
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.atribuicoes import (
+    agenda_do_dia,
+    descrever,
+    garantir_tecnicos_livres,
+    ler_servico,
+    tecnicos_livres,
+)
+from ..core.database import get_db, get_db_leitura
+from ..core.distribuicao import confirmar_distribuicao, propor_distribuicao
+from ..core.replit_config import config
+from ..models.tecnico import Atribuicao, Tecnico
+from ..schemas.servico import StatusServico, TipoServico
+from ..schemas.tecnico import (
+    AtribuicaoCreate,
+    AtribuicaoResponse,
+    DistribuicaoConfirmacao,
+    DistribuicaoProposta,
+    TecnicoCreate,
+    TecnicoResponse,
+    TecnicoUpdate,
+)
+from .users import get_current_user
+
+
+router = APIRouter(prefix="/tecnicos", tags=["Técnicos"])
+
+
+def _obter_tecnico(db: Session, tecnico_id: int, bloquear: bool = False) -> Tecnico:
+    consulta = db.query(Tecnico).filter(Tecnico.id == tecnico_id)
+    if bloquear:
+        # Serializa as atribuições do mesmo técnico até ao commit (PostgreSQL)
+        consulta = consulta.with_for_update()
+    tecnico = consulta.first()
+    if tecnico is None:
+        raise HTTPException(status_code=404, detail="Técnico não encontrado")
+    return tecnico
+
+
+def descrever_atribuicao(atribuicao: Atribuicao, servico: dict) -> dict:
+    """Resposta de uma atribuição acabada de gravar, com os dados do serviço."""
+    return descrever({
+        "id": atribuicao.id,
+        "tecnico_id": atribuicao.tecnico_id,
+        "origem": atribuicao.origem,
+        "servico_id": atribuicao.servico_id,
+        "data_servico": servico["data_servico"],
+        "hora_inicio": atribuicao.hora_inicio,
+        "duracao_horas": atribuicao.duracao_horas or servico["duracao_horas"],
+        "status": servico["status"],
+    })
+
+
+@router.post("/", response_model=TecnicoResponse, status_code=status.HTTP_201_CREATED)
+def criar_tecnico(
+    tecnico: TecnicoCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Cria um técnico. Requer autenticação."""
+    dados = tecnico.dict()
+    dados["especialidade"] = tecnico.especialidade.value if tecnico.especialidade else None
+    novo_tecnico = Tecnico(**dados)
+    db.add(novo_tecnico)
+    db.commit()
+    db.refresh(novo_tecnico)
+    return novo_tecnico
+
+
+@router.get("/", response_model=List[TecnicoResponse])
+def listar_tecnicos(
+    activo: Optional[bool] = Query(None, description="Filtrar por técnicos activos/inactivos"),
+    especialidade: Optional[TipoServico] = Query(None, description="Filtrar por especialidade"),
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user),
+):
+    """Lista os técnicos por nome. Requer autenticação."""
+    query = db.query(Tecnico)
+    if activo is not None:
+        query = query.filter(Tecnico.activo.is_(activo))
+    if especialidade:
+        query = query.filter(Tecnico.especialidade == especialidade.value)
+    return query.order_by(Tecnico.nome, Tecnico.id).all()
+
+
+@router.get("/disponiveis", response_model=List[TecnicoResponse])
+def listar_tecnicos_disponiveis(
+    data: date = Query(..., description="Dia (YYYY-MM-DD)"),
+    inicio: time = Query(..., description="Início da janela (HH:MM)"),
+    fim: time = Query(..., description="Fim da janela (HH:MM)"),
+    tipo: Optional[TipoServico] = Query(None, description="Só técnicos que fazem este tipo de serviço"),
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user),
+):
+    """
+    Técnicos activos sem atribuições entre `inicio` e `fim` no dia
+    indicado. Requer autenticação.
+    """
+    if fim <= inicio:
+        raise HTTPException(status_code=400, detail="O fim da janela tem de ser posterior ao início")
+    return tecnicos_livres(db, data, inicio, fim, tipo.value if tipo else None)
+
+
+@router.get("/distribuicao", response_model=DistribuicaoProposta)
+def propor_distribuicao_dia(
+    data: date = Query(..., description="Dia (YYYY-MM-DD)"),
+    # Primária: a `versao` é comparada na confirmação, que lê da primária
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Propõe técnico e hora de início para os serviços sem técnico do dia
+    (`servicos`, Aqua e Verde), respeitando as especialidades, a agenda
+    de cada técnico e o horário de trabalho, com as horas equilibradas.
+    Não grava nada. Requer autenticação.
+    """
+    return propor_distribuicao(
+        db, data,
+        config.WORKDAY_START_HOUR * 60, config.WORKDAY_END_HOUR * 60,
+        config.ASSIGNMENT_SEARCH_SECONDS,
+    )
+
+
+@router.post("/distribuicao", response_model=List[AtribuicaoResponse], status_code=status.HTTP_201_CREATED)
+def confirmar_distribuicao_dia(
+    pedido: DistribuicaoConfirmacao,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Grava as atribuições de uma proposta numa só transacção. Devolve 409
+    se os serviços, os técnicos ou a agenda do dia mudaram desde a
+    proposta (`versao`), e 400 se alguma atribuição é inválida ou se
+    sobrepõe a outra. Requer autenticação.
+    """
+    propostas = [{**proposta.dict(), "origem": proposta.origem.value} for proposta in pedido.atribuicoes]
+    ids = set(confirmar_distribuicao(db, pedido.data, pedido.versao, propostas))
+    return [descrever(linha._mapping) for linha in agenda_do_dia(db, pedido.data) if linha.id in ids]
+
+
+@router.get("/{tecnico_id}", response_model=TecnicoResponse)
+def obter_tecnico(
+    tecnico_id: int,
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user),
+):
+    """Obtém um técnico pelo ID. Requer autenticação."""
+    return _obter_tecnico(db, tecnico_id)
+
+
+@router.put("/{tecnico_id}", response_model=TecnicoResponse)
+def actualizar_tecnico(
+    tecnico_id: int,
+    tecnico_update: TecnicoUpdate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Actualiza um técnico. Requer autenticação.
+
+    Desactivar um técnico mantém as atribuições já feitas, mas impede
+    novas e retira-o das disponibilidades.
+    """
+    tecnico = _obter_tecnico(db, tecnico_id)
+    for campo, valor in tecnico_update.dict(exclude_unset=True).items():
+        setattr(tecnico, campo, getattr(valor, "value", valor))
+    db.commit()
+    db.refresh(tecnico)
+    return tecnico
+
+
+@router.delete("/{tecnico_id}", status_code=status.HTTP_204_NO_CONTENT)
+def eliminar_tecnico(
+    tecnico_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Elimina um técnico sem atribuições. Requer autenticação."""
+    tecnico = _obter_tecnico(db, tecnico_id)
+    if db.query(Atribuicao.id).filter(Atribuicao.tecnico_id == tecnico_id).first():
+        raise HTTPException(
+            status_code=400,
+            detail="Não é possível eliminar técnico com atribuições (desactive-o)"
+        )
+    db.delete(tecnico)
+    db.commit()
+    return None
+
+
+@router.get("/{tecnico_id}/agenda", response_model=List[AtribuicaoResponse])
+def obter_agenda(
+    tecnico_id: int,
+    data: date = Query(..., description="Dia (YYYY-MM-DD)"),
+    db: Session = Depends(get_db_leitura),
+    current_user=Depends(get_current_user),
+):
+    """Atribuições do técnico no dia, pela hora de início (sem cancelados). Requer autenticação."""
+    _obter_tecnico(db, tecnico_id)
+    return [descrever(linha._mapping) for linha in agenda_do_dia(db, data, [tecnico_id])]
+
+
+@router.post(
+    "/{tecnico_id}/atribuicoes",
+    response_model=AtribuicaoResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def criar_atribuicao(
+    tecnico_id: int,
+    atribuicao: AtribuicaoCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Atribui um serviço ao técnico a partir de `hora_inicio`. Rejeitada
+    (400) se se sobrepõe a outra atribuição do técnico nesse dia.
+    Requer autenticação.
+    """
+    tecnico = _obter_tecnico(db, tecnico_id, bloquear=True)
+    if not tecnico.activo:
+        raise HTTPException(status_code=400, detail="Técnico inactivo")
+    origem = atribuicao.origem.value
+    servico = ler_servico(db, origem, atribuicao.servico_id)
+    if servico is None:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    if servico["status"] == StatusServico.CANCELADO.value:
+        raise HTTPException(status_code=400, detail="Não é possível atribuir um serviço cancelado")
+    if tecnico.especialidade and tecnico.especialidade != servico["tipo"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"O técnico não faz serviços de {servico['tipo']}"
+        )
+
+    nova_atribuicao = Atribuicao(tecnico_id=tecnico_id, **{**atribuicao.dict(), "origem": origem})
+    db.add(nova_atribuicao)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Índice único origem/serviço/técnico
+        db.rollback()
+        raise HTTPException(status_code=400, detail="O técnico já está atribuído a este serviço")
+    garantir_tecnicos_livres(db, [atribuicao.servico_id], origem)
+    db.commit()
+    return descrever_atribuicao(nova_atribuicao, servico)
+
+
+@router.delete("/{tecnico_id}/atribuicoes/{atribuicao_id}", status_code=status.HTTP_204_NO_CONTENT)
+def eliminar_atribuicao(
+    tecnico_id: int,
+    atribuicao_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Retira o técnico de um serviço. Requer autenticação."""
+    atribuicao = db.get(Atribuicao, atribuicao_id)
+    if atribuicao is None or atribuicao.tecnico_id != tecnico_id:
+        raise HTTPException(status_code=404, detail="Atribuição não encontrada")
+    db.delete(atribuicao)
+    db.commit()
+    return None
@@ -7,17 +7,30 @@ autenticação OAuth2 básico usando senhas e tokens JWT.
 """
 
 from datetime import timedelta
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..core.database import SessionLocal
+from ..core.database import get_db
+from ..core.database_async import get_async_db
 from ..core.security import (
-    criar_token_acesso,
-    gerar_hash_senha,
-    verificar_senha,
-    verificar_token,
+    UtilizadorAutenticado,
+    criar_token_utilizador,
+    decodificar_token,
+    gerar_hash_senha_async,
+    memorizar_utilizador,
+    principal_do_token,
+    registar_invalidacao_cache,
+    token_auto_contido,
+    utilizador_em_cache,
+    verificar_senha_async,
+    versao_token_valida,
+    versao_token_valida_async,
 )
 from ..models.user import User
 from ..schemas.user import UserCreate, UserResponse
@@ -28,47 +41,89 @@ router = APIRouter(prefix="/utilizadores", tags=["Utilizadores"])
 # Define o esquema OAuth2 que irá extrair o token do cabeçalho Authorization
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/utilizadores/login")
 
+# Criar, desactivar ou mudar a senha de um utilizador invalida a cache de autenticação
+registar_invalidacao_cache(User)
 
-def get_db():
-    """Cria e encerra sessões de base de dados conforme necessário."""
-    db = SessionLocal()
+
+def _procurar_por_email(db: Session, email: str) -> Optional[User]:
+    """
+    Procura o utilizador e liberta logo a ligação: o bcrypt que se segue
+    não a deve ocupar.
+    """
     try:
-        yield db
+        return db.query(User).filter(User.email == email).first()
     finally:
         db.close()
 
 
+def _gravar(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+# O hashing espera no pool de processos sem ocupar uma thread do servidor;
+# só as consultas curtas correm no threadpool.
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def criar_utilizador(utilizador: UserCreate, db: Session = Depends(get_db)):
+async def criar_utilizador(utilizador: UserCreate, db: Session = Depends(get_db)):
     """Cria um novo utilizador."""
-    db_user = db.query(User).filter(User.email == utilizador.email).first()
-    if db_user:
+    if await run_in_threadpool(_procurar_por_email, db, utilizador.email):
         raise HTTPException(status_code=400, detail="Email já registado")
-    hash_senha = gerar_hash_senha(utilizador.senha)
+    hash_senha = await gerar_hash_senha_async(utilizador.senha)
     novo_user = User(nome=utilizador.nome, email=utilizador.email, hash_senha=hash_senha)
-    db.add(novo_user)
-    db.commit()
-    db.refresh(novo_user)
-    return novo_user
+    return await run_in_threadpool(_gravar, db, novo_user)
 
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Endpoint de autenticação."""
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verificar_senha(form_data.password, user.hash_senha):
+    user = await run_in_threadpool(_procurar_por_email, db, form_data.username)
+    if not user or not await verificar_senha_async(form_data.password, user.hash_senha):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
     access_token_expires = timedelta(minutes=30)
-    access_token = criar_token_acesso(data={"sub": user.email}, expires_delta=access_token_expires)
+    access_token = criar_token_utilizador(user, expires_delta=access_token_expires)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> UtilizadorAutenticado:
     """Obtém o utilizador actual com base no token JWT fornecido."""
-    email = verificar_token(token)
+    payload = decodificar_token(token)
+    email = payload.get("sub") if payload else None
     if email is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido ou expirado")
+    if token_auto_contido(payload):
+        if not versao_token_valida(payload, db, User):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revogado")
+        return principal_do_token(payload)
+    utilizador = utilizador_em_cache(token)
+    if utilizador is not None:
+        return utilizador
     user = db.query(User).filter(User.email == email).first()
     if user is None:
         raise HTTPException(status_code=404, detail="Utilizador não encontrado")
-    return user
+    return memorizar_utilizador(token, payload, user)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> UtilizadorAutenticado:
+    """Versão assíncrona de `get_current_user`, usada pelas rotas assíncronas."""
+    payload = decodificar_token(token)
+    email = payload.get("sub") if payload else None
+    if email is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido ou expirado")
+    if token_auto_contido(payload):
+        if not await versao_token_valida_async(payload, db, User):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revogado")
+        return principal_do_token(payload)
+    utilizador = utilizador_em_cache(token)
+    if utilizador is not None:
+        return utilizador
+    resultado = await db.execute(select(User).where(User.email == email))
+    user = resultado.scalars().first()
+    if user is None:
+        raise HTTPException(status_code=404, detail="Utilizador não encontrado")
+    return memorizar_utilizador(token, payload, user)
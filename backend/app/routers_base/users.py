@@ -4,14 +4,15 @@ Autenticação JWT e gestão de utilizadores
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from app.core.database import get_db
 from app.core.security import (
-    gerar_hash_senha, 
-    verificar_senha, 
-    criar_token_acesso, 
+    gerar_hash_senha_async, 
+    verificar_senha_async, 
+    criar_token_utilizador, 
     get_current_user,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
@@ -20,8 +21,24 @@ from app.schemas_base.user import UserCreate, UserResponse, Token
 
 router = APIRouter(prefix="/utilizadores", tags=["Utilizadores"])
 
+def _procurar_por_email(db: Session, email: str):
+    """Procura o utilizador e liberta a ligação antes do hashing"""
+    try:
+        return db.query(User).filter(User.email == email).first()
+    finally:
+        db.close()
+
+def _gravar(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+# Rotas assíncronas: o bcrypt espera no pool de hashing sem ocupar uma
+# thread do servidor; só as consultas curtas correm no threadpool
+
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def criar_utilizador(user: UserCreate, db: Session = Depends(get_db)):
+async def criar_utilizador(user: UserCreate, db: Session = Depends(get_db)):
     """
     Criar novo utilizador no sistema
     
@@ -31,15 +48,14 @@ def criar_utilizador(user: UserCreate, db: Session = Depends(get_db)):
     - **is_active**: Utilizador activo (opcional, padrão True)
     """
     # Verificar se email já existe
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+    if await run_in_threadpool(_procurar_por_email, db, user.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email já está registado no sistema"
         )
     
     # Criar novo utilizador com senha hasheada
-    hashed_password = gerar_hash_senha(user.senha)
+    hashed_password = await gerar_hash_senha_async(user.senha)
     db_user = User(
         nome=user.nome,
         email=user.email,
@@ -47,21 +63,17 @@ def criar_utilizador(user: UserCreate, db: Session = Depends(get_db)):
         is_active=user.is_active
     )
     
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    return db_user
+    return await run_in_threadpool(_gravar, db, db_user)
 
 @router.post("/login", response_model=Token)
-def login_utilizador(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_utilizador(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     Login de utilizador com email e senha
     
     Retorna token JWT válido por 30 minutos
     """
     # Buscar utilizador por email
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await run_in_threadpool(_procurar_por_email, db, form_data.username)
     
     if not user:
         raise HTTPException(
@@ -71,7 +83,7 @@ def login_utilizador(form_data: OAuth2PasswordRequestForm = Depends(), db: Sessi
         )
     
     # Verificar senha
-    if not verificar_senha(form_data.password, user.hash_senha):
+    if not await verificar_senha_async(form_data.password, user.hash_senha):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorrectos",
@@ -87,9 +99,7 @@ def login_utilizador(form_data: OAuth2PasswordRequestForm = Depends(), db: Sessi
     
     # Criar token de acesso
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = criar_token_acesso(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    access_token = criar_token_utilizador(user, expires_delta=access_token_expires)
     
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -3,7 +3,8 @@ Esquemas Pydantic para clientes.
 
 Define os modelos de dados utilizados na criação, leitura e listagem de
 clientes. A inclusão dos serviços associados permite obter a relação
-completa entre clientes e serviços, quando necessário.
+completa entre clientes e serviços, quando necessário; as listagens usam
+um schema leve e só incluem os serviços a pedido.
 """
 
 from typing import List, Optional
@@ -98,3 +99,23 @@ class ClienteResponse(ClienteBase):
 
     class Config:
         orm_mode = True
+
+
+class ClienteListagem(ClienteBase):
+    """
+    Schema leve para listagens de clientes.
+
+    Os serviços só são incluídos (e carregados) quando pedidos com
+    `include=servicos`; caso contrário o campo é omitido da resposta.
+    """
+    id: int
+    servicos: Optional[List[ServicoResponse]] = None
+
+    class Config:
+        orm_mode = True
+
+
+class ClienteSugestao(BaseModel):
+    """Sugestão do autocomplete de clientes (apenas id e nome)."""
+    id: int
+    nome: str
@@ -0,0 +1,122 @@
+"""
+Esquemas Pydantic para planos recorrentes e as suas ocorrências.
+"""
+
+from datetime import date, datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, validator
+
+from .servico import StatusServico, TipoServico
+
+
+class FrequenciaPlano(str, Enum):
+    """Periodicidade das visitas de um plano."""
+    SEMANAL = "semanal"
+    QUINZENAL = "quinzenal"
+    MENSAL = "mensal"
+
+
+def _validar_duracao(v: Optional[int]) -> Optional[int]:
+    if v is not None and (v < 1 or v > 12):
+        raise ValueError("Duração deve estar entre 1 e 12 horas")
+    return v
+
+
+def _limpar_descricao(v: Optional[str]) -> Optional[str]:
+    if v is None:
+        return None
+    descricao_limpa = v.strip()
+    if len(descricao_limpa) > 500:
+        raise ValueError("Descrição não pode ter mais de 500 caracteres")
+    return descricao_limpa or None
+
+
+class PlanoBase(BaseModel):
+    cliente_id: int
+    tipo: TipoServico
+    frequencia: FrequenciaPlano
+    data_inicio: date
+    data_fim: Optional[date] = None
+    duracao_horas: int
+    descricao: Optional[str] = None
+
+    @validator("data_fim")
+    def validar_data_fim(cls, v: Optional[date], values) -> Optional[date]:
+        inicio = values.get("data_inicio")
+        if v is not None and inicio is not None and v < inicio:
+            raise ValueError("A data de fim não pode ser anterior à data de início")
+        return v
+
+    _duracao = validator("duracao_horas", allow_reuse=True)(_validar_duracao)
+    _descricao = validator("descricao", allow_reuse=True)(_limpar_descricao)
+
+
+class PlanoCreate(PlanoBase):
+    pass
+
+
+class PlanoUpdate(BaseModel):
+    """
+    Actualização parcial de um plano. As alterações aplicam-se às
+    ocorrências ainda não materializadas.
+    """
+    frequencia: Optional[FrequenciaPlano] = None
+    data_inicio: Optional[date] = None
+    data_fim: Optional[date] = None
+    duracao_horas: Optional[int] = None
+    descricao: Optional[str] = None
+
+    _duracao = validator("duracao_horas", allow_reuse=True)(_validar_duracao)
+    _descricao = validator("descricao", allow_reuse=True)(_limpar_descricao)
+
+
+class ExcecaoPlanoCreate(BaseModel):
+    data: date
+    motivo: Optional[str] = None
+
+
+class ExcecaoPlanoResponse(ExcecaoPlanoCreate):
+    class Config:
+        orm_mode = True
+
+
+class PlanoResponse(PlanoBase):
+    id: int
+    data_criacao: Optional[datetime] = None
+    excecoes: List[ExcecaoPlanoResponse] = []
+
+    class Config:
+        orm_mode = True
+
+
+class Ocorrencia(BaseModel):
+    """
+    Ocorrência de um plano numa data. Sem `servico_id` é apenas prevista
+    (calculada a partir do plano); com `servico_id` já foi materializada
+    e os restantes campos são os do serviço.
+    """
+    plano_id: int
+    cliente_id: int
+    tipo: TipoServico
+    data_ocorrencia: date
+    data_servico: date
+    duracao_horas: int
+    descricao: Optional[str] = None
+    status: StatusServico = StatusServico.AGENDADO
+    servico_id: Optional[int] = None
+
+
+class MaterializarOcorrencia(BaseModel):
+    """
+    Campos a alterar ao iniciar ou editar uma ocorrência prevista. Por
+    defeito fica com os valores do plano.
+    """
+    status: StatusServico = StatusServico.EM_PROGRESSO
+    data_servico: Optional[date] = None
+    duracao_horas: Optional[int] = None
+    descricao: Optional[str] = None
+
+    _duracao = validator("duracao_horas", allow_reuse=True)(_validar_duracao)
+    _descricao = validator("descricao", allow_reuse=True)(_limpar_descricao)
@@ -6,7 +6,7 @@ que são devolvidos ao cliente quando um serviço é consultado.
 """
 
 from datetime import date, datetime
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from enum import Enum
 
 from pydantic import BaseModel, validator
@@ -72,6 +72,38 @@ class ServicoCreate(ServicoBase):
     pass
 
 
+class ServicoImportacao(ServicoBase):
+    """
+    Linha da importação em massa de serviços.
+
+    O cliente é indicado por `cliente_id` ou por `cliente_nome` (os
+    clientes importados no mesmo onboarding ainda não têm id conhecido).
+    """
+    cliente_id: Optional[int] = None
+    cliente_nome: Optional[str] = None
+
+    @validator("cliente_id")
+    def validar_cliente_id(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and v <= 0:
+            raise ValueError("ID do cliente deve ser um número positivo")
+        return v
+
+    @validator("cliente_nome")
+    def validar_cliente_nome(cls, v: Optional[str]) -> Optional[str]:
+        """Normaliza como ClienteBase.nome, para coincidir com o nome gravado."""
+        if v is None or not v.strip():
+            return None
+        return v.strip().title()
+
+
+class ServicoHistorico(ServicoImportacao):
+    """Importação do histórico de serviços: aceita datas passadas."""
+
+    @validator("data_servico")
+    def validar_data_servico(cls, v: date) -> date:
+        return v
+
+
 class ServicoUpdate(BaseModel):
     """Schema para actualização parcial de serviços."""
     tipo: Optional[TipoServico] = None
@@ -94,9 +126,68 @@ class ServicoUpdate(BaseModel):
         return v
 
 
+# Serviços por pedido na alteração de estado em massa
+MAX_SERVICOS_STATUS_EM_MASSA = 1000
+
+
+class ServicoStatusEmMassa(BaseModel):
+    """
+    Alteração do estado de vários serviços (ex.: fecho do dia).
+
+    Os serviços são indicados por `ids`, ou por `data_servico` (e
+    opcionalmente `cliente_id`); neste caso os cancelados ficam de fora.
+    """
+    status: StatusServico
+    ids: Optional[List[int]] = None
+    data_servico: Optional[date] = None
+    cliente_id: Optional[int] = None
+
+    @validator("ids")
+    def validar_ids(cls, v: Optional[List[int]]) -> Optional[List[int]]:
+        if v is None:
+            return None
+        if not v:
+            raise ValueError("Indique pelo menos um serviço")
+        if len(v) > MAX_SERVICOS_STATUS_EM_MASSA:
+            raise ValueError(f"Máximo de {MAX_SERVICOS_STATUS_EM_MASSA} serviços por pedido")
+        # Sem repetidos, pela ordem do pedido
+        return list(dict.fromkeys(v))
+
+    @validator("cliente_id", always=True)
+    def validar_seleccao(cls, v: Optional[int], values) -> Optional[int]:
+        """Exige ids ou data_servico (não ambos); cliente_id só com a data."""
+        por_ids = values.get("ids") is not None
+        por_data = values.get("data_servico") is not None
+        if por_ids == por_data:
+            raise ValueError("Indique ids ou data_servico")
+        if v is not None and por_ids:
+            raise ValueError("cliente_id só se aplica com data_servico")
+        return v
+
+
+class ServicoStatusResultado(BaseModel):
+    """Resultado por serviço: actualizado, inalterado ou nao_encontrado."""
+    id: int
+    resultado: Literal["actualizado", "inalterado", "nao_encontrado"]
+    status_anterior: Optional[StatusServico] = None
+
+
+class ServicoStatusEmMassaResposta(BaseModel):
+    status: StatusServico
+    actualizados: int
+    resultados: List[ServicoStatusResultado]
+
+
 class ServicoResponse(ServicoBase):
     id: int
     data_criacao: Optional[datetime] = None
+    plano_id: Optional[int] = None
+    data_ocorrencia: Optional[date] = None
+
+    @validator("data_servico")
+    def validar_data_servico(cls, v: date) -> date:
+        """Serviços gravados (incluindo o histórico importado) podem ser passados."""
+        return v
 
     class Config:
         orm_mode = True
@@ -113,3 +204,43 @@ class ServicoResumo(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class CalendarioServico(BaseModel):
+    """
+    Entrada do calendário. `origem` indica a tabela: "servicos", "aqua"
+    (piscinas) ou "verde" (jardins); "plano" é uma ocorrência prevista de
+    um plano recorrente, ainda sem serviço (`id` vazio).
+    """
+    origem: str
+    id: Optional[int] = None
+    tipo: str
+    data_servico: date
+    duracao_horas: int
+    status: Optional[str] = None
+    cliente_id: int
+    cliente_nome: Optional[str] = None
+    descricao: Optional[str] = None
+    plano_id: Optional[int] = None
+
+
+class CalendarioDia(BaseModel):
+    """Serviços de um dia e total de horas (sem os cancelados)."""
+    data: date
+    total_horas: int
+    servicos: List[CalendarioServico]
+
+
+class CalendarioResposta(BaseModel):
+    inicio: date
+    fim: date
+    dias: List[CalendarioDia]
+
+
+class ProximoSlotResposta(BaseModel):
+    """Primeiro dia com horas livres; `capacidade` vazia quando não há limite diário."""
+    data: date
+    duracao: int
+    horas_marcadas: int
+    capacidade: Optional[int] = None
+    horas_livres: Optional[int] = None
@@ -0,0 +1,166 @@
+"""
+Esquemas Pydantic para técnicos e as suas atribuições a serviços.
+"""
+
+from datetime import date, datetime, time
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, validator
+
+from .servico import StatusServico, TipoServico
+
+
+class OrigemServico(str, Enum):
+    """Tabela do serviço: `servicos` ou os módulos Aqua e Verde."""
+    SERVICOS = "servicos"
+    AQUA = "aqua"
+    VERDE = "verde"
+
+
+def _validar_nome(v: Optional[str]) -> Optional[str]:
+    if v is None:
+        return None
+    if len(v.strip()) < 2:
+        raise ValueError("Nome deve ter pelo menos 2 caracteres")
+    return v.strip().title()
+
+
+def _limpar_telefone(v: Optional[str]) -> Optional[str]:
+    if v is None or v.strip() == "":
+        return None
+    return v.strip()
+
+
+class TecnicoBase(BaseModel):
+    nome: str
+    telefone: Optional[str] = None
+    # Sem especialidade: faz serviços de jardinagem e de piscina
+    especialidade: Optional[TipoServico] = None
+    activo: bool = True
+
+    _nome = validator("nome", allow_reuse=True)(_validar_nome)
+    _telefone = validator("telefone", allow_reuse=True)(_limpar_telefone)
+
+
+class TecnicoCreate(TecnicoBase):
+    pass
+
+
+class TecnicoUpdate(BaseModel):
+    """Actualização parcial de um técnico."""
+    nome: Optional[str] = None
+    telefone: Optional[str] = None
+    especialidade: Optional[TipoServico] = None
+    activo: Optional[bool] = None
+
+    _nome = validator("nome", allow_reuse=True)(_validar_nome)
+    _telefone = validator("telefone", allow_reuse=True)(_limpar_telefone)
+
+
+class TecnicoResponse(TecnicoBase):
+    id: int
+    data_criacao: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+def _hora_ao_minuto(v: time) -> time:
+    """A agenda trabalha ao minuto; segundos e fuso são ignorados."""
+    return v.replace(second=0, microsecond=0, tzinfo=None)
+
+
+def _validar_duracao(v: Optional[int]) -> Optional[int]:
+    if v is not None and (v < 1 or v > 12):
+        raise ValueError("Duração deve estar entre 1 e 12 horas")
+    return v
+
+
+class AtribuicaoCreate(BaseModel):
+    """
+    Atribuição de um serviço a um técnico a partir de `hora_inicio`. Sem
+    `duracao_horas` ocupa a duração do serviço.
+    """
+    origem: OrigemServico = OrigemServico.SERVICOS
+    servico_id: int
+    hora_inicio: time
+    duracao_horas: Optional[int] = None
+
+    _hora_inicio = validator("hora_inicio", allow_reuse=True)(_hora_ao_minuto)
+    _duracao = validator("duracao_horas", allow_reuse=True)(_validar_duracao)
+
+
+class AtribuicaoResponse(BaseModel):
+    id: int
+    tecnico_id: int
+    origem: OrigemServico
+    servico_id: int
+    data_servico: date
+    hora_inicio: time
+    hora_fim: time
+    duracao_horas: int
+    status: Optional[StatusServico] = None
+
+
+# Atribuições por confirmação da distribuição automática
+MAX_ATRIBUICOES_DISTRIBUICAO = 1000
+
+
+class AtribuicaoProposta(BaseModel):
+    """Atribuição proposta pela distribuição automática (pode ser editada antes de confirmar)."""
+    origem: OrigemServico
+    servico_id: int
+    tecnico_id: int
+    hora_inicio: time
+    duracao_horas: Optional[int] = None
+
+    _hora_inicio = validator("hora_inicio", allow_reuse=True)(_hora_ao_minuto)
+    _duracao = validator("duracao_horas", allow_reuse=True)(_validar_duracao)
+
+
+class AtribuicaoPropostaResposta(AtribuicaoProposta):
+    hora_fim: time
+
+
+class ServicoSemTecnico(BaseModel):
+    origem: OrigemServico
+    servico_id: int
+    tipo: TipoServico
+    duracao_horas: Optional[int] = None
+    motivo: str
+
+
+class HorasTecnico(BaseModel):
+    """Horas do técnico no dia (existentes e propostas)."""
+    tecnico_id: int
+    nome: str
+    horas: float
+    servicos_propostos: int
+
+
+class DistribuicaoProposta(BaseModel):
+    """
+    Proposta de distribuição dos serviços sem técnico de um dia. Para a
+    gravar, envie `data`, `versao` e as `atribuicoes` (tal como vieram ou
+    editadas) para POST /tecnicos/distribuicao.
+    """
+    data: date
+    versao: str
+    atribuicoes: List[AtribuicaoPropostaResposta]
+    sem_tecnico: List[ServicoSemTecnico]
+    tecnicos: List[HorasTecnico]
+    movimentos: int
+    duracao_ms: float
+
+
+class DistribuicaoConfirmacao(BaseModel):
+    data: date
+    versao: str
+    atribuicoes: List[AtribuicaoProposta]
+
+    @validator("atribuicoes")
+    def validar_atribuicoes(cls, v: List[AtribuicaoProposta]) -> List[AtribuicaoProposta]:
+        if len(v) > MAX_ATRIBUICOES_DISTRIBUICAO:
+            raise ValueError(f"No máximo {MAX_ATRIBUICOES_DISTRIBUICAO} atribuições por pedido")
+        return v
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos índices da tabela `servicos`.
+
+Gera uma base SQLite temporária com N serviços (1 milhão por defeito) e
+compara, para as consultas reais das rotas, o plano de execução e a
+latência mediana com os índices antigos (simples, em tipo/status/data)
+e com os índices compostos declarados em `app/models/servico.py`.
+
+    python backend/benchmarks/indices_servicos.py
+    python backend/benchmarks/indices_servicos.py --linhas 200000 --repeticoes 50
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.models.cliente import Cliente  # noqa: E402
+from backend.app.models.servico import Servico  # noqa: E402
+
+TIPOS = ["jardinagem", "piscina"]
+ESTADOS = ["agendado", "em_progresso", "concluido", "cancelado"]
+
+# Índices existentes antes da alteração
+INDICES_ANTIGOS = {
+    "ix_servicos_tipo": "CREATE INDEX ix_servicos_tipo ON servicos (tipo)",
+    "ix_servicos_status": "CREATE INDEX ix_servicos_status ON servicos (status)",
+}
+
+CONSULTAS = {
+    "duplicado (criar_servico)": (
+        "SELECT id FROM servicos WHERE cliente_id = :cliente AND data_servico = :data "
+        "AND status != 'cancelado' LIMIT 1"
+    ),
+    "listar por cliente": (
+        "SELECT * FROM servicos WHERE cliente_id = :cliente ORDER BY data_servico DESC LIMIT 100"
+    ),
+    "listar por status + datas": (
+        "SELECT * FROM servicos WHERE status = :status AND data_servico BETWEEN :inicio AND :fim "
+        "ORDER BY data_servico DESC LIMIT 100"
+    ),
+    "listar por tipo + datas": (
+        "SELECT * FROM servicos WHERE tipo = :tipo AND data_servico BETWEEN :inicio AND :fim "
+        "ORDER BY data_servico DESC LIMIT 100"
+    ),
+    "dashboard próximos 7 dias": (
+        "SELECT count(*) FROM servicos WHERE status = 'agendado' "
+        "AND data_servico BETWEEN :hoje AND :semana"
+    ),
+}
+
+
+def popular(engine, linhas: int, clientes: int) -> None:
+    """Insere clientes e serviços com datas espalhadas por três anos."""
+    aleatorio = random.Random(42)
+    hoje = date.today()
+    with engine.begin() as conn:
+        conn.execute(
+            Cliente.__table__.insert(),
+            [{"nome": f"Cliente {i}"} for i in range(1, clientes + 1)],
+        )
+        lote = []
+        for _ in range(linhas):
+            lote.append({
+                "tipo": aleatorio.choice(TIPOS),
+                "data_servico": hoje + timedelta(days=aleatorio.randint(-730, 365)),
+                "duracao_horas": aleatorio.randint(1, 8),
+                "cliente_id": aleatorio.randint(1, clientes),
+                "status": aleatorio.choice(ESTADOS),
+            })
+            if len(lote) == 50_000:
+                conn.execute(Servico.__table__.insert(), lote)
+                lote.clear()
+        if lote:
+            conn.execute(Servico.__table__.insert(), lote)
+
+
+def parametros(aleatorio: random.Random, clientes: int) -> dict:
+    hoje = date.today()
+    inicio = hoje + timedelta(days=aleatorio.randint(-700, 300))
+    return {
+        "cliente": aleatorio.randint(1, clientes),
+        "data": hoje + timedelta(days=aleatorio.randint(-730, 365)),
+        "status": aleatorio.choice(ESTADOS),
+        "tipo": aleatorio.choice(TIPOS),
+        "inicio": inicio,
+        "fim": inicio + timedelta(days=30),
+        "hoje": hoje,
+        "semana": hoje + timedelta(days=7),
+    }
+
+
+def medir(engine, repeticoes: int, clientes: int) -> dict:
+    """Plano e latência mediana (ms) de cada consulta."""
+    resultados = {}
+    with engine.connect() as conn:
+        for nome, sql in CONSULTAS.items():
+            aleatorio = random.Random(7)
+            plano = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), parametros(aleatorio, clientes)).fetchall()
+            tempos = []
+            for _ in range(repeticoes):
+                valores = parametros(aleatorio, clientes)
+                inicio = time.perf_counter()
+                conn.execute(text(sql), valores).fetchall()
+                tempos.append((time.perf_counter() - inicio) * 1000)
+            resultados[nome] = {
+                "plano": " | ".join(linha[-1] for linha in plano),
+                "mediana_ms": statistics.median(tempos),
+            }
+    return resultados
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dos índices de servicos")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--clientes", type=int, default=20_000)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        engine = create_engine(f"sqlite:///{Path(directorio) / 'benchmark.db'}")
+        Cliente.__table__.create(engine)
+        Servico.__table__.create(engine)
+
+        # Estado "antes": sem os compostos, com os índices simples antigos
+        with engine.begin() as conn:
+            for indice in Servico.__table__.indexes:
+                if len(indice.columns) > 1:
+                    conn.exec_driver_sql(f"DROP INDEX {indice.name}")
+            for ddl in INDICES_ANTIGOS.values():
+                conn.exec_driver_sql(ddl)
+
+        print(f"A gerar {args.linhas} serviços para {args.clientes} clientes...")
+        inicio = time.perf_counter()
+        popular(engine, args.linhas, args.clientes)
+        print(f"Dados gerados em {time.perf_counter() - inicio:.1f}s")
+
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        antes = medir(engine, args.repeticoes, args.clientes)
+
+        # Estado "depois": índices do modelo
+        with engine.begin() as conn:
+            for nome in INDICES_ANTIGOS:
+                conn.exec_driver_sql(f"DROP INDEX {nome}")
+        for indice in Servico.__table__.indexes:
+            if len(indice.columns) > 1:
+                indice.create(engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        depois = medir(engine, args.repeticoes, args.clientes)
+        engine.dispose()
+
+    for nome in CONSULTAS:
+        a, d = antes[nome], depois[nome]
+        ganho = a["mediana_ms"] / d["mediana_ms"] if d["mediana_ms"] else float("inf")
+        print(f"\n== {nome}")
+        print(f"   antes : {a['mediana_ms']:9.3f} ms  {a['plano']}")
+        print(f"   depois: {d['mediana_ms']:9.3f} ms  {d['plano']}")
+        print(f"   ganho : {ganho:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark da paginação de `GET /servicos/`: offset vs cursor (keyset).
+
+Gera uma base SQLite temporária com N serviços e mede a latência mediana
+da página 1 e de uma página profunda (5000 por defeito) nos dois modos,
+com a consulta real da rota (`paginar` com ORDEM_SERVICOS). Com offset a
+página profunda lê e descarta `pagina * limite` linhas; com cursor o
+custo é o de uma procura no índice (data_servico, id).
+
+    python backend/benchmarks/paginacao_servicos.py
+    python backend/benchmarks/paginacao_servicos.py --linhas 300000 --pagina 2500
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+# Raiz do repositório (backend.*), backend/ (app.*, usado pelos routers) e benchmarks/
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from backend.app.core.paginacao import SEGUINTE, codificar_cursor, paginar  # noqa: E402
+from backend.app.models.cliente import Cliente  # noqa: E402
+from backend.app.models.servico import Servico  # noqa: E402
+from backend.app.routers.servicos import ORDEM_SERVICOS  # noqa: E402
+from indices_servicos import popular  # noqa: E402
+
+
+def medir(sessao: Session, repeticoes: int, limite: int, skip: int = 0, cursor=None) -> float:
+    """Latência mediana (ms) de uma página."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        paginar(sessao.query(Servico), ORDEM_SERVICOS, skip, limite, cursor)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        sessao.expunge_all()
+    return statistics.median(tempos)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark da paginação de servicos")
+    parser.add_argument("--linhas", type=int, default=600_000)
+    parser.add_argument("--clientes", type=int, default=20_000)
+    parser.add_argument("--limite", type=int, default=100)
+    parser.add_argument("--pagina", type=int, default=5000)
+    parser.add_argument("--repeticoes", type=int, default=30)
+    args = parser.parse_args()
+
+    saltar = (args.pagina - 1) * args.limite
+    if saltar >= args.linhas:
+        parser.error(f"--linhas tem de ser maior que {saltar} para a página {args.pagina}")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        engine = create_engine(f"sqlite:///{Path(directorio) / 'benchmark.db'}")
+        Cliente.__table__.create(engine)
+        Servico.__table__.create(engine)
+
+        print(f"A gerar {args.linhas} serviços para {args.clientes} clientes...")
+        inicio = time.perf_counter()
+        popular(engine, args.linhas, args.clientes)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        print(f"Dados gerados em {time.perf_counter() - inicio:.1f}s")
+
+        with Session(engine) as sessao:
+            # Cursor equivalente a ter percorrido as páginas anteriores
+            ultima_anterior = paginar(sessao.query(Servico), ORDEM_SERVICOS, saltar - 1, 1, None)[0][0]
+            cursor = codificar_cursor(ultima_anterior, ORDEM_SERVICOS, SEGUINTE)
+
+            resultados = {
+                "página 1": medir(sessao, args.repeticoes, args.limite),
+                f"offset p{args.pagina}": medir(sessao, args.repeticoes, args.limite, skip=saltar),
+                f"cursor p{args.pagina}": medir(sessao, args.repeticoes, args.limite, cursor=cursor),
+            }
+            mesma_pagina = (
+                [s.id for s in paginar(sessao.query(Servico), ORDEM_SERVICOS, saltar, args.limite, None)[0]]
+                == [s.id for s in paginar(sessao.query(Servico), ORDEM_SERVICOS, 0, args.limite, cursor)[0]]
+            )
+        engine.dispose()
+
+    for nome, mediana in resultados.items():
+        print(f"   {nome:<14}: {mediana:9.3f} ms")
+    profunda_offset = resultados[f"offset p{args.pagina}"]
+    profunda_cursor = resultados[f"cursor p{args.pagina}"]
+    print(f"\nPágina {args.pagina}: cursor {profunda_offset / profunda_cursor:.1f}x mais rápido que offset")
+    print(f"Mesmas linhas nos dois modos: {'sim' if mesma_pagina else 'NÃO'}")
+    return 0 if mesma_pagina else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Bootstrap da base de dados GestOnGo (comando único).
+
+Prepara a base de dados antes do arranque:
+
+1. cria as tabelas, colunas e índices em falta;
+2. grava o carimbo do esquema;
+3. cria o utilizador administrador por defeito;
+4. reconcilia os contadores agregados.
+
+Corra uma vez por deploy, antes de arrancar os workers com
+BOOTSTRAP_ON_STARTUP=false:
+
+    python backend/bootstrap.py              # aplicação principal (backend.main)
+    python backend/bootstrap.py --modular    # aplicação modular (main_modular)
+    python backend/bootstrap.py --forcar     # ignora o carimbo e revê o esquema
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+DIRECTORIO_BACKEND = Path(__file__).resolve().parent
+
+
+def bootstrap_principal(forcar: bool) -> dict:
+    sys.path.insert(0, str(DIRECTORIO_BACKEND.parent))
+    from backend.app.core.arranque import executar_bootstrap
+    from backend.app.core.database import Base, SessionLocal, engine
+    from backend.app.core.security import gerar_hash_senha, pool_hashing
+    from backend.app.models import registar_modelos
+    from backend.app.models.user import User
+
+    registar_modelos()
+    try:
+        return executar_bootstrap(engine, Base.metadata, SessionLocal, User, gerar_hash_senha, "principal", forcar)
+    finally:
+        pool_hashing.encerrar()
+
+
+def bootstrap_modular(forcar: bool) -> dict:
+    sys.path.insert(0, str(DIRECTORIO_BACKEND))
+    from app.core.arranque import criar_utilizador_admin, reconciliar_contadores_arranque
+    from app.core.database import SessionLocal, criar_tabelas
+    from app.core.security import gerar_hash_senha, pool_hashing
+    from app.models_base.user import User
+
+    try:
+        return {
+            "esquema_actualizado": criar_tabelas(forcar),
+            "admin_criado": criar_utilizador_admin(SessionLocal, User, gerar_hash_senha),
+            "contadores_corrigidos": len(reconciliar_contadores_arranque(SessionLocal)["deriva"]),
+        }
+    finally:
+        pool_hashing.encerrar()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bootstrap da base de dados GestOnGo")
+    parser.add_argument("--modular", action="store_true", help="preparar o esquema de main_modular")
+    parser.add_argument("--forcar", action="store_true", help="ignorar o carimbo do esquema")
+    args = parser.parse_args()
+
+    if args.modular:
+        resultado = bootstrap_modular(args.forcar)
+    else:
+        resultado = bootstrap_principal(args.forcar)
+
+    estado = "actualizado" if resultado["esquema_actualizado"] else "já actualizado"
+    print(f"📊 Esquema {estado}")
+    if resultado.get("fases_ms"):
+        print("⏱️ " + ", ".join(f"{nome}={ms}ms" for nome, ms in resultado["fases_ms"].items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Exportação analítica GestOnGo: serviços em Parquet ou Arrow IPC.
+
+Escreve servicos (com o nome do cliente) e, se existirem, as tabelas dos
+módulos Aqua e Verde, particionados por mês. Cada execução acrescenta
+apenas as linhas criadas ou alteradas desde a anterior; agende-a (cron)
+com a frequência que os relatórios precisam. Lê da réplica quando
+DATABASE_READ_URL está configurado. Requer o pyarrow.
+
+    python backend/exportar_analitica.py /dados/gestongo
+    python backend/exportar_analitica.py /dados/gestongo --formato arrow
+    python backend/exportar_analitica.py /dados/gestongo-v2 --completa
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+DIRECTORIO_BACKEND = Path(__file__).resolve().parent
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Exportação analítica GestOnGo (Parquet / Arrow)")
+    parser.add_argument("destino", type=Path, help="directório da cópia analítica")
+    parser.add_argument("--formato", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument(
+        "--completa", action="store_true",
+        help="ignorar as marcas e exportar tudo (use um destino novo para não duplicar versões)",
+    )
+    parser.add_argument("--tabelas", nargs="+", help="limitar a estas tabelas")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(DIRECTORIO_BACKEND.parent))
+    from backend.app.core.analitica import TABELAS, exportar_analitica
+    from backend.app.core.database import engine, engine_leitura
+
+    try:
+        resumo = exportar_analitica(
+            engine_leitura or engine, args.destino, args.formato, args.completa, args.tabelas or TABELAS
+        )
+    except RuntimeError as erro:
+        print(f"❌ {erro}")
+        return 1
+
+    for tabela, resultado in resumo.items():
+        print(
+            f"📦 {tabela}: {resultado['linhas']} linhas em {len(resultado['ficheiros'])} ficheiros "
+            f"({resultado['duracao_ms']}ms)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
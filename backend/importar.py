@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Importação em massa de clientes e serviços GestOnGo (CSV / NDJSON).
+
+Equivalente às rotas POST /clientes/importar e /servicos/importar, sem
+limites de upload. Importe primeiro os clientes: os serviços podem
+referir o cliente pelo nome (coluna `cliente_nome`).
+
+    python backend/importar.py clientes clientes.csv
+    python backend/importar.py servicos historico.ndjson --historico
+    python backend/importar.py servicos servicos.csv --lote 2000 --relatorio erros.json
+
+Os processos da API vêem os novos registos de imediato; a cache do
+dashboard e o índice do autocomplete actualizam-se pela sua expiração.
+Termina com código 1 se alguma linha foi rejeitada.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+DIRECTORIO_BACKEND = Path(__file__).resolve().parent
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Importação em massa GestOnGo")
+    parser.add_argument("entidade", choices=["clientes", "servicos"])
+    parser.add_argument("ficheiro", type=Path)
+    parser.add_argument("--formato", choices=["csv", "ndjson"], help="por defeito, pela extensão do ficheiro")
+    parser.add_argument("--historico", action="store_true", help="aceitar serviços com datas passadas")
+    parser.add_argument("--lote", type=int, default=None, help="linhas por transacção")
+    parser.add_argument("--relatorio", type=Path, help="gravar o relatório completo (JSON) neste ficheiro")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(DIRECTORIO_BACKEND.parent))
+    from backend.app.core.arranque import preparar_esquema
+    from backend.app.core.database import Base, SessionLocal, engine
+    from backend.app.core.importacao import (
+        TAMANHO_LOTE,
+        detectar_formato,
+        importar_clientes,
+        importar_servicos,
+        ler_linhas,
+    )
+
+    try:
+        formato = detectar_formato(args.ficheiro.name, args.formato)
+    except ValueError as erro:
+        parser.error(str(erro))
+    lote = args.lote or TAMANHO_LOTE
+
+    # Uma leitura do carimbo quando o esquema já está actualizado
+    preparar_esquema(engine, Base.metadata, "principal")
+    db = SessionLocal()
+    try:
+        with args.ficheiro.open("rb") as ficheiro:
+            linhas = ler_linhas(ficheiro, formato)
+            if args.entidade == "clientes":
+                relatorio = importar_clientes(db, linhas, lote)
+            else:
+                relatorio = importar_servicos(db, linhas, args.historico, lote)
+    finally:
+        db.close()
+
+    resultado = relatorio.como_dict()
+    print(
+        f"📥 {resultado['entidade']}: {resultado['importados']}/{resultado['linhas']} importados, "
+        f"{resultado['duplicados']} duplicados, {resultado['invalidos']} inválidos "
+        f"em {resultado['duracao_ms']}ms"
+    )
+    for erro in resultado["erros"][:20]:
+        print(f"   linha {erro['linha']}: {'; '.join(erro['erros'])}")
+    if len(resultado["erros"]) > 20 or resultado["erros_omitidos"]:
+        print("   ... (use --relatorio para a lista completa)")
+    if args.relatorio:
+        args.relatorio.write_text(json.dumps(resultado, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+    return 1 if resultado["duplicados"] or resultado["invalidos"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
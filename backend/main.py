@@ -1,9 +1,10 @@
 """
 Ponto de entrada da aplicação FastAPI - GestOnGo.
 
-Este ficheiro inicializa a base de dados, cria as tabelas e regista
-as rotas de utilizadores, clientes e serviços. Para executar a API,
-utilize o comando:
+Este ficheiro regista as rotas de utilizadores, clientes e serviços. As
+tabelas e o administrador por defeito são preparados no arranque (ver
+`app/core/arranque.py`), ou uma única vez com `python backend/bootstrap.py`.
+Para executar a API, utilize o comando:
 
     uvicorn backend.main:app --reload --port 8000
 
@@ -12,21 +13,91 @@ configuração para reflectir o fuso horário local ou outras
 particularidades regionais.
 """
 
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+import time
+from contextlib import asynccontextmanager
 
-from .app.core.database import Base, engine, SessionLocal
-from .app.routers import users, clientes, servicos
-from .app.core.security import gerar_hash_senha
-from .app.models.user import User
+# Antes das restantes importações, que contam para a fase "importacao" do
+# arranque; daí as importações tardias (E402)
+_inicio_importacao = time.perf_counter()
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+
+from .app.core.arranque import (  # noqa: E402
+    MedidorArranque,
+    criar_utilizador_admin,
+    preparar_esquema,
+    reconciliar_contadores_arranque,
+)
+from .app.core.database import (  # noqa: E402
+    Base,
+    engine,
+    SessionLocal,
+    encaminhamento_leituras,
+    registar_escritas,
+    iniciar_manutencao_sqlite,
+    parar_manutencao_sqlite,
+)
+from .app.core.replit_config import config  # noqa: E402
+from .app.routers import users, clientes, servicos, planos, tecnicos, metricas  # noqa: E402
+from .app.core.database_async import encerrar_engine_async  # noqa: E402
+from .app.core.security import gerar_hash_senha, pool_hashing  # noqa: E402
+from .app.models import registar_modelos  # noqa: E402
+from .app.models.cliente import Cliente  # noqa: E402
+from .app.models.user import User  # noqa: E402
+
+# Todas as tabelas no Base.metadata, como no bootstrap.py
+registar_modelos()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranque e encerramento da aplicação.
+
+    O esquema só é criado quando o carimbo na base de dados não coincide
+    com os modelos (uma leitura no caminho rápido). O administrador por
+    defeito é criado nesse mesmo momento; em produção use `bootstrap.py`
+    uma vez e BOOTSTRAP_ON_STARTUP=false nos workers.
+    """
+    global _inicio_importacao
+    # O tempo de importação só conta no primeiro arranque do processo
+    medidor = MedidorArranque(config.STARTUP_BUDGET_MS, inicio=_inicio_importacao)
+    _inicio_importacao = None
+    if config.BOOTSTRAP_ON_STARTUP:
+        with medidor.fase("esquema"):
+            esquema_actualizado = preparar_esquema(engine, Base.metadata, "principal")
+        if esquema_actualizado:
+            # O hash é calculado no mesmo pool de processos usado pelo login
+            with medidor.fase("admin"):
+                criar_utilizador_admin(SessionLocal, User, gerar_hash_senha)
+            with medidor.fase("contadores"):
+                reconciliar_contadores_arranque(SessionLocal)
+    with medidor.fase("autocomplete"):
+        # Índice em memória dos nomes de clientes (GET /clientes/autocomplete)
+        db = SessionLocal()
+        try:
+            clientes.indice_autocomplete.carregar(db, Cliente)
+        finally:
+            db.close()
+    with medidor.fase("tarefas_fundo"):
+        # Manutenção periódica da base de dados SQLite
+        iniciar_manutencao_sqlite()
+    medidor.reportar()
+
+    yield
+
+    # Termina o pool de hashing, a manutenção e o engine assíncrono
+    pool_hashing.encerrar()
+    parar_manutencao_sqlite()
+    await encerrar_engine_async()
 
-# Cria todas as tabelas definidas nos modelos.
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="GestOnGo - Gestão de Serviços de Campo",
     description="API para gestão de serviços de jardinagem e manutenção de piscinas",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configuração CORS para permitir acesso do frontend
@@ -36,34 +107,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursores de paginação lidos pelo frontend
+    expose_headers=["Link", "X-Cursor-Seguinte", "X-Cursor-Anterior"],
 )
 
-# Cria utilizador administrador por defeito se não existir
-def criar_utilizador_admin():
-    db = SessionLocal()
-    try:
-        admin_existente = db.query(User).filter(User.email == "admin@gestongo.pt").first()
-        if not admin_existente:
-            hash_senha = gerar_hash_senha("gestongo2025")
-            admin_user = User(
-                nome="Administrador GestOnGo",
-                email="admin@gestongo.pt",
-                hash_senha=hash_senha,
-                is_active=True
-            )
-            db.add(admin_user)
-            db.commit()
-            print("✅ Utilizador administrador criado: admin@gestongo.pt / gestongo2025")
-    finally:
-        db.close()
-
-# Cria o utilizador admin na inicialização
-criar_utilizador_admin()
+# Com réplica de leitura, as escritas de cada cliente encaminham as suas
+# leituras seguintes para a primária (read-your-writes)
+if encaminhamento_leituras.activo:
+    app.middleware("http")(registar_escritas)
 
 # Registo das rotas
+# Com DATABASE_ASYNC as rotas CRUD assíncronas são registadas primeiro e
+# têm precedência sobre as equivalentes síncronas.
 app.include_router(users.router)
+if config.DATABASE_ASYNC:
+    from .app.routers import clientes_async, servicos_async
+    app.include_router(clientes_async.router)
+    app.include_router(servicos_async.router)
 app.include_router(clientes.router)
 app.include_router(servicos.router)
+app.include_router(planos.router)
+app.include_router(tecnicos.router)
+if config.ENABLE_ADMIN_ROUTES:
+    app.include_router(metricas.router)
 
 @app.get("/")
 async def root():
@@ -14,9 +14,34 @@ Cada módulo é carregado dinamicamente baseado nas variáveis de ambiente:
 """
 
 import os
-from typing import Dict, Any
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List
+
+# Antes das restantes importações, que contam para a fase "importacao" do
+# arranque; daí as importações tardias (E402)
+_inicio_importacao = time.perf_counter()
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+
+from app.core.arranque import MedidorArranque, criar_utilizador_admin, reconciliar_contadores_arranque  # noqa: E402
+from app.core.database import (  # noqa: E402
+    SessionLocal,
+    criar_tabelas,
+    encaminhamento_leituras,
+    iniciar_manutencao_sqlite,
+    parar_manutencao_sqlite,
+    registar_escritas,
+)
+from app.core.database_async import encerrar_engine_async  # noqa: E402
+from app.core.replit_config import config  # noqa: E402
+from app.core.security import gerar_hash_senha, pool_hashing  # noqa: E402
+from app.models_base.user import User  # noqa: E402
+
+# Mensagens de carregamento, impressas uma vez no arranque (lifespan) e não
+# a cada importação do módulo
+registo_arranque: List[str] = []
 
 # ====================================================================
 # CONFIGURAÇÃO DE FEATURE FLAGS
@@ -41,10 +66,49 @@ FEATURE_AQUA = get_feature_flag('FEATURE_AQUA', True)
 FEATURE_VERDE = get_feature_flag('FEATURE_VERDE', True) 
 FEATURE_PHYTO = get_feature_flag('FEATURE_PHYTO', False)
 
-print("🔧 Feature Flags carregadas:")
-print(f"   🌊 AQUA (Piscinas): {'✅ ATIVO' if FEATURE_AQUA else '❌ INATIVO'}")
-print(f"   🌱 VERDE (Jardinagem): {'✅ ATIVO' if FEATURE_VERDE else '❌ INATIVO'}")
-print(f"   🌿 PHYTO (Fitoterapia): {'✅ ATIVO' if FEATURE_PHYTO else '❌ INATIVO'}")
+registo_arranque.append("🔧 Feature Flags carregadas:")
+registo_arranque.append(f"   🌊 AQUA (Piscinas): {'✅ ATIVO' if FEATURE_AQUA else '❌ INATIVO'}")
+registo_arranque.append(f"   🌱 VERDE (Jardinagem): {'✅ ATIVO' if FEATURE_VERDE else '❌ INATIVO'}")
+registo_arranque.append(f"   🌿 PHYTO (Fitoterapia): {'✅ ATIVO' if FEATURE_PHYTO else '❌ INATIVO'}")
+
+# ====================================================================
+# INICIALIZAÇÃO DO SISTEMA
+# ====================================================================
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Eventos executados no início e no encerramento da aplicação"""
+    global _inicio_importacao
+    # O tempo de importação só conta no primeiro arranque do processo
+    medidor = MedidorArranque(config.STARTUP_BUDGET_MS, inicio=_inicio_importacao)
+    _inicio_importacao = None
+    if config.BOOTSTRAP_ON_STARTUP:
+        with medidor.fase("esquema"):
+            esquema_actualizado = criar_tabelas()
+        if esquema_actualizado:
+            with medidor.fase("admin"):
+                criar_utilizador_admin(SessionLocal, User, gerar_hash_senha)
+            with medidor.fase("contadores"):
+                reconciliar_contadores_arranque(SessionLocal)
+    with medidor.fase("tarefas_fundo"):
+        iniciar_manutencao_sqlite()
+
+    print("\n".join(registo_arranque))
+    print("\n" + "="*60)
+    print("🚀 GestOnGo API iniciada com sucesso!")
+    print(f"📊 Módulos ativos: {len([m for m in modules_status.values() if m])}/{len(modules_status)}")
+    print("📚 Documentação disponível em: /docs")
+    print("🔧 Informações dos módulos: /modules")
+    print("💚 Health check: /health")
+    medidor.reportar()
+    print("="*60 + "\n")
+
+    yield
+
+    pool_hashing.encerrar()
+    parar_manutencao_sqlite()
+    await encerrar_engine_async()
+    print("👋 GestOnGo API encerrada")
 
 # ====================================================================
 # INICIALIZAÇÃO DA APLICAÇÃO FASTAPI
@@ -56,7 +120,8 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # ====================================================================
@@ -71,9 +136,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    # Cursores de paginação lidos pelo frontend
+    expose_headers=["Link", "X-Cursor-Seguinte", "X-Cursor-Anterior"],
 )
 
-print("🌐 CORS configurado para permitir todas as origens")
+registo_arranque.append("🌐 CORS configurado para permitir todas as origens")
+
+# Leituras após escrita do mesmo cliente vão à primária (read-your-writes)
+if encaminhamento_leituras.activo:
+    app.middleware("http")(registar_escritas)
+    registo_arranque.append("📖 Réplica de leitura activa")
 
 # ====================================================================
 # CARREGAMENTO DINÂMICO DE MÓDULOS
@@ -88,13 +160,13 @@ if FEATURE_AQUA:
         from modules.aqua.routers import aqua_router
         app.include_router(aqua_router, prefix="/aqua", tags=["Aqua - Piscinas"])
         modules_status["aqua"] = True
-        print("🌊 Módulo AQUA carregado com sucesso (Prefix: /aqua)")
+        registo_arranque.append("🌊 Módulo AQUA carregado com sucesso (Prefix: /aqua)")
     except ImportError as e:
-        print(f"❌ Erro ao carregar módulo AQUA: {e}")
+        registo_arranque.append(f"❌ Erro ao carregar módulo AQUA: {e}")
         modules_status["aqua"] = False
 else:
     modules_status["aqua"] = False
-    print("⏭️ Módulo AQUA desativado por feature flag")
+    registo_arranque.append("⏭️ Módulo AQUA desativado por feature flag")
 
 # --- MÓDULO VERDE (Jardinagem) ---
 if FEATURE_VERDE:
@@ -102,13 +174,13 @@ if FEATURE_VERDE:
         from modules.verde.routers import verde_router
         app.include_router(verde_router, prefix="/verde", tags=["Verde - Jardinagem"])
         modules_status["verde"] = True
-        print("🌱 Módulo VERDE carregado com sucesso (Prefix: /verde)")
+        registo_arranque.append("🌱 Módulo VERDE carregado com sucesso (Prefix: /verde)")
     except ImportError as e:
-        print(f"❌ Erro ao carregar módulo VERDE: {e}")
+        registo_arranque.append(f"❌ Erro ao carregar módulo VERDE: {e}")
         modules_status["verde"] = False
 else:
     modules_status["verde"] = False
-    print("⏭️ Módulo VERDE desativado por feature flag")
+    registo_arranque.append("⏭️ Módulo VERDE desativado por feature flag")
 
 # --- MÓDULO PHYTO (Fitoterapia) ---
 if FEATURE_PHYTO:
@@ -116,13 +188,13 @@ if FEATURE_PHYTO:
         from modules.phyto.routers import phyto_router
         app.include_router(phyto_router, prefix="/phyto", tags=["Phyto - Fitoterapia"])
         modules_status["phyto"] = True
-        print("🌿 Módulo PHYTO carregado com sucesso (Prefix: /phyto)")
+        registo_arranque.append("🌿 Módulo PHYTO carregado com sucesso (Prefix: /phyto)")
     except ImportError as e:
-        print(f"❌ Erro ao carregar módulo PHYTO: {e}")
+        registo_arranque.append(f"❌ Erro ao carregar módulo PHYTO: {e}")
         modules_status["phyto"] = False
 else:
     modules_status["phyto"] = False
-    print("⏭️ Módulo PHYTO desativado por feature flag")
+    registo_arranque.append("⏭️ Módulo PHYTO desativado por feature flag")
 
 # ====================================================================
 # ENDPOINTS PRINCIPAIS
@@ -217,26 +289,6 @@ async def get_modules_info() -> Dict[str, Any]:
         }
     }
 
-# ====================================================================
-# INICIALIZAÇÃO DO SISTEMA
-# ====================================================================
-
-@app.on_event("startup")
-async def startup_event():
-    """Eventos executados no início da aplicação"""
-    print("\n" + "="*60)
-    print("🚀 GestOnGo API iniciada com sucesso!")
-    print(f"📊 Módulos ativos: {len([m for m in modules_status.values() if m])}/{len(modules_status)}")
-    print("📚 Documentação disponível em: /docs")
-    print("🔧 Informações dos módulos: /modules")
-    print("💚 Health check: /health")
-    print("="*60 + "\n")
-
-@app.on_event("shutdown") 
-async def shutdown_event():
-    """Eventos executados no encerramento da aplicação"""
-    print("👋 GestOnGo API encerrada")
-
 # ====================================================================
 # PONTO DE ENTRADA PARA DESENVOLVIMENTO
 # ====================================================================
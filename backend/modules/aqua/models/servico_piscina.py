@@ -3,8 +3,10 @@ Modelo ServicoPiscina - Módulo Aqua (Piscinas)
 Serviços de manutenção e limpeza de piscinas
 """
 
-from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.contadores import chaves_servico, registar_contadores
 from app.core.database import Base
 
 class ServicoPiscina(Base):
@@ -18,8 +20,14 @@ class ServicoPiscina(Base):
     - duracao_horas: Duração do serviço em horas
     - descricao: Descrição detalhada do serviço
     - cliente_id: Referência ao cliente (FK)
+    - data_actualizacao: Última criação/alteração (exportação incremental)
     """
     __tablename__ = "servicos_piscina"
+    # Listagem por cliente ordenada por data, e listagem geral ordenada por data
+    __table_args__ = (
+        Index("ix_servicos_piscina_cliente_data", "cliente_id", "data_servico"),
+        Index("ix_servicos_piscina_data", "data_servico"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, comment="ID único do serviço")
     tipo = Column(String(20), default="piscina", nullable=False, comment="Tipo de serviço (fixo)")
@@ -27,6 +35,9 @@ class ServicoPiscina(Base):
     duracao_horas = Column(Integer, nullable=False, comment="Duração em horas")
     descricao = Column(Text, nullable=True, comment="Descrição detalhada do serviço")
     cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False, comment="ID do cliente")
+    # Default do lado do cliente: a coluna pode ser acrescentada a tabelas existentes
+    data_actualizacao = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now(),
+                               nullable=True, comment="Data da última criação ou alteração")
 
     # Relacionamento com Cliente
     cliente = relationship("Cliente", back_populates="servicos_piscina")
@@ -37,3 +48,6 @@ class ServicoPiscina(Base):
 # Adicionar relacionamento reverso ao modelo Cliente
 from app.models_base.cliente import Cliente
 Cliente.servicos_piscina = relationship("ServicoPiscina", back_populates="cliente")
+
+# Totais por mês e horas marcadas por dia mantidos na tabela de contadores
+registar_contadores(ServicoPiscina, ("tipo", "data_servico", "duracao_horas"), chaves_servico("servicos_piscina"))
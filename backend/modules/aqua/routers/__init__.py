@@ -1 +1,13 @@
 # Routers do módulo Aqua
+from fastapi import APIRouter
+
+from app.core.replit_config import config
+from modules.aqua.routers import servicos_piscina
+
+# Com DATABASE_ASYNC as rotas CRUD assíncronas são registadas primeiro e
+# têm precedência; as restantes continuam a ser servidas pelo router síncrono.
+aqua_router = APIRouter()
+if config.DATABASE_ASYNC:
+    from modules.aqua.routers import servicos_piscina_async
+    aqua_router.include_router(servicos_piscina_async.router)
+aqua_router.include_router(servicos_piscina.router)
@@ -3,13 +3,20 @@ Router de serviços de piscinas - Módulo Aqua
 CRUD de serviços com validação específica para piscinas
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from typing import List, Optional
+from datetime import date
+from app.core.atribuicoes import garantir_tecnicos_livres
+from app.core.capacidade import garantir_capacidade, reserva
+from app.core.database import get_db, get_db_leitura
+from app.core.exportacao import resposta_exportacao, validar_formato
+from app.core.paginacao import paginar, publicar_cursores
 from app.core.security import get_current_user
 from app.models_base.user import User
 from app.models_base.cliente import Cliente
+from app.models.tecnico import Atribuicao
 from modules.aqua.models.servico_piscina import ServicoPiscina
 from modules.aqua.schemas.servico_piscina import (
     ServicoPiscinaCreate, 
@@ -19,6 +26,9 @@ from modules.aqua.schemas.servico_piscina import (
 
 router = APIRouter(prefix="/servicos-piscina", tags=["Módulo Aqua - Piscinas"])
 
+# Mais recentes primeiro; o id desempata serviços do mesmo dia
+ORDEM_SERVICOS_PISCINA = ((ServicoPiscina.data_servico, True), (ServicoPiscina.id, True))
+
 @router.post("/", response_model=ServicoPiscinaResponse, status_code=status.HTTP_201_CREATED)
 def criar_servico_piscina(
     servico: ServicoPiscinaCreate,
@@ -48,6 +58,8 @@ def criar_servico_piscina(
     
     db_servico = ServicoPiscina(**servico_data)
     db.add(db_servico)
+    db.flush()
+    garantir_capacidade(db, reserva(db_servico))
     db.commit()
     db.refresh(db_servico)
     
@@ -55,10 +67,13 @@ def criar_servico_piscina(
 
 @router.get("/", response_model=List[ServicoPiscinaResponse])
 def listar_servicos_piscina(
+    request: Request,
+    response: Response,
     offset: int = Query(0, ge=0, description="Número de registos a saltar"),
     limit: int = Query(50, ge=1, le=100, description="Número máximo de registos"),
     cliente_id: int = Query(None, description="Filtrar por ID do cliente"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devolvido em X-Cursor-Seguinte/X-Cursor-Anterior"),
+    db: Session = Depends(get_db_leitura),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -69,6 +84,7 @@ def listar_servicos_piscina(
     - **offset**: Número de registos a saltar (padrão: 0)
     - **limit**: Número máximo de registos (padrão: 50, máximo: 100)
     - **cliente_id**: Filtrar serviços de um cliente específico (opcional)
+    - **cursor**: Continuar a partir de um cursor (cabeçalhos X-Cursor-* e Link)
     """
     query = db.query(ServicoPiscina)
     
@@ -77,14 +93,58 @@ def listar_servicos_piscina(
         query = query.filter(ServicoPiscina.cliente_id == cliente_id)
     
     # Ordenar por data de serviço (descendente)
-    servicos = query.order_by(ServicoPiscina.data_servico.desc()).offset(offset).limit(limit).all()
+    servicos, seguinte, anterior = paginar(query, ORDEM_SERVICOS_PISCINA, offset, limit, cursor)
+    publicar_cursores(request, response, seguinte, anterior)
     
     return servicos
 
+@router.get("/export")
+def exportar_servicos_piscina(
+    formato: str = Query("csv", description="csv ou ndjson"),
+    gzip: bool = Query(False, description="Comprimir (ficheiro .gz gerado em streaming)"),
+    cliente_id: int = Query(None, description="Filtrar por ID do cliente"),
+    data_inicio: Optional[date] = Query(None, description="Data início (YYYY-MM-DD)"),
+    data_fim: Optional[date] = Query(None, description="Data fim (YYYY-MM-DD)"),
+    db: Session = Depends(get_db_leitura),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Exportar serviços de piscina em CSV ou NDJSON, sem limite de linhas (requer autenticação)
+    
+    Enviado em streaming, pela ordem da listagem (mais recentes primeiro)
+    
+    - **formato**: csv (padrão) ou ndjson
+    - **gzip**: comprimir a resposta (ficheiro .gz)
+    - **cliente_id**, **data_inicio**, **data_fim**: filtros opcionais
+    """
+    try:
+        formato = validar_formato(formato)
+    except ValueError as erro:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(erro))
+    
+    consulta = select(
+        ServicoPiscina.id,
+        ServicoPiscina.tipo,
+        ServicoPiscina.data_servico,
+        ServicoPiscina.duracao_horas,
+        ServicoPiscina.cliente_id,
+        Cliente.nome.label("cliente_nome"),
+        ServicoPiscina.descricao,
+    ).outerjoin(Cliente, ServicoPiscina.cliente_id == Cliente.id)
+    if cliente_id:
+        consulta = consulta.where(ServicoPiscina.cliente_id == cliente_id)
+    if data_inicio:
+        consulta = consulta.where(ServicoPiscina.data_servico >= data_inicio)
+    if data_fim:
+        consulta = consulta.where(ServicoPiscina.data_servico <= data_fim)
+    consulta = consulta.order_by(*[c.desc() if desc else c for c, desc in ORDEM_SERVICOS_PISCINA])
+    
+    return resposta_exportacao(db, consulta, formato, f"servicos-piscina-{date.today():%Y%m%d}", gzip)
+
 @router.get("/{servico_id}", response_model=ServicoPiscinaResponse)
 def obter_servico_piscina(
     servico_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -119,10 +179,14 @@ def actualizar_servico_piscina(
         )
     
     # Actualizar apenas os campos fornecidos
+    anterior = reserva(servico)
     update_data = servico_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(servico, field, value)
     
+    db.flush()
+    garantir_capacidade(db, reserva(servico), anterior)
+    garantir_tecnicos_livres(db, [servico.id], "aqua")
     db.commit()
     db.refresh(servico)
     
@@ -145,6 +209,7 @@ def eliminar_servico_piscina(
             detail="Serviço de piscina não encontrado"
         )
     
+    db.execute(delete(Atribuicao).where(Atribuicao.origem == "aqua", Atribuicao.servico_id == servico_id))
     db.delete(servico)
     db.commit()
     
@@ -0,0 +1,147 @@
+"""
+Router assíncrono de serviços de piscinas - Módulo Aqua
+Equivalente a servicos_piscina.py sobre a sessão assíncrona (DATABASE_ASYNC=true)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.atribuicoes import garantir_tecnicos_livres
+from app.core.capacidade import garantir_capacidade, reserva
+from app.core.database_async import get_async_db
+from app.core.paginacao import paginar_async, publicar_cursores
+from app.core.security import UtilizadorAutenticado, get_current_user_async
+from app.models_base.cliente import Cliente
+from app.models.tecnico import Atribuicao
+from modules.aqua.models.servico_piscina import ServicoPiscina
+from modules.aqua.routers.servicos_piscina import ORDEM_SERVICOS_PISCINA
+from modules.aqua.schemas.servico_piscina import (
+    ServicoPiscinaCreate,
+    ServicoPiscinaResponse,
+    ServicoPiscinaUpdate
+)
+
+router = APIRouter(prefix="/servicos-piscina", tags=["Módulo Aqua - Piscinas"])
+
+async def _obter_servico(db: AsyncSession, servico_id: int) -> ServicoPiscina:
+    servico = await db.get(ServicoPiscina, servico_id)
+
+    if not servico:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Serviço de piscina não encontrado"
+        )
+
+    return servico
+
+@router.post("/", response_model=ServicoPiscinaResponse, status_code=status.HTTP_201_CREATED)
+async def criar_servico_piscina(
+    servico: ServicoPiscinaCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UtilizadorAutenticado = Depends(get_current_user_async)
+):
+    """
+    Criar novo serviço de piscina (requer autenticação)
+    """
+    # Verificar se cliente existe
+    if not await db.get(Cliente, servico.cliente_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cliente não encontrado"
+        )
+
+    # Garantir que o tipo é 'piscina'
+    servico_data = servico.dict()
+    servico_data["tipo"] = "piscina"
+
+    db_servico = ServicoPiscina(**servico_data)
+    db.add(db_servico)
+    await db.flush()
+    await db.run_sync(garantir_capacidade, reserva(db_servico))
+    await db.commit()
+    await db.refresh(db_servico)
+
+    return db_servico
+
+@router.get("/", response_model=List[ServicoPiscinaResponse])
+async def listar_servicos_piscina(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0, description="Número de registos a saltar"),
+    limit: int = Query(50, ge=1, le=100, description="Número máximo de registos"),
+    cliente_id: int = Query(None, description="Filtrar por ID do cliente"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devolvido em X-Cursor-Seguinte/X-Cursor-Anterior"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UtilizadorAutenticado = Depends(get_current_user_async)
+):
+    """
+    Listar serviços de piscina com paginação (requer autenticação)
+
+    Ordenados por data de serviço (mais recentes primeiro)
+    """
+    query = select(ServicoPiscina)
+
+    # Filtrar por cliente se especificado
+    if cliente_id:
+        query = query.where(ServicoPiscina.cliente_id == cliente_id)
+
+    # Ordenar por data de serviço (descendente)
+    servicos, seguinte, anterior = await paginar_async(db, query, ORDEM_SERVICOS_PISCINA, offset, limit, cursor)
+    publicar_cursores(request, response, seguinte, anterior)
+
+    return servicos
+
+@router.get("/{servico_id:int}", response_model=ServicoPiscinaResponse)
+async def obter_servico_piscina(
+    servico_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UtilizadorAutenticado = Depends(get_current_user_async)
+):
+    """
+    Obter serviço de piscina por ID (requer autenticação)
+    """
+    return await _obter_servico(db, servico_id)
+
+@router.put("/{servico_id:int}", response_model=ServicoPiscinaResponse)
+async def actualizar_servico_piscina(
+    servico_id: int,
+    servico_update: ServicoPiscinaUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UtilizadorAutenticado = Depends(get_current_user_async)
+):
+    """
+    Actualizar serviço de piscina (requer autenticação)
+    """
+    servico = await _obter_servico(db, servico_id)
+
+    # Actualizar apenas os campos fornecidos
+    anterior = reserva(servico)
+    update_data = servico_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(servico, field, value)
+
+    await db.flush()
+    await db.run_sync(garantir_capacidade, reserva(servico), anterior)
+    await db.run_sync(garantir_tecnicos_livres, [servico.id], "aqua")
+    await db.commit()
+    await db.refresh(servico)
+
+    return servico
+
+@router.delete("/{servico_id:int}", status_code=status.HTTP_204_NO_CONTENT)
+async def eliminar_servico_piscina(
+    servico_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UtilizadorAutenticado = Depends(get_current_user_async)
+):
+    """
+    Eliminar serviço de piscina (requer autenticação)
+    """
+    servico = await _obter_servico(db, servico_id)
+
+    await db.execute(delete(Atribuicao).where(Atribuicao.origem == "aqua", Atribuicao.servico_id == servico_id))
+    await db.delete(servico)
+    await db.commit()
+
+    return None
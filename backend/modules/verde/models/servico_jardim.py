@@ -3,8 +3,10 @@ Modelo ServicoJardim - Módulo Verde (Jardinagem)
 Serviços de jardinagem e manutenção de espaços verdes
 """
 
-from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.contadores import chaves_servico, registar_contadores
 from app.core.database import Base
 
 class ServicoJardim(Base):
@@ -18,8 +20,14 @@ class ServicoJardim(Base):
     - duracao_horas: Duração do serviço em horas
     - descricao: Descrição detalhada do serviço
     - cliente_id: Referência ao cliente (FK)
+    - data_actualizacao: Última criação/alteração (exportação incremental)
     """
     __tablename__ = "servicos_jardim"
+    # Listagem por cliente ordenada por data, e listagem geral ordenada por data
+    __table_args__ = (
+        Index("ix_servicos_jardim_cliente_data", "cliente_id", "data_servico"),
+        Index("ix_servicos_jardim_data", "data_servico"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, comment="ID único do serviço")
     tipo = Column(String(20), default="jardinagem", nullable=False, comment="Tipo de serviço (fixo)")
@@ -27,6 +35,9 @@ class ServicoJardim(Base):
     duracao_horas = Column(Integer, nullable=False, comment="Duração em horas")
     descricao = Column(Text, nullable=True, comment="Descrição detalhada do serviço")
     cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False, comment="ID do cliente")
+    # Default do lado do cliente: a coluna pode ser acrescentada a tabelas existentes
+    data_actualizacao = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now(),
+                               nullable=True, comment="Data da última criação ou alteração")
 
     # Relacionamento com Cliente
     cliente = relationship("Cliente", back_populates="servicos_jardim")
@@ -37,3 +48,6 @@ class ServicoJardim(Base):
 # Adicionar relacionamento reverso ao modelo Cliente
 from app.models_base.cliente import Cliente
 Cliente.servicos_jardim = relationship("ServicoJardim", back_populates="cliente")
+
+# Totais por mês e horas marcadas por dia mantidos na tabela de contadores
+registar_contadores(ServicoJardim, ("tipo", "data_servico", "duracao_horas"), chaves_servico("servicos_jardim"))
@@ -1 +1,13 @@
 # Routers do módulo Verde
+from fastapi import APIRouter
+
+from app.core.replit_config import config
+from modules.verde.routers import servicos_jardim
+
+# Com DATABASE_ASYNC as rotas CRUD assíncronas são registadas primeiro e
+# têm precedência; as restantes continuam a ser servidas pelo router síncrono.
+verde_router = APIRouter()
+if config.DATABASE_ASYNC:
+    from modules.verde.routers import servicos_jardim_async
+    verde_router.include_router(servicos_jardim_async.router)
+verde_router.include_router(servicos_jardim.router)
@@ -3,13 +3,20 @@ Router de serviços de jardinagem - Módulo Verde
 CRUD de serviços com validação específica para jardinagem
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from typing import List, Optional
+from datetime import date
+from app.core.atribuicoes import garantir_tecnicos_livres
+from app.core.capacidade import garantir_capacidade, reserva
+from app.core.database import get_db, get_db_leitura
+from app.core.exportacao import resposta_exportacao, validar_formato
+from app.core.paginacao import paginar, publicar_cursores
 from app.core.security import get_current_user
 from app.models_base.user import User
 from app.models_base.cliente import Cliente
+from app.models.tecnico import Atribuicao
 from modules.verde.models.servico_jardim import ServicoJardim
 from modules.verde.schemas.servico_jardim import (
     ServicoJardimCreate, 
@@ -19,6 +26,9 @@ from modules.verde.schemas.servico_jardim import (
 
 router = APIRouter(prefix="/servicos-jardim", tags=["Módulo Verde - Jardinagem"])
 
+# Mais recentes primeiro; o id desempata serviços do mesmo dia
+ORDEM_SERVICOS_JARDIM = ((ServicoJardim.data_servico, True), (ServicoJardim.id, True))
+
 @router.post("/", response_model=ServicoJardimResponse, status_code=status.HTTP_201_CREATED)
 def criar_servico_jardim(
     servico: ServicoJardimCreate,
@@ -48,6 +58,8 @@ def criar_servico_jardim(
     
     db_servico = ServicoJardim(**servico_data)
     db.add(db_servico)
+    db.flush()
+    garantir_capacidade(db, reserva(db_servico))
     db.commit()
     db.refresh(db_servico)
     
@@ -55,10 +67,13 @@ def criar_servico_jardim(
 
 @router.get("/", response_model=List[ServicoJardimResponse])
 def listar_servicos_jardim(
+    request: Request,
+    response: Response,
     offset: int = Query(0, ge=0, description="Número de registos a saltar"),
     limit: int = Query(50, ge=1, le=100, description="Número máximo de registos"),
     cliente_id: int = Query(None, description="Filtrar por ID do cliente"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devolvido em X-Cursor-Seguinte/X-Cursor-Anterior"),
+    db: Session = Depends(get_db_leitura),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -69,6 +84,7 @@ def listar_servicos_jardim(
     - **offset**: Número de registos a saltar (padrão: 0)
     - **limit**: Número máximo de registos (padrão: 50, máximo: 100)
     - **cliente_id**: Filtrar serviços de um cliente específico (opcional)
+    - **cursor**: Continuar a partir de um cursor (cabeçalhos X-Cursor-* e Link)
     """
     query = db.query(ServicoJardim)
     
@@ -77,14 +93,58 @@ def listar_servicos_jardim(
         query = query.filter(ServicoJardim.cliente_id == cliente_id)
     
     # Ordenar por data de serviço (descendente)
-    servicos = query.order_by(ServicoJardim.data_servico.desc()).offset(offset).limit(limit).all()
+    servicos, seguinte, anterior = paginar(query, ORDEM_SERVICOS_JARDIM, offset, limit, cursor)
+    publicar_cursores(request, response, seguinte, anterior)
     
     return servicos
 
+@router.get("/export")
+def exportar_servicos_jardim(
+    formato: str = Query("csv", description="csv ou ndjson"),
+    gzip: bool = Query(False, description="Comprimir (ficheiro .gz gerado em streaming)"),
+    cliente_id: int = Query(None, description="Filtrar por ID do cliente"),
+    data_inicio: Optional[date] = Query(None, description="Data início (YYYY-MM-DD)"),
+    data_fim: Optional[date] = Query(None, description="Data fim (YYYY-MM-DD)"),
+    db: Session = Depends(get_db_leitura),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Exportar serviços de jardinagem em CSV ou NDJSON, sem limite de linhas (requer autenticação)
+    
+    Enviado em streaming, pela ordem da listagem (mais recentes primeiro)
+    
+    - **formato**: csv (padrão) ou ndjson
+    - **gzip**: comprimir a resposta (ficheiro .gz)
+    - **cliente_id**, **data_inicio**, **data_fim**: filtros opcionais
+    """
+    try:
+        formato = validar_formato(formato)
+    except ValueError as erro:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(erro))
+    
+    consulta = select(
+        ServicoJardim.id,
+        ServicoJardim.tipo,
+        ServicoJardim.data_servico,
+        ServicoJardim.duracao_horas,
+        ServicoJardim.cliente_id,
+        Cliente.nome.label("cliente_nome"),
+        ServicoJardim.descricao,
+    ).outerjoin(Cliente, ServicoJardim.cliente_id == Cliente.id)
+    if cliente_id:
+        consulta = consulta.where(ServicoJardim.cliente_id == cliente_id)
+    if data_inicio:
+        consulta = consulta.where(ServicoJardim.data_servico >= data_inicio)
+    if data_fim:
+        consulta = consulta.where(ServicoJardim.data_servico <= data_fim)
+    consulta = consulta.order_by(*[c.desc() if desc else c for c, desc in ORDEM_SERVICOS_JARDIM])
+    
+    return resposta_exportacao(db, consulta, formato, f"servicos-jardim-{date.today():%Y%m%d}", gzip)
+
 @router.get("/{servico_id}", response_model=ServicoJardimResponse)
 def obter_servico_jardim(
     servico_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -119,10 +179,14 @@ def actualizar_servico_jardim(
         )
     
     # Actualizar apenas os campos fornecidos
+    anterior = reserva(servico)
     update_data = servico_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(servico, field, value)
     
+    db.flush()
+    garantir_capacidade(db, reserva(servico), anterior)
+    garantir_tecnicos_livres(db, [servico.id], "verde")
     db.commit()
     db.refresh(servico)
     
@@ -145,6 +209,7 @@ def eliminar_servico_jardim(
             detail="Serviço de jardinagem não encontrado"
         )
     
+    db.execute(delete(Atribuicao).where(Atribuicao.origem == "verde", Atribuicao.servico_id == servico_id))
     db.delete(servico)
     db.commit()
     
@@ -0,0 +1,147 @@
+"""
+Router assíncrono de serviços de jardinagem - Módulo Verde
+Equivalente a servicos_jardim.py sobre a sessão assíncrona (DATABASE_ASYNC=true)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.atribuicoes import garantir_tecnicos_livres
+from app.core.capacidade import garantir_capacidade, reserva
+from app.core.database_async import get_async_db
+from app.core.paginacao import paginar_async, publicar_cursores
+from app.core.security import UtilizadorAutenticado, get_current_user_async
+from app.models_base.cliente import Cliente
+from app.models.tecnico import Atribuicao
+from modules.verde.models.servico_jardim import ServicoJardim
+from modules.verde.routers.servicos_jardim import ORDEM_SERVICOS_JARDIM
+from modules.verde.schemas.servico_jardim import (
+    ServicoJardimCreate,
+    ServicoJardimResponse,
+    ServicoJardimUpdate
+)
+
+router = APIRouter(prefix="/servicos-jardim", tags=["Módulo Verde - Jardinagem"])
+
+async def _obter_servico(db: AsyncSession, servico_id: int) -> ServicoJardim:
+    servico = await db.get(ServicoJardim, servico_id)
+
+    if not servico:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Serviço de jardinagem não encontrado"
+        )
+
+    return servico
+
+@router.post("/", response_model=ServicoJardimResponse, status_code=status.HTTP_201_CREATED)
+async def criar_servico_jardim(
+    servico: ServicoJardimCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UtilizadorAutenticado = Depends(get_current_user_async)
+):
+    """
+    Criar novo serviço de jardinagem (requer autenticação)
+    """
+    # Verificar se cliente existe
+    if not await db.get(Cliente, servico.cliente_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cliente não encontrado"
+        )
+
+    # Garantir que o tipo é 'jardinagem'
+    servico_data = servico.dict()
+    servico_data["tipo"] = "jardinagem"
+
+    db_servico = ServicoJardim(**servico_data)
+    db.add(db_servico)
+    await db.flush()
+    await db.run_sync(garantir_capacidade, reserva(db_servico))
+    await db.commit()
+    await db.refresh(db_servico)
+
+    return db_servico
+
+@router.get("/", response_model=List[ServicoJardimResponse])
+async def listar_servicos_jardim(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0, description="Número de registos a saltar"),
+    limit: int = Query(50, ge=1, le=100, description="Número máximo de registos"),
+    cliente_id: int = Query(None, description="Filtrar por ID do cliente"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devolvido em X-Cursor-Seguinte/X-Cursor-Anterior"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UtilizadorAutenticado = Depends(get_current_user_async)
+):
+    """
+    Listar serviços de jardinagem com paginação (requer autenticação)
+
+    Ordenados por data de serviço (mais recentes primeiro)
+    """
+    query = select(ServicoJardim)
+
+    # Filtrar por cliente se especificado
+    if cliente_id:
+        query = query.where(ServicoJardim.cliente_id == cliente_id)
+
+    # Ordenar por data de serviço (descendente)
+    servicos, seguinte, anterior = await paginar_async(db, query, ORDEM_SERVICOS_JARDIM, offset, limit, cursor)
+    publicar_cursores(request, response, seguinte, anterior)
+
+    return servicos
+
+@router.get("/{servico_id:int}", response_model=ServicoJardimResponse)
+async def obter_servico_jardim(
+    servico_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UtilizadorAutenticado = Depends(get_current_user_async)
+):
+    """
+    Obter serviço de jardinagem por ID (requer autenticação)
+    """
+    return await _obter_servico(db, servico_id)
+
+@router.put("/{servico_id:int}", response_model=ServicoJardimResponse)
+async def actualizar_servico_jardim(
+    servico_id: int,
+    servico_update: ServicoJardimUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UtilizadorAutenticado = Depends(get_current_user_async)
+):
+    """
+    Actualizar serviço de jardinagem (requer autenticação)
+    """
+    servico = await _obter_servico(db, servico_id)
+
+    # Actualizar apenas os campos fornecidos
+    anterior = reserva(servico)
+    update_data = servico_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(servico, field, value)
+
+    await db.flush()
+    await db.run_sync(garantir_capacidade, reserva(servico), anterior)
+    await db.run_sync(garantir_tecnicos_livres, [servico.id], "verde")
+    await db.commit()
+    await db.refresh(servico)
+
+    return servico
+
+@router.delete("/{servico_id:int}", status_code=status.HTTP_204_NO_CONTENT)
+async def eliminar_servico_jardim(
+    servico_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UtilizadorAutenticado = Depends(get_current_user_async)
+):
+    """
+    Eliminar serviço de jardinagem (requer autenticação)
+    """
+    servico = await _obter_servico(db, servico_id)
+
+    await db.execute(delete(Atribuicao).where(Atribuicao.origem == "verde", Atribuicao.servico_id == servico_id))
+    await db.delete(servico)
+    await db.commit()
+
+    return None
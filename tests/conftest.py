@@ -4,11 +4,14 @@ Configuração de testes para GestOnGo.
 Este módulo configura fixtures e utilitários para testes da API.
 """
 
+from datetime import date, timedelta
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import Column, Date, Integer, MetaData, String, Table, Text, create_engine
 from sqlalchemy.orm import sessionmaker
 
+from backend.app.core import origens
 from backend.app.core.database import Base, get_db
 from backend.main import app
 
@@ -70,6 +73,25 @@ def authenticated_client(client):
     return client
 
 
+@pytest.fixture
+def tabela_piscina():
+    """Tabela do módulo Aqua, como criada pela aplicação modular."""
+    tabela = Table(
+        "servicos_piscina", MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("tipo", String(20), nullable=False),
+        Column("data_servico", Date, nullable=False, index=True),
+        Column("duracao_horas", Integer, nullable=False),
+        Column("descricao", Text),
+        Column("cliente_id", Integer, nullable=False),
+    )
+    tabela.create(engine)
+    origens._tabelas_reflectidas.limpar()
+    yield tabela
+    tabela.drop(engine)
+    origens._tabelas_reflectidas.limpar()
+
+
 @pytest.fixture
 def sample_cliente_data():
     """Dados de exemplo para criar um cliente."""
@@ -91,3 +113,20 @@ def sample_servico_data():
         "cliente_id": 1,
         "descricao": "Manutenção de jardim e poda de árvores"
     }
+
+
+def criar_servico(client, cliente_id, dia, tipo="jardinagem", duracao=2):
+    """
+    Cria um serviço pela API e devolve a resposta. `dia` é uma data ou o
+    número de dias a partir de hoje.
+    """
+    if isinstance(dia, int):
+        dia = date.today() + timedelta(days=dia)
+    resposta = client.post("/servicos/", json={
+        "tipo": tipo,
+        "data_servico": dia.isoformat(),
+        "duracao_horas": duracao,
+        "cliente_id": cliente_id,
+    })
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()
@@ -0,0 +1,64 @@
+"""
+Testes para a exportação analítica incremental (Parquet / Arrow).
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds  # noqa: E402
+
+from backend.app.core.analitica import exportar_analitica, ler_marcas  # noqa: E402
+from tests.conftest import criar_servico, engine  # noqa: E402
+
+
+def _ler(destino, tabela="servicos", formato="parquet"):
+    dataset = ds.dataset(destino / tabela, format="ipc" if formato == "arrow" else formato, partitioning="hive")
+    return sorted(dataset.to_table().to_pylist(), key=lambda linha: (linha["id"], linha["exportado_em"]))
+
+
+def test_exportacao_incremental_parquet(authenticated_client, tmp_path):
+    cliente_id = authenticated_client.post("/clientes/", json={"nome": "Vivenda Mar"}).json()["id"]
+    primeiro = criar_servico(authenticated_client, cliente_id, 1, "piscina")["id"]
+    segundo = criar_servico(authenticated_client, cliente_id, 2)["id"]
+    terceiro = criar_servico(authenticated_client, cliente_id, 45, "piscina")["id"]
+
+    resumo = exportar_analitica(engine, tmp_path)
+    assert resumo["servicos"]["linhas"] == 3
+    meses = {(date.today() + timedelta(days=dias)).strftime("%Y-%m") for dias in (1, 2, 45)}
+    assert {ficheiro.split("/")[1] for ficheiro in resumo["servicos"]["ficheiros"]} == {f"mes={m}" for m in meses}
+    linhas = _ler(tmp_path)
+    assert [linha["id"] for linha in linhas] == [primeiro, segundo, terceiro]
+    assert linhas[0]["cliente_nome"] == "Vivenda Mar"
+    assert linhas[1]["tipo"] == "jardinagem"
+    assert not list(tmp_path.rglob("*.parcial"))
+
+    # Sem alterações: nada de novo, mesmo relendo a margem da marca
+    assert exportar_analitica(engine, tmp_path)["servicos"] == {
+        "linhas": 0, "ficheiros": [], "duracao_ms": pytest.approx(0, abs=5000)
+    }
+
+    authenticated_client.put(f"/servicos/{segundo}", json={"status": "concluido"})
+    quarto = criar_servico(authenticated_client, cliente_id, 3, "piscina")["id"]
+    assert exportar_analitica(engine, tmp_path)["servicos"]["linhas"] == 2
+
+    linhas = _ler(tmp_path)
+    assert [linha["id"] for linha in linhas] == [primeiro, segundo, segundo, terceiro, quarto]
+    # A versão actual de cada id é a exportada mais recentemente
+    assert [linha["status"] for linha in linhas if linha["id"] == segundo] == ["agendado", "concluido"]
+    assert ler_marcas(tmp_path)["servicos"].ultimo_id == quarto
+
+
+def test_exportacao_completa_arrow(authenticated_client, tmp_path):
+    cliente_id = authenticated_client.post("/clientes/", json={"nome": "Quinta Azul"}).json()["id"]
+    criar_servico(authenticated_client, cliente_id, 5, "piscina")
+    exportar_analitica(engine, tmp_path, "arrow")
+
+    resumo = exportar_analitica(engine, tmp_path / "completa", "arrow", completa=True)
+    assert resumo["servicos"]["linhas"] == 1
+    assert resumo["servicos"]["ficheiros"][0].endswith(".arrow")
+    assert _ler(tmp_path / "completa", formato="arrow")[0]["cliente_nome"] == "Quinta Azul"
+
+    with pytest.raises(ValueError):
+        exportar_analitica(engine, tmp_path, "csv")
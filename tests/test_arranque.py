@@ -0,0 +1,154 @@
+"""
+Testes para o arranque e preparação do esquema.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.core.arranque import (
+    MedidorArranque,
+    criar_utilizador_admin,
+    ler_carimbo,
+    preparar_esquema,
+)
+from backend.app.core.database import Base
+from backend.app.models.user import User
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Arranque de um worker sem bootstrap (como no Dockerfile), contra a base
+# de dados preparada só pelo bootstrap.py
+SCRIPT_WORKER = """
+import json
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from backend.main import app
+
+with TestClient(app) as c:
+    token = c.post("/utilizadores/login", data={"username": "admin@gestongo.pt", "password": "gestongo2025"})
+    c.headers["Authorization"] = "Bearer " + token.json()["access_token"]
+    cliente_id = c.post("/clientes/", json={"nome": "Cliente Deploy"}).json()["id"]
+    servico = c.post("/servicos/", json={
+        "tipo": "jardinagem", "data_servico": (date.today() + timedelta(days=3)).isoformat(),
+        "duracao_horas": 2, "cliente_id": cliente_id,
+    })
+    tecnico = c.post("/tecnicos/", json={"nome": "Ana"})
+    atribuicao = c.post(f"/tecnicos/{tecnico.json()['id']}/atribuicoes", json={
+        "servico_id": servico.json()["id"], "hora_inicio": "09:00",
+    })
+    print(json.dumps({
+        "login": token.status_code,
+        "criar_servico": servico.status_code,
+        "criar_tecnico": tecnico.status_code,
+        "listar_tecnicos": c.get("/tecnicos/").status_code,
+        "atribuir": atribuicao.status_code,
+        "actualizar_servico": c.put(f"/servicos/{servico.json()['id']}", json={"duracao_horas": 3}).status_code,
+        "eliminar_servico": c.delete(f"/servicos/{servico.json()['id']}").status_code,
+    }))
+"""
+
+
+def _metadata(com_indice: bool = False) -> MetaData:
+    metadata = MetaData()
+    tabela = Table(
+        "itens",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("nome", String(50)),
+    )
+    if com_indice:
+        Index("ix_itens_nome", tabela.c.nome)
+    return metadata
+
+
+def test_preparar_esquema_salta_quando_carimbo_coincide(tmp_path):
+    """Testa o caminho rápido: o segundo arranque não recria o esquema."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'arranque.db'}")
+
+    assert preparar_esquema(engine, _metadata(), "teste") is True
+    assert ler_carimbo(engine, "esquema:teste") is not None
+    assert preparar_esquema(engine, _metadata(), "teste") is False
+    assert preparar_esquema(engine, _metadata(), "teste", forcar=True) is True
+
+
+def test_preparar_esquema_cria_indices_novos_em_tabelas_existentes(tmp_path):
+    """Testa que um índice acrescentado ao modelo muda o carimbo e é criado."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'arranque.db'}")
+    preparar_esquema(engine, _metadata(), "teste")
+
+    assert preparar_esquema(engine, _metadata(com_indice=True), "teste") is True
+    indices = {indice["name"] for indice in inspect(engine).get_indexes("itens")}
+    assert "ix_itens_nome" in indices
+
+
+def test_preparar_esquema_remove_indices_obsoletos(tmp_path):
+    """Testa que um índice substituído no modelo é removido de uma base de dados existente."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'arranque.db'}")
+    preparar_esquema(engine, _metadata(com_indice=True), "teste")
+
+    metadata = _metadata()
+    metadata.tables["itens"].info["indices_obsoletos"] = ("ix_itens_nome",)
+    assert preparar_esquema(engine, metadata, "teste") is True
+    assert inspect(engine).get_indexes("itens") == []
+
+
+def test_bootstrap_prepara_o_esquema_dos_workers(tmp_path):
+    """Testa o deploy do Dockerfile: bootstrap.py e depois os workers com BOOTSTRAP_ON_STARTUP=false."""
+    ambiente = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'deploy.db'}",
+        "BOOTSTRAP_ON_STARTUP": "false",
+        "HASH_POOL_PROCESSES": "0",
+        "PYTHONPATH": os.pathsep.join([str(RAIZ), str(RAIZ / "backend")]),
+    }
+    subprocess.run(
+        [sys.executable, "backend/bootstrap.py"], cwd=RAIZ, env=ambiente, check=True, capture_output=True
+    )
+    worker = subprocess.run(
+        [sys.executable, "-c", SCRIPT_WORKER], cwd=tmp_path, env=ambiente, capture_output=True, text=True
+    )
+    assert worker.returncode == 0, worker.stderr
+    assert json.loads(worker.stdout.strip().splitlines()[-1]) == {
+        "login": 200,
+        "criar_servico": 201,
+        "criar_tecnico": 201,
+        "listar_tecnicos": 200,
+        "atribuir": 201,
+        "actualizar_servico": 200,
+        "eliminar_servico": 204,
+    }
+
+
+def test_criar_utilizador_admin_uma_vez(tmp_path):
+    """Testa que o administrador só é criado (e o hash calculado) uma vez."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'admin.db'}")
+    Base.metadata.create_all(bind=engine)
+    sessoes = sessionmaker(bind=engine)
+    hashes = []
+
+    def gerar_hash(senha):
+        hashes.append(senha)
+        return "hash"
+
+    assert criar_utilizador_admin(sessoes, User, gerar_hash) is True
+    assert criar_utilizador_admin(sessoes, User, gerar_hash) is False
+    assert len(hashes) == 1
+
+
+def test_medidor_arranque_compara_com_orcamento():
+    """Testa o relatório de fases e o orçamento de arranque."""
+    medidor = MedidorArranque(orcamento_ms=10_000, inicio=time.perf_counter())
+    with medidor.fase("esquema"):
+        pass
+
+    relatorio = medidor.reportar()
+    assert relatorio["dentro_orcamento"] is True
+    assert {"importacao", "esquema"} <= set(relatorio["fases_ms"])
+    assert MedidorArranque(orcamento_ms=0, inicio=time.perf_counter() - 1).relatorio()["dentro_orcamento"] is False
@@ -0,0 +1,79 @@
+"""
+Testes para o autocomplete de clientes (índice de prefixos em memória).
+"""
+
+import statistics
+import time
+
+import pytest
+
+from backend.app.core.autocomplete import IndicePrefixos, dobrar
+from backend.app.routers.clientes import indice_autocomplete
+
+
+@pytest.fixture(autouse=True)
+def reconstruir_indice():
+    # O índice do arranque foi construído a partir de outra base de dados
+    indice_autocomplete.invalidar()
+    yield
+    indice_autocomplete.invalidar()
+
+
+def test_indice_prefixos_ordem_e_actualizacoes():
+    """Testa a dobragem de acentos, a ordem das sugestões e as actualizações."""
+    indice = IndicePrefixos()
+    indice.construir([(1, "Ana Silva"), (2, "João Sá"), (3, "Silvério Antunes"), (4, "Anabela Costa")])
+
+    assert dobrar("  JOÃO   Sá ") == "joao sa"
+    assert indice.procurar("ana") == [(1, "Ana Silva"), (4, "Anabela Costa")]
+    assert indice.procurar("SIL") == [(3, "Silvério Antunes"), (1, "Ana Silva")]
+    assert indice.procurar("joao s") == [(2, "João Sá")]
+    assert indice.procurar("an", limite=1) == [(1, "Ana Silva")]
+    assert indice.procurar("x") == []
+
+    indice.actualizar(1, "Beatriz Sousa")
+    indice.remover(3)
+    assert indice.procurar("sil") == []
+    assert indice.procurar("sou") == [(1, "Beatriz Sousa")]
+    assert indice.estatisticas()["registos"] == 3
+
+
+def test_indice_prefixos_latencia():
+    """Testa que uma procura num índice de 50 mil nomes fica abaixo de 1 ms."""
+    indice = IndicePrefixos()
+    indice.construir((i, f"Cliente {i:05d} Apelido{i % 997}") for i in range(1, 50_001))
+
+    tempos = []
+    for prefixo in ("cli", "cliente 42", "apelido9", "a", "zz"):
+        for _ in range(100):
+            inicio = time.perf_counter()
+            indice.procurar(prefixo, 10)
+            tempos.append(time.perf_counter() - inicio)
+    assert statistics.median(tempos) < 0.001
+
+
+def test_autocomplete_endpoint(authenticated_client):
+    """Testa a rota e a actualização do índice ao criar, alterar e eliminar."""
+    ids = {}
+    for nome in ("Maria Conceição", "Mário Lopes", "José Maria Pinto"):
+        ids[nome] = authenticated_client.post("/clientes/", json={"nome": nome}).json()["id"]
+
+    resposta = authenticated_client.get("/clientes/autocomplete", params={"q": "mari"})
+    assert resposta.status_code == 200
+    assert resposta.json() == [
+        {"id": ids["Maria Conceição"], "nome": "Maria Conceição"},
+        {"id": ids["Mário Lopes"], "nome": "Mário Lopes"},
+        {"id": ids["José Maria Pinto"], "nome": "José Maria Pinto"},
+    ]
+
+    authenticated_client.put(f"/clientes/{ids['Mário Lopes']}", json={"nome": "Rui Lopes"})
+    authenticated_client.delete(f"/clientes/{ids['José Maria Pinto']}")
+    novo = authenticated_client.post("/clientes/", json={"nome": "Marisa Reis"}).json()["id"]
+
+    nomes = [s["nome"] for s in authenticated_client.get("/clientes/autocomplete?q=mar&limite=5").json()]
+    assert nomes == ["Maria Conceição", "Marisa Reis"]
+    assert authenticated_client.get("/clientes/autocomplete?q=lopes").json() == [
+        {"id": ids["Mário Lopes"], "nome": "Rui Lopes"}
+    ]
+    assert novo in [s["id"] for s in authenticated_client.get("/clientes/autocomplete?q=reis").json()]
+    assert authenticated_client.get("/clientes/autocomplete?limite=0").status_code == 422
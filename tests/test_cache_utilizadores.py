@@ -0,0 +1,67 @@
+"""
+Testes para a cache do utilizador autenticado.
+"""
+
+import time
+
+from backend.app.core.cache import CacheTTL
+from backend.app.core.security import (
+    cache_utilizadores,
+    criar_token_acesso,
+    decodificar_token,
+    invalidar_utilizador,
+    memorizar_utilizador,
+    utilizador_em_cache,
+)
+from backend.app.models.user import User
+
+
+def test_cache_despeja_entrada_menos_usada():
+    """Testa que a entrada menos usada é despejada ao atingir o limite."""
+    cache = CacheTTL(max_entradas=2, ttl_segundos=60)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    cache.obter("a")
+    cache.guardar("c", 3)
+
+    assert cache.obter("b") is None
+    assert cache.obter("a") == 1
+    assert cache.obter("c") == 3
+    assert cache.estatisticas()["despejos"] == 1
+
+
+def test_cache_expira_entradas():
+    """Testa que as entradas expiram ao fim do TTL."""
+    cache = CacheTTL(max_entradas=10, ttl_segundos=60)
+    cache.guardar("a", 1, ttl_segundos=0.01)
+    time.sleep(0.02)
+
+    assert cache.obter("a") is None
+    assert cache.estatisticas()["misses"] == 1
+
+
+def test_cache_conta_hits_e_misses():
+    """Testa os contadores de acertos e falhas."""
+    cache = CacheTTL(max_entradas=10, ttl_segundos=60)
+    cache.obter("x")
+    cache.guardar("x", "valor")
+    cache.obter("x")
+    cache.obter("x")
+
+    estatisticas = cache.estatisticas()
+    assert estatisticas["hits"] == 2
+    assert estatisticas["misses"] == 1
+
+
+def test_memorizar_e_invalidar_utilizador():
+    """Testa que a invalidação por email remove o utilizador da cache."""
+    token = criar_token_acesso({"sub": "cache@gestongo.pt"})
+    user = User(id=7, nome="Cache", email="cache@gestongo.pt", hash_senha="x", is_active=True)
+
+    utilizador = memorizar_utilizador(token, decodificar_token(token), user)
+    assert utilizador.id == 7
+    assert utilizador_em_cache(token) == utilizador
+
+    assert invalidar_utilizador("cache@gestongo.pt") == 1
+    assert utilizador_em_cache(token) is None
+    assert "hits" in cache_utilizadores.estatisticas()
@@ -0,0 +1,109 @@
+"""
+Testes para o calendário de serviços agrupado por dia.
+"""
+
+from datetime import date, timedelta
+
+from sqlalchemy import event, insert
+
+from backend.app.core import calendario
+from tests.conftest import criar_servico, engine
+
+
+def test_calendario_por_dia(authenticated_client, tabela_piscina):
+    """Testa o agrupamento por dia, os totais, os módulos e os planos."""
+    inicio = date.today() + timedelta(days=1)
+    fim = inicio + timedelta(days=6)
+    ana = authenticated_client.post("/clientes/", json={"nome": "Ana"}).json()["id"]
+    rui = authenticated_client.post("/clientes/", json={"nome": "Rui"}).json()["id"]
+    primeiro = criar_servico(authenticated_client, ana, inicio)["id"]
+    segundo = criar_servico(authenticated_client, rui, inicio, "piscina", 3)["id"]
+    cancelado = criar_servico(authenticated_client, ana, inicio + timedelta(days=2), duracao=4)["id"]
+    authenticated_client.put(f"/servicos/{cancelado}", json={"status": "cancelado"})
+    criar_servico(authenticated_client, ana, fim + timedelta(days=1))
+    authenticated_client.post("/planos/", json={
+        "cliente_id": rui, "tipo": "piscina", "frequencia": "semanal",
+        "data_inicio": (inicio + timedelta(days=3)).isoformat(), "duracao_horas": 1,
+    })
+
+    with engine.begin() as conn:
+        conn.execute(insert(tabela_piscina).values(
+            tipo="piscina", data_servico=inicio, duracao_horas=1, cliente_id=ana, descricao="Aqua"
+        ))
+
+    consultas = []
+
+    def registar(conn, cursor, sql, parametros, contexto, executemany):
+        if "UNION ALL" in sql and "sqlite_master" not in sql:
+            consultas.append(sql)
+
+    event.listen(engine, "before_cursor_execute", registar)
+    try:
+        resposta = authenticated_client.get("/servicos/calendario", params={
+            "inicio": inicio.isoformat(), "fim": fim.isoformat()
+        })
+    finally:
+        event.remove(engine, "before_cursor_execute", registar)
+
+    assert resposta.status_code == 200, resposta.text
+    assert len(consultas) == 1
+    dados = resposta.json()
+    dias = {dia["data"]: dia for dia in dados["dias"]}
+    assert len(dias) == 7 and dados["inicio"] == inicio.isoformat()
+
+    primeiro_dia = dias[inicio.isoformat()]
+    assert [(s["origem"], s["id"]) for s in primeiro_dia["servicos"]] == [
+        ("aqua", 1), ("servicos", primeiro), ("servicos", segundo)
+    ]
+    assert primeiro_dia["servicos"][1]["cliente_nome"] == "Ana"
+    assert primeiro_dia["total_horas"] == 6
+
+    # Cancelados aparecem, mas não contam para as horas
+    assert dias[(inicio + timedelta(days=2)).isoformat()]["total_horas"] == 0
+    assert len(dias[(inicio + timedelta(days=2)).isoformat()]["servicos"]) == 1
+
+    previsto = dias[(inicio + timedelta(days=3)).isoformat()]
+    assert previsto["servicos"][0]["origem"] == "plano"
+    assert previsto["servicos"][0]["id"] is None
+    assert previsto["servicos"][0]["cliente_nome"] == "Rui"
+    assert previsto["total_horas"] == 1
+    assert dias[(inicio + timedelta(days=1)).isoformat()] == {
+        "data": (inicio + timedelta(days=1)).isoformat(), "total_horas": 0, "servicos": []
+    }
+
+
+def test_calendario_etag(authenticated_client):
+    """Testa o 304 com o ETag anterior e um novo ETag após alterações."""
+    inicio = date.today() + timedelta(days=1)
+    params = {"inicio": inicio.isoformat(), "fim": (inicio + timedelta(days=6)).isoformat()}
+    cliente_id = authenticated_client.post("/clientes/", json={"nome": "Cliente ETag"}).json()["id"]
+    servico_id = criar_servico(authenticated_client, cliente_id, inicio)["id"]
+
+    resposta = authenticated_client.get("/servicos/calendario", params=params)
+    etag = resposta.headers["etag"]
+    assert etag.startswith('W/"')
+
+    resposta = authenticated_client.get("/servicos/calendario", params=params, headers={"If-None-Match": etag})
+    assert resposta.status_code == 304
+    assert resposta.content == b""
+    assert resposta.headers["etag"] == etag
+
+    authenticated_client.put(f"/servicos/{servico_id}", json={"duracao_horas": 5})
+    resposta = authenticated_client.get("/servicos/calendario", params=params, headers={"If-None-Match": etag})
+    assert resposta.status_code == 200
+    assert resposta.headers["etag"] != etag
+    assert resposta.json()["dias"][0]["total_horas"] == 5
+
+
+def test_calendario_janela_invalida(authenticated_client):
+    """Testa a rejeição de janelas invertidas ou demasiado longas."""
+    hoje = date.today()
+    resposta = authenticated_client.get("/servicos/calendario", params={
+        "inicio": hoje.isoformat(), "fim": (hoje - timedelta(days=1)).isoformat()
+    })
+    assert resposta.status_code == 400
+    resposta = authenticated_client.get("/servicos/calendario", params={
+        "inicio": hoje.isoformat(), "fim": (hoje + timedelta(days=calendario.MAX_DIAS_CALENDARIO)).isoformat()
+    })
+    assert resposta.status_code == 400
+    assert authenticated_client.get("/servicos/calendario", params={"inicio": hoje.isoformat()}).status_code == 422
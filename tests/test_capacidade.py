@@ -0,0 +1,168 @@
+"""
+Testes para a capacidade diária e a procura do próximo dia livre.
+"""
+
+import json
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from backend.app.core.capacidade import ArvoreMinimos
+from backend.app.core.contadores import reconciliar_contadores
+from backend.app.core.replit_config import config
+from backend.app.routers.servicos import agenda_capacidade
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def capacidade(monkeypatch):
+    """Capacidade de 8 horas por dia e agenda relida a partir desta base de dados."""
+    monkeypatch.setattr(config, "DAILY_CAPACITY_HOURS", 8)
+    agenda_capacidade.invalidar()
+    yield 8
+    agenda_capacidade.invalidar()
+
+
+def _clientes(client, quantidade):
+    return [client.post("/clientes/", json={"nome": f"Cliente {n}"}).json()["id"] for n in range(quantidade)]
+
+
+def _marcar(client, cliente_id, dia, horas):
+    return client.post("/servicos/", json={
+        "tipo": "jardinagem", "data_servico": dia.isoformat(), "duracao_horas": horas, "cliente_id": cliente_id,
+    })
+
+
+def test_arvore_minimos_primeiro_ate():
+    """Compara a procura na árvore com uma procura linear."""
+    gerador = random.Random(7)
+    valores = [gerador.randint(0, 10) for _ in range(100)]
+    arvore = ArvoreMinimos(valores)
+    for _ in range(300):
+        if gerador.random() < 0.3:
+            indice = gerador.randrange(len(valores))
+            valores[indice] = gerador.randint(0, 10)
+            arvore.alterar(indice, valores[indice])
+        inicio, limite = gerador.randrange(110), gerador.randint(0, 10)
+        esperado = next((i for i in range(inicio, len(valores)) if valores[i] <= limite), None)
+        assert arvore.primeiro_ate(inicio, limite) == esperado
+
+
+def test_rejeita_marcacao_acima_da_capacidade(authenticated_client, capacidade):
+    """Testa a rejeição na criação, na alteração e ao reactivar cancelados."""
+    dia = date.today() + timedelta(days=3)
+    clientes = _clientes(authenticated_client, 4)
+    assert _marcar(authenticated_client, clientes[0], dia, 5).status_code == 201
+    segundo = _marcar(authenticated_client, clientes[1], dia, 3).json()["id"]
+
+    resposta = _marcar(authenticated_client, clientes[2], dia, 1)
+    assert resposta.status_code == 400
+    assert "0 de 8 horas livres" in resposta.json()["detail"]
+    assert len(authenticated_client.get("/servicos/", params={"data_inicio": dia.isoformat()}).json()) == 2
+
+    # Aumentar a duração excede; editar sem mais horas continua possível
+    assert authenticated_client.put(f"/servicos/{segundo}", json={"duracao_horas": 4}).status_code == 400
+    assert authenticated_client.put(f"/servicos/{segundo}", json={"descricao": "Sebes"}).status_code == 200
+
+    # Cancelar liberta as horas; reactivar volta a contar
+    authenticated_client.put(f"/servicos/{segundo}", json={"status": "cancelado"})
+    terceiro = _marcar(authenticated_client, clientes[2], dia, 3).json()["id"]
+    resposta = authenticated_client.patch("/servicos/status", json={"status": "agendado", "ids": [segundo]})
+    assert resposta.status_code == 400
+    assert authenticated_client.get(f"/servicos/{segundo}").json()["status"] == "cancelado"
+
+    # Mudar de dia verifica o dia de destino
+    outro_dia = dia + timedelta(days=1)
+    assert _marcar(authenticated_client, clientes[3], outro_dia, 6).status_code == 201
+    resposta = authenticated_client.put(f"/servicos/{terceiro}", json={"data_servico": outro_dia.isoformat()})
+    assert resposta.status_code == 400
+
+    with TestingSessionLocal() as db:
+        assert reconciliar_contadores(db, corrigir=False)["deriva"] == {}
+
+
+def test_importacao_respeita_a_capacidade(authenticated_client, capacidade):
+    """Um lote que excede a capacidade é desfeito; o modo histórico não é limitado."""
+    dia = date.today() + timedelta(days=3)
+    clientes = _clientes(authenticated_client, 5)
+    linhas = [
+        {"tipo": "piscina", "data_servico": dia.isoformat(), "duracao_horas": horas, "cliente_id": cliente_id}
+        for cliente_id, horas in zip(clientes, (5, 2, 2))
+    ]
+    linhas.append({**linhas[0], "data_servico": (dia + timedelta(days=1)).isoformat(), "cliente_id": clientes[3]})
+
+    def importar(linhas, **params):
+        ficheiro = "\n".join(json.dumps(linha) for linha in linhas).encode()
+        resposta = authenticated_client.post(
+            "/servicos/importar", files={"ficheiro": ("s.ndjson", ficheiro)}, params={"lote": 2, **params}
+        )
+        assert resposta.status_code == 200, resposta.text
+        return resposta.json()
+
+    relatorio = importar(linhas)
+    assert (relatorio["importados"], relatorio["invalidos"]) == (2, 2)
+    assert relatorio["erros"] == [
+        {"linha": 3, "erros": [f"data_servico: Capacidade diária excedida em {dia}: 1 de 8 horas livres, o lote ocupa 2"]},
+        {"linha": 4, "erros": ["Lote não gravado por erros noutras linhas"]},
+    ]
+    assert _marcar(authenticated_client, clientes[4], dia, 1).status_code == 201
+
+    relatorio = importar([linhas[2]], historico=True)
+    assert relatorio["importados"] == 1
+    with TestingSessionLocal() as db:
+        assert reconciliar_contadores(db, corrigir=False)["deriva"] == {}
+
+
+def test_proximo_slot(authenticated_client, capacidade):
+    """Testa a procura do primeiro dia com horas livres."""
+    hoje = date.today()
+    clientes = _clientes(authenticated_client, 3)
+    cheios = []
+    for dias in range(3):
+        resposta = _marcar(authenticated_client, clientes[0], hoje + timedelta(days=dias), 7)
+        cheios.append(resposta.json()["id"])
+    _marcar(authenticated_client, clientes[1], hoje + timedelta(days=1), 1)
+
+    resposta = authenticated_client.get("/servicos/proximo-slot", params={"duracao": 2})
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.json() == {
+        "data": (hoje + timedelta(days=3)).isoformat(),
+        "duracao": 2,
+        "horas_marcadas": 0,
+        "capacidade": 8,
+        "horas_livres": 8,
+    }
+    resposta = authenticated_client.get("/servicos/proximo-slot", params={"duracao": 1})
+    assert resposta.json()["data"] == hoje.isoformat()
+    assert resposta.json()["horas_livres"] == 1
+
+    # Dias passados são ignorados; a agenda vê as alterações seguintes
+    ontem = (hoje - timedelta(days=1)).isoformat()
+    authenticated_client.delete(f"/servicos/{cheios[2]}")
+    resposta = authenticated_client.get("/servicos/proximo-slot", params={"duracao": 2, "a_partir_de": ontem})
+    assert resposta.json()["data"] == (hoje + timedelta(days=2)).isoformat()
+
+    _marcar(authenticated_client, clientes[2], hoje + timedelta(days=2), 8)
+    resposta = authenticated_client.get("/servicos/proximo-slot", params={"duracao": 2})
+    assert resposta.json()["data"] == (hoje + timedelta(days=3)).isoformat()
+
+    assert authenticated_client.get("/servicos/proximo-slot", params={"duracao": 9}).status_code == 400
+    resposta = authenticated_client.get("/servicos/proximo-slot", params={
+        "duracao": 2, "a_partir_de": (hoje + timedelta(days=agenda_capacidade.horizonte_dias)).isoformat()
+    })
+    assert resposta.status_code == 400
+
+
+def test_proximo_slot_confirma_nos_contadores(authenticated_client, capacidade):
+    """Um dia marcado por outro worker (agenda desactualizada) não é proposto."""
+    hoje = date.today()
+    cliente_id = _clientes(authenticated_client, 1)[0]
+    assert authenticated_client.get("/servicos/proximo-slot", params={"duracao": 4}).json()["data"] == hoje.isoformat()
+
+    _marcar(authenticated_client, cliente_id, hoje, 8)
+    # Simula a escrita noutro processo: a agenda não foi avisada
+    agenda_capacidade._pendentes.clear()
+    resposta = authenticated_client.get("/servicos/proximo-slot", params={"duracao": 4})
+    assert resposta.json()["data"] == (hoje + timedelta(days=1)).isoformat()
+    assert agenda_capacidade.estatisticas()["correccoes"] >= 1
@@ -2,7 +2,12 @@
 Testes para operações CRUD de clientes.
 """
 
+from datetime import date, timedelta
+
 import pytest
+from sqlalchemy import event
+
+from tests.conftest import engine
 
 
 def test_criar_cliente(authenticated_client, sample_cliente_data):
@@ -128,3 +133,42 @@ def test_paginacao_clientes(authenticated_client):
     response = authenticated_client.get("/clientes/?limit=3&skip=3")
     assert response.status_code == 200
     assert len(response.json()) == 2
+
+
+def test_listar_clientes_include_servicos(authenticated_client):
+    """Testa a listagem leve por defeito e a inclusão dos serviços a pedido."""
+    hoje = date.today()
+    for indice in range(3):
+        cliente_id = authenticated_client.post("/clientes/", json={"nome": f"Cliente {indice}"}).json()["id"]
+        for dias in (1, 3, 2):
+            authenticated_client.post("/servicos/", json={
+                "tipo": "jardinagem",
+                "data_servico": (hoje + timedelta(days=dias)).isoformat(),
+                "duracao_horas": 1,
+                "cliente_id": cliente_id,
+            })
+
+    clientes = authenticated_client.get("/clientes/").json()
+    assert len(clientes) == 3
+    assert all("servicos" not in cliente for cliente in clientes)
+
+    consultas = []
+
+    def contar(conn, cursor, sql, *args):
+        consultas.append(sql)
+
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        clientes = authenticated_client.get("/clientes/?include=servicos").json()
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+    datas = [s["data_servico"] for s in clientes[0]["servicos"]]
+    assert datas == sorted(datas, reverse=True) and len(datas) == 3
+    # Utilizador + clientes + serviços, independentemente do número de clientes
+    assert len([sql for sql in consultas if sql.lstrip().upper().startswith("SELECT")]) <= 3
+
+    clientes = authenticated_client.get("/clientes/?include=servicos&servicos_limite=2").json()
+    assert [len(c["servicos"]) for c in clientes] == [2, 2, 2]
+    assert clientes[0]["servicos"][0]["data_servico"] == (hoje + timedelta(days=3)).isoformat()
+
+    assert authenticated_client.get("/clientes/?include=facturas").status_code == 422
@@ -0,0 +1,53 @@
+"""
+Testes para os contadores agregados mantidos incrementalmente.
+"""
+
+from backend.app.core.contadores import ler_contadores, reconciliar_contadores
+from backend.app.models.contador import Contador
+from tests.conftest import TestingSessionLocal, criar_servico
+
+
+def test_contadores_acompanham_escritas(authenticated_client, sample_cliente_data):
+    """Testa criação, alteração e eliminação reflectidas nos contadores."""
+    cliente_id = authenticated_client.post("/clientes/", json=sample_cliente_data).json()["id"]
+    authenticated_client.post("/clientes/", json={"nome": "Sem Contactos"})
+    servico = criar_servico(authenticated_client, cliente_id, 1)
+    criar_servico(authenticated_client, cliente_id, 2, tipo="piscina")
+
+    authenticated_client.put(f"/servicos/{servico['id']}", json={"status": "concluido"})
+    authenticated_client.delete(f"/servicos/{servico['id']}")
+
+    with TestingSessionLocal() as db:
+        totais = ler_contadores(db, [
+            "clientes:total", "clientes:com_telefone",
+            "servicos:total", "servicos:tipo:jardinagem", "servicos:tipo:piscina",
+            "servicos:status:agendado", "servicos:status:concluido",
+        ])
+        assert totais == {
+            "clientes:total": 2, "clientes:com_telefone": 1,
+            "servicos:total": 1, "servicos:tipo:jardinagem": 0, "servicos:tipo:piscina": 1,
+            "servicos:status:agendado": 1, "servicos:status:concluido": 0,
+        }
+        assert reconciliar_contadores(db, corrigir=False)["deriva"] == {}
+
+    estatisticas = authenticated_client.get("/clientes/estatisticas/resumo").json()
+    assert estatisticas["total_clientes"] == 2
+    assert estatisticas["percentagem_telefone"] == 50.0
+
+
+def test_reconciliacao_reporta_e_corrige_deriva(authenticated_client, sample_cliente_data):
+    """Testa que a reconciliação detecta contadores adulterados e os corrige."""
+    authenticated_client.post("/clientes/", json=sample_cliente_data)
+
+    with TestingSessionLocal() as db:
+        db.query(Contador).filter(Contador.chave == "clientes:total").update({"valor": 7})
+        db.commit()
+
+    resposta = authenticated_client.post("/metricas/contadores/reconciliar")
+    assert resposta.status_code == 200
+    resultado = resposta.json()
+    assert resultado["deriva"] == {"clientes:total": {"guardado": 7, "real": 1}}
+    assert resultado["corrigido"] is True
+
+    with TestingSessionLocal() as db:
+        assert ler_contadores(db, ["clientes:total"]) == {"clientes:total": 1}
@@ -0,0 +1,88 @@
+"""
+Testes para o dashboard de serviços (agregação única e cache).
+"""
+
+import threading
+import time
+
+import pytest
+
+from backend.app.core.cache import CacheRevalidada
+from backend.app.models.servico import Servico
+from backend.app.routers.servicos import cache_dashboard
+from tests.conftest import TestingSessionLocal, criar_servico
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache_dashboard():
+    cache_dashboard.invalidar()
+    yield
+    cache_dashboard.invalidar()
+
+
+def test_dashboard_totais_e_invalidacao(authenticated_client, sample_cliente_data):
+    """Testa os totais e que uma escrita invalida o resultado em cache."""
+    cliente_id = authenticated_client.post("/clientes/", json=sample_cliente_data).json()["id"]
+    criar_servico(authenticated_client, cliente_id, 1)
+    criar_servico(authenticated_client, cliente_id, 30, tipo="piscina")
+
+    dados = authenticated_client.get("/servicos/estatisticas/dashboard").json()
+    assert dados["total_servicos"] == 2
+    assert dados["por_tipo"] == {"jardinagem": 1, "piscina": 1}
+    assert dados["por_status"] == {"agendados": 2, "concluidos": 0}
+    assert dados["proximos_7_dias"] == 1
+
+    hits = cache_dashboard.estatisticas()["hits"]
+    assert authenticated_client.get("/servicos/estatisticas/dashboard").json() == dados
+    assert cache_dashboard.estatisticas()["hits"] == hits + 1
+
+    criar_servico(authenticated_client, cliente_id, 2)
+    dados = authenticated_client.get("/servicos/estatisticas/dashboard").json()
+    assert dados["total_servicos"] == 3
+    assert dados["proximos_7_dias"] == 2
+
+
+def test_dashboard_invalidado_so_depois_do_commit(authenticated_client, sample_cliente_data):
+    """Testa que um cálculo entre o flush e o commit não fica em cache."""
+    cliente_id = authenticated_client.post("/clientes/", json=sample_cliente_data).json()["id"]
+    servico_id = criar_servico(authenticated_client, cliente_id, 1)["id"]
+
+    db = TestingSessionLocal()
+    try:
+        db.get(Servico, servico_id).duracao_horas = 3
+        db.flush()
+        # Pedido concorrente recalcula com os dados ainda confirmados
+        assert cache_dashboard.obter("dashboard", lambda: "antigo") == "antigo"
+        db.commit()
+        assert cache_dashboard.obter("dashboard", lambda: "novo") == "novo"
+
+        db.get(Servico, servico_id).duracao_horas = 4
+        db.flush()
+        db.rollback()
+        assert cache_dashboard.obter("dashboard", lambda: "depois do rollback") == "novo"
+    finally:
+        db.close()
+
+
+def test_cache_revalidada_serve_valor_antigo_enquanto_recalcula():
+    """Testa stale-while-revalidate e o descarte de recálculos invalidados."""
+    cache = CacheRevalidada(ttl_segundos=0.2, stale_segundos=60)
+    recalculado = threading.Event()
+
+    def calcular_fundo():
+        recalculado.set()
+        return "novo"
+
+    assert cache.obter("k", lambda: "antigo", calcular_fundo) == "antigo"
+    time.sleep(0.25)
+    assert cache.obter("k", lambda: "directo", calcular_fundo) == "antigo"
+    assert recalculado.wait(5)
+    for _ in range(100):
+        if cache.obter("k", lambda: "directo", calcular_fundo) == "novo":
+            break
+        time.sleep(0.01)
+    assert cache.obter("k", lambda: "directo", calcular_fundo) == "novo"
+    assert cache.estatisticas()["hits_antigos"] >= 1
+
+    cache.invalidar()
+    assert cache.obter("k", lambda: "directo", calcular_fundo) == "directo"
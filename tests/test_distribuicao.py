@@ -0,0 +1,124 @@
+"""
+Testes para a distribuição automática dos serviços pelos técnicos.
+"""
+
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from backend.app.core.atribuicoes import IntervalosOrdenados
+from backend.app.core.distribuicao import distribuir
+from tests.conftest import engine
+
+
+def _servico(client, dia, duracao, tipo, nome):
+    cliente_id = client.post("/clientes/", json={"nome": nome}).json()["id"]
+    resposta = client.post("/servicos/", json={
+        "tipo": tipo, "data_servico": dia.isoformat(), "duracao_horas": duracao, "cliente_id": cliente_id,
+    })
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()["id"]
+
+
+def test_distribuir_500_servicos_50_tecnicos():
+    """Sem sobreposições, com especialidades e horário, em menos de um segundo."""
+    gerador = random.Random(5)
+    tecnicos = [
+        {"id": n, "especialidade": gerador.choice([None, None, "piscina", "jardinagem"])} for n in range(1, 51)
+    ]
+    servicos = [
+        {"origem": gerador.choice(["servicos", "aqua", "verde"]), "id": n,
+         "tipo": gerador.choice(["piscina", "jardinagem"]), "duracao_horas": gerador.choice([1, 1, 2, 3])}
+        for n in range(500)
+    ]
+    ocupadas = [(gerador.randint(1, 50), 600 + 120 * n, 660 + 120 * n) for n in range(3) for _ in range(10)]
+
+    inicio = time.perf_counter()
+    resultado = distribuir(servicos, tecnicos, ocupadas, 8 * 60, 18 * 60, limite_segundos=0.5)
+    assert time.perf_counter() - inicio < 1.0
+
+    especialidades = {tecnico["id"]: tecnico["especialidade"] for tecnico in tecnicos}
+    por_chave = {(s["origem"], s["id"]): s for s in servicos}
+    agendas = {tecnico_id: IntervalosOrdenados() for tecnico_id in especialidades}
+    for tecnico_id, inicio_ocupado, fim_ocupado in ocupadas:
+        if agendas[tecnico_id].livre(inicio_ocupado, fim_ocupado):
+            agendas[tecnico_id].inserir(inicio_ocupado, fim_ocupado)
+    colocados = set()
+    for atribuicao in resultado["atribuicoes"]:
+        chave = atribuicao["origem"], atribuicao["servico_id"]
+        servico = por_chave[chave]
+        assert especialidades[atribuicao["tecnico_id"]] in (None, servico["tipo"])
+        fim = atribuicao["inicio"] + servico["duracao_horas"] * 60
+        assert 8 * 60 <= atribuicao["inicio"] and fim <= 18 * 60
+        agendas[atribuicao["tecnico_id"]].inserir(atribuicao["inicio"], fim)
+        colocados.add(chave)
+    sem_tecnico = {(s["origem"], s["id"]) for s in resultado["sem_tecnico"]}
+    assert colocados | sem_tecnico == set(por_chave) and not colocados & sem_tecnico
+
+
+def test_pesquisa_local_equilibra_com_trocas():
+    """A fase gulosa deixa 5h/2h; uma troca entre técnicos equilibra para 4h/3h."""
+    tecnicos = [{"id": 1, "especialidade": None}, {"id": 2, "especialidade": "piscina"}]
+    servicos = [
+        {"origem": "servicos", "id": 1, "tipo": "piscina", "duracao_horas": 3},
+        {"origem": "servicos", "id": 2, "tipo": "jardinagem", "duracao_horas": 2},
+        {"origem": "servicos", "id": 3, "tipo": "piscina", "duracao_horas": 2},
+    ]
+    resultado = distribuir(servicos, tecnicos, [], 8 * 60, 18 * 60)
+    assert resultado["movimentos"] == 1
+    assert resultado["minutos"] == {1: 240, 2: 180}
+    assert {a["servico_id"]: a["tecnico_id"] for a in resultado["atribuicoes"]} == {1: 2, 2: 1, 3: 1}
+
+
+def test_propor_e_confirmar_distribuicao(authenticated_client, tabela_piscina):
+    """Testa a proposta, a confirmação numa transacção e a recusa de propostas antigas."""
+    dia = date.today() + timedelta(days=5)
+    ana = authenticated_client.post("/tecnicos/", json={"nome": "Ana"}).json()["id"]
+    bruno = authenticated_client.post("/tecnicos/", json={"nome": "Bruno", "especialidade": "piscina"}).json()["id"]
+    jardins = [_servico(authenticated_client, dia, 2, "jardinagem", f"Jardim {n}") for n in range(3)]
+    piscina = _servico(authenticated_client, dia, 1, "piscina", "Piscina")
+    authenticated_client.post(f"/tecnicos/{ana}/atribuicoes", json={"servico_id": jardins[0], "hora_inicio": "08:00"})
+
+    with engine.begin() as conn:
+        conn.execute(insert(tabela_piscina).values(tipo="piscina", data_servico=dia, duracao_horas=3, cliente_id=1))
+
+    resposta = authenticated_client.get("/tecnicos/distribuicao", params={"data": dia.isoformat()})
+    assert resposta.status_code == 200, resposta.text
+    proposta = resposta.json()
+    propostas = {(a["origem"], a["servico_id"]): a for a in proposta["atribuicoes"]}
+    assert set(propostas) == {("servicos", jardins[1]), ("servicos", jardins[2]),
+                              ("servicos", piscina), ("aqua", 1)}
+    assert propostas[("servicos", jardins[1])]["tecnico_id"] == ana
+    assert proposta["sem_tecnico"] == []
+    assert {t["tecnico_id"]: t["horas"] for t in proposta["tecnicos"]} == {ana: 6, bruno: 4}
+
+    # Proposta editada com sobreposição: nada é gravado
+    editadas = [dict(a) for a in proposta["atribuicoes"]]
+    for atribuicao in editadas:
+        atribuicao["hora_inicio"] = "08:00:00"
+    resposta = authenticated_client.post("/tecnicos/distribuicao", json={
+        "data": dia.isoformat(), "versao": proposta["versao"], "atribuicoes": editadas
+    })
+    assert resposta.status_code == 400
+    agenda = authenticated_client.get(f"/tecnicos/{bruno}/agenda", params={"data": dia.isoformat()}).json()
+    assert agenda == []
+
+    resposta = authenticated_client.post("/tecnicos/distribuicao", json={
+        "data": dia.isoformat(), "versao": proposta["versao"], "atribuicoes": proposta["atribuicoes"]
+    })
+    assert resposta.status_code == 201, resposta.text
+    assert len(resposta.json()) == 4
+    agenda = authenticated_client.get(f"/tecnicos/{bruno}/agenda", params={"data": dia.isoformat()}).json()
+    assert [(a["origem"], a["hora_inicio"], a["hora_fim"]) for a in agenda] == [
+        ("aqua", "08:00:00", "11:00:00"), ("servicos", "11:00:00", "12:00:00")
+    ]
+
+    # A mesma proposta já não se aplica; o dia ficou todo atribuído
+    resposta = authenticated_client.post("/tecnicos/distribuicao", json={
+        "data": dia.isoformat(), "versao": proposta["versao"], "atribuicoes": proposta["atribuicoes"]
+    })
+    assert resposta.status_code == 409
+    proposta = authenticated_client.get("/tecnicos/distribuicao", params={"data": dia.isoformat()}).json()
+    assert proposta["atribuicoes"] == [] and proposta["sem_tecnico"] == []
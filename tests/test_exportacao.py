@@ -0,0 +1,97 @@
+"""
+Testes para a exportação em streaming de serviços.
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from backend.app.core.exportacao import resposta_exportacao
+from backend.app.models.servico import Servico
+from tests.conftest import TestingSessionLocal
+
+
+def _importar_servicos(client, quantidade):
+    """Cria `quantidade` serviços (mais do que o limite das listagens) pela importação."""
+    cliente_id = client.post("/clientes/", json={"nome": "Condomínio Sol"}).json()["id"]
+    hoje = date.today()
+    linhas = [
+        {
+            "tipo": "piscina" if dia % 2 else "jardinagem",
+            "data_servico": (hoje + timedelta(days=dia)).isoformat(),
+            "duracao_horas": 2,
+            "cliente_id": cliente_id,
+            "descricao": "Manutenção, \"mensal\"" if dia == 0 else None,
+        }
+        for dia in range(quantidade)
+    ]
+    corpo = "\n".join(json.dumps(linha) for linha in linhas).encode()
+    resposta = client.post("/servicos/importar", files={"ficheiro": ("s.ndjson", corpo, "application/x-ndjson")})
+    assert resposta.json()["importados"] == quantidade
+    return cliente_id
+
+
+def test_exportar_csv_sem_limite_e_com_filtros(authenticated_client):
+    cliente_id = _importar_servicos(authenticated_client, 150)
+
+    resposta = authenticated_client.get("/servicos/export")
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/csv")
+    assert resposta.headers["content-disposition"].endswith('.csv"')
+    linhas = list(csv.DictReader(io.StringIO(resposta.text)))
+    assert len(linhas) == 150
+    # Mesma ordem da listagem: mais recentes primeiro
+    assert linhas[0]["data_servico"] == (date.today() + timedelta(days=149)).isoformat()
+    assert linhas[-1]["descricao"] == 'Manutenção, "mensal"'
+    assert linhas[-1]["cliente_nome"] == "Condomínio Sol"
+    assert linhas[-1]["cliente_id"] == str(cliente_id)
+
+    resposta = authenticated_client.get(
+        "/servicos/export",
+        params={"tipo": "piscina", "data_fim": (date.today() + timedelta(days=9)).isoformat()},
+    )
+    assert [linha["tipo"] for linha in csv.DictReader(io.StringIO(resposta.text))] == ["piscina"] * 5
+
+    # Exportação vazia: só o cabeçalho
+    resposta = authenticated_client.get("/servicos/export", params={"cliente_id": cliente_id + 1})
+    assert resposta.text.splitlines() == [
+        "id,tipo,data_servico,duracao_horas,status,cliente_id,cliente_nome,descricao,data_criacao"
+    ]
+
+
+def test_exportar_ndjson_gzip(authenticated_client):
+    _importar_servicos(authenticated_client, 120)
+
+    resposta = authenticated_client.get("/servicos/export", params={"formato": "ndjson", "gzip": True})
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"] == "application/gzip"
+    assert resposta.headers["content-disposition"].endswith('.ndjson.gz"')
+    servicos = [json.loads(linha) for linha in gzip.decompress(resposta.content).decode().splitlines()]
+    assert len(servicos) == 120
+    assert set(servicos[0]) >= {"id", "tipo", "data_servico", "status", "cliente_nome"}
+
+    assert authenticated_client.get("/servicos/export", params={"formato": "xlsx"}).status_code == 400
+    assert authenticated_client.get("/servicos/export", headers={"Authorization": ""}).status_code == 401
+
+
+def test_exportacao_envia_um_bloco_de_cada_vez(authenticated_client):
+    """Testa que as linhas são lidas e enviadas em blocos de `tamanho_bloco`."""
+    _importar_servicos(authenticated_client, 7)
+    db = TestingSessionLocal()
+    try:
+        consulta = select(Servico.id, Servico.data_servico).order_by(Servico.id)
+        resposta = resposta_exportacao(db, consulta, "ndjson", "teste", tamanho_bloco=3)
+    finally:
+        # A sessão do pedido fecha antes do envio; o gerador usa a sua própria
+        db.close()
+
+    async def ler():
+        return [pedaco.decode() async for pedaco in resposta.body_iterator]
+
+    pedacos = asyncio.run(ler())
+    assert [pedaco.count("\n") for pedaco in pedacos] == [3, 3, 1]
@@ -0,0 +1,78 @@
+"""
+Testes para o pool de hashing de senhas.
+"""
+
+import asyncio
+import time
+
+import anyio
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from backend.app.core import security
+from backend.app.core.hashing import PoolHashing, calcular_hash, comparar_hash
+from backend.main import app
+
+
+class PoolLento(PoolHashing):
+    """Pool cuja verificação demora 0,5 s sem ocupar threads (como um bcrypt noutro processo)."""
+
+    async def executar(self, funcao, *args):
+        await asyncio.sleep(0.5)
+        return True
+
+
+def test_hash_e_verificacao_no_pool():
+    """Testa hashing e verificação através de processos trabalhadores."""
+    pool = PoolHashing(processos=1, max_pendentes=4)
+    try:
+        hash_senha = pool.executar_sync(calcular_hash, "senha123")
+        assert asyncio.run(pool.executar(comparar_hash, "senha123", hash_senha)) is True
+        assert asyncio.run(pool.executar(comparar_hash, "errada", hash_senha)) is False
+    finally:
+        pool.encerrar()
+
+    estatisticas = pool.estatisticas()
+    assert estatisticas["concluidos"] == 3
+    assert estatisticas["em_fila"] == 0
+
+
+def test_pool_recusa_quando_fila_cheia():
+    """Testa que o pool responde 503 imediatamente quando a fila está cheia."""
+    pool = PoolHashing(processos=0, max_pendentes=0)
+
+    with pytest.raises(HTTPException) as erro:
+        pool.executar_sync(calcular_hash, "senha123")
+
+    assert erro.value.status_code == 503
+    assert erro.value.headers["Retry-After"] == "1"
+    assert pool.estatisticas()["rejeitados"] == 1
+
+
+def test_logins_em_espera_nao_ocupam_o_threadpool(authenticated_client, monkeypatch):
+    """Uma vaga de logins à espera do hashing não atrasa as rotas CRUD."""
+    monkeypatch.setattr(security, "pool_hashing", PoolLento(processos=0, max_pendentes=32))
+    cabecalhos = dict(authenticated_client.headers)
+
+    async def cenario():
+        # Threadpool com 2 threads: 6 logins bloqueantes esgotavam-no
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 2
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+            logins = [
+                asyncio.create_task(cliente.post(
+                    "/utilizadores/login", data={"username": "teste@gestongo.pt", "password": "senha123"}
+                ))
+                for _ in range(6)
+            ]
+            await asyncio.sleep(0.1)
+            inicio = time.perf_counter()
+            resposta = await cliente.get("/clientes/", headers=cabecalhos)
+            duracao = time.perf_counter() - inicio
+            return resposta.status_code, duracao, [r.status_code for r in await asyncio.gather(*logins)]
+
+    estado, duracao, logins = asyncio.run(cenario())
+    assert estado == 200
+    assert duracao < 0.3
+    assert logins == [200] * 6
@@ -0,0 +1,99 @@
+"""
+Testes para a importação em massa de clientes e serviços.
+"""
+
+import json
+from datetime import date, timedelta
+
+from backend.app.core.contadores import ler_contadores
+from tests.conftest import TestingSessionLocal
+
+
+def _ndjson(linhas):
+    return "\n".join(json.dumps(linha) if isinstance(linha, dict) else linha for linha in linhas).encode()
+
+
+def test_importar_clientes_csv(authenticated_client):
+    """Testa validação, duplicados (base e ficheiro) e o relatório por linha."""
+    authenticated_client.post("/clientes/", json={"nome": "Cliente Existente"})
+    csv = (
+        "nome,telefone,endereco,observacoes\n"
+        "ana sousa,912345678,Rua A,\n"
+        "Cliente Existente,,,\n"
+        "B,,,\n"
+        "Rui Costa,123,,\n"
+        "Ana Sousa,,,repetido no ficheiro\n"
+        "Marta Pires,,Rua B,VIP\n"
+    ).encode()
+
+    resposta = authenticated_client.post(
+        "/clientes/importar", files={"ficheiro": ("clientes.csv", csv, "text/csv")}, params={"lote": 2}
+    )
+    assert resposta.status_code == 200
+    relatorio = resposta.json()
+    assert (relatorio["linhas"], relatorio["importados"], relatorio["duplicados"], relatorio["invalidos"]) == (6, 2, 2, 2)
+    assert [erro["linha"] for erro in relatorio["erros"]] == [3, 4, 5, 6]
+    assert relatorio["erros"][2]["erros"][0].startswith("telefone: Value error, Formato de telefone inválido")
+
+    nomes = [c["nome"] for c in authenticated_client.get("/clientes/").json()]
+    assert nomes == ["Cliente Existente", "Ana Sousa", "Marta Pires"]
+    assert authenticated_client.get("/clientes/autocomplete?q=mar").json()[0]["nome"] == "Marta Pires"
+    assert authenticated_client.get("/clientes/", params={"q": "vip"}).json()[0]["nome"] == "Marta Pires"
+
+    db = TestingSessionLocal()
+    try:
+        assert ler_contadores(db, ["clientes:total", "clientes:com_endereco"]) == {
+            "clientes:total": 3, "clientes:com_endereco": 2
+        }
+    finally:
+        db.close()
+
+
+def test_importar_servicos_ndjson_historico(authenticated_client):
+    """Testa o modo histórico, a resolução do cliente pelo nome e os duplicados."""
+    cliente_id = authenticated_client.post("/clientes/", json={"nome": "Quinta Do Lago"}).json()["id"]
+    passado = (date.today() - timedelta(days=400)).isoformat()
+    futuro = (date.today() + timedelta(days=3)).isoformat()
+    linhas = [
+        {"tipo": "jardinagem", "data_servico": passado, "duracao_horas": 2, "cliente_nome": "quinta do lago", "status": "concluido"},
+        {"tipo": "piscina", "data_servico": futuro, "duracao_horas": 1, "cliente_id": cliente_id},
+        {"tipo": "piscina", "data_servico": futuro, "duracao_horas": 3, "cliente_id": cliente_id},
+        {"tipo": "piscina", "data_servico": futuro, "duracao_horas": 3, "cliente_nome": "Desconhecido"},
+        {"tipo": "piscina", "data_servico": futuro, "duracao_horas": 3},
+        "{invalido",
+    ]
+
+    # Sem modo histórico a data passada é rejeitada como em criar_servico
+    resposta = authenticated_client.post(
+        "/servicos/importar", files={"ficheiro": ("s.ndjson", _ndjson(linhas[:1]), "application/x-ndjson")}
+    )
+    assert resposta.json()["invalidos"] == 1
+
+    dashboard = authenticated_client.get("/servicos/estatisticas/dashboard").json()
+    resposta = authenticated_client.post(
+        "/servicos/importar",
+        files={"ficheiro": ("s.ndjson", _ndjson(linhas), "application/x-ndjson")},
+        params={"historico": True},
+    )
+    relatorio = resposta.json()
+    assert (relatorio["importados"], relatorio["duplicados"], relatorio["invalidos"]) == (2, 1, 3)
+    assert {erro["linha"]: erro["erros"][0].split(":")[0] for erro in relatorio["erros"]} == {
+        3: "data_servico", 4: "cliente_id", 5: "cliente_id", 6: "JSON inválido"
+    }
+
+    servicos = authenticated_client.get(f"/servicos/?cliente_id={cliente_id}").json()
+    assert [(s["data_servico"], s["status"]) for s in servicos] == [(futuro, "agendado"), (passado, "concluido")]
+    # Contadores actualizados e cache do dashboard invalidada
+    novo_dashboard = authenticated_client.get("/servicos/estatisticas/dashboard").json()
+    assert novo_dashboard["total_servicos"] == dashboard["total_servicos"] + 2
+    assert novo_dashboard["por_status"]["concluidos"] == 1
+
+
+def test_importar_formato_invalido(authenticated_client):
+    resposta = authenticated_client.post("/clientes/importar", files={"ficheiro": ("c.xlsx", b"x", "application/octet-stream")})
+    assert resposta.status_code == 400
+    resposta = authenticated_client.post(
+        "/clientes/importar", files={"ficheiro": ("c.csv", b"nome\n\xff\xfe\n", "text/csv")}
+    )
+    assert resposta.status_code == 200
+    assert resposta.json()["erros"][0]["erros"][0].startswith("Ficheiro ilegível")
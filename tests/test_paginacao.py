@@ -0,0 +1,86 @@
+"""
+Testes para a paginação por cursor (keyset) das listagens.
+"""
+
+from datetime import date, timedelta
+
+
+def _criar_servicos(client, total, clientes=3):
+    """Serviços repartidos por poucos dias, para haver empates na data."""
+    ids_clientes = [
+        client.post("/clientes/", json={"nome": f"Cliente Cursor {i}"}).json()["id"]
+        for i in range(clientes)
+    ]
+    for indice in range(total):
+        resposta = client.post("/servicos/", json={
+            "tipo": "jardinagem",
+            "data_servico": (date.today() + timedelta(days=1 + indice // clientes)).isoformat(),
+            "duracao_horas": 1,
+            "cliente_id": ids_clientes[indice % clientes],
+        })
+        assert resposta.status_code == 201
+
+
+def test_cursor_percorre_servicos_sem_repetir(authenticated_client):
+    """Testa que os cursores percorrem tudo na ordem (data, id) e voltam atrás."""
+    _criar_servicos(authenticated_client, 10)
+    esperados = authenticated_client.get("/servicos/?limit=100").json()
+    assert [(s["data_servico"], s["id"]) for s in esperados] == sorted(
+        ((s["data_servico"], s["id"]) for s in esperados), reverse=True
+    )
+
+    vistos, paginas, cursor = [], [], None
+    while True:
+        parametros = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        resposta = authenticated_client.get("/servicos/", params=parametros)
+        assert resposta.status_code == 200
+        paginas.append((resposta.json(), resposta.headers.get("X-Cursor-Anterior")))
+        vistos.extend(s["id"] for s in resposta.json())
+        cursor = resposta.headers.get("X-Cursor-Seguinte")
+        if not cursor:
+            break
+        assert 'rel="next"' in resposta.headers["Link"]
+
+    assert vistos == [s["id"] for s in esperados]
+    assert [len(pagina) for pagina, _ in paginas] == [4, 4, 2]
+    assert paginas[0][1] is None
+
+    # O cursor anterior da última página devolve a página do meio
+    anterior = authenticated_client.get("/servicos/", params={"limit": 4, "cursor": paginas[2][1]})
+    assert anterior.json() == paginas[1][0]
+    assert anterior.headers["X-Cursor-Anterior"]
+
+
+def test_cursor_ignora_insercoes_em_paginas_ja_lidas(authenticated_client):
+    """Testa que inserir serviços mais recentes não desloca a página seguinte."""
+    _criar_servicos(authenticated_client, 6)
+    primeira = authenticated_client.get("/servicos/", params={"limit": 3})
+    segunda_esperada = authenticated_client.get("/servicos/", params={"skip": 3, "limit": 3}).json()
+
+    cliente_id = authenticated_client.post("/clientes/", json={"nome": "Cliente Novo"}).json()["id"]
+    authenticated_client.post("/servicos/", json={
+        "tipo": "piscina",
+        "data_servico": (date.today() + timedelta(days=60)).isoformat(),
+        "duracao_horas": 1,
+        "cliente_id": cliente_id,
+    })
+
+    cursor = primeira.headers["X-Cursor-Seguinte"]
+    assert authenticated_client.get("/servicos/", params={"limit": 3, "cursor": cursor}).json() == segunda_esperada
+    resumo = authenticated_client.get("/servicos/resumo", params={"limit": 3, "cursor": cursor}).json()
+    assert [s["id"] for s in resumo] == [s["id"] for s in segunda_esperada]
+
+
+def test_cursor_clientes_e_erros(authenticated_client):
+    """Testa o cursor nas listagens de clientes e a validação dos parâmetros."""
+    for indice in range(5):
+        authenticated_client.post("/clientes/", json={"nome": f"Cliente Pagina {indice}"})
+
+    primeira = authenticated_client.get("/clientes/", params={"limit": 2})
+    segunda = authenticated_client.get("/clientes/", params={"limit": 2, "cursor": primeira.headers["X-Cursor-Seguinte"]})
+    offset = authenticated_client.get("/clientes/", params={"limit": 2, "skip": 2})
+    assert segunda.json() == offset.json()
+
+    assert authenticated_client.get("/servicos/", params={"cursor": "invalido"}).status_code == 400
+    resposta = authenticated_client.get("/clientes/", params={"skip": 2, "cursor": primeira.headers["X-Cursor-Seguinte"]})
+    assert resposta.status_code == 400
@@ -0,0 +1,70 @@
+"""
+Testes para a pesquisa textual de clientes (FTS5 no SQLite).
+"""
+
+from sqlalchemy import inspect, select
+from sqlalchemy.dialects import postgresql
+
+from backend.app.core.pesquisa import fts5_disponivel
+from backend.app.models.cliente import Cliente, pesquisa_clientes
+from tests.conftest import engine
+
+
+def _criar(client, **dados):
+    resposta = client.post("/clientes/", json=dados)
+    assert resposta.status_code == 201
+    return resposta.json()["id"]
+
+
+def _pesquisar(client, texto, **parametros):
+    resposta = client.get("/clientes/", params={"q": texto, **parametros})
+    assert resposta.status_code == 200
+    return [c["id"] for c in resposta.json()]
+
+
+def test_pesquisa_ignora_acentos_e_ordena_por_relevancia(authenticated_client):
+    """Testa acentos, várias colunas e o peso do nome no ranking."""
+    assert fts5_disponivel()
+    assert inspect(engine).has_table(pesquisa_clientes.nome_fts)
+
+    joao = _criar(authenticated_client, nome="João Conceição", telefone="912345678")
+    maria = _criar(authenticated_client, nome="Maria Santos", endereco="Rua de São João, Porto")
+    pedro = _criar(authenticated_client, nome="Pedro Gonçalves", observacoes="Portão verde")
+
+    assert _pesquisar(authenticated_client, "joao") == [joao, maria]
+    assert _pesquisar(authenticated_client, "CONCEICAO") == [joao]
+    assert _pesquisar(authenticated_client, "9123") == [joao]
+    assert _pesquisar(authenticated_client, "lisboa") == []
+    assert _pesquisar(authenticated_client, "portao") == [pedro]
+    assert _pesquisar(authenticated_client, "sao porto") == [maria]
+    assert _pesquisar(authenticated_client, "jo", limit=1, skip=1) == [maria]
+
+    # Parâmetro antigo continua a funcionar
+    resposta = authenticated_client.get("/clientes/", params={"nome": "maria"})
+    assert [c["id"] for c in resposta.json()] == [maria]
+
+
+def test_pesquisa_acompanha_alteracoes(authenticated_client):
+    """Testa que os triggers mantêm o índice após actualizar e eliminar."""
+    cliente_id = _criar(authenticated_client, nome="Ana Ribeiro")
+    assert _pesquisar(authenticated_client, "ribeiro") == [cliente_id]
+
+    authenticated_client.put(f"/clientes/{cliente_id}", json={"nome": "Ana Lourenço"})
+    assert _pesquisar(authenticated_client, "ribeiro") == []
+    assert _pesquisar(authenticated_client, "lourenco") == [cliente_id]
+
+    authenticated_client.delete(f"/clientes/{cliente_id}")
+    assert _pesquisar(authenticated_client, "lourenco") == []
+
+    resposta = authenticated_client.get("/clientes/", params={"q": "ana", "cursor": "abc"})
+    assert resposta.status_code == 400
+
+
+def test_pesquisa_postgresql_usa_expressao_do_indice():
+    """Testa que a consulta no PostgreSQL repete a expressão do índice GIN."""
+    consulta = pesquisa_clientes.filtrar(select(Cliente), "postgresql", "João", Cliente.id)
+    sql = str(consulta.compile(dialect=postgresql.dialect()))
+    assert pesquisa_clientes._documento_sql() in sql
+    assert "LIKE '%%' ||" in sql
+    assert "word_similarity" in sql
+    assert pesquisa_clientes._documento_sql() in pesquisa_clientes._ddl_postgresql()[-1]
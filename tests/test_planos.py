@@ -0,0 +1,147 @@
+"""
+Testes para os planos recorrentes e a expansão das ocorrências.
+"""
+
+from datetime import date, timedelta
+
+from backend.app.core.contadores import reconciliar_contadores
+from backend.app.core.recorrencia import datas_ocorrencias
+from tests.conftest import TestingSessionLocal
+
+
+def _criar_plano(client, cliente_id, inicio, frequencia="semanal", **extra):
+    resposta = client.post("/planos/", json={
+        "cliente_id": cliente_id,
+        "tipo": "piscina",
+        "frequencia": frequencia,
+        "data_inicio": inicio.isoformat(),
+        "duracao_horas": 2,
+        **extra,
+    })
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()
+
+
+def _ocorrencias(client, inicio, fim, **filtros):
+    resposta = client.get("/planos/ocorrencias", params={
+        "data_inicio": inicio.isoformat(), "data_fim": fim.isoformat(), **filtros
+    })
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+def test_datas_ocorrencias_frequencias():
+    """Testa as frequências, o fim do mês e janelas muito afastadas do início."""
+    inicio = date(2024, 1, 31)
+    mensais = list(datas_ocorrencias("mensal", inicio, None, date(2024, 1, 1), date(2024, 5, 31)))
+    assert mensais == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30), date(2024, 5, 31)]
+
+    quinzenais = list(datas_ocorrencias("quinzenal", date(2024, 1, 1), None, date(2024, 1, 10), date(2024, 2, 15)))
+    assert quinzenais == [date(2024, 1, 15), date(2024, 1, 29), date(2024, 2, 12)]
+
+    # Janela a séculos do início: a primeira data é calculada directamente
+    semanais = list(datas_ocorrencias("semanal", date(2024, 1, 1), None, date(2400, 1, 1), date(2400, 1, 14)))
+    assert len(semanais) == 2 and all((d - date(2024, 1, 1)).days % 7 == 0 for d in semanais)
+
+    assert list(datas_ocorrencias("semanal", date(2024, 1, 1), date(2024, 1, 7), date(2024, 1, 2), date(2024, 3, 1))) == []
+
+
+def test_ocorrencias_previstas_e_excecoes(authenticated_client):
+    """Testa a listagem por janela, o fim do plano e as excepções."""
+    cliente_id = authenticated_client.post("/clientes/", json={"nome": "Cliente Plano"}).json()["id"]
+    inicio = date.today() + timedelta(days=1)
+    plano = _criar_plano(authenticated_client, cliente_id, inicio, data_fim=(inicio + timedelta(days=35)).isoformat())
+
+    ocorrencias = _ocorrencias(authenticated_client, inicio, inicio + timedelta(days=60))
+    assert [o["data_ocorrencia"] for o in ocorrencias] == [
+        (inicio + timedelta(days=7 * n)).isoformat() for n in range(6)
+    ]
+    assert all(o["servico_id"] is None and o["status"] == "agendado" for o in ocorrencias)
+
+    retirada = inicio + timedelta(days=14)
+    resposta = authenticated_client.post(f"/planos/{plano['id']}/excecoes", json={"data": retirada.isoformat(), "motivo": "Férias"})
+    assert resposta.status_code == 201
+    # Só datas do plano podem ser retiradas
+    resposta = authenticated_client.post(f"/planos/{plano['id']}/excecoes", json={"data": (inicio + timedelta(days=1)).isoformat()})
+    assert resposta.status_code == 400
+
+    datas = [o["data_ocorrencia"] for o in _ocorrencias(authenticated_client, inicio, inicio + timedelta(days=60))]
+    assert retirada.isoformat() not in datas and len(datas) == 5
+    assert authenticated_client.get(f"/planos/{plano['id']}").json()["excecoes"][0]["motivo"] == "Férias"
+
+    assert authenticated_client.delete(f"/planos/{plano['id']}/excecoes/{retirada.isoformat()}").status_code == 204
+    assert len(_ocorrencias(authenticated_client, inicio, inicio + timedelta(days=60))) == 6
+    assert _ocorrencias(authenticated_client, inicio, inicio + timedelta(days=60), cliente_id=cliente_id + 1) == []
+
+
+def test_materializar_ocorrencia(authenticated_client):
+    """Testa que só as ocorrências materializadas contam como serviços."""
+    cliente_id = authenticated_client.post("/clientes/", json={"nome": "Cliente Materializar"}).json()["id"]
+    inicio = date.today() + timedelta(days=1)
+    plano = _criar_plano(authenticated_client, cliente_id, inicio, frequencia="quinzenal")
+
+    # Um plano sem fim não cria serviços
+    dashboard = authenticated_client.get("/servicos/estatisticas/dashboard").json()
+    assert dashboard["total_servicos"] == 0
+
+    segunda = inicio + timedelta(days=14)
+    resposta = authenticated_client.post(
+        f"/planos/{plano['id']}/ocorrencias/{segunda.isoformat()}/materializar",
+        json={"descricao": "Trocar filtro"},
+    )
+    assert resposta.status_code == 201, resposta.text
+    servico = resposta.json()
+    assert servico["status"] == "em_progresso"
+    assert servico["plano_id"] == plano["id"]
+    assert servico["data_ocorrencia"] == segunda.isoformat()
+    assert servico["descricao"] == "Trocar filtro"
+
+    # Segunda materialização da mesma data, datas fora do plano e janelas inválidas
+    url = f"/planos/{plano['id']}/ocorrencias/{segunda.isoformat()}/materializar"
+    assert authenticated_client.post(url).status_code == 400
+    url = f"/planos/{plano['id']}/ocorrencias/{(inicio + timedelta(days=7)).isoformat()}/materializar"
+    assert authenticated_client.post(url).status_code == 400
+    resposta = authenticated_client.get("/planos/ocorrencias", params={
+        "data_inicio": inicio.isoformat(), "data_fim": (inicio + timedelta(days=400)).isoformat()
+    })
+    assert resposta.status_code == 400
+
+    ocorrencias = _ocorrencias(authenticated_client, inicio, inicio + timedelta(days=28))
+    assert [o["servico_id"] for o in ocorrencias] == [None, servico["id"], None]
+    assert ocorrencias[1]["status"] == "em_progresso"
+
+    dashboard = authenticated_client.get("/servicos/estatisticas/dashboard").json()
+    assert dashboard["total_servicos"] == 1
+    with TestingSessionLocal() as db:
+        assert reconciliar_contadores(db, corrigir=False)["deriva"] == {}
+
+    # O cliente não pode ser eliminado enquanto tiver o plano
+    authenticated_client.delete(f"/servicos/{servico['id']}")
+    assert authenticated_client.delete(f"/clientes/{cliente_id}").status_code == 400
+
+    assert authenticated_client.delete(f"/planos/{plano['id']}").status_code == 204
+    assert authenticated_client.get(f"/planos/{plano['id']}").status_code == 404
+    assert _ocorrencias(authenticated_client, inicio, inicio + timedelta(days=28)) == []
+    assert authenticated_client.delete(f"/clientes/{cliente_id}").status_code == 204
+
+
+def test_validacao_planos(authenticated_client):
+    """Testa as validações na criação e actualização de planos."""
+    cliente_id = authenticated_client.post("/clientes/", json={"nome": "Cliente Validação"}).json()["id"]
+    inicio = date.today()
+    base = {"cliente_id": cliente_id, "tipo": "jardinagem", "data_inicio": inicio.isoformat(), "duracao_horas": 2}
+
+    assert authenticated_client.post("/planos/", json={**base, "frequencia": "diaria"}).status_code == 422
+    resposta = authenticated_client.post("/planos/", json={
+        **base, "frequencia": "mensal", "data_fim": (inicio - timedelta(days=1)).isoformat()
+    })
+    assert resposta.status_code == 422
+    assert authenticated_client.post("/planos/", json={**base, "frequencia": "mensal", "cliente_id": 9999}).status_code == 404
+
+    plano = _criar_plano(authenticated_client, cliente_id, inicio, frequencia="mensal")
+    resposta = authenticated_client.put(f"/planos/{plano['id']}", json={"data_fim": (inicio - timedelta(days=1)).isoformat()})
+    assert resposta.status_code == 400
+    resposta = authenticated_client.put(f"/planos/{plano['id']}", json={"frequencia": "semanal", "duracao_horas": 3})
+    assert resposta.status_code == 200
+    assert resposta.json()["frequencia"] == "semanal"
+    assert [p["id"] for p in authenticated_client.get("/planos/", params={"tipo": "piscina"}).json()] == [plano["id"]]
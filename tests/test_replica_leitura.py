@@ -0,0 +1,66 @@
+"""
+Testes para o encaminhamento de leituras para a réplica.
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.core import database
+from backend.app.core.database import Base, EncaminhamentoLeituras
+from backend.app.models.cliente import Cliente
+
+
+def _replica(tmp_path, nome="replica.db"):
+    engine = create_engine(f"sqlite:///{tmp_path / nome}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def test_leitura_vai_a_replica_excepto_apos_escrita(tmp_path):
+    """Testa read-your-writes: quem escreveu lê da primária durante a janela."""
+    encaminhamento = EncaminhamentoLeituras(_replica(tmp_path), janela_segundos=60)
+
+    sessao = encaminhamento.abrir_sessao("cliente-a")
+    assert sessao is not None
+    sessao.close()
+
+    encaminhamento.registar_escrita("cliente-a")
+    assert encaminhamento.abrir_sessao("cliente-a") is None
+    assert encaminhamento.abrir_sessao("cliente-a", forcar_primaria=False) is None
+    outra = encaminhamento.abrir_sessao("cliente-b")
+    assert outra is not None
+    outra.close()
+    assert encaminhamento.abrir_sessao("cliente-b", forcar_primaria=True) is None
+
+    estatisticas = encaminhamento.estatisticas()
+    assert estatisticas["leituras_replica"] == 2
+    assert estatisticas["leituras_apos_escrita"] == 2
+    assert estatisticas["leituras_primaria"] == 3
+
+
+def test_replica_indisponivel_usa_primaria(tmp_path):
+    """Testa que uma réplica em baixo é posta de parte durante a pausa."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'inexistente' / 'replica.db'}")
+    encaminhamento = EncaminhamentoLeituras(engine, pausa_falha_segundos=60)
+
+    assert encaminhamento.abrir_sessao("cliente-a") is None
+    assert encaminhamento.abrir_sessao("cliente-a") is None
+
+    estatisticas = encaminhamento.estatisticas()
+    assert estatisticas["falhas_replica"] == 1
+    assert estatisticas["replica_disponivel"] is False
+
+
+def test_rotas_get_lêem_da_replica(authenticated_client, tmp_path, monkeypatch):
+    """Testa que as rotas GET usam a réplica e respeitam X-Consistencia."""
+    engine = _replica(tmp_path)
+    with sessionmaker(bind=engine)() as sessao:
+        sessao.add(Cliente(nome="Cliente Réplica"))
+        sessao.commit()
+    monkeypatch.setattr(database, "encaminhamento_leituras", EncaminhamentoLeituras(engine))
+
+    resposta = authenticated_client.get("/clientes/")
+    assert [c["nome"] for c in resposta.json()] == ["Cliente Réplica"]
+
+    resposta = authenticated_client.get("/clientes/", headers={"X-Consistencia": "primaria"})
+    assert resposta.json() == []
@@ -0,0 +1,68 @@
+"""
+Testes para as rotas CRUD assíncronas (DATABASE_ASYNC).
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.app.core.database import Base
+from backend.app.core.database_async import get_async_db, url_async
+from backend.app.core.security import UtilizadorAutenticado
+from backend.app.routers import clientes_async, servicos_async
+from backend.app.routers.users import get_current_user_async
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def client_async(tmp_path):
+    """Aplicação mínima com as rotas assíncronas sobre uma base temporária."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    sessao = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with sessao() as db:
+            yield db
+
+    async def preparar():
+        async with engine.begin() as ligacao:
+            await ligacao.run_sync(Base.metadata.create_all)
+
+    app = FastAPI()
+    app.include_router(clientes_async.router)
+    app.include_router(servicos_async.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user_async] = lambda: UtilizadorAutenticado(
+        id=1, nome="Teste", email="teste@gestongo.pt", is_active=True
+    )
+
+    with TestClient(app) as test_client:
+        test_client.portal.call(preparar)
+        yield test_client
+        test_client.portal.call(engine.dispose)
+
+
+def test_url_async_troca_driver():
+    """Testa a conversão do URL para o driver assíncrono."""
+    assert url_async("sqlite:///./gestongo.db") == "sqlite+aiosqlite:///./gestongo.db"
+    assert url_async("postgresql+psycopg2://u:s@h/db") == "postgresql+asyncpg://u:s@h/db"
+    with pytest.raises(ValueError):
+        url_async("mssql://u:s@h/db")
+
+
+def test_crud_cliente_async(client_async):
+    """Testa criar, obter, actualizar e eliminar um cliente pelas rotas assíncronas."""
+    resposta = client_async.post("/clientes/", json={"nome": "Cliente Async", "telefone": "912345678"})
+    assert resposta.status_code == 201
+    cliente = resposta.json()
+    assert cliente["servicos"] == []
+
+    resposta = client_async.put(f"/clientes/{cliente['id']}", json={"telefone": "934567890"})
+    assert resposta.status_code == 200
+    assert resposta.json()["telefone"] == "934567890"
+
+    assert client_async.get("/clientes/?nome=async").json()[0]["id"] == cliente["id"]
+    assert client_async.delete(f"/clientes/{cliente['id']}").status_code == 204
+    assert client_async.get(f"/clientes/{cliente['id']}").status_code == 404
@@ -0,0 +1,44 @@
+"""
+Testes para o perfil de desempenho SQLite.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+
+from backend.app.core.database import ManutencaoSQLite, _valor_pragma, aplicar_pragmas_sqlite
+
+
+@pytest.fixture
+def engine_wal(tmp_path):
+    """Engine SQLite em ficheiro com o perfil aplicado."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'perfil.db'}")
+    event.listen(engine, "connect", aplicar_pragmas_sqlite)
+    yield engine
+    engine.dispose()
+
+
+def test_pragmas_aplicados_em_cada_ligacao(engine_wal):
+    """Testa que WAL, synchronous e temp_store ficam configurados."""
+    with engine_wal.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+
+def test_manutencao_executa_checkpoint(engine_wal):
+    """Testa uma ronda de checkpoint e optimize."""
+    with engine_wal.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE t (x INTEGER)")
+        conn.exec_driver_sql("INSERT INTO t VALUES (1)")
+
+    manutencao = ManutencaoSQLite(engine_wal, intervalo_segundos=0)
+    manutencao.executar()
+    assert manutencao.execucoes == 1
+
+
+def test_valor_pragma_rejeita_sql():
+    """Testa que valores de configuração não podem injectar SQL."""
+    assert _valor_pragma("-65536") == "-65536"
+    with pytest.raises(ValueError):
+        _valor_pragma("WAL; DROP TABLE clientes")
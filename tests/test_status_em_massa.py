@@ -0,0 +1,88 @@
+"""
+Testes para a alteração de estado de serviços em massa.
+"""
+
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from backend.app.core.contadores import ler_contadores, reconciliar_contadores
+from backend.app.models.servico import Servico
+from tests.conftest import TestingSessionLocal, criar_servico, engine
+
+
+def test_status_em_massa_por_ids(authenticated_client):
+    """Testa o resultado por id, um único UPDATE e os contadores."""
+    clientes = [authenticated_client.post("/clientes/", json={"nome": f"Cliente {n}"}).json()["id"] for n in "ABC"]
+    ids = [criar_servico(authenticated_client, cliente_id, 1)["id"] for cliente_id in clientes]
+    authenticated_client.put(f"/servicos/{ids[2]}", json={"status": "concluido"})
+    authenticated_client.get("/servicos/estatisticas/dashboard")
+
+    actualizacoes = []
+
+    def registar(conn, cursor, sql, parametros, contexto, executemany):
+        if sql.startswith("UPDATE servicos"):
+            actualizacoes.append(sql)
+
+    event.listen(engine, "before_cursor_execute", registar)
+    try:
+        resposta = authenticated_client.patch(
+            "/servicos/status", json={"status": "concluido", "ids": [ids[0], ids[1], ids[2], 999, ids[0]]}
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", registar)
+
+    assert resposta.status_code == 200
+    corpo = resposta.json()
+    assert corpo["actualizados"] == 2
+    assert [(r["id"], r["resultado"], r["status_anterior"]) for r in corpo["resultados"]] == [
+        (ids[0], "actualizado", "agendado"),
+        (ids[1], "actualizado", "agendado"),
+        (ids[2], "inalterado", "concluido"),
+        (999, "nao_encontrado", None),
+    ]
+    assert len(actualizacoes) == 1
+
+    # Contadores coerentes e cache do dashboard invalidada
+    dashboard = authenticated_client.get("/servicos/estatisticas/dashboard").json()
+    assert dashboard["por_status"]["concluidos"] == 3
+    with TestingSessionLocal() as db:
+        dia = (date.today() + timedelta(days=1)).isoformat()
+        assert ler_contadores(db, ["servicos:status:concluido", f"servicos:agendados:dia:{dia}"]) == {
+            "servicos:status:concluido": 3, f"servicos:agendados:dia:{dia}": 0
+        }
+        assert reconciliar_contadores(db, corrigir=False)["deriva"] == {}
+        assert db.get(Servico, ids[0]).data_actualizacao is not None
+
+
+def test_status_em_massa_por_data_e_cliente(authenticated_client):
+    """Testa a selecção por data (e cliente), que deixa de fora os cancelados."""
+    primeiro = authenticated_client.post("/clientes/", json={"nome": "Primeiro"}).json()["id"]
+    segundo = authenticated_client.post("/clientes/", json={"nome": "Segundo"}).json()["id"]
+    do_dia = criar_servico(authenticated_client, primeiro, 2)["id"]
+    outro_cliente = criar_servico(authenticated_client, segundo, 2)["id"]
+    outro_dia = criar_servico(authenticated_client, primeiro, 3)["id"]
+    authenticated_client.put(f"/servicos/{outro_cliente}", json={"status": "cancelado"})
+    dia = (date.today() + timedelta(days=2)).isoformat()
+
+    resposta = authenticated_client.patch("/servicos/status", json={"status": "em_progresso", "data_servico": dia})
+    assert [(r["id"], r["resultado"]) for r in resposta.json()["resultados"]] == [(do_dia, "actualizado")]
+
+    resposta = authenticated_client.patch(
+        "/servicos/status", json={"status": "concluido", "data_servico": dia, "cliente_id": segundo}
+    )
+    assert resposta.json() == {"status": "concluido", "actualizados": 0, "resultados": []}
+    assert authenticated_client.get(f"/servicos/{outro_dia}").json()["status"] == "agendado"
+
+
+def test_status_em_massa_validacao(authenticated_client):
+    dia = date.today().isoformat()
+    invalidos = [
+        {"status": "concluido"},
+        {"status": "concluido", "ids": [1], "data_servico": dia},
+        {"status": "concluido", "ids": [1], "cliente_id": 1},
+        {"status": "concluido", "ids": []},
+        {"status": "fechado", "ids": [1]},
+    ]
+    for corpo in invalidos:
+        assert authenticated_client.patch("/servicos/status", json=corpo).status_code == 422
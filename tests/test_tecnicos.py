@@ -0,0 +1,143 @@
+"""
+Testes para os técnicos, as atribuições e a detecção de sobreposições.
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from backend.app.core.atribuicoes import IntervalosOrdenados
+
+
+def _servico(client, dia, duracao=2, tipo="jardinagem", nome="Cliente"):
+    cliente_id = client.post("/clientes/", json={"nome": nome}).json()["id"]
+    resposta = client.post("/servicos/", json={
+        "tipo": tipo, "data_servico": dia.isoformat(), "duracao_horas": duracao, "cliente_id": cliente_id,
+    })
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()["id"]
+
+
+def _tecnico(client, nome, **campos):
+    resposta = client.post("/tecnicos/", json={"nome": nome, **campos})
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()["id"]
+
+
+def _atribuir(client, tecnico_id, servico_id, hora_inicio, **campos):
+    return client.post(f"/tecnicos/{tecnico_id}/atribuicoes", json={
+        "servico_id": servico_id, "hora_inicio": hora_inicio, **campos
+    })
+
+
+def test_intervalos_ordenados_aleatorio():
+    """Compara a pesquisa binária com uma verificação linear."""
+    gerador = random.Random(11)
+    intervalos = IntervalosOrdenados()
+    aceites = []
+    for _ in range(500):
+        inicio = gerador.randrange(0, 1400)
+        fim = inicio + gerador.randint(1, 120)
+        esperado = [(i, f) for i, f in aceites if i < fim and inicio < f]
+        conflito = intervalos.sobreposto(inicio, fim)
+        assert (conflito is None) == (not esperado)
+        if conflito is None:
+            intervalos.inserir(inicio, fim, len(aceites))
+            aceites.append((inicio, fim))
+        else:
+            assert conflito[:2] in esperado
+            with pytest.raises(ValueError):
+                intervalos.inserir(inicio, fim)
+    assert [item[:2] for item in intervalos] == sorted(aceites)
+
+
+def test_atribuicao_rejeita_sobreposicao(authenticated_client):
+    """Testa a rejeição de atribuições sobrepostas do mesmo técnico."""
+    dia = date.today() + timedelta(days=2)
+    ana = _tecnico(authenticated_client, "Ana")
+    rui = _tecnico(authenticated_client, "Rui")
+    manha = _servico(authenticated_client, dia, 2, nome="Cliente A")
+    meio = _servico(authenticated_client, dia, 2, nome="Cliente B")
+    tarde = _servico(authenticated_client, dia, 1, nome="Cliente C")
+
+    resposta = _atribuir(authenticated_client, ana, manha, "09:00")
+    assert resposta.status_code == 201, resposta.text
+    assert resposta.json()["hora_fim"] == "11:00:00"
+
+    resposta = _atribuir(authenticated_client, ana, meio, "10:30")
+    assert resposta.status_code == 400
+    assert "09:00 às 11:00" in resposta.json()["detail"]
+    # Outro técnico, ou o mesmo a seguir ao fim, não colidem
+    assert _atribuir(authenticated_client, rui, meio, "10:30").status_code == 201
+    assert _atribuir(authenticated_client, ana, tarde, "11:00").status_code == 201
+    # Duração própria da atribuição
+    assert _atribuir(authenticated_client, rui, tarde, "08:00", duracao_horas=3).status_code == 400
+    assert _atribuir(authenticated_client, rui, manha, "08:00", duracao_horas=2).status_code == 201
+
+    assert _atribuir(authenticated_client, ana, manha, "15:00").status_code == 400
+    assert _atribuir(authenticated_client, ana, meio, "23:00").status_code == 400
+
+    agenda = authenticated_client.get(f"/tecnicos/{ana}/agenda", params={"data": dia.isoformat()}).json()
+    assert [(a["servico_id"], a["hora_inicio"]) for a in agenda] == [(manha, "09:00:00"), (tarde, "11:00:00")]
+
+    # Eliminar o serviço retira as atribuições; o técnico fica livre
+    authenticated_client.delete(f"/servicos/{tarde}")
+    assert _atribuir(authenticated_client, ana, meio, "11:00").status_code == 201
+    assert authenticated_client.delete(f"/tecnicos/{ana}").status_code == 400
+
+
+def test_alteracao_de_servico_verifica_tecnicos(authenticated_client):
+    """Mudar a duração, o dia ou reactivar um serviço não pode sobrepor técnicos."""
+    dia = date.today() + timedelta(days=3)
+    ana = _tecnico(authenticated_client, "Ana")
+    primeiro = _servico(authenticated_client, dia, 2, nome="Cliente A")
+    segundo = _servico(authenticated_client, dia, 2, nome="Cliente B")
+    outro_dia = _servico(authenticated_client, dia + timedelta(days=1), 2, nome="Cliente C")
+    _atribuir(authenticated_client, ana, primeiro, "09:00")
+    _atribuir(authenticated_client, ana, segundo, "11:00")
+    _atribuir(authenticated_client, ana, outro_dia, "10:00")
+
+    assert authenticated_client.put(f"/servicos/{primeiro}", json={"duracao_horas": 3}).status_code == 400
+    assert authenticated_client.get(f"/servicos/{primeiro}").json()["duracao_horas"] == 2
+    resposta = authenticated_client.put(f"/servicos/{segundo}", json={
+        "data_servico": (dia + timedelta(days=1)).isoformat()
+    })
+    assert resposta.status_code == 400
+
+    # Cancelado deixa de ocupar o técnico; reactivar volta a verificar
+    authenticated_client.put(f"/servicos/{segundo}", json={"status": "cancelado"})
+    assert authenticated_client.put(f"/servicos/{primeiro}", json={"duracao_horas": 4}).status_code == 200
+    resposta = authenticated_client.patch("/servicos/status", json={"status": "agendado", "ids": [segundo]})
+    assert resposta.status_code == 400
+    assert authenticated_client.get(f"/servicos/{segundo}").json()["status"] == "cancelado"
+
+
+def test_tecnicos_disponiveis(authenticated_client):
+    """Testa quem está livre numa janela, para a equipa toda."""
+    dia = date.today() + timedelta(days=4)
+    ana = _tecnico(authenticated_client, "Ana")
+    bruno = _tecnico(authenticated_client, "Bruno", especialidade="piscina")
+    carla = _tecnico(authenticated_client, "Carla")
+    _tecnico(authenticated_client, "Duarte", activo=False)
+    _atribuir(authenticated_client, ana, _servico(authenticated_client, dia, 2, nome="Cliente A"), "10:00")
+    _atribuir(authenticated_client, bruno, _servico(authenticated_client, dia, 1, "piscina", "Cliente B"), "12:00")
+    # Atribuição noutro dia não conta
+    _atribuir(authenticated_client, carla, _servico(authenticated_client, dia + timedelta(days=1), nome="Cliente C"), "09:00")
+
+    def livres(inicio, fim, **params):
+        resposta = authenticated_client.get("/tecnicos/disponiveis", params={
+            "data": dia.isoformat(), "inicio": inicio, "fim": fim, **params
+        })
+        assert resposta.status_code == 200, resposta.text
+        return [tecnico["nome"] for tecnico in resposta.json()]
+
+    assert livres("09:00", "12:00") == ["Bruno", "Carla"]
+    assert livres("09:00", "13:00") == ["Carla"]
+    assert livres("12:00", "13:00") == ["Ana", "Carla"]
+    assert livres("09:00", "12:00", tipo="jardinagem") == ["Carla"]
+
+    resposta = authenticated_client.get("/tecnicos/disponiveis", params={
+        "data": dia.isoformat(), "inicio": "12:00", "fim": "09:00"
+    })
+    assert resposta.status_code == 400
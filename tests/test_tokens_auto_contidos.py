@@ -0,0 +1,124 @@
+"""
+Testes para os tokens JWT auto-contidos.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.core import security
+from backend.app.core.database import Base
+from backend.app.models.user import User
+
+
+@pytest.fixture
+def db():
+    """Sessão numa base de dados SQLite em memória."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    sessao = sessionmaker(bind=engine)()
+    security.registar_invalidacao_cache(User)
+    yield sessao
+    sessao.close()
+
+
+@pytest.fixture
+def utilizador(db):
+    user = User(nome="Técnico", email="tokens@gestongo.pt", hash_senha="hash", is_active=True)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_token_auto_contido_transporta_utilizador(monkeypatch, utilizador):
+    """Testa que o token inclui id, nome, estado e versão."""
+    monkeypatch.setattr(security.config, "JWT_SELF_CONTAINED", True)
+    payload = security.decodificar_token(security.criar_token_utilizador(utilizador))
+
+    assert security.token_auto_contido(payload)
+    principal = security.principal_do_token(payload)
+    assert principal.id == utilizador.id
+    assert principal.email == "tokens@gestongo.pt"
+    assert principal.nome == "Técnico"
+
+
+def test_token_simples_por_defeito(utilizador):
+    """Testa que sem a opção activa o token só contém o email."""
+    payload = security.decodificar_token(security.criar_token_utilizador(utilizador))
+    assert not security.token_auto_contido(payload)
+    assert payload["sub"] == "tokens@gestongo.pt"
+
+
+def test_mudar_senha_revoga_token(monkeypatch, db, utilizador):
+    """Testa que mudar a senha incrementa a versão e revoga o token."""
+    monkeypatch.setattr(security.config, "JWT_SELF_CONTAINED", True)
+    payload = security.decodificar_token(security.criar_token_utilizador(utilizador))
+    assert security.versao_token_valida(payload, db, User)
+
+    utilizador.hash_senha = "novo-hash"
+    db.commit()
+
+    assert utilizador.versao_token == 1
+    assert not security.versao_token_valida(payload, db, User)
+
+
+def test_desactivar_utilizador_revoga_token(monkeypatch, db, utilizador):
+    """Testa que desactivar o utilizador revoga os tokens emitidos."""
+    monkeypatch.setattr(security.config, "JWT_SELF_CONTAINED", True)
+    payload = security.decodificar_token(security.criar_token_utilizador(utilizador))
+
+    utilizador.is_active = False
+    db.commit()
+
+    assert not security.versao_token_valida(payload, db, User)
+
+
+@pytest.fixture
+def sessoes(tmp_path):
+    """Duas sessões sobre o mesmo ficheiro SQLite, como dois pedidos concorrentes."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'tokens.db'}")
+    Base.metadata.create_all(bind=engine)
+    fabrica = sessionmaker(bind=engine)
+    security.registar_invalidacao_cache(User)
+    escrita, leitura = fabrica(), fabrica()
+    yield escrita, leitura
+    escrita.close()
+    leitura.close()
+    engine.dispose()
+
+
+def test_leitura_entre_flush_e_commit_nao_anula_revogacao(monkeypatch, sessoes):
+    """Testa que a cache só é invalidada depois do commit que revoga o token."""
+    monkeypatch.setattr(security.config, "JWT_SELF_CONTAINED", True)
+    escrita, leitura = sessoes
+    user = User(nome="Técnico", email="concorrente@gestongo.pt", hash_senha="hash", is_active=True)
+    escrita.add(user)
+    escrita.commit()
+    payload = security.decodificar_token(security.criar_token_utilizador(user))
+
+    user.is_active = False
+    escrita.flush()
+    # Pedido concorrente lê a linha ainda confirmada e volta a pô-la em cache
+    assert security.versao_token_valida(payload, leitura, User)
+    leitura.rollback()
+    escrita.commit()
+
+    assert not security.versao_token_valida(payload, leitura, User)
+
+
+def test_rollback_descarta_invalidacoes(monkeypatch, sessoes):
+    """Testa que uma escrita desfeita não invalida a cache."""
+    monkeypatch.setattr(security.config, "JWT_SELF_CONTAINED", True)
+    escrita, _ = sessoes
+    user = User(nome="Técnico", email="rollback@gestongo.pt", hash_senha="hash", is_active=True)
+    escrita.add(user)
+    escrita.commit()
+    payload = security.decodificar_token(security.criar_token_utilizador(user))
+    assert security.versao_token_valida(payload, escrita, User)
+
+    user.hash_senha = "novo-hash"
+    escrita.flush()
+    escrita.rollback()
+
+    assert security.cache_versoes_token.obter(user.id) is not None
+    assert "invalidacoes_pendentes" not in escrita.info